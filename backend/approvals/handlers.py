@@ -24,6 +24,7 @@ def broadcast_order_update(order):
     from asgiref.sync import async_to_sync
     from orders.serializers import UnifiedOrderSerializer
     from orders.consumers import convert_complex_types_to_str
+    from orders.services import OrderStateBroadcastService
 
     channel_layer = get_channel_layer()
     if not channel_layer:
@@ -35,14 +36,10 @@ def broadcast_order_update(order):
     final_payload = convert_complex_types_to_str(serialized_order)
 
     # Broadcast to order's WebSocket group
-    group_name = f"tenant_{order.tenant_id}_order_{order.id}"
+    group_name = OrderStateBroadcastService.group_name(order)
+    # No operation ID for approval-triggered updates
     async_to_sync(channel_layer.group_send)(
-        group_name,
-        {
-            "type": "cart_update",
-            "payload": final_payload,
-            "operationId": None  # No operation ID for approval-triggered updates
-        }
+        group_name, OrderStateBroadcastService.build_cart_event(group_name, final_payload)
     )
 
     logger.info(f"Broadcasted order update to WebSocket group {group_name} after approval")
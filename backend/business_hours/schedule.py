@@ -0,0 +1,261 @@
+"""
+Compiled business hours schedules.
+
+A CompiledSchedule resolves a profile's regular hours, special hours and
+holidays for every day of a horizon into one sorted array of absolute
+(UTC timestamp) open/close intervals, already adjusted for the profile's
+timezone and DST. Open checks and next-open/next-close lookups are binary
+searches over that array instead of per-date queries.
+
+Schedules are held per process in ScheduleStore, one per profile, anchored at
+the profile's current local date and rebuilt when the profile's schedule
+generation in the shared cache moves (bumped by business_hours.signals) or
+when the horizon no longer covers the lookahead.
+"""
+import threading
+import time as time_module
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pytz
+from django.conf import settings
+from django.db.models import Prefetch
+
+from core_backend.infrastructure.cache import AdvancedCacheManager
+
+# get_next_opening_time has always looked at most this far ahead
+NEXT_OPENING_SEARCH_DAYS = 30
+
+
+class CompiledSchedule:
+    """
+    A profile's open intervals over [start_date, start_date + horizon_days),
+    plus the day before start_date so its overnight slots are included.
+
+    Intervals are closed at both ends (a slot closing at 17:00 is still open
+    at 17:00:00), overlapping or touching intervals are merged, and `days`
+    keeps the resolved hours info for each local date of the horizon.
+    """
+
+    __slots__ = ("profile_id", "version", "tz", "start_date", "end_date",
+                 "start_ts", "end_ts", "opens", "closes", "days")
+
+    def __init__(self, profile_id, version, tz, start_date: date, end_date: date,
+                 intervals: List[Tuple[float, float]], days: Dict[date, Dict]):
+        self.profile_id = profile_id
+        self.version = version
+        self.tz = tz
+        self.start_date = start_date
+        self.end_date = end_date
+        self.start_ts = tz.localize(datetime.combine(start_date, time.min)).timestamp()
+        self.end_ts = tz.localize(datetime.combine(end_date, time.min)).timestamp()
+        self.opens: List[float] = [interval[0] for interval in intervals]
+        self.closes: List[float] = [interval[1] for interval in intervals]
+        self.days = days
+
+    def covers(self, ts: float) -> bool:
+        """Whether open/next-open/next-close lookups at ts are fully answered by this horizon"""
+        return self.start_ts <= ts and ts + NEXT_OPENING_SEARCH_DAYS * 86400 <= self.end_ts
+
+    def covers_date(self, target_date: date) -> bool:
+        return target_date in self.days
+
+    def is_open(self, ts: float) -> bool:
+        i = bisect_right(self.opens, ts) - 1
+        return i >= 0 and ts <= self.closes[i]
+
+    def next_opening(self, ts: float) -> Optional[float]:
+        """First opening strictly after ts within the search window"""
+        j = bisect_right(self.opens, ts)
+        if j < len(self.opens) and self.opens[j] <= ts + NEXT_OPENING_SEARCH_DAYS * 86400:
+            return self.opens[j]
+        return None
+
+    def next_closing(self, ts: float) -> Optional[float]:
+        """Closing of the interval containing ts, or None if closed at ts"""
+        i = bisect_right(self.opens, ts) - 1
+        if i >= 0 and ts <= self.closes[i]:
+            return self.closes[i]
+        return None
+
+    def to_datetime(self, ts: float) -> datetime:
+        return datetime.fromtimestamp(ts, tz=pytz.utc).astimezone(self.tz)
+
+    def hours_for_date(self, target_date: date) -> Dict:
+        """Hours info for a date in the horizon (a copy; callers may mutate it)"""
+        info = self.days[target_date]
+        return {**info, 'slots': [dict(slot) for slot in info['slots']]}
+
+    @classmethod
+    def build(cls, profile, start_date: date, horizon_days: int, version=None) -> "CompiledSchedule":
+        """
+        Compile the profile's hours for local dates [start_date, start_date + horizon_days).
+
+        Precedence per date is the one BusinessHoursService has always used:
+        special hours, then closed holidays, then regular hours (closed if
+        none are defined). An overnight slot spills into the next date unless
+        that date has special hours or is a holiday, which govern their whole
+        calendar day.
+        """
+        from .models import Holiday, RegularHours, SpecialHours, SpecialHoursTimeSlot, TimeSlot
+
+        tz = pytz.timezone(profile.timezone)
+        # Start one day early so the previous night's overnight slots are included
+        first_date = start_date - timedelta(days=1)
+        end_date = start_date + timedelta(days=horizon_days)
+
+        regular_by_day = {
+            regular.day_of_week: regular
+            for regular in RegularHours.all_objects.filter(profile_id=profile.id).prefetch_related(
+                Prefetch('time_slots', queryset=TimeSlot.all_objects.order_by('opening_time'))
+            )
+        }
+        special_by_date = {
+            special.date: special
+            for special in SpecialHours.all_objects.filter(
+                profile_id=profile.id, date__gte=first_date, date__lte=end_date
+            ).prefetch_related(
+                Prefetch('special_time_slots', queryset=SpecialHoursTimeSlot.all_objects.order_by('opening_time'))
+            )
+        }
+        holidays = set(
+            Holiday.all_objects.filter(profile_id=profile.id, is_closed=True).values_list('month', 'day')
+        )
+
+        def is_holiday(target_date):
+            return (target_date.month, target_date.day) in holidays
+
+        def resolve(target_date):
+            special = special_by_date.get(target_date)
+            if special is not None:
+                reason = special.reason or 'Special Hours'
+                if special.is_closed:
+                    return {'is_closed': True, 'slots': [], 'reason': reason}
+                slots = [
+                    {'opening_time': slot.opening_time, 'closing_time': slot.closing_time, 'type': 'special'}
+                    for slot in special.special_time_slots.all()
+                ]
+                return {'is_closed': False, 'slots': slots, 'reason': reason}
+
+            if is_holiday(target_date):
+                return {'is_closed': True, 'slots': [], 'reason': 'Holiday'}
+
+            regular = regular_by_day.get(target_date.weekday())
+            if regular is None or regular.is_closed:
+                # Default to closed if no hours defined
+                return {'is_closed': True, 'slots': []}
+            slots = [
+                {'opening_time': slot.opening_time, 'closing_time': slot.closing_time, 'type': slot.slot_type}
+                for slot in regular.time_slots.all()
+            ]
+            return {'is_closed': False, 'slots': slots}
+
+        days = {}
+        intervals = []
+        day = first_date
+        while day < end_date:
+            info = days[day] = resolve(day)
+            for slot in info['slots']:
+                opening = datetime.combine(day, slot['opening_time'])
+                closing = datetime.combine(day, slot['closing_time'])
+                if slot['closing_time'] <= slot['opening_time']:
+                    # Overnight slot (e.g. 10 PM - 6 AM)
+                    closing += timedelta(days=1)
+                    next_day = day + timedelta(days=1)
+                    if next_day in special_by_date or is_holiday(next_day):
+                        closing = datetime.combine(next_day, time.min)
+                # Localize the naive wall-clock times so DST is applied per date
+                intervals.append((tz.localize(opening).timestamp(), tz.localize(closing).timestamp()))
+            day += timedelta(days=1)
+
+        merged: List[Tuple[float, float]] = []
+        for opening, closing in sorted(intervals):
+            if merged and opening <= merged[-1][1]:
+                if closing > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], closing)
+            else:
+                merged.append((opening, closing))
+
+        return cls(profile.id, version, tz, start_date, end_date, merged, days)
+
+
+class ScheduleStore:
+    """
+    Per-process LRU of CompiledSchedules, one per profile.
+
+    Each profile's schedule version is its "business_hours_schedule" cache
+    generation (AdvancedCacheManager), bumped whenever its profile, slots,
+    special hours or holidays change. A held schedule is served until its
+    version no longer matches - checked at most every
+    BUSINESS_HOURS_SCHEDULE['VERSION_CHECK_SECONDS'] - or until its horizon
+    stops covering the lookup. While the cache is unavailable held schedules
+    keep being served.
+    """
+
+    GENERATION_FAMILY = "business_hours_schedule"
+
+    def __init__(self):
+        self._entries: "OrderedDict[int, List]" = OrderedDict()  # profile_id -> [schedule, checked_at]
+        self._lock = threading.Lock()
+
+    def current_version(self, profile_id) -> Optional[int]:
+        """Profile's schedule generation, or None when the cache is unavailable"""
+        return AdvancedCacheManager.get_generation(self.GENERATION_FAMILY, profile_id)
+
+    def get(self, profile, ts: Optional[float] = None) -> CompiledSchedule:
+        """
+        Schedule for the profile covering ts (default: now).
+
+        Lookups far from today (e.g. a historical date) get a schedule
+        anchored at that date, which is built but not stored.
+        """
+        config = settings.BUSINESS_HOURS_SCHEDULE
+        if ts is None:
+            ts = time_module.time()
+        now = time_module.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(profile.id)
+            if entry is not None:
+                self._entries.move_to_end(profile.id)
+
+        if entry is not None and entry[0].covers(ts):
+            if now - entry[1] < config["VERSION_CHECK_SECONDS"]:
+                return entry[0]
+            version = self.current_version(profile.id)
+            if version is None or entry[0].version == version:
+                entry[1] = now
+                return entry[0]
+        else:
+            version = self.current_version(profile.id)
+
+        tz = pytz.timezone(profile.timezone)
+        today = datetime.now(tz).date()
+        anchor = datetime.fromtimestamp(ts, tz=pytz.utc).astimezone(tz).date()
+        if 0 <= (anchor - today).days <= 1:
+            anchor = today
+
+        schedule = CompiledSchedule.build(profile, anchor, config["HORIZON_DAYS"], version)
+        if anchor == today:
+            with self._lock:
+                self._entries[profile.id] = [schedule, now]
+                self._entries.move_to_end(profile.id)
+                while len(self._entries) > config["CACHE_SIZE"]:
+                    self._entries.popitem(last=False)
+        return schedule
+
+    def invalidate(self, profile_id) -> None:
+        """Bump the profile's schedule version so every worker rebuilds it"""
+        AdvancedCacheManager.bump_generation(self.GENERATION_FAMILY, profile_id)
+        with self._lock:
+            self._entries.pop(profile_id, None)
+
+    def clear(self) -> None:
+        """Drop this process's schedules (versions in the shared cache are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+
+compiled_schedules = ScheduleStore()
@@ -1,16 +1,13 @@
 from datetime import datetime, date, time, timedelta
-from typing import List, Dict, Optional, Tuple, Union
+from typing import Dict, Optional, Union
+import logging
 import pytz
 from django.utils import timezone
 from django.core.cache import cache
-from .models import (
-    BusinessHoursProfile,
-    RegularHours,
-    TimeSlot,
-    SpecialHours,
-    SpecialHoursTimeSlot,
-    Holiday
-)
+from .models import BusinessHoursProfile
+from .schedule import CompiledSchedule, compiled_schedules
+
+logger = logging.getLogger(__name__)
 
 
 class BusinessHoursService:
@@ -18,15 +15,20 @@ class BusinessHoursService:
     
     CACHE_TIMEOUT = 300  # 5 minutes
     
-    def __init__(self, profile_id: Optional[int] = None):
+    def __init__(self, profile_id: Optional[Union[int, BusinessHoursProfile]] = None):
         """
         Initialize service with a specific profile or default profile
         
         Args:
-            profile_id: ID of the business hours profile to use. If None, uses default.
+            profile_id: ID of the business hours profile to use (or the profile
+                itself). If None, uses default.
         """
-        self.profile_id = profile_id
         self._profile = None
+        self._schedule = None
+        if isinstance(profile_id, BusinessHoursProfile):
+            self._profile = profile_id
+            profile_id = profile_id.id
+        self.profile_id = profile_id
     
     @property
     def profile(self) -> BusinessHoursProfile:
@@ -54,6 +56,21 @@ class BusinessHoursService:
 
         return self._profile
     
+    def _to_business_time(self, dt: Optional[datetime]) -> datetime:
+        """Convert dt (default: now) to the profile's timezone; naive datetimes are business-local"""
+        if dt is None:
+            dt = timezone.now()
+        business_tz = pytz.timezone(self.profile.timezone)
+        if dt.tzinfo is None:
+            return business_tz.localize(dt)
+        return dt.astimezone(business_tz)
+
+    def _schedule_for(self, ts: float) -> CompiledSchedule:
+        """Compiled schedule covering ts, reused across calls on this service"""
+        if self._schedule is None or not self._schedule.covers(ts):
+            self._schedule = compiled_schedules.get(self.profile, ts)
+        return self._schedule
+
     def is_open(self, dt: Optional[datetime] = None) -> bool:
         """
         Check if the business is open at a specific datetime
@@ -64,48 +81,8 @@ class BusinessHoursService:
         Returns:
             True if open, False if closed
         """
-        if dt is None:
-            dt = timezone.now()
-        
-        # Convert to business timezone
-        business_tz = pytz.timezone(self.profile.timezone)
-        if dt.tzinfo is None:
-            dt = timezone.make_aware(dt, business_tz)
-        else:
-            dt = dt.astimezone(business_tz)
-        
-        check_date = dt.date()
-        check_time = dt.time()
-        
-        # First check for special hours on this date
-        special_hours = self._get_special_hours_for_date(check_date)
-        if special_hours:
-            return self._is_time_in_slots(check_time, special_hours['slots'])
-        
-        # Check for holidays
-        if self._is_holiday(check_date):
-            return False  # Assuming holidays are closed by default
-        
-        # Check regular hours for current day
-        regular_hours = self._get_regular_hours_for_date(check_date)
-        if regular_hours and not regular_hours['is_closed']:
-            if self._is_time_in_slots(check_time, regular_hours['slots']):
-                return True
-        
-        # Check if previous day's overnight hours extend into this day
-        previous_date = check_date - timedelta(days=1)
-        prev_special_hours = self._get_special_hours_for_date(previous_date)
-        
-        if prev_special_hours and not prev_special_hours['is_closed']:
-            if self._is_time_in_overnight_slots(check_time, prev_special_hours['slots']):
-                return True
-        
-        prev_regular_hours = self._get_regular_hours_for_date(previous_date)
-        if prev_regular_hours and not prev_regular_hours['is_closed']:
-            if self._is_time_in_overnight_slots(check_time, prev_regular_hours['slots']):
-                return True
-        
-        return False
+        ts = self._to_business_time(dt).timestamp()
+        return self._schedule_for(ts).is_open(ts)
     
     def get_next_opening_time(self, from_dt: Optional[datetime] = None) -> Optional[datetime]:
         """
@@ -117,36 +94,10 @@ class BusinessHoursService:
         Returns:
             Next opening datetime or None if no opening found in next 30 days
         """
-        if from_dt is None:
-            from_dt = timezone.now()
-        
-        business_tz = pytz.timezone(self.profile.timezone)
-        if from_dt.tzinfo is None:
-            from_dt = timezone.make_aware(from_dt, business_tz)
-        else:
-            from_dt = from_dt.astimezone(business_tz)
-        
-        # Search for next 30 days
-        for i in range(30):
-            check_date = (from_dt + timedelta(days=i)).date()
-            
-            # Get hours for this date
-            hours_info = self._get_hours_for_date(check_date)
-            if not hours_info or hours_info['is_closed']:
-                continue
-            
-            # Find next opening time on this date
-            for slot in hours_info['slots']:
-                opening_dt = datetime.combine(check_date, slot['opening_time'])
-                opening_dt = business_tz.localize(opening_dt)
-                
-                # If this is today, make sure opening time is in the future
-                if i == 0 and opening_dt <= from_dt:
-                    continue
-                
-                return opening_dt
-        
-        return None
+        ts = self._to_business_time(from_dt).timestamp()
+        schedule = self._schedule_for(ts)
+        opening = schedule.next_opening(ts)
+        return schedule.to_datetime(opening) if opening is not None else None
     
     def get_next_closing_time(self, from_dt: Optional[datetime] = None) -> Optional[datetime]:
         """
@@ -158,38 +109,10 @@ class BusinessHoursService:
         Returns:
             Next closing datetime or None if currently closed or no closing found
         """
-        if from_dt is None:
-            from_dt = timezone.now()
-        
-        if not self.is_open(from_dt):
-            return None
-        
-        business_tz = pytz.timezone(self.profile.timezone)
-        if from_dt.tzinfo is None:
-            from_dt = timezone.make_aware(from_dt, business_tz)
-        else:
-            from_dt = from_dt.astimezone(business_tz)
-        
-        check_date = from_dt.date()
-        check_time = from_dt.time()
-        
-        # Get hours for today
-        hours_info = self._get_hours_for_date(check_date)
-        if not hours_info or hours_info['is_closed']:
-            return None
-        
-        # Find the current slot and return its closing time
-        for slot in hours_info['slots']:
-            if self._is_time_in_slot(check_time, slot):
-                closing_dt = datetime.combine(check_date, slot['closing_time'])
-                
-                # Handle overnight slots
-                if slot['closing_time'] <= slot['opening_time']:
-                    closing_dt += timedelta(days=1)
-                
-                return business_tz.localize(closing_dt)
-        
-        return None
+        ts = self._to_business_time(from_dt).timestamp()
+        schedule = self._schedule_for(ts)
+        closing = schedule.next_closing(ts)
+        return schedule.to_datetime(closing) if closing is not None else None
     
     def get_hours_for_date(self, target_date: date) -> Dict:
         """
@@ -263,153 +186,35 @@ class BusinessHoursService:
         return summary
     
     def _get_hours_for_date(self, target_date: date) -> Dict:
-        """Internal method to get hours for a specific date with caching"""
-        from tenant.managers import get_current_tenant
-        tenant = get_current_tenant()
-
-        # Include tenant in cache key to prevent cross-tenant cache pollution
-        cache_key = f"business_hours_{tenant.id if tenant else 'none'}_{self.profile.id}_{target_date}"
-        hours_info = cache.get(cache_key)
-        
-        if hours_info is None:
-            # Check for special hours first
-            special_hours = self._get_special_hours_for_date(target_date)
-            if special_hours:
-                hours_info = special_hours
-            else:
-                # Check for holiday
-                if self._is_holiday(target_date):
-                    hours_info = {
-                        'is_closed': True,
-                        'slots': [],
-                        'reason': 'Holiday'
-                    }
-                else:
-                    # Get regular hours
-                    hours_info = self._get_regular_hours_for_date(target_date)
-            
-            cache.set(cache_key, hours_info, self.CACHE_TIMEOUT)
-        
-        return hours_info
-    
-    def _get_special_hours_for_date(self, target_date: date) -> Optional[Dict]:
-        """Get special hours for a specific date"""
-        try:
-            special_hours = SpecialHours.objects.get(
-                profile=self.profile,
-                date=target_date
-            )
-            
-            if special_hours.is_closed:
-                return {
-                    'is_closed': True,
-                    'slots': [],
-                    'reason': special_hours.reason or 'Special Hours'
-                }
-            
-            slots = []
-            for slot in special_hours.special_time_slots.all():
-                slots.append({
-                    'opening_time': slot.opening_time,
-                    'closing_time': slot.closing_time,
-                    'type': 'special'
-                })
-            
-            return {
-                'is_closed': False,
-                'slots': slots,
-                'reason': special_hours.reason or 'Special Hours'
-            }
-            
-        except SpecialHours.DoesNotExist:
-            return None
-    
-    def _get_regular_hours_for_date(self, target_date: date) -> Dict:
-        """Get regular hours for a specific date"""
-        day_of_week = target_date.weekday()  # Monday = 0, Sunday = 6
-        
-        try:
-            regular_hours = RegularHours.objects.get(
-                profile=self.profile,
-                day_of_week=day_of_week
-            )
-            
-            if regular_hours.is_closed:
-                return {
-                    'is_closed': True,
-                    'slots': []
-                }
-            
-            slots = []
-            for slot in regular_hours.time_slots.all():
-                slots.append({
-                    'opening_time': slot.opening_time,
-                    'closing_time': slot.closing_time,
-                    'type': slot.slot_type
-                })
-            
-            return {
-                'is_closed': False,
-                'slots': slots
-            }
-            
-        except RegularHours.DoesNotExist:
-            # Default to closed if no hours defined
-            return {
-                'is_closed': True,
-                'slots': []
-            }
-    
-    def _is_holiday(self, target_date: date) -> bool:
-        """Check if a date is a holiday"""
-        return Holiday.objects.filter(
-            profile=self.profile,
-            month=target_date.month,
-            day=target_date.day,
-            is_closed=True
-        ).exists()
-    
-    def _is_time_in_slots(self, check_time: time, slots: List[Dict]) -> bool:
-        """Check if a time falls within any of the provided time slots"""
-        for slot in slots:
-            if self._is_time_in_slot(check_time, slot):
-                return True
-        return False
-    
-    def _is_time_in_slot(self, check_time: time, slot: Dict) -> bool:
-        """Check if a time falls within a specific time slot"""
-        opening = slot['opening_time']
-        closing = slot['closing_time']
-        
-        # Handle overnight hours (e.g., 10 PM to 6 AM)
-        if opening > closing:
-            return check_time >= opening or check_time <= closing
-        else:
-            return opening <= check_time <= closing
-    
-    def _is_time_in_overnight_slots(self, check_time: time, slots: List[Dict]) -> bool:
-        """Check if a time falls within any overnight slots from the previous day"""
-        for slot in slots:
-            opening = slot['opening_time']
-            closing = slot['closing_time']
-            
-            # Only check slots that span overnight (opening > closing)
-            if opening > closing:
-                # Check if current time is in the "next day" portion (before closing)
-                if check_time <= closing:
-                    return True
-        return False
+        """Internal method to get hours for a specific date from the compiled schedule"""
+        if self._schedule is None or not self._schedule.covers_date(target_date):
+            business_tz = pytz.timezone(self.profile.timezone)
+            ts = business_tz.localize(datetime.combine(target_date, time(12, 0))).timestamp()
+            self._schedule = compiled_schedules.get(self.profile, ts)
+        return self._schedule.hours_for_date(target_date)
     
     @classmethod
-    def clear_cache(cls, profile_id: Optional[int] = None):
-        """Clear cached business hours data"""
+    def clear_cache(cls, profile_id: Optional[int] = None, tenant_id=None):
+        """
+        Clear cached business hours data
+
+        Args:
+            profile_id: Profile whose compiled schedule and cached profile to drop
+            tenant_id: Tenant owning the profile. If None, uses the current tenant.
+        """
+        if tenant_id is None:
+            from tenant.managers import get_current_tenant
+            tenant = get_current_tenant()
+            tenant_id = tenant.id if tenant else 'none'
+
+        keys = [f"business_hours_profile_{tenant_id}_default"]  # the default may be the one that changed
         if profile_id:
-            # Clear specific profile cache
-            cache.delete(f"business_hours_profile_{profile_id}")
-            # Clear date-specific caches (would need pattern deletion in production)
-        else:
-            # Clear all business hours caches (simplified approach)
-            cache.delete("business_hours_profile_default")
+            compiled_schedules.invalidate(profile_id)
+            keys.append(f"business_hours_profile_{tenant_id}_{profile_id}")
+        try:
+            cache.delete_many(keys)
+        except Exception as e:
+            logger.warning(f"Failed to clear cached business hours profiles: {e}")
     
     @classmethod
     def get_default_service(cls) -> 'BusinessHoursService':
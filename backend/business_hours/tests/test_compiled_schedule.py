@@ -0,0 +1,188 @@
+"""
+Compiled Schedule Tests
+
+Tests that business hours are answered from a compiled per-profile schedule:
+lookups are query-free once compiled, overnight and DST boundaries resolve to
+the right absolute times, and changes to hours rebuild the schedule.
+
+Test Categories:
+1. Compiled Lookups (4 tests)
+2. Invalidation (3 tests)
+3. Cache Clearing (1 test)
+"""
+
+import pytest
+from datetime import datetime, date, time, timedelta
+import pytz
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tenant.managers import set_current_tenant
+from business_hours.models import (
+    BusinessHoursProfile, RegularHours, TimeSlot, SpecialHours, Holiday
+)
+from business_hours.schedule import compiled_schedules
+from business_hours.services import BusinessHoursService
+
+NEW_YORK = pytz.timezone('America/New_York')
+
+
+@pytest.fixture
+def schedule_settings(settings):
+    settings.BUSINESS_HOURS_SCHEDULE = {'HORIZON_DAYS': 60, 'CACHE_SIZE': 8, 'VERSION_CHECK_SECONDS': 60}
+    compiled_schedules.clear()
+    yield settings.BUSINESS_HOURS_SCHEDULE
+    compiled_schedules.clear()
+
+
+@pytest.fixture
+def daily_profile(tenant_a, schedule_settings):
+    """Open every day 9 AM - 5 PM, plus Friday night 10 PM - 2 AM"""
+    set_current_tenant(tenant_a)
+    profile = BusinessHoursProfile.objects.create(
+        tenant=tenant_a, name='Daily Store', timezone='America/New_York', is_active=True
+    )
+    for day in range(7):
+        regular_hours = RegularHours.objects.create(
+            tenant=tenant_a, profile=profile, day_of_week=day, is_closed=False
+        )
+        TimeSlot.objects.create(
+            tenant=tenant_a, regular_hours=regular_hours,
+            opening_time=time(9, 0), closing_time=time(17, 0), slot_type='regular'
+        )
+        if day == 4:
+            TimeSlot.objects.create(
+                tenant=tenant_a, regular_hours=regular_hours,
+                opening_time=time(22, 0), closing_time=time(2, 0), slot_type='regular'
+            )
+    return profile
+
+
+# ============================================================================
+# COMPILED LOOKUPS TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestCompiledLookups:
+    """Test open/next-open/next-close lookups against the compiled schedule."""
+
+    def test_lookups_after_compile_are_query_free(self, tenant_a, daily_profile):
+        service = BusinessHoursService(daily_profile)
+        service.is_open()
+
+        now = timezone.now()
+        with CaptureQueriesContext(connection) as ctx:
+            for hours in range(0, 24 * 7, 5):
+                dt = now + timedelta(hours=hours)
+                BusinessHoursService(daily_profile).is_open(dt)
+                service.get_next_opening_time(dt)
+
+        assert len(ctx.captured_queries) == 0
+
+    def test_overnight_slot_and_next_closing(self, tenant_a, daily_profile):
+        service = BusinessHoursService(daily_profile.id)
+
+        friday_late = NEW_YORK.localize(datetime(2024, 1, 19, 23, 30))
+        saturday_early = NEW_YORK.localize(datetime(2024, 1, 20, 1, 30))
+
+        assert service.is_open(friday_late) is True
+        assert service.is_open(saturday_early) is True
+        assert service.is_open(NEW_YORK.localize(datetime(2024, 1, 20, 3, 0))) is False
+        assert service.get_next_closing_time(friday_late) == NEW_YORK.localize(datetime(2024, 1, 20, 2, 0))
+        assert service.get_next_opening_time(saturday_early) == NEW_YORK.localize(datetime(2024, 1, 20, 9, 0))
+
+    def test_dst_transition_uses_local_wall_clock(self, tenant_a, daily_profile):
+        # US DST starts Sunday 2024-03-10: 9 AM is 14:00 UTC before the switch, 13:00 UTC after it
+        service = BusinessHoursService(daily_profile.id)
+        saturday_evening = NEW_YORK.localize(datetime(2024, 3, 9, 18, 0))
+
+        next_opening = service.get_next_opening_time(saturday_evening)
+
+        assert next_opening == NEW_YORK.localize(datetime(2024, 3, 10, 9, 0))
+        assert next_opening.astimezone(pytz.utc).hour == 13
+
+    def test_special_hours_and_holidays_override_regular_hours(self, tenant_a, daily_profile):
+        SpecialHours.objects.create(
+            tenant=tenant_a, profile=daily_profile, date=date(2024, 1, 16), is_closed=True, reason='Inventory'
+        )
+        Holiday.objects.create(tenant=tenant_a, profile=daily_profile, name='Closed Day', month=1, day=17)
+        service = BusinessHoursService(daily_profile.id)
+
+        monday_noon = NEW_YORK.localize(datetime(2024, 1, 15, 12, 0))
+        assert service.is_open(NEW_YORK.localize(datetime(2024, 1, 16, 12, 0))) is False
+        assert service.is_open(NEW_YORK.localize(datetime(2024, 1, 17, 12, 0))) is False
+        assert service.get_next_opening_time(monday_noon) == NEW_YORK.localize(datetime(2024, 1, 18, 9, 0))
+        assert service.get_hours_for_date(date(2024, 1, 17))['reason'] == 'Holiday'
+
+
+# ============================================================================
+# INVALIDATION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestScheduleInvalidation:
+    """Test that changes to hours rebuild the compiled schedule."""
+
+    def test_slot_change_rebuilds_schedule(self, tenant_a, daily_profile):
+        service_time = timezone.now().astimezone(NEW_YORK).replace(hour=19, minute=0, second=0, microsecond=0)
+        assert BusinessHoursService(daily_profile.id).is_open(service_time) is False
+
+        TimeSlot.objects.filter(regular_hours__profile=daily_profile).update(closing_time=time(20, 0))
+        # .update() bypasses signals - the stored schedule is still served
+        assert BusinessHoursService(daily_profile.id).is_open(service_time) is False
+
+        slot = TimeSlot.objects.filter(
+            regular_hours__profile=daily_profile, regular_hours__day_of_week=service_time.weekday(),
+            opening_time=time(9, 0)
+        ).get()
+        slot.save()
+
+        assert BusinessHoursService(daily_profile.id).is_open(service_time) is True
+
+    def test_other_worker_rebuilds_when_version_moves(self, tenant_a, daily_profile, schedule_settings):
+        schedule_settings['VERSION_CHECK_SECONDS'] = 0
+        before = compiled_schedules.get(daily_profile)
+
+        compiled_schedules.invalidate(daily_profile.id)
+        compiled_schedules._entries[daily_profile.id] = [before, 0]
+
+        assert compiled_schedules.get(daily_profile) is not before
+
+    def test_schedule_served_and_rebuilt_while_cache_is_down(self, tenant_a, daily_profile, cache_unavailable):
+        service_time = timezone.now().astimezone(NEW_YORK).replace(hour=19, minute=0, second=0, microsecond=0)
+        assert BusinessHoursService(daily_profile.id).is_open(service_time) is False
+
+        slot = TimeSlot.objects.get(
+            regular_hours__profile=daily_profile, regular_hours__day_of_week=service_time.weekday(),
+            opening_time=time(9, 0)
+        )
+        slot.closing_time = time(20, 0)
+        slot.save()
+
+        assert compiled_schedules.current_version(daily_profile.id) is None
+        assert BusinessHoursService(daily_profile.id).is_open(service_time) is True
+
+
+# ============================================================================
+# CACHE CLEARING TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestClearCache:
+    """Test that clear_cache deletes the keys the service actually sets."""
+
+    def test_clear_cache_deletes_tenant_scoped_profile_keys(self, tenant_a, daily_profile):
+        daily_profile.is_default = True
+        daily_profile.save()
+        BusinessHoursService(daily_profile.id).profile
+        BusinessHoursService().profile
+        assert cache.get(f"business_hours_profile_{tenant_a.id}_{daily_profile.id}") is not None
+        assert cache.get(f"business_hours_profile_{tenant_a.id}_default") is not None
+
+        BusinessHoursService.clear_cache(daily_profile.id, tenant_a.id)
+
+        assert cache.get(f"business_hours_profile_{tenant_a.id}_{daily_profile.id}") is None
+        assert cache.get(f"business_hours_profile_{tenant_a.id}_default") is None
@@ -20,6 +20,9 @@ if 'debug_toolbar.middleware.DebugToolbarMiddleware' in settings.MIDDLEWARE:
 settings.ENABLE_CSRF_HEADER_CHECK = False
 settings.ENABLE_DOUBLE_SUBMIT_CSRF = False
 
+# Query budget runner and report (see core_backend/tests/query_budgets.py)
+pytest_plugins = ['core_backend.tests.query_budget_plugin']
+
 
 # ============================================================================
 # AUTO-USE FIXTURES (Run automatically for every test)
@@ -79,6 +82,15 @@ def clear_cache_after_test():
     yield  # Run the test
     cache.clear()  # Clear all cache keys
 
+    from core_backend.infrastructure.cache import LocalCacheTier
+    LocalCacheTier.clear()  # Per-worker L1 entries outlive cache.clear()
+
+    from tenant.registry import tenant_registry
+    tenant_registry.clear()  # Rolled-back tenants never fire the invalidation signals
+
+    from business_hours.schedule import compiled_schedules
+    compiled_schedules.clear()
+
 
 # ============================================================================
 # API CLIENT FIXTURES
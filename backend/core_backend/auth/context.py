@@ -0,0 +1,225 @@
+"""
+Request-scoped authentication context.
+
+TenantMiddleware needs the access token's tenant claims before DRF runs, and
+CookieJWTAuthentication then needs the verified token and its user. The
+WebSocket middlewares need the same per connection. AuthContext verifies a
+raw token once and keeps the result - claims, validated token or error, user
+and tenant - on the HttpRequest or ASGI scope, so every consumer reuses it.
+
+Users can optionally be served from a short-TTL cache keyed by
+(user_id, token_version), where token_version is a per-user cache generation
+bumped whenever the user is saved or deleted (see users.signals). When the
+cache is unavailable users are loaded from the database.
+"""
+import logging
+from typing import Optional
+
+import jwt
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from core_backend.infrastructure.cache import AdvancedCacheManager
+
+logger = logging.getLogger(__name__)
+
+_UNSET = object()
+
+
+def get_access_token(cookies) -> Optional[str]:
+    """Staff access token from cookies - admin cookie first, then the POS/base cookie"""
+    admin_cookie_name = getattr(settings, 'SIMPLE_JWT_ADMIN', {}).get('AUTH_COOKIE')
+    access_token = None
+    if admin_cookie_name:
+        access_token = cookies.get(admin_cookie_name)
+    if not access_token:
+        access_token = cookies.get(settings.SIMPLE_JWT.get("AUTH_COOKIE"))
+    return access_token or None
+
+
+def get_scope_cookies(scope) -> dict:
+    """Parse (once) the cookies of a WebSocket connection from its scope headers"""
+    cookies = scope.get('cookies')
+    if cookies is None:
+        headers = dict(scope.get('headers', []))
+        cookie_header = headers.get(b'cookie', b'').decode('utf-8')
+        cookies = {}
+        for cookie in cookie_header.split('; '):
+            if '=' in cookie:
+                key, value = cookie.split('=', 1)
+                cookies[key] = value
+        scope['cookies'] = cookies
+    return cookies
+
+
+def get_auth_context(carrier, access_token) -> Optional["AuthContext"]:
+    """
+    Return the AuthContext for access_token on an HttpRequest or ASGI scope,
+    creating it on first use. Contexts are kept per raw token because the
+    HTTP and WebSocket middlewares don't all read the same cookie.
+    """
+    if not access_token:
+        return None
+
+    if isinstance(carrier, dict):
+        contexts = carrier.setdefault('auth_contexts', {})
+    else:
+        # DRF's Request proxies the HttpRequest; keep the contexts on the latter
+        carrier = getattr(carrier, '_request', carrier)
+        contexts = getattr(carrier, '_auth_contexts', None)
+        if contexts is None:
+            contexts = carrier._auth_contexts = {}
+
+    context = contexts.get(access_token)
+    if context is None:
+        context = contexts[access_token] = AuthContext(access_token)
+    return context
+
+
+class AuthContext:
+    """
+    One access token, verified once.
+
+    `claims` is the verified payload when the token is valid, otherwise the
+    unverified payload (tenant resolution has always read claims without
+    verification; DRF still rejects the request). `error` holds the
+    InvalidToken raised by verification, if any.
+    """
+
+    def __init__(self, raw_token: str):
+        self.raw_token = raw_token
+        self._verified = False
+        self._validated_token = None
+        self._error = None
+        self._claims = _UNSET
+        self._user = _UNSET
+        self.tenant = None
+
+    def _verify(self) -> None:
+        if self._verified:
+            return
+        self._verified = True
+        try:
+            self._validated_token = JWTAuthentication().get_validated_token(self.raw_token)
+        except InvalidToken as e:
+            self._error = e
+
+    @property
+    def validated_token(self):
+        """The validated simplejwt token; raises the stored InvalidToken if verification failed"""
+        self._verify()
+        if self._error is not None:
+            raise self._error
+        return self._validated_token
+
+    @property
+    def is_valid(self) -> bool:
+        self._verify()
+        return self._error is None
+
+    @property
+    def error(self) -> Optional[InvalidToken]:
+        self._verify()
+        return self._error
+
+    @property
+    def claims(self) -> Optional[dict]:
+        if self._claims is _UNSET:
+            if self.is_valid:
+                self._claims = self._validated_token.payload
+            else:
+                try:
+                    self._claims = jwt.decode(
+                        self.raw_token,
+                        options={'verify_signature': False, 'verify_exp': False}
+                    )
+                except jwt.InvalidTokenError:
+                    self._claims = None
+        return self._claims
+
+    def get_user(self):
+        """
+        Load (once) the active user the verified token belongs to.
+
+        Raises InvalidToken/AuthenticationFailed with the same codes
+        CookieJWTAuthentication has always used.
+        """
+        if self._user is _UNSET:
+            try:
+                user_id = self.validated_token[settings.SIMPLE_JWT.get('USER_ID_CLAIM', 'user_id')]
+            except KeyError:
+                raise InvalidToken('Token contained no recognizable user identification')
+            self._user = load_user(user_id)
+            if self._user is not None and self.tenant is not None and self._user.tenant_id == self.tenant.id:
+                # Reuse the tenant the middleware already resolved for this token
+                self._user.tenant = self.tenant
+
+        if self._user is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not self._user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return self._user
+
+
+def get_token_version(user_id) -> Optional[int]:
+    """User's cache generation, or None when the cache is unavailable"""
+    return AdvancedCacheManager.get_generation(f"auth_user:{user_id}", "none")
+
+
+def bump_token_version(user_id) -> None:
+    """Retire every cached copy of the user"""
+    AdvancedCacheManager.bump_generation(f"auth_user:{user_id}", "none")
+
+
+def load_user(user_id):
+    """
+    Load a user by id across tenants, or None if there is no such user.
+
+    With AUTH_CONTEXT['USER_CACHE_ENABLED'] the user is cached for
+    USER_CACHE_TTL_SECONDS under (user_id, token_version); the tenant is
+    re-attached from the tenant registry so tenant changes are never stale.
+    """
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    config = settings.AUTH_CONTEXT
+    id_field = settings.SIMPLE_JWT.get('USER_ID_FIELD', 'id')
+
+    def fetch():
+        try:
+            # Use all_objects to bypass tenant filtering during authentication
+            return User.all_objects.select_related('tenant').get(**{id_field: user_id})
+        except User.DoesNotExist:
+            return None
+
+    if not config['USER_CACHE_ENABLED']:
+        return fetch()
+
+    version = get_token_version(user_id)
+    if version is None:
+        return fetch()
+
+    key = f"auth_user:{user_id}:{version}"
+    cache = AdvancedCacheManager.get_cache()
+    try:
+        user = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Auth user cache read failed: {e}")
+        return fetch()
+    if user is None:
+        user = fetch()
+        if user is not None:
+            try:
+                cache.set(key, user, config['USER_CACHE_TTL_SECONDS'])
+            except Exception as e:
+                logger.warning(f"Auth user cache write failed: {e}")
+    elif user.tenant_id is not None:
+        from tenant.models import Tenant
+        from tenant.registry import tenant_registry
+
+        try:
+            user.tenant = tenant_registry.get(id=user.tenant_id)
+        except Tenant.DoesNotExist:
+            return fetch()
+    return user
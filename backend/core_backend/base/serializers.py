@@ -2,6 +2,8 @@ from rest_framework import serializers
 from products.models import Product, Category
 import warnings
 
+from core_backend.infrastructure.request_metrics import timed_serialization
+
 
 class BaseModelSerializer(serializers.ModelSerializer):
     """
@@ -28,6 +30,11 @@ class BaseModelSerializer(serializers.ModelSerializer):
 
         return data
 
+    @timed_serialization
+    def to_representation(self, instance):
+        """Time spent here is reported as serializer time in the request metrics"""
+        return super().to_representation(instance)
+
 
 class FieldsetMixin:
     """
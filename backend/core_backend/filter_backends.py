@@ -32,9 +32,9 @@ class ProjectFilterBackend(DjangoFilterBackend):
     return all records from that entire day.
     """
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        logger.info("🎯 ProjectFilterBackend instance created!")
+    # Generated FilterSets by (view class, model, filterset_fields); class-level
+    # because DRF instantiates the backend for every request
+    filterset_cache = {}
 
     @property
     def filterset_base(self):
@@ -46,83 +46,104 @@ class ProjectFilterBackend(DjangoFilterBackend):
         """
         Return the filterset class to use, ensuring BaseFilterSet is the base.
 
-        When filterset_fields is a dict like {"created_at": ["gte", "lte"]},
-        we manually create FlexibleDateTimeFilter instances for DateTimeFields.
+        FilterSets generated from a view's filterset_fields are built once per
+        (view class, model, filterset_fields) and kept in filterset_cache.
         """
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"ProjectFilterBackend.get_filterset_class called for view: {view.__class__.__name__}")
+        # If a filterset_class is explicitly defined on the view, use it
+        if getattr(view, 'filterset_class', None):
+            return super().get_filterset_class(view, queryset)
 
+        filterset_fields = getattr(view, 'filterset_fields', None)
+        if not filterset_fields:
+            return None
+
+        model = queryset.model if queryset is not None else view.queryset.model
+        cache_key = (view.__class__, model, _freeze_filterset_fields(filterset_fields))
+        filterset_class = self.filterset_cache.get(cache_key)
+        if filterset_class is None:
+            filterset_class = self._build_filterset_class(view, queryset, model, filterset_fields)
+            logger.debug(f"ProjectFilterBackend: Built FilterSet for {view.__class__.__name__} ({model.__name__})")
+            # setdefault so concurrent first requests all end up with the same class
+            filterset_class = self.filterset_cache.setdefault(cache_key, filterset_class)
+        return filterset_class
+
+    @classmethod
+    def clear_filterset_cache(cls):
+        """Drop the generated FilterSets (tests, or after redefining filterset_fields)"""
+        cls.filterset_cache.clear()
+
+    def _build_filterset_class(self, view, queryset, filterset_model, filterset_fields):
+        """
+        Create a FilterSet with BaseFilterSet as the base.
+
+        With a queryset, django-filter's AutoFilterSet over filterset_base is
+        used; BaseFilterSet.filter_for_field already maps DateTimeFields to
+        FlexibleDateTimeFilter. Without one (e.g. schema generation), the
+        FlexibleDateTimeFilter instances are created explicitly when
+        filterset_fields is a dict.
+        """
         from django.db import models
         from core_backend.base.filters import FlexibleDateTimeFilter
 
         filterset_class = super().get_filterset_class(view, queryset)
-        logger.info(f"  - super().get_filterset_class returned: {filterset_class}")
-
-        # If a filterset_class is explicitly defined on the view, use it
         if filterset_class:
             return filterset_class
 
-        # Otherwise, create one dynamically with BaseFilterSet as the base
-        filterset_fields = getattr(view, 'filterset_fields', None)
-
-        if filterset_fields:
-            model = queryset.model if queryset is not None else view.queryset.model
-
-            # When filterset_fields is a dict, we need to manually generate filters
-            if isinstance(filterset_fields, dict):
-                import logging
-                logger = logging.getLogger(__name__)
-
-                # Build filter attributes dictionary and track DateTime fields
-                filter_attrs = {}
-                datetime_fields = set()
-                remaining_fields = {}
-
-                for field_name, lookups in filterset_fields.items():
-                    # Get the model field
-                    try:
-                        model_field = model._meta.get_field(field_name)
-                    except:
-                        remaining_fields[field_name] = lookups
-                        continue
-
-                    # For DateTimeFields, use FlexibleDateTimeFilter
-                    if isinstance(model_field, models.DateTimeField):
-                        datetime_fields.add(field_name)
-                        logger.info(f"ProjectFilterBackend: Creating FlexibleDateTimeFilter for {field_name} with lookups {lookups}")
-                        for lookup in lookups:
-                            filter_name = f"{field_name}__{lookup}" if lookup != 'exact' else field_name
-                            filter_attrs[filter_name] = FlexibleDateTimeFilter(
-                                field_name=field_name,
-                                lookup_expr=lookup
-                            )
-                            logger.info(f"  - Created filter: {filter_name} (lookup_expr={lookup})")
-                    else:
-                        # Keep non-DateTime fields for Meta.fields
-                        remaining_fields[field_name] = lookups
-
-                # Build a dynamic FilterSet class with only non-DateTime fields in Meta
-                # (DateTime filters are added manually to avoid django-filters auto-generation)
-                class AutoFilterSet(self.filterset_base):
-                    class Meta:
-                        model = model
-                        fields = remaining_fields  # Exclude DateTime fields
-
-                # Add the explicit FlexibleDateTimeFilter instances
-                for name, filter_instance in filter_attrs.items():
-                    setattr(AutoFilterSet, name, filter_instance)
-
-                logger.info(f"ProjectFilterBackend: Created AutoFilterSet with {len(filter_attrs)} DateTime filters and {len(remaining_fields)} other filters")
-
-                return AutoFilterSet
-            else:
-                # Simple list format - use default behavior with our base
-                class AutoFilterSet(self.filterset_base):
-                    class Meta:
-                        model = model
-                        fields = filterset_fields
-
-                return AutoFilterSet
-
-        return None
+        # When filterset_fields is a dict, we need to manually generate filters
+        if isinstance(filterset_fields, dict):
+            # Build filter attributes dictionary and track DateTime fields
+            filter_attrs = {}
+            datetime_fields = set()
+            remaining_fields = {}
+
+            for field_name, lookups in filterset_fields.items():
+                # Get the model field
+                try:
+                    model_field = filterset_model._meta.get_field(field_name)
+                except:
+                    remaining_fields[field_name] = lookups
+                    continue
+
+                # For DateTimeFields, use FlexibleDateTimeFilter
+                if isinstance(model_field, models.DateTimeField):
+                    datetime_fields.add(field_name)
+                    for lookup in lookups:
+                        filter_name = f"{field_name}__{lookup}" if lookup != 'exact' else field_name
+                        filter_attrs[filter_name] = FlexibleDateTimeFilter(
+                            field_name=field_name,
+                            lookup_expr=lookup
+                        )
+                else:
+                    # Keep non-DateTime fields for Meta.fields
+                    remaining_fields[field_name] = lookups
+
+            # Build a dynamic FilterSet class with only non-DateTime fields in Meta
+            # (DateTime filters are added manually to avoid django-filters auto-generation)
+            class AutoFilterSet(self.filterset_base):
+                class Meta:
+                    model = filterset_model
+                    fields = remaining_fields  # Exclude DateTime fields
+
+            # Add the explicit FlexibleDateTimeFilter instances
+            for name, filter_instance in filter_attrs.items():
+                setattr(AutoFilterSet, name, filter_instance)
+
+            return AutoFilterSet
+        else:
+            # Simple list format - use default behavior with our base
+            class AutoFilterSet(self.filterset_base):
+                class Meta:
+                    model = filterset_model
+                    fields = filterset_fields
+
+            return AutoFilterSet
+
+
+def _freeze_filterset_fields(filterset_fields):
+    """Hashable form of a view's filterset_fields (list or dict of lookups)"""
+    if isinstance(filterset_fields, dict):
+        return tuple(
+            (name, tuple(lookups) if isinstance(lookups, (list, tuple)) else lookups)
+            for name, lookups in filterset_fields.items()
+        )
+    return tuple(filterset_fields)
@@ -3,10 +3,21 @@ from django.core.cache.utils import make_template_fragment_key
 from functools import wraps
 import logging
 import json
+import fnmatch
 import hashlib
+import datetime
+import math
+import random
+import uuid
 import time
+import threading
+from collections import OrderedDict
 from typing import Optional, Any, Dict, List
 from contextlib import contextmanager
+from django.db import transaction
+from decimal import Decimal
+
+from .request_metrics import record_cache_access
 
 logger = logging.getLogger(__name__)
 
@@ -115,6 +126,158 @@ class AdvancedCacheManager:
             logger.error(f"❌ Cache invalidation FAILED for pattern '{pattern}' in '{cache_name}': {e}")
             return False
     
+    # =========================================================================
+    # GENERATION-COUNTER INVALIDATION
+    # =========================================================================
+    # Each cache family (the decorated function name) gets a per-tenant
+    # generation number that is folded into the keys built by simple_cache.
+    # Invalidating a family is a single INCR - old keys are never enumerated,
+    # they simply stop being addressed and age out through their TTL.
+
+    GENERATION_CACHE = 'default'
+    GENERATION_FAMILIES_KEY = 'cachegen:families'
+
+    # family name -> key signature ("simple_cache:<module.qualname>:<prefix>") used for pattern matching
+    _generation_families = {}
+    # families this process has already published to the shared registry
+    _published_families = set()
+
+    @classmethod
+    def uses_generation_invalidation(cls):
+        """True when CACHE_INVALIDATION_MODE selects generation counters over SCAN deletes"""
+        from django.conf import settings
+        return getattr(settings, 'CACHE_INVALIDATION_MODE', 'generation') == 'generation'
+
+    @classmethod
+    def register_family(cls, family, signature=None):
+        """Register a cache family so pattern invalidation can resolve it without SCAN"""
+        cls._generation_families[family] = signature or family
+
+    @classmethod
+    def generation_key(cls, family, tenant_id):
+        """Key holding the generation counter for a family within one tenant"""
+        return f"cachegen:{family}:tenant_id={tenant_id}"
+
+    @classmethod
+    def get_generation(cls, family, tenant_id):
+        """
+        Current generation for a family/tenant, seeding the counter on first use.
+
+        Returns None when the generation store is unavailable; callers must then
+        bypass the cache, since a key without its generation cannot be invalidated.
+        Only families passed to register_family are published for pattern
+        invalidation; others (per-process stores' versions) are private counters.
+        """
+        cache = cls.get_cache(cls.GENERATION_CACHE)
+        if not cache:
+            return None
+
+        key = cls.generation_key(family, tenant_id)
+        try:
+            generation = cache.get(key)
+            if generation is None:
+                # Seed from the clock so an evicted counter never comes back at a
+                # generation that still has live keys from before the eviction.
+                cache.add(key, int(time.time() * 1000), None)
+                generation = cache.get(key)
+                # A missing counter may mean the registry was flushed too - republish
+                if family in cls._generation_families:
+                    cls._publish_family(family)
+            elif family in cls._generation_families and family not in cls._published_families:
+                cls._publish_family(family)
+            return generation
+        except Exception as e:
+            cls._record_failure(cls.GENERATION_CACHE)
+            logger.error(f"Failed to read cache generation for '{family}': {e}")
+            return None
+
+    @classmethod
+    def bump_generation(cls, family, tenant_id):
+        """Invalidate every key of a family for one tenant with a single INCR"""
+        cache = cls.get_cache(cls.GENERATION_CACHE)
+        if not cache:
+            return False
+
+        key = cls.generation_key(family, tenant_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # No counter yet - nothing has been cached under it, but seed it so
+            # a concurrent first read cannot land on a pre-existing generation.
+            cache.add(key, int(time.time() * 1000), None)
+        except Exception as e:
+            cls._record_failure(cls.GENERATION_CACHE)
+            logger.error(f"Failed to bump cache generation for '{family}': {e}")
+            return False
+        return True
+
+    @classmethod
+    def invalidate_generations(cls, pattern, tenant_id):
+        """
+        Bump the generation of every family whose key signature matches the pattern.
+
+        Args:
+            pattern: Legacy glob pattern (e.g. '*get_cached_products_list*')
+            tenant_id: Tenant scope of the invalidation ('none' for no tenant)
+
+        Returns:
+            List of invalidated family names, or None if the generation store is unavailable
+        """
+        if not cls.get_cache(cls.GENERATION_CACHE):
+            return None
+
+        match_pattern = f"*{pattern}*"
+        families = [
+            family for family, signature in cls._known_families().items()
+            if fnmatch.fnmatchcase(signature, match_pattern)
+        ]
+
+        for family in families:
+            if not cls.bump_generation(family, tenant_id):
+                return None
+        return families
+
+    @classmethod
+    def _publish_family(cls, family):
+        """Record a family in the shared registry so other workers can invalidate it"""
+        client = cls._get_generation_client()
+        if client is not None:
+            cache = caches[cls.GENERATION_CACHE]
+            client.hset(
+                cache.make_key(cls.GENERATION_FAMILIES_KEY),
+                family,
+                cls._generation_families.get(family, family),
+            )
+        cls._published_families.add(family)
+
+    @classmethod
+    def _known_families(cls):
+        """Families registered in this process merged with those published by other workers"""
+        families = {}
+        client = cls._get_generation_client()
+        if client is not None:
+            try:
+                cache = caches[cls.GENERATION_CACHE]
+                shared = client.hgetall(cache.make_key(cls.GENERATION_FAMILIES_KEY))
+                families.update({
+                    name.decode() if isinstance(name, bytes) else name:
+                    signature.decode() if isinstance(signature, bytes) else signature
+                    for name, signature in shared.items()
+                })
+            except Exception as e:
+                logger.warning(f"Could not read shared cache family registry: {e}")
+        families.update(cls._generation_families)
+        return families
+
+    @classmethod
+    def _get_generation_client(cls):
+        """Raw Redis client for the generation cache (None for non-Redis backends)"""
+        try:
+            from django_redis import get_redis_connection
+            return get_redis_connection(cls.GENERATION_CACHE)
+        except Exception:
+            return None
+
     @classmethod
     def get_cache_stats(cls, cache_name='default'):
         """Get cache statistics for monitoring"""
@@ -136,6 +299,276 @@ class AdvancedCacheManager:
             logger.error(f"Failed to get cache stats for {cache_name}: {e}")
             return None
 
+class CacheArgsKey(str):
+    """Pre-built argument digest that cached functions accept via `_args_key` to skip re-hashing"""
+
+
+class CacheKeyBuilder:
+    """
+    Stable, collision-free digests for cached function arguments.
+
+    Arguments are normalised into nested tuples of primitives before hashing:
+        - model instances contribute (label, pk, version) where version is the
+          instance's `cache_key_version` or `updated_at` when available
+        - objects may implement `__cache_key__()` returning primitives
+        - classes (e.g. `cls` of a cached classmethod) contribute their dotted path
+        - querysets, unsaved instances and objects without a stable identity are rejected
+
+    The full SHA-256 digest is used, so distinct arguments never share a key and
+    keys no longer depend on `__str__`.
+    """
+
+    PRIMITIVES = (str, int, float, bool, type(None))
+
+    @classmethod
+    def digest(cls, args=(), kwargs=None):
+        """Digest positional and keyword arguments into a CacheArgsKey"""
+        normalized = (
+            tuple(cls.normalize(arg) for arg in args),
+            tuple(sorted((key, cls.normalize(value)) for key, value in (kwargs or {}).items())),
+        )
+        return CacheArgsKey(hashlib.sha256(repr(normalized).encode()).hexdigest())
+
+    @classmethod
+    def normalize(cls, value):
+        """Reduce a value to a hashable structure of primitives that identifies it"""
+        from django.db.models import Model, QuerySet
+
+        if isinstance(value, cls.PRIMITIVES):
+            return value
+        if isinstance(value, QuerySet):
+            raise TypeError(
+                f"QuerySets cannot be used as cache key arguments ({value.model.__name__}); "
+                "pass ids or instances instead"
+            )
+        if hasattr(value, '__cache_key__') and not isinstance(value, type):
+            return ('obj', type(value).__qualname__, cls.normalize(value.__cache_key__()))
+        if isinstance(value, Model):
+            if value.pk is None:
+                raise TypeError(f"Unsaved {type(value).__name__} instance cannot be used as a cache key argument")
+            version = getattr(value, 'cache_key_version', None)
+            if version is None:
+                version = getattr(value, 'updated_at', None)
+            return ('model', value._meta.label_lower, cls.normalize(value.pk), cls.normalize(version))
+        if isinstance(value, type):
+            return ('class', f"{value.__module__}.{value.__qualname__}")
+        if isinstance(value, (list, tuple)):
+            return (type(value).__name__, tuple(cls.normalize(item) for item in value))
+        if isinstance(value, (set, frozenset)):
+            return ('set', tuple(sorted(repr(cls.normalize(item)) for item in value)))
+        if isinstance(value, dict):
+            return ('dict', tuple(sorted((repr(cls.normalize(k)), cls.normalize(v)) for k, v in value.items())))
+        if isinstance(value, (Decimal, uuid.UUID, datetime.date, datetime.time, datetime.timedelta)):
+            return (type(value).__name__, str(value))
+        if type(value).__repr__ is not object.__repr__:
+            return (type(value).__qualname__, repr(value))
+
+        # Default reprs embed memory addresses and would differ per worker
+        raise TypeError(
+            f"{type(value).__qualname__} has no stable cache identity; implement __cache_key__()"
+        )
+
+
+class LocalCacheTier:
+    """
+    Per-worker L1 cache in front of Redis: a bounded LRU with per-entry TTL.
+
+    Entries are addressed by the full simple_cache key, which already carries the
+    tenant id and the family generation. A generation bump therefore makes stale
+    L1 entries unreachable in every worker - coherence costs one small counter
+    read instead of fetching and unpickling the cached value.
+
+    Cached values are shared between callers in the same process and must be
+    treated as read-only.
+    """
+
+    _entries = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def _settings(cls):
+        from django.conf import settings
+        return getattr(settings, 'CACHE_L1', {})
+
+    @classmethod
+    def is_enabled(cls):
+        """L1 needs generation keys to stay coherent, so pattern mode disables it"""
+        return (
+            cls._settings().get('ENABLED', True)
+            and AdvancedCacheManager.uses_generation_invalidation()
+        )
+
+    @classmethod
+    def get(cls, key):
+        """Return (hit, value) for a key, dropping it if its TTL has passed"""
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del cls._entries[key]
+                return False, None
+            cls._entries.move_to_end(key)
+            return True, value
+
+    @classmethod
+    def set(cls, key, value, timeout):
+        """Store a value for at most CACHE_L1['TIMEOUT'] seconds, evicting LRU entries"""
+        config = cls._settings()
+        ttl = min(timeout, config.get('TIMEOUT', 60)) if timeout else config.get('TIMEOUT', 60)
+        max_entries = config.get('MAX_ENTRIES', 256)
+
+        with cls._lock:
+            cls._entries[key] = (time.monotonic() + ttl, value)
+            cls._entries.move_to_end(key)
+            while len(cls._entries) > max_entries:
+                cls._entries.popitem(last=False)
+
+    @classmethod
+    def clear(cls):
+        """Drop every L1 entry in this process"""
+        with cls._lock:
+            cls._entries.clear()
+
+    @classmethod
+    def size(cls):
+        return len(cls._entries)
+
+
+class CacheEnvelope:
+    """
+    Cached value plus freshness metadata for stale-while-revalidate.
+
+    The Redis TTL covers timeout + stale_ttl; fresh_until marks the soft expiry
+    after which the value is still served while one worker refreshes it.
+    compute_time feeds probabilistic early expiration (XFetch), which spreads
+    refreshes out before the soft expiry instead of all workers hitting it at once.
+    """
+
+    __slots__ = ('value', 'fresh_until', 'compute_time')
+
+    def __init__(self, value, timeout, compute_time=0.0):
+        self.value = value
+        self.fresh_until = time.time() + timeout
+        self.compute_time = compute_time
+
+    def __getstate__(self):
+        return (self.value, self.fresh_until, self.compute_time)
+
+    def __setstate__(self, state):
+        self.value, self.fresh_until, self.compute_time = state
+
+    def is_stale(self, now=None):
+        return (now or time.time()) >= self.fresh_until
+
+    def should_refresh_early(self, beta, now=None):
+        """XFetch: refresh with rising probability as the soft expiry approaches"""
+        if beta <= 0 or self.compute_time <= 0:
+            return False
+        now = now or time.time()
+        # -log(random) is exponentially distributed; 1 - random() avoids log(0)
+        return now - self.compute_time * beta * math.log(1.0 - random.random()) >= self.fresh_until
+
+
+class SingleFlight:
+    """
+    Stampede protection for cache fills.
+
+    On a miss only the lock holder recomputes; the other workers poll briefly for
+    its result and compute themselves only if the holder is slower than
+    CACHE_STAMPEDE['WAIT_TIMEOUT']. Stale entries are refreshed by one worker in
+    the background while everyone else keeps serving the previous value.
+    """
+
+    @classmethod
+    def _settings(cls):
+        from django.conf import settings
+        return getattr(settings, 'CACHE_STAMPEDE', {})
+
+    @classmethod
+    def fill(cls, cache, cache_key, producer):
+        """
+        Return the cached entry for cache_key, computing it under a distributed lock.
+
+        producer() must compute the value, store it under cache_key and return the
+        stored entry. The return value is whatever is stored (raw value or envelope).
+        """
+        config = cls._settings()
+        lock_name = f"fill:{cache_key}"
+
+        with AdvancedCacheManager.cache_lock(lock_name, timeout=config.get('LOCK_TIMEOUT', 30)) as acquired:
+            if acquired:
+                # Double-check: the previous holder may have filled it just before we locked
+                entry = cache.get(cache_key)
+                if entry is not None:
+                    return entry
+                return producer()
+
+        entry = cls._wait_for_fill(cache, cache_key, lock_name, config)
+        if entry is not None:
+            return entry
+
+        logger.warning(f"Single-flight wait expired for {cache_key[:50]}..., computing locally")
+        return producer()
+
+    @classmethod
+    def _wait_for_fill(cls, cache, cache_key, lock_name, config):
+        """Poll for the lock holder's result until it lands, the lock goes away, or we time out"""
+        lock_cache = AdvancedCacheManager.get_cache(AdvancedCacheManager.DYNAMIC_CACHE)
+        poll_interval = config.get('POLL_INTERVAL', 0.05)
+        deadline = time.monotonic() + config.get('WAIT_TIMEOUT', 5)
+
+        while time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            entry = cache.get(cache_key)
+            if entry is not None:
+                return entry
+            if lock_cache is None or lock_cache.get(f"lock:{lock_name}") is None:
+                # Holder finished without storing anything (e.g. result was None)
+                return cache.get(cache_key)
+        return None
+
+    @classmethod
+    def refresh(cls, cache_key, producer):
+        """
+        Refresh a stale entry once across all workers.
+
+        Returns True if this worker took the refresh. Runs in a daemon thread when
+        CACHE_STAMPEDE['BACKGROUND_REFRESH'] is set, otherwise inline.
+        """
+        config = cls._settings()
+        lock_cache = AdvancedCacheManager.get_cache(AdvancedCacheManager.DYNAMIC_CACHE)
+        if lock_cache is None:
+            return False
+
+        lock_key = f"lock:refresh:{cache_key}"
+        if not lock_cache.add(lock_key, "locked", config.get('LOCK_TIMEOUT', 30)):
+            return False
+
+        def run():
+            try:
+                producer()
+            except Exception as e:
+                logger.error(f"Background cache refresh failed for {cache_key[:50]}...: {e}")
+            finally:
+                lock_cache.delete(lock_key)
+
+        if config.get('BACKGROUND_REFRESH', True):
+            def run_in_thread():
+                from django.db import connections
+                try:
+                    run()
+                finally:
+                    # Threads get their own DB connections - don't leak them
+                    connections.close_all()
+
+            threading.Thread(target=run_in_thread, name="cache-refresh", daemon=True).start()
+        else:
+            run()
+        return True
+
+
 class CacheWarmingManager:
     """Intelligent cache warming system"""
     
@@ -368,7 +801,7 @@ def advanced_cache(timeout=300, cache_name='default', key_prefix=None,
     """Advanced caching decorator with warming and serialization"""
     def decorator(func):
         @wraps(func)
-        def wrapper(*args, **kwargs):
+        def wrapper(*args, _args_key=None, **kwargs):
             # Generate sophisticated cache key
             if key_prefix:
                 cache_key = f"{key_prefix}:{func.__name__}"
@@ -378,35 +811,35 @@ def advanced_cache(timeout=300, cache_name='default', key_prefix=None,
             # Add version and parameters
             cache_key = AdvancedCacheManager.cache_key(
                 'function', cache_key, 'result', version=version,
-                args_hash=hashlib.md5(str(args).encode()).hexdigest()[:8],
-                kwargs_hash=hashlib.md5(str(sorted(kwargs.items())).encode()).hexdigest()[:8]
+                args_digest=_args_key or CacheKeyBuilder.digest(args, kwargs)
             )
             
             cache = AdvancedCacheManager.get_cache(cache_name)
             if not cache:
                 return func(*args, **kwargs)  # Graceful degradation
             
+            def produce():
+                value = func(*args, **kwargs)
+                if serialize_complex:
+                    value = _serialize_complex_types(value)
+                cache.set(cache_key, value, timeout)
+                return value
+
             try:
                 result = cache.get(cache_key)
                 
                 if result is None:
-                    # Cache warming lock for expensive operations
+                    # Single-flight fill for expensive operations: lock losers wait
+                    # for the holder's result instead of computing it again
                     if warm_on_miss:
-                        with AdvancedCacheManager.cache_lock(f"warm_{cache_key}"):
-                            result = cache.get(cache_key)  # Double-check after lock
-                            if result is None:
-                                result = func(*args, **kwargs)
-                                if serialize_complex:
-                                    result = _serialize_complex_types(result)
-                                cache.set(cache_key, result, timeout)
+                        result = SingleFlight.fill(cache, cache_key, produce)
                     else:
-                        result = func(*args, **kwargs)
-                        if serialize_complex:
-                            result = _serialize_complex_types(result)
-                        cache.set(cache_key, result, timeout)
+                        result = produce()
                     
+                    CacheMonitor.record_tier_access('l2', False)
                     logger.debug(f"Cache MISS: {cache_key}")
                 else:
+                    CacheMonitor.record_tier_access('l2', True)
                     logger.debug(f"Cache HIT: {cache_key}")
                 
                 return result
@@ -415,6 +848,7 @@ def advanced_cache(timeout=300, cache_name='default', key_prefix=None,
                 logger.error(f"Cache operation failed for {cache_key}: {e}")
                 return func(*args, **kwargs)  # Graceful degradation
                 
+        wrapper.make_args_key = lambda *args, **kwargs: CacheKeyBuilder.digest(args, kwargs)
         return wrapper
     return decorator
 
@@ -438,6 +872,12 @@ class CacheMonitor:
         'avg_miss_time': 0,
         'slow_queries': 0
     }
+
+    # Hit/miss counters per tier: l1 = in-process LRU, l2 = Redis
+    _tier_stats = {
+        'l1': {'hits': 0, 'misses': 0},
+        'l2': {'hits': 0, 'misses': 0},
+    }
     
     @classmethod
     def get_all_cache_stats(cls):
@@ -495,14 +935,14 @@ class CacheMonitor:
                 status = "HIT" if hit else "MISS"
                 cache_source = cache_name.upper()
                 
-                # Use different log levels based on performance
+                # Use different log levels based on performance; per-request hit/miss
+                # counts are in the request metrics (RequestMetricsMiddleware)
                 if execution_time > 1000:  # Over 1 second
                     logger.warning(f"🐌 SLOW CACHE {status} [{cache_source}]: {cache_key[:50]}... took {execution_time:.1f}ms")
                 elif execution_time > 500:  # Over 500ms
                     logger.info(f"⏰ CACHE {status} [{cache_source}]: {cache_key[:50]}... took {execution_time:.1f}ms")
-                else:
-                    # Changed to INFO so cache hits are visible in production logs
-                    logger.info(f"⚡ CACHE {status} [{cache_source}]: {cache_key[:50]}... took {execution_time:.1f}ms")
+                elif logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"⚡ CACHE {status} [{cache_source}]: {cache_key[:50]}... took {execution_time:.1f}ms")
                     
                 # Track cache performance metrics (could be sent to monitoring service)
                 cls._track_cache_metrics(cache_key, hit, execution_time, cache_name)
@@ -537,6 +977,26 @@ class CacheMonitor:
         except Exception as e:
             logger.error(f"Error tracking cache metrics: {e}")
     
+    @classmethod
+    def record_tier_access(cls, tier, hit):
+        """Count a hit or miss against a cache tier ('l1' or 'l2')"""
+        counters = cls._tier_stats.setdefault(tier, {'hits': 0, 'misses': 0})
+        counters['hits' if hit else 'misses'] += 1
+        record_cache_access(tier, hit)
+
+    @classmethod
+    def get_tier_stats(cls):
+        """Hit/miss counters and hit rate for each cache tier"""
+        tiers = {}
+        for tier, counters in cls._tier_stats.items():
+            total = counters['hits'] + counters['misses']
+            tiers[tier] = {
+                **counters,
+                'hit_rate': (counters['hits'] / total) * 100 if total else 0,
+            }
+        tiers['l1']['entries'] = LocalCacheTier.size()
+        return tiers
+
     @classmethod
     def get_cache_performance_stats(cls):
         """Get current cache performance statistics"""
@@ -548,6 +1008,7 @@ class CacheMonitor:
             else:
                 stats['hit_rate'] = 0
                 stats['miss_rate'] = 0
+            stats['tiers'] = cls.get_tier_stats()
             return stats
         except Exception as e:
             logger.error(f"Error getting cache stats: {e}")
@@ -565,6 +1026,10 @@ class CacheMonitor:
                 'avg_miss_time': 0,
                 'slow_queries': 0
             }
+            cls._tier_stats = {
+                'l1': {'hits': 0, 'misses': 0},
+                'l2': {'hits': 0, 'misses': 0},
+            }
             logger.info("Cache performance stats cleared")
         except Exception as e:
             logger.error(f"Error clearing cache stats: {e}")
@@ -599,4 +1064,14 @@ def invalidate_cache_groups(*groups, tenant=None):
     for group in groups:
         # Use centralized function with tenant scoping for proper multi-tenant cache invalidation
         invalidate_cache_pattern(f"*{group}*", cache_name='static_data', tenant=tenant)
-        invalidate_cache_pattern(f"*{group}*", cache_name='default', tenant=tenant)
\ No newline at end of file
+        invalidate_cache_pattern(f"*{group}*", cache_name='default', tenant=tenant)
+
+
+def invalidate_now_and_on_commit(invalidate, *args):
+    """
+    Run an invalidation now, so this worker sees the change straight away, and
+    again on commit, so no other worker keeps what it loaded from the
+    not-yet-committed rows.
+    """
+    invalidate(*args)
+    transaction.on_commit(lambda: invalidate(*args))
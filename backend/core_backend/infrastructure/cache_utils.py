@@ -1,20 +1,44 @@
 from django.core.cache import cache
 from functools import wraps
-import hashlib
 import json
 import time
 import logging
 
 # Import the new advanced cache system
-from .cache import AdvancedCacheManager, advanced_cache, CacheWarmingManager, CacheMonitor
+from .cache import (
+    AdvancedCacheManager, advanced_cache, CacheWarmingManager, CacheMonitor,
+    LocalCacheTier, CacheEnvelope, SingleFlight, CacheKeyBuilder,
+)
 
 logger = logging.getLogger(__name__)
 
-def simple_cache(timeout=300, key_prefix='', log_performance=True, cache_name='static_data'):
-    """Enhanced simple caching decorator with advanced backend support and tenant isolation"""
+def simple_cache(timeout=300, key_prefix='', log_performance=True, cache_name='static_data', use_l1=False,
+                 single_flight=True, stale_ttl=0, early_expiration_beta=0):
+    """
+    Enhanced simple caching decorator with advanced backend support and tenant isolation.
+
+    With use_l1=True, results are also kept in the per-worker LocalCacheTier so hot
+    lookups skip the Redis round-trip and unpickle. Every caller in the worker gets
+    the same object, so only opt in for immutable results (projections, bytes), never
+    model instances, querysets or dicts callers may change.
+
+    Stampede protection:
+        single_flight: on a miss only one worker recomputes, the others wait for it
+        stale_ttl: seconds past `timeout` during which the previous value is still
+            served while one worker refreshes it in the background
+        early_expiration_beta: XFetch factor (1.0 is typical) for probabilistic
+            refresh before the soft expiry; 0 disables it
+    """
     def decorator(func):
+        # Register the function as a generation family so invalidate_cache_pattern
+        # can resolve patterns to families without scanning the keyspace. The family
+        # is the qualified name: same-named functions in other modules or classes
+        # must not share (and bump) one generation.
+        family = f"{func.__module__}.{func.__qualname__}"
+        AdvancedCacheManager.register_family(family, f"simple_cache:{family}:{key_prefix}")
+
         @wraps(func)
-        def wrapper(*args, **kwargs):
+        def wrapper(*args, _args_key=None, **kwargs):
             start_time = time.time()
 
             # Use advanced cache manager for better reliability
@@ -28,34 +52,110 @@ def simple_cache(timeout=300, key_prefix='', log_performance=True, cache_name='s
                 return result
 
             # Get current tenant for cache key isolation
-            from tenant.managers import get_current_tenant
+            from tenant.managers import get_current_tenant, set_current_tenant
             tenant = get_current_tenant()
             tenant_id = str(tenant.id) if tenant else 'none'
 
+            try:
+                # Stable identity of the arguments (models by label/pk/version, never str())
+                args_digest = _args_key or CacheKeyBuilder.digest(args, kwargs)
+            except TypeError as e:
+                # Arguments without a stable identity (unsaved models, arbitrary objects)
+                # can't be cached safely - run the function uncached
+                logger.warning(f"Uncacheable arguments for {func.__name__}, bypassing cache: {e}")
+                result = func(*args, **kwargs)
+                execution_time = (time.time() - start_time) * 1000
+                if log_performance:
+                    CacheMonitor.log_cache_performance(f"uncacheable_{func.__name__}", hit=False, execution_time=execution_time, cache_name="uncacheable")
+                return result
+
+            key_params = {
+                'tenant_id': tenant_id,  # CRITICAL: Include tenant in cache key
+                'args_digest': args_digest,
+            }
+
+            # Fold the family generation into the key - bumping it invalidates every key at once
+            if AdvancedCacheManager.uses_generation_invalidation():
+                generation = AdvancedCacheManager.get_generation(family, tenant_id)
+                if generation is None:
+                    # Without a generation the entry could never be invalidated - bypass the cache
+                    result = func(*args, **kwargs)
+                    execution_time = (time.time() - start_time) * 1000
+                    if log_performance:
+                        CacheMonitor.log_cache_performance(f"unavailable_{func.__name__}", hit=False, execution_time=execution_time, cache_name="unavailable")
+                    return result
+                key_params['gen'] = generation
+
             # Generate cache key with versioning AND tenant isolation
             cache_key = AdvancedCacheManager.cache_key(
-                'simple_cache', func.__name__, key_prefix,
-                tenant_id=tenant_id,  # CRITICAL: Include tenant in cache key
-                args_hash=hashlib.md5(str(args).encode()).hexdigest()[:8],
-                kwargs_hash=hashlib.md5(str(sorted(kwargs.items())).encode()).hexdigest()[:8]
+                'simple_cache', family, key_prefix, **key_params
             )
             
+            # L1: per-worker LRU keyed by the full (tenant + generation) cache key
+            use_local = use_l1 and LocalCacheTier.is_enabled()
+            local_key = f"{cache_name}:{cache_key}"
+            if use_local:
+                hit, result = LocalCacheTier.get(local_key)
+                CacheMonitor.record_tier_access('l1', hit)
+                if hit:
+                    execution_time = (time.time() - start_time) * 1000
+                    if log_performance:
+                        CacheMonitor.log_cache_performance(cache_key, hit=True, execution_time=execution_time, cache_name='l1')
+                    return result
+
+            use_envelope = stale_ttl > 0 or early_expiration_beta > 0
+
+            def produce():
+                # Recompute and store the entry; runs inline, under the fill lock or in a refresh thread
+                compute_start = time.time()
+                value = func(*args, **kwargs)
+                if use_envelope:
+                    entry = CacheEnvelope(value, timeout, compute_time=time.time() - compute_start)
+                    cache_instance.set(cache_key, entry, timeout + stale_ttl)
+                else:
+                    entry = value
+                    cache_instance.set(cache_key, entry, timeout)
+                return entry
+
+            def produce_for_tenant():
+                # Background refresh threads don't inherit the request's tenant context
+                previous_tenant = get_current_tenant()
+                set_current_tenant(tenant)
+                try:
+                    return produce()
+                finally:
+                    set_current_tenant(previous_tenant)
+
             try:
-                result = cache_instance.get(cache_key)
+                entry = cache_instance.get(cache_key)
                 
-                if result is None:
-                    # Cache MISS - execute function
-                    result = func(*args, **kwargs)
-                    cache_instance.set(cache_key, result, timeout)
+                if entry is None:
+                    # Cache MISS - execute function (once across workers with single_flight)
+                    CacheMonitor.record_tier_access('l2', False)
+                    if single_flight:
+                        entry = SingleFlight.fill(cache_instance, cache_key, produce)
+                    else:
+                        entry = produce()
+                    result = entry.value if isinstance(entry, CacheEnvelope) else entry
                     
                     execution_time = (time.time() - start_time) * 1000
                     if log_performance:
                         CacheMonitor.log_cache_performance(cache_key, hit=False, execution_time=execution_time, cache_name=cache_name)
                 else:
-                    # Cache HIT - return cached result
+                    # Cache HIT - return cached result, refreshing it if stale or due early
+                    CacheMonitor.record_tier_access('l2', True)
+                    if isinstance(entry, CacheEnvelope):
+                        if entry.is_stale() or entry.should_refresh_early(early_expiration_beta):
+                            SingleFlight.refresh(cache_key, produce_for_tenant)
+                        result = entry.value
+                    else:
+                        result = entry
                     execution_time = (time.time() - start_time) * 1000
                     if log_performance:
                         CacheMonitor.log_cache_performance(cache_key, hit=True, execution_time=execution_time, cache_name=cache_name)
+
+                if use_local:
+                    LocalCacheTier.set(local_key, result, timeout)
                 
                 return result
                 
@@ -68,6 +168,9 @@ def simple_cache(timeout=300, key_prefix='', log_performance=True, cache_name='s
                     CacheMonitor.log_cache_performance(f"error_{func.__name__}", hit=False, execution_time=execution_time, cache_name="error")
                 return result
                 
+        # Hot callers can digest arguments once and pass the result back as _args_key
+        wrapper.make_args_key = lambda *args, **kwargs: CacheKeyBuilder.digest(args, kwargs)
+        wrapper.cache_family = family
         return wrapper
     return decorator
 
@@ -75,6 +178,12 @@ def invalidate_cache_pattern(pattern, cache_name='static_data', tenant=None):
     """
     Enhanced pattern invalidation using advanced cache manager with tenant isolation.
 
+    In generation mode (CACHE_INVALIDATION_MODE='generation', the default) the pattern
+    is matched against registered simple_cache families and each match costs a single
+    INCR. Pattern mode falls back to django-redis delete_pattern, which SCANs the keyspace;
+    so does generation mode when the pattern matches no family (keys written outside
+    simple_cache) or the generation store is unavailable.
+
     Args:
         pattern: Cache key pattern to invalidate (e.g., '*get_cached_products*')
         cache_name: Name of cache to invalidate
@@ -87,9 +196,20 @@ def invalidate_cache_pattern(pattern, cache_name='static_data', tenant=None):
 
     # Build tenant-scoped pattern
     # CRITICAL: tenant_id is at the END of cache keys, not the beginning
-    # Actual key format: v1:simple_cache:get_cached_products_list:static:args_hash=xxx:kwargs_hash=yyy:tenant_id=b4c861f4...
+    # Actual key format: v1:simple_cache:products.services.ProductService.get_cached_products_list:static:args_digest=xxx:gen=nnn:tenant_id=b4c861f4...
     tenant_id = str(tenant.id) if tenant else 'none'
     tenant_name = tenant.name if tenant else 'None'
+
+    if AdvancedCacheManager.uses_generation_invalidation():
+        families = AdvancedCacheManager.invalidate_generations(pattern, tenant_id)
+        if families:
+            logger.debug(f"Invalidated cache generations for pattern='{pattern}' tenant '{tenant_name}' (ID={tenant_id}): {families}")
+            return True
+        if families is None:
+            logger.warning(f"⚠️ Generation store unavailable, falling back to pattern deletion for '{pattern}'")
+        else:
+            logger.debug(f"No cache family matches pattern='{pattern}', falling back to pattern deletion")
+
     tenant_scoped_pattern = f"*{pattern}*tenant_id={tenant_id}*"
 
     logger.info(f"🔍 Invalidating cache pattern='{pattern}' for tenant '{tenant_name}' (ID={tenant_id}), full_pattern='{tenant_scoped_pattern}'")
@@ -106,17 +226,17 @@ def invalidate_cache_pattern(pattern, cache_name='static_data', tenant=None):
     return result_static or result_default
 
 # Convenience functions for common cache operations
-def cache_static_data(timeout=3600*6):
-    """Decorator for highly static data (6 hours default)"""
-    return simple_cache(timeout=timeout, cache_name='static_data', key_prefix='static')
+def cache_static_data(timeout=3600*6, use_l1=False, **options):
+    """Decorator for highly static data (6 hours default; pass use_l1=True for immutable results)"""
+    return simple_cache(timeout=timeout, cache_name='static_data', key_prefix='static', use_l1=use_l1, **options)
 
-def cache_dynamic_data(timeout=300):
+def cache_dynamic_data(timeout=300, **options):
     """Decorator for dynamic data (5 minutes default)"""
-    return simple_cache(timeout=timeout, cache_name='default', key_prefix='dynamic')
+    return simple_cache(timeout=timeout, cache_name='default', key_prefix='dynamic', **options)
 
-def cache_session_data(timeout=900):
+def cache_session_data(timeout=900, **options):
     """Decorator for session-related data (15 minutes default)"""
-    return simple_cache(timeout=timeout, cache_name='session_data', key_prefix='session')
+    return simple_cache(timeout=timeout, cache_name='session_data', key_prefix='session', **options)
 
 # =============================================================================
 # CONSOLIDATED FUNCTIONS (now available from .cache import)
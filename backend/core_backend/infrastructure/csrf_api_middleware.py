@@ -2,6 +2,9 @@ from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
 
+from core_backend.infrastructure import routes
+from core_backend.infrastructure.routes import get_route_flags
+
 
 class CSRFApiMiddleware(MiddlewareMixin):
     """
@@ -14,23 +17,18 @@ class CSRFApiMiddleware(MiddlewareMixin):
       * Double-submit (X-CSRF-Token must match csrf_token cookie) when ENABLE_DOUBLE_SUBMIT_CSRF=True
     """
 
-    WHITELIST_PATHS = (
-        "/api/health/",
-        "/api/security/csrf/",
-        "/api/payments/webhooks/",
-    )
-
     def process_request(self, request):
         try:
-            path = request.path
+            flags = get_route_flags(request)
             method = request.method.upper()
 
             # Only enforce for API unsafe methods
-            if not path.startswith("/api/"):
+            if not flags & routes.API:
                 return None
             if method in ("GET", "HEAD", "OPTIONS"):
                 return None
-            if any(path.startswith(p) for p in self.WHITELIST_PATHS):
+            # Whitelist (CSRF_EXEMPT in routes.ROUTES)
+            if flags & routes.CSRF_EXEMPT:
                 return None
 
             # Header guard
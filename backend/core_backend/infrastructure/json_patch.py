@@ -0,0 +1,130 @@
+"""
+Minimal RFC 6902 JSON Patch support for realtime broadcasts.
+
+Only the operations the diff produces are implemented (add, remove, replace)
+on plain JSON documents - dicts, lists and scalars as returned by
+``json.loads``. Lists are diffed by trimming the common prefix and suffix, so
+appending, removing or editing one cart line yields a one- or two-op patch.
+"""
+import copy
+
+
+class JsonPatchError(ValueError):
+    """Raised when a patch does not apply to the given document"""
+
+
+def _escape(token):
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token):
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def make_patch(source, target):
+    """Return the list of operations that turns ``source`` into ``target``"""
+    operations = []
+    _diff(source, target, '', operations)
+    return operations
+
+
+def _diff(source, target, path, operations):
+    if type(source) is not type(target):
+        operations.append({'op': 'replace', 'path': path, 'value': copy.deepcopy(target)})
+    elif isinstance(source, dict):
+        for key in source:
+            if key not in target:
+                operations.append({'op': 'remove', 'path': f"{path}/{_escape(key)}"})
+        for key, value in target.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in source:
+                operations.append({'op': 'add', 'path': child, 'value': copy.deepcopy(value)})
+            elif source[key] != value:
+                _diff(source[key], value, child, operations)
+    elif isinstance(source, list):
+        _diff_list(source, target, path, operations)
+    elif source != target:
+        operations.append({'op': 'replace', 'path': path, 'value': copy.deepcopy(target)})
+
+
+def _diff_list(source, target, path, operations):
+    shortest = min(len(source), len(target))
+    prefix = 0
+    while prefix < shortest and source[prefix] == target[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < shortest - prefix and source[-1 - suffix] == target[-1 - suffix]:
+        suffix += 1
+
+    source_middle = len(source) - prefix - suffix
+    target_middle = len(target) - prefix - suffix
+    for offset in range(min(source_middle, target_middle)):
+        index = prefix + offset
+        _diff(source[index], target[index], f"{path}/{index}", operations)
+
+    # Removals keep hitting the same index as later elements shift down
+    for _ in range(source_middle - target_middle):
+        operations.append({'op': 'remove', 'path': f"{path}/{prefix + target_middle}"})
+    for offset in range(source_middle, target_middle):
+        index = prefix + offset
+        operations.append({'op': 'add', 'path': f"{path}/{index}", 'value': copy.deepcopy(target[index])})
+
+
+def apply_patch(document, operations):
+    """Return a patched copy of ``document``; the input is left untouched"""
+    result = copy.deepcopy(document)
+    for operation in operations:
+        op, path = operation.get('op'), operation.get('path')
+        if path is None:
+            raise JsonPatchError(f"Operation without a path: {operation}")
+        if path == '':
+            if op not in ('add', 'replace'):
+                raise JsonPatchError(f"Cannot {op} the document root")
+            result = copy.deepcopy(operation['value'])
+            continue
+
+        tokens = [_unescape(token) for token in path.split('/')[1:]]
+        parent = _resolve(result, tokens[:-1], path)
+        key = tokens[-1]
+
+        if isinstance(parent, dict):
+            if op in ('remove', 'replace') and key not in parent:
+                raise JsonPatchError(f"Path {path} does not exist")
+            if op == 'remove':
+                del parent[key]
+            elif op in ('add', 'replace'):
+                parent[key] = copy.deepcopy(operation['value'])
+            else:
+                raise JsonPatchError(f"Unsupported operation: {op}")
+        elif isinstance(parent, list):
+            index = len(parent) if key == '-' and op == 'add' else _index(key, path)
+            limit = len(parent) + 1 if op == 'add' else len(parent)
+            if not 0 <= index < limit:
+                raise JsonPatchError(f"Path {path} is out of range")
+            if op == 'remove':
+                del parent[index]
+            elif op == 'add':
+                parent.insert(index, copy.deepcopy(operation['value']))
+            elif op == 'replace':
+                parent[index] = copy.deepcopy(operation['value'])
+            else:
+                raise JsonPatchError(f"Unsupported operation: {op}")
+        else:
+            raise JsonPatchError(f"Path {path} does not point into a container")
+    return result
+
+
+def _index(token, path):
+    if not token.isdigit():
+        raise JsonPatchError(f"Invalid list index in {path}")
+    return int(token)
+
+
+def _resolve(document, tokens, path):
+    node = document
+    for token in tokens:
+        try:
+            node = node[_index(token, path)] if isinstance(node, list) else node[token]
+        except (KeyError, IndexError, TypeError):
+            raise JsonPatchError(f"Path {path} does not exist")
+    return node
@@ -4,6 +4,8 @@ from django.conf import settings
 from settings.models import GlobalSettings
 from business_hours.models import BusinessHoursProfile
 from business_hours.services import BusinessHoursService
+from core_backend.infrastructure import routes
+from core_backend.infrastructure.routes import get_route_flags
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,32 +25,9 @@ class BusinessHoursMiddleware(MiddlewareMixin):
     when the selected location is open. POS staff remain unrestricted.
     """
 
-    # Endpoints that are ALWAYS allowed (browsing, cart management)
-    EXEMPT_ENDPOINTS = [
-        "/api/cart/",  # Cart operations - users can add items anytime
-        "/api/products/",  # Product browsing
-        "/api/menu/",  # Menu viewing
-        "/api/categories/",  # Category browsing
-        "/api/discounts/available/",  # View available discounts
-    ]
-
-    # Specific endpoints blocked during closed hours for web customers
-    # (Order creation and payment processing)
-    RESTRICTED_ENDPOINTS = [
-        "/api/orders/create/",  # Order creation
-        "/api/orders/guest-order/",  # Guest order creation
-        "/api/payments/initiate/",  # Payment initiation
-        "/api/payments/guest/",  # Guest payment
-        "/api/orders/online/",  # Online order endpoint
-        "/api/orders/website/",  # Website order endpoint
-    ]
-
-    # Headers that indicate requests from customer website/external sources
-    EXTERNAL_REQUEST_INDICATORS = [
-        "customer-app",  # Custom header from customer website
-        "online-ordering",  # Custom header for online orders
-        "website-order",  # Custom header for website orders
-    ]
+    # Exempt endpoints (browsing, cart management), restricted endpoints (order
+    # creation, payment processing) and the external-request headers are
+    # defined in core_backend.infrastructure.routes.ROUTES
 
     def process_request(self, request):
         # Skip business hours check for certain conditions
@@ -141,11 +120,7 @@ class BusinessHoursMiddleware(MiddlewareMixin):
             return True
 
         # Skip for static files and admin
-        if (
-            request.path.startswith("/static/")
-            or request.path.startswith("/media/")
-            or request.path.startswith("/admin/")
-        ):
+        if get_route_flags(request) & (routes.STATIC | routes.DJANGO_ADMIN):
             return True
 
         return False
@@ -157,23 +132,19 @@ class BusinessHoursMiddleware(MiddlewareMixin):
         Returns True only for order creation and payment endpoints from web customers.
         Always allows cart, browsing, and product operations.
         """
-        path = request.path
+        flags = get_route_flags(request)
 
         # ALWAYS allow exempt endpoints (cart, browsing, products)
-        for exempt_endpoint in self.EXEMPT_ENDPOINTS:
-            if path.startswith(exempt_endpoint):
-                return False
+        if flags & routes.BUSINESS_HOURS_EXEMPT:
+            return False
 
         # Check for specific restricted endpoints (order creation, payments)
-        for restricted_endpoint in self.RESTRICTED_ENDPOINTS:
-            if path.startswith(restricted_endpoint):
-                return True
+        if flags & routes.BUSINESS_HOURS_RESTRICTED:
+            return True
 
         # Check for external request indicators in headers on order/payment endpoints
-        if path.startswith("/api/orders/") or path.startswith("/api/payments/"):
-            for indicator in self.EXTERNAL_REQUEST_INDICATORS:
-                if request.META.get(f'HTTP_{indicator.upper().replace("-", "_")}'):
-                    return True
+        if flags & routes.ORDERS_OR_PAYMENTS and flags & routes.EXTERNAL:
+            return True
 
         # Conservative approach - only block explicitly restricted endpoints
         return False
@@ -247,7 +218,7 @@ class AdminHostRestrictionMiddleware(MiddlewareMixin):
 
     def process_request(self, request):
         # Only check admin paths
-        if not request.path.startswith("/admin/"):
+        if not get_route_flags(request) & routes.DJANGO_ADMIN:
             return None
 
         # Get the host from the request
@@ -0,0 +1,304 @@
+"""
+Request-level performance instrumentation.
+
+RequestMetricsMiddleware samples a REQUEST_METRICS['SAMPLE_RATE'] fraction of
+requests. For a sampled request a RequestMetrics is made current (in a
+context variable) and collects:
+
+- SQL query count and time, through a database execute_wrapper
+- cache hits and misses per tier, reported by CacheMonitor.record_tier_access
+- serializer time, from BaseModelSerializer.to_representation (outermost
+  serializer only, so nested serializers aren't counted twice)
+- response bytes
+
+The totals can be sent back as a Server-Timing header and are aggregated per
+route (method + URL pattern) into fixed-bucket duration histograms in
+RequestMetricsStore: one set per BUCKET_SECONDS, kept for WINDOW_SECONDS.
+Each worker publishes its aggregates to the default cache every
+PUBLISH_SECONDS, and collect() merges every worker's, for the request_metrics
+management command and the /api/metrics/requests/ endpoint.
+"""
+import contextvars
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+# Upper bounds (ms) of the duration histogram buckets; one more counts the overflow
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Counters for one sampled request; also the execute_wrapper that times its queries"""
+
+    __slots__ = ("sql_count", "sql_ms", "cache", "serializer_ms", "response_bytes", "_serializer_depth")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.cache: Dict[str, List[int]] = {}  # tier -> [hits, misses]
+        self.serializer_ms = 0.0
+        self.response_bytes = 0
+        self._serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_ms += (time.perf_counter() - start) * 1000
+
+    def record_cache(self, tier: str, hit: bool) -> None:
+        counters = self.cache.get(tier)
+        if counters is None:
+            counters = self.cache[tier] = [0, 0]
+        counters[0 if hit else 1] += 1
+
+    def server_timing(self, total_ms: float) -> str:
+        """Server-Timing header value"""
+        entries = [
+            f'db;dur={self.sql_ms:.1f};desc="{self.sql_count} queries"',
+            f"serializer;dur={self.serializer_ms:.1f}",
+        ]
+        for tier, (hits, misses) in sorted(self.cache.items()):
+            entries.append(f'cache-{tier};desc="{hits} hits, {misses} misses"')
+        entries.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(entries)
+
+
+@contextmanager
+def measure_request():
+    """Make a new RequestMetrics current for the block and time its queries on every connection"""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            yield metrics
+    finally:
+        _current.reset(token)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+def record_cache_access(tier: str, hit: bool) -> None:
+    """Count a cache hit or miss against the current request, if it is sampled"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.record_cache(tier, hit)
+
+
+def timed_serialization(to_representation):
+    """Decorator for Serializer.to_representation adding its time to the current request"""
+
+    @wraps(to_representation)
+    def wrapper(self, instance):
+        metrics = _current.get()
+        if metrics is None or metrics._serializer_depth:
+            return to_representation(self, instance)
+        metrics._serializer_depth = 1
+        start = time.perf_counter()
+        try:
+            return to_representation(self, instance)
+        finally:
+            metrics.serializer_ms += (time.perf_counter() - start) * 1000
+            metrics._serializer_depth = 0
+
+    return wrapper
+
+
+def _empty_route_stats() -> dict:
+    return {
+        "count": 0,
+        "errors": 0,
+        "duration_ms": 0.0,
+        "duration_histogram": [0] * (len(DURATION_BUCKETS_MS) + 1),
+        "sql_count": 0,
+        "sql_count_max": 0,
+        "sql_ms": 0.0,
+        "serializer_ms": 0.0,
+        "response_bytes": 0,
+        "cache": {},
+    }
+
+
+def _merge_route_stats(into: dict, stats: dict) -> None:
+    for field in ("count", "errors", "duration_ms", "sql_count", "sql_ms", "serializer_ms", "response_bytes"):
+        into[field] += stats[field]
+    into["sql_count_max"] = max(into["sql_count_max"], stats["sql_count_max"])
+    into["duration_histogram"] = [a + b for a, b in zip(into["duration_histogram"], stats["duration_histogram"])]
+    for tier, (hits, misses) in stats["cache"].items():
+        counters = into["cache"].setdefault(tier, [0, 0])
+        counters[0] += hits
+        counters[1] += misses
+
+
+def _histogram_percentile(histogram: List[int], fraction: float) -> Optional[float]:
+    """Upper bound (ms) of the bucket holding the given fraction of requests; None past the last bound"""
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    threshold = fraction * total
+    seen = 0
+    for i, count in enumerate(histogram):
+        seen += count
+        if seen >= threshold:
+            return DURATION_BUCKETS_MS[i] if i < len(DURATION_BUCKETS_MS) else None
+    return None
+
+
+def summarize(routes: Dict[str, dict]) -> List[dict]:
+    """Per-route rows (averages, percentile estimates, hit rates), slowest total time first"""
+    rows = []
+    for route, stats in routes.items():
+        count = stats["count"] or 1
+        rows.append({
+            "route": route,
+            "count": stats["count"],
+            "errors": stats["errors"],
+            "avg_ms": stats["duration_ms"] / count,
+            "p50_ms": _histogram_percentile(stats["duration_histogram"], 0.50),
+            "p95_ms": _histogram_percentile(stats["duration_histogram"], 0.95),
+            "p99_ms": _histogram_percentile(stats["duration_histogram"], 0.99),
+            "avg_sql_count": stats["sql_count"] / count,
+            "max_sql_count": stats["sql_count_max"],
+            "avg_sql_ms": stats["sql_ms"] / count,
+            "avg_serializer_ms": stats["serializer_ms"] / count,
+            "avg_response_bytes": stats["response_bytes"] / count,
+            "cache": {
+                tier: {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": (hits / (hits + misses)) * 100 if hits + misses else 0,
+                }
+                for tier, (hits, misses) in sorted(stats["cache"].items())
+            },
+            "duration_histogram": dict(zip(
+                [str(bound) for bound in DURATION_BUCKETS_MS] + ["inf"], stats["duration_histogram"]
+            )),
+        })
+    rows.sort(key=lambda row: row["avg_ms"] * row["count"], reverse=True)
+    return rows
+
+
+class RequestMetricsStore:
+    """
+    Per-process rolling aggregates of sampled requests, by time bucket and route.
+
+    Workers publish their buckets to the default cache under their own key and
+    list themselves in an index key; the index is read-modify-write, so a
+    concurrent publish can drop a worker from it until its next publish.
+    """
+
+    INDEX_KEY = "request_metrics:workers"
+
+    def __init__(self):
+        self._buckets: "OrderedDict[int, Dict[str, dict]]" = OrderedDict()  # bucket start -> route -> stats
+        self._lock = threading.Lock()
+        self._published_at = 0.0
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    @staticmethod
+    def _worker_key(worker_id) -> str:
+        return f"request_metrics:worker:{worker_id}"
+
+    def record(self, route: str, metrics: RequestMetrics, duration_ms: float, status_code: int) -> None:
+        config = settings.REQUEST_METRICS
+        now = time.time()
+        bucket = int(now // config["BUCKET_SECONDS"] * config["BUCKET_SECONDS"])
+        slot = len(DURATION_BUCKETS_MS)
+        for i, bound in enumerate(DURATION_BUCKETS_MS):
+            if duration_ms <= bound:
+                slot = i
+                break
+
+        with self._lock:
+            routes = self._buckets.get(bucket)
+            if routes is None:
+                routes = self._buckets[bucket] = {}
+                self._prune(now)
+            stats = routes.get(route)
+            if stats is None:
+                stats = routes[route] = _empty_route_stats()
+            stats["count"] += 1
+            stats["errors"] += status_code >= 500
+            stats["duration_ms"] += duration_ms
+            stats["duration_histogram"][slot] += 1
+            stats["sql_count"] += metrics.sql_count
+            stats["sql_count_max"] = max(stats["sql_count_max"], metrics.sql_count)
+            stats["sql_ms"] += metrics.sql_ms
+            stats["serializer_ms"] += metrics.serializer_ms
+            stats["response_bytes"] += metrics.response_bytes
+            for tier, (hits, misses) in metrics.cache.items():
+                counters = stats["cache"].setdefault(tier, [0, 0])
+                counters[0] += hits
+                counters[1] += misses
+
+        if now - self._published_at >= config["PUBLISH_SECONDS"]:
+            self.publish()
+
+    def _prune(self, now: float) -> None:
+        oldest = now - settings.REQUEST_METRICS["WINDOW_SECONDS"]
+        while self._buckets:
+            bucket = next(iter(self._buckets))
+            if bucket >= oldest:
+                break
+            self._buckets.popitem(last=False)
+
+    def snapshot(self) -> Dict[int, Dict[str, dict]]:
+        with self._lock:
+            self._prune(time.time())
+            return {
+                bucket: {route: {**stats, "cache": {t: list(c) for t, c in stats["cache"].items()}}
+                         for route, stats in routes.items()}
+                for bucket, routes in self._buckets.items()
+            }
+
+    def publish(self) -> None:
+        """Write this worker's aggregates to the shared cache"""
+        self._published_at = time.time()
+        timeout = settings.REQUEST_METRICS["WINDOW_SECONDS"]
+        cache.set(self._worker_key(self.worker_id), self.snapshot(), timeout)
+        workers = cache.get(self.INDEX_KEY) or []
+        if self.worker_id not in workers:
+            workers = [w for w in workers if cache.get(self._worker_key(w)) is not None]
+            workers.append(self.worker_id)
+            cache.set(self.INDEX_KEY, workers, None)
+
+    def collect(self, window_seconds: Optional[int] = None) -> Dict[str, dict]:
+        """Every published worker's aggregates over the last window_seconds, merged per route"""
+        oldest = time.time() - (window_seconds or settings.REQUEST_METRICS["WINDOW_SECONDS"])
+        workers = cache.get(self.INDEX_KEY) or []
+        snapshots = cache.get_many([self._worker_key(w) for w in workers]).values()
+
+        merged: Dict[str, dict] = {}
+        for snapshot in snapshots:
+            for bucket, routes in snapshot.items():
+                if bucket + settings.REQUEST_METRICS["BUCKET_SECONDS"] <= oldest:
+                    continue
+                for route, stats in routes.items():
+                    _merge_route_stats(merged.setdefault(route, _empty_route_stats()), stats)
+        return merged
+
+    def clear(self) -> None:
+        """Drop this process's aggregates (published snapshots expire on their own)"""
+        with self._lock:
+            self._buckets.clear()
+        self._published_at = 0.0
+
+
+request_metrics_store = RequestMetricsStore()
@@ -0,0 +1,55 @@
+"""
+Middleware recording request-level performance metrics (see request_metrics).
+"""
+import logging
+import random
+import time
+
+from django.conf import settings
+
+from .request_metrics import measure_request, request_metrics_store
+
+logger = logging.getLogger(__name__)
+
+
+def route_label(request) -> str:
+    """Method and URL pattern of the request (not its concrete path, which would split routes per id)"""
+    match = getattr(request, 'resolver_match', None)
+    route = match.route if match is not None and match.route else '<unresolved>'
+    return f"{request.method} /{route.lstrip('/')}"
+
+
+class RequestMetricsMiddleware:
+    """
+    Sample requests and record their SQL, cache, serializer and response metrics.
+
+    Only a REQUEST_METRICS['SAMPLE_RATE'] fraction of requests is measured;
+    the others pass straight through. Sampled responses get a Server-Timing
+    header when REQUEST_METRICS['SERVER_TIMING'] is on.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = settings.REQUEST_METRICS
+        sample_rate = config['SAMPLE_RATE']
+        if sample_rate <= 0 or (sample_rate < 1 and random.random() >= sample_rate):
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with measure_request() as metrics:
+            response = self.get_response(request)
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        try:
+            if not response.streaming:
+                metrics.response_bytes = len(response.content)
+            if config['SERVER_TIMING']:
+                response['Server-Timing'] = metrics.server_timing(duration_ms)
+            request_metrics_store.record(route_label(request), metrics, duration_ms, response.status_code)
+        except Exception as e:
+            # Metrics must never fail the request
+            logger.error(f"Failed to record request metrics: {e}")
+
+        return response
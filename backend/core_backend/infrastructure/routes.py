@@ -0,0 +1,119 @@
+"""
+Shared route classification for the request middlewares.
+
+TenantMiddleware, BusinessHoursMiddleware, CSRFApiMiddleware and
+AdminHostRestrictionMiddleware all decide what to do from the request path.
+Their exempt/restricted prefix lists live here in one ROUTES table, compiled
+at import into a dict keyed by prefix. Every prefix ends at a '/' boundary, so
+a path is classified by looking up each of its first few '/'-terminated
+prefixes (at most the depth of the deepest entry) instead of scanning every
+list with startswith.
+
+The flags are computed once per request by get_route_flags() and kept on the
+request as `request.route_flags`; each middleware reads them with a bitwise
+test:
+
+    if get_route_flags(request) & routes.TENANT_EXEMPT:
+        ...
+"""
+from typing import Dict, Iterable, Tuple
+
+# Path flags (plain ints so the per-request bit tests stay cheap)
+API = 1 << 0                        # /api/...
+DJANGO_ADMIN = 1 << 1               # Django admin (/admin/...)
+STATIC = 1 << 2                     # Static and media files
+TENANT_EXEMPT = 1 << 3              # Served without tenant context
+CSRF_EXEMPT = 1 << 4                # Skipped by CSRFApiMiddleware
+BUSINESS_HOURS_EXEMPT = 1 << 5      # Always allowed (browsing, cart management)
+BUSINESS_HOURS_RESTRICTED = 1 << 6  # Blocked during closed hours for web customers
+ORDERS_OR_PAYMENTS = 1 << 7         # Order/payment endpoints (external-request check)
+
+# Request flag, from headers rather than the path
+EXTERNAL = 1 << 8                   # Sent by the customer website/online ordering
+
+ROUTES: Tuple[Tuple[str, int], ...] = (
+    ("/api/", API),
+    ("/admin/", DJANGO_ADMIN | TENANT_EXEMPT),
+    ("/static/", STATIC),
+    ("/media/", STATIC),
+
+    # Authentication and security endpoints must work without tenant context
+    ("/api/users/login/pos/", TENANT_EXEMPT),                         # POS login
+    ("/api/users/login/admin/", TENANT_EXEMPT),                       # Admin login
+    ("/api/users/login/web/", TENANT_EXEMPT),                         # Web/customer login
+    ("/api/security/csrf/", TENANT_EXEMPT | CSRF_EXEMPT),             # CSRF token issuance
+    ("/api/terminals/pairing/device-authorization/", TENANT_EXEMPT),  # Device/terminal registration
+    ("/api/terminals/pairing/token/", TENANT_EXEMPT),                 # Device/terminal token polling (RFC 8628)
+    ("/api/payments/webhooks/", TENANT_EXEMPT | CSRF_EXEMPT),         # Payment provider webhooks (Stripe, etc.)
+    ("/api/health/", CSRF_EXEMPT),                                    # Health check
+
+    # Business hours: browsing and cart operations are allowed anytime
+    ("/api/cart/", BUSINESS_HOURS_EXEMPT),
+    ("/api/products/", BUSINESS_HOURS_EXEMPT),
+    ("/api/menu/", BUSINESS_HOURS_EXEMPT),
+    ("/api/categories/", BUSINESS_HOURS_EXEMPT),
+    ("/api/discounts/available/", BUSINESS_HOURS_EXEMPT),
+
+    # Business hours: order creation and payment processing are restricted
+    ("/api/orders/", ORDERS_OR_PAYMENTS),
+    ("/api/payments/", ORDERS_OR_PAYMENTS),
+    ("/api/orders/create/", BUSINESS_HOURS_RESTRICTED),
+    ("/api/orders/guest-order/", BUSINESS_HOURS_RESTRICTED),
+    ("/api/payments/initiate/", BUSINESS_HOURS_RESTRICTED),
+    ("/api/payments/guest/", BUSINESS_HOURS_RESTRICTED),
+    ("/api/orders/online/", BUSINESS_HOURS_RESTRICTED),
+    ("/api/orders/website/", BUSINESS_HOURS_RESTRICTED),
+)
+
+# Headers that indicate requests from customer website/external sources
+EXTERNAL_REQUEST_HEADERS = (
+    "HTTP_CUSTOMER_APP",       # Custom header from customer website
+    "HTTP_ONLINE_ORDERING",    # Custom header for online orders
+    "HTTP_WEBSITE_ORDER",      # Custom header for website orders
+)
+
+
+class RouteTable:
+    """Prefix -> flags table; a path gets the union of the flags of every prefix it starts with"""
+
+    def __init__(self, routes: Iterable[Tuple[str, int]]):
+        self._prefixes: Dict[str, int] = {}
+        self._max_depth = 0
+        for prefix, flags in routes:
+            if not (prefix.startswith("/") and prefix.endswith("/")):
+                raise ValueError(f"Route prefix must start and end with '/': {prefix!r}")
+            self._prefixes[prefix] = self._prefixes.get(prefix, 0) | flags
+            self._max_depth = max(self._max_depth, prefix.count("/") - 1)
+
+    def classify(self, path: str) -> int:
+        flags = 0
+        prefixes = self._prefixes
+        end = 0
+        for _ in range(self._max_depth):
+            end = path.find("/", end + 1)
+            if end == -1:
+                break
+            flags |= prefixes.get(path[:end + 1], 0)
+        return flags
+
+
+route_table = RouteTable(ROUTES)
+
+
+def classify_request(request) -> int:
+    """Path flags for the request plus EXTERNAL when an external-request header is set"""
+    flags = route_table.classify(request.path)
+    meta = request.META
+    for header in EXTERNAL_REQUEST_HEADERS:
+        if meta.get(header):
+            flags |= EXTERNAL
+            break
+    return flags
+
+
+def get_route_flags(request) -> int:
+    """Route flags of the request, classified on first use and kept on the request"""
+    flags = getattr(request, "route_flags", None)
+    if flags is None:
+        flags = request.route_flags = classify_request(request)
+    return flags
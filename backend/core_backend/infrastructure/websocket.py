@@ -0,0 +1,37 @@
+"""
+Encode-once helpers for channel-layer broadcasts.
+
+A group send reaches every consumer in the group; if each one rebuilds and
+``json.dumps`` the client frame, fan-out to N screens encodes the same data N
+times. Senders instead encode the frame once and put the text on the event;
+consumer handlers forward ``event["text"]`` verbatim.
+"""
+import json
+
+
+class RawJSON(str):
+    """Already-encoded JSON that encode_message splices in verbatim"""
+
+
+def encode_message(message):
+    """
+    ``json.dumps`` of a top-level dict, except RawJSON values are inserted as-is.
+
+    Lets a frame wrap a payload that was already encoded (e.g. for size
+    metrics) without encoding it a second time; the output is byte-identical
+    to ``json.dumps`` of the decoded message.
+    """
+    members = (
+        f"{json.dumps(key)}: {value if isinstance(value, RawJSON) else json.dumps(value)}"
+        for key, value in message.items()
+    )
+    return "{" + ", ".join(members) + "}"
+
+
+def pre_encoded_event(message, **fields):
+    """
+    Channel-layer event for ``message``, routed to the handler named by its
+    ``type``, carrying the client frame as text. Extra ``fields`` are event
+    metadata for the handlers and are not sent to clients.
+    """
+    return {"type": message["type"], "text": encode_message(message), **fields}
@@ -0,0 +1,86 @@
+"""
+Per-request benchmark of ProjectFilterBackend on list endpoints that filter
+through generated FilterSets (views that declare filterset_fields only).
+
+Each simulated request instantiates the backend, as DRF does, and runs
+filter_queryset on an unevaluated queryset, so no queries are executed.
+"before" clears ProjectFilterBackend.filterset_cache on every request, which
+rebuilds the FilterSet class the way every request used to; "after" serves
+it from the cache.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from business_hours.views import BusinessHoursProfileViewSet
+from core_backend.filter_backends import ProjectFilterBackend
+from inventory.views import InventoryStockViewSet, LocationViewSet
+from settings.views import PrinterViewSet
+from users.views import UserViewSet
+
+# (view class, list path, query params)
+LIST_ENDPOINTS = (
+    (InventoryStockViewSet, "/api/inventory/stock/", {}),
+    (LocationViewSet, "/api/inventory/locations/", {}),
+    (UserViewSet, "/api/users/", {"is_active": "true", "role": "CASHIER"}),
+    (PrinterViewSet, "/api/settings/printers/", {"is_active": "true"}),
+    (BusinessHoursProfileViewSet, "/api/business-hours/profiles/", {"is_active": "true"}),
+)
+
+
+def build_view(view_class, request):
+    view = view_class()
+    view.request = request
+    view.action = "list"
+    view.format_kwarg = None
+    view.args, view.kwargs = (), {}
+    return view
+
+
+def base_queryset(view_class):
+    model = view_class.queryset.model
+    manager = getattr(model, "all_objects", model._default_manager)
+    return manager.all()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ProjectFilterBackend per request on list endpoints with generated FilterSets, with and without the FilterSet cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=500,
+            help='Requests per endpoint (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        factory = RequestFactory()
+        endpoints = [
+            (view_class, Request(factory.get(path, params)), base_queryset(view_class))
+            for view_class, path, params in LIST_ENDPOINTS
+        ]
+
+        def run(view_class, request, queryset, cached):
+            if not cached:
+                ProjectFilterBackend.clear_filterset_cache()
+            view = build_view(view_class, request)
+            ProjectFilterBackend().filter_queryset(request, queryset, view)
+
+        self.stdout.write(f"{iterations} requests per endpoint")
+        self.stdout.write(f"  {'endpoint':<30} {'before':>12} {'after':>12}")
+        for view_class, request, queryset in endpoints:
+            timings = []
+            for cached in (False, True):
+                run(view_class, request, queryset, cached)  # warm up
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    run(view_class, request, queryset, cached)
+                timings.append((time.perf_counter() - start) * 1e6 / iterations)
+            self.stdout.write(
+                f"  {view_class.__name__:<30} {timings[0]:9.1f} us {timings[1]:9.1f} us"
+            )
+        ProjectFilterBackend.clear_filterset_cache()
@@ -0,0 +1,138 @@
+"""
+Micro-benchmark of the per-request path classification done by the middlewares.
+
+Compares, over a mix of representative request paths, the linear startswith
+checks TenantMiddleware, BusinessHoursMiddleware, CSRFApiMiddleware and
+AdminHostRestrictionMiddleware used to run (reproduced below as the
+"before" reference) against one classification through the shared route
+table in core_backend.infrastructure.routes ("after"). Both sides compute the
+same decisions; the command fails if they ever disagree.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from core_backend.infrastructure import routes
+from core_backend.infrastructure.routes import get_route_flags
+
+SAMPLE_REQUESTS = (
+    ("get", "/api/products/", {}),
+    ("get", "/api/products/42/", {}),
+    ("get", "/api/orders/", {}),
+    ("post", "/api/orders/create/", {}),
+    ("post", "/api/orders/guest-order/", {"HTTP_CUSTOMER_APP": "1"}),
+    ("patch", "/api/orders/123/items/", {"HTTP_ONLINE_ORDERING": "1"}),
+    ("post", "/api/payments/initiate/", {}),
+    ("post", "/api/payments/webhooks/stripe/", {}),
+    ("post", "/api/cart/add/", {}),
+    ("post", "/api/users/login/pos/", {}),
+    ("get", "/api/reports/sales/summary/", {}),
+    ("get", "/admin/orders/order/", {}),
+    ("get", "/static/css/app.css", {}),
+)
+
+# The lists the middlewares used to scan for every request
+_LEGACY_TENANT_EXEMPT = (
+    "/api/users/login/pos/",
+    "/api/users/login/admin/",
+    "/api/users/login/web/",
+    "/api/security/csrf/",
+    "/api/terminals/pairing/device-authorization/",
+    "/api/terminals/pairing/token/",
+    "/api/payments/webhooks/",
+)
+_LEGACY_CSRF_WHITELIST = ("/api/health/", "/api/security/csrf/", "/api/payments/webhooks/")
+_LEGACY_BUSINESS_HOURS_EXEMPT = [
+    "/api/cart/", "/api/products/", "/api/menu/", "/api/categories/", "/api/discounts/available/",
+]
+_LEGACY_BUSINESS_HOURS_RESTRICTED = [
+    "/api/orders/create/", "/api/orders/guest-order/", "/api/payments/initiate/",
+    "/api/payments/guest/", "/api/orders/online/", "/api/orders/website/",
+]
+_LEGACY_EXTERNAL_INDICATORS = ["customer-app", "online-ordering", "website-order"]
+
+
+def legacy_decisions(request):
+    """(admin_host_check, tenant_exempt, csrf_checked, business_hours_skip, business_hours_restrict)"""
+    path = request.path
+    admin = path.startswith("/admin/")
+    tenant_exempt = path.startswith("/admin/") or any(path.startswith(p) for p in _LEGACY_TENANT_EXEMPT)
+    csrf_checked = path.startswith("/api/") and not any(path.startswith(p) for p in _LEGACY_CSRF_WHITELIST)
+    bh_skip = path.startswith("/static/") or path.startswith("/media/") or path.startswith("/admin/")
+
+    restrict = False
+    for endpoint in _LEGACY_BUSINESS_HOURS_EXEMPT:
+        if path.startswith(endpoint):
+            break
+    else:
+        for endpoint in _LEGACY_BUSINESS_HOURS_RESTRICTED:
+            if path.startswith(endpoint):
+                restrict = True
+                break
+        else:
+            if path.startswith("/api/orders/") or path.startswith("/api/payments/"):
+                for indicator in _LEGACY_EXTERNAL_INDICATORS:
+                    if request.META.get(f'HTTP_{indicator.upper().replace("-", "_")}'):
+                        restrict = True
+                        break
+    return admin, tenant_exempt, csrf_checked, bh_skip, restrict
+
+
+def route_table_decisions(request):
+    """The same decisions, read from the request's route flags"""
+    flags = get_route_flags(request)
+    restrict = not flags & routes.BUSINESS_HOURS_EXEMPT and bool(
+        flags & routes.BUSINESS_HOURS_RESTRICTED
+        or (flags & routes.ORDERS_OR_PAYMENTS and flags & routes.EXTERNAL)
+    )
+    return (
+        bool(flags & routes.DJANGO_ADMIN),
+        bool(flags & routes.TENANT_EXEMPT),
+        bool(flags & routes.API) and not flags & routes.CSRF_EXEMPT,
+        bool(flags & (routes.STATIC | routes.DJANGO_ADMIN)),
+        restrict,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-request middleware path classification: legacy startswith scans vs the shared route table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20000,
+            help='Passes over the sample requests (default: 20000)',
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        factory = RequestFactory()
+        requests = [getattr(factory, method)(path, **headers) for method, path, headers in SAMPLE_REQUESTS]
+
+        for request in requests:
+            if legacy_decisions(request) != route_table_decisions(request):
+                raise CommandError(f"Route table disagrees with the legacy checks for {request.path}")
+
+        def run_legacy():
+            for request in requests:
+                legacy_decisions(request)
+
+        def run_route_table():
+            for request in requests:
+                # Each pass is a fresh request: classify it again
+                request.route_flags = None
+                route_table_decisions(request)
+
+        results = {}
+        for label, run in (('before (startswith scans)', run_legacy), ('after (route table)', run_route_table)):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                run()
+            elapsed = time.perf_counter() - start
+            results[label] = elapsed * 1e9 / (iterations * len(requests))
+
+        self.stdout.write(f"{len(requests)} sample requests x {iterations} iterations")
+        for label, ns_per_request in results.items():
+            self.stdout.write(f"  {label:<28} {ns_per_request:8.0f} ns/request")
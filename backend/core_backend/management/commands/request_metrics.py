@@ -0,0 +1,75 @@
+"""
+Show per-route request metrics published by the workers (see
+core_backend.infrastructure.request_metrics).
+"""
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core_backend.infrastructure.request_metrics import (
+    DURATION_BUCKETS_MS, request_metrics_store, summarize
+)
+
+
+class Command(BaseCommand):
+    help = 'Show per-route request metrics (latency percentiles, SQL, cache, serializer time, bytes) from sampled requests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window',
+            type=int,
+            default=None,
+            help='Seconds to look back (default: REQUEST_METRICS["WINDOW_SECONDS"])',
+        )
+        parser.add_argument(
+            '--route',
+            default=None,
+            help='Only routes containing this text',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Number of routes to show, by total time (default: 20)',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the full rows as JSON',
+        )
+
+    def handle(self, *args, **options):
+        rows = summarize(request_metrics_store.collect(options['window']))
+        if options['route']:
+            rows = [row for row in rows if options['route'] in row['route']]
+        rows = rows[:options['limit']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+
+        if not rows:
+            self.stdout.write(
+                f"No sampled requests (SAMPLE_RATE={settings.REQUEST_METRICS['SAMPLE_RATE']})"
+            )
+            return
+
+        def ms(value):
+            return f"{value:.0f}" if value is not None else f">{DURATION_BUCKETS_MS[-1]}"
+
+        self.stdout.write(
+            f"{'route':<50} {'count':>6} {'avg ms':>7} {'p50':>6} {'p95':>6} {'p99':>6} "
+            f"{'sql':>5} {'max':>4} {'sql ms':>7} {'ser ms':>7} {'KB':>7}  cache hit %"
+        )
+        for row in rows:
+            cache_rates = " ".join(
+                f"{tier}:{stats['hit_rate']:.0f}" for tier, stats in row['cache'].items()
+            ) or "-"
+            self.stdout.write(
+                f"{row['route'][:50]:<50} {row['count']:>6} {row['avg_ms']:>7.1f} "
+                f"{ms(row['p50_ms']):>6} {ms(row['p95_ms']):>6} {ms(row['p99_ms']):>6} "
+                f"{row['avg_sql_count']:>5.1f} {row['max_sql_count']:>4} {row['avg_sql_ms']:>7.1f} "
+                f"{row['avg_serializer_ms']:>7.1f} {row['avg_response_bytes'] / 1024:>7.1f}  {cache_rates}"
+            )
+
@@ -90,6 +90,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "core_backend.infrastructure.request_metrics_middleware.RequestMetricsMiddleware",  # Sampled per-request SQL/cache/serializer metrics
     "core_backend.infrastructure.middleware.AdminHostRestrictionMiddleware",  # Restrict admin to system subdomain only
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -562,6 +563,119 @@ SESSION_COOKIE_AGE = 3600 * 8  # 8 hours
 # Cache versioning for deployments
 CACHE_VERSION = os.getenv("CACHE_VERSION", 1)
 
+# Cache invalidation strategy for simple_cache families:
+# "generation" bumps a per-tenant counter folded into keys (one INCR, no SCAN),
+# "pattern" deletes matching keys with django-redis delete_pattern (SCAN).
+CACHE_INVALIDATION_MODE = os.getenv("CACHE_INVALIDATION_MODE", "generation")
+
+# Per-worker L1 tier in front of Redis for immutable cached values: simple_cache
+# functions that opt in with use_l1=True (the product projections), the POS menu
+# snapshot and the tax rate table. Only active in generation mode, where the
+# generation in the key keeps it coherent.
+CACHE_L1 = {
+    "ENABLED": os.getenv("CACHE_L1_ENABLED", "True").lower() == "true",
+    "MAX_ENTRIES": int(os.getenv("CACHE_L1_MAX_ENTRIES", 256)),
+    "TIMEOUT": int(os.getenv("CACHE_L1_TIMEOUT", 60)),  # seconds
+}
+
+# Stampede protection for simple_cache / advanced_cache(warm_on_miss=True)
+CACHE_STAMPEDE = {
+    "LOCK_TIMEOUT": 30,  # seconds a fill/refresh lock is held at most
+    "WAIT_TIMEOUT": 5,  # seconds lock losers wait for the holder's result
+    "POLL_INTERVAL": 0.05,  # seconds between polls while waiting
+    "BACKGROUND_REFRESH": True,  # refresh stale entries in a daemon thread
+}
+
+# Report cache invalidation from order saves is collected per transaction and
+# flushed on commit. DEBOUNCE_SECONDS > 0 additionally coalesces flushes across
+# transactions into one Celery task per window (0 = flush inline on commit).
+REPORT_INVALIDATION = {
+    "DEBOUNCE_SECONDS": int(os.getenv("REPORT_INVALIDATION_DEBOUNCE_SECONDS", "0")),
+}
+
+# Tenant settings (GlobalSettings + PrinterConfiguration) are served from
+# immutable per-tenant snapshots in a per-process LRU of SNAPSHOT_CACHE_SIZE
+# tenants. Saves bump the tenant's version counter in the default cache; each
+# worker compares its snapshot's version at most every VERSION_CHECK_SECONDS.
+TENANT_SETTINGS = {
+    "SNAPSHOT_CACHE_SIZE": int(os.getenv("TENANT_SETTINGS_CACHE_SIZE", "512")),
+    "VERSION_CHECK_SECONDS": float(os.getenv("TENANT_SETTINGS_VERSION_CHECK_SECONDS", "1.0")),
+}
+
+# Tenant resolution (TenantMiddleware, TenantWebSocketMiddleware) reads from a
+# per-process registry of all tenants and verified custom domains. The registry
+# is reloaded after TTL_SECONDS, or when Tenant/CustomDomain saves bump its
+# version counter in the default cache, checked at most every VERSION_CHECK_SECONDS.
+TENANT_REGISTRY = {
+    "TTL_SECONDS": int(os.getenv("TENANT_REGISTRY_TTL_SECONDS", "300")),
+    "VERSION_CHECK_SECONDS": float(os.getenv("TENANT_REGISTRY_VERSION_CHECK_SECONDS", "1.0")),
+}
+
+# Access tokens are verified once per request/connection into an AuthContext
+# shared by TenantMiddleware, CookieJWTAuthentication and the WebSocket
+# middlewares. With USER_CACHE_ENABLED, the authenticated user is cached for
+# USER_CACHE_TTL_SECONDS under (user_id, token_version); saving or deleting the
+# user bumps its token version.
+AUTH_CONTEXT = {
+    "USER_CACHE_ENABLED": os.getenv("AUTH_USER_CACHE_ENABLED", "False").lower() == "true",
+    "USER_CACHE_TTL_SECONDS": int(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "30")),
+}
+
+# Business hours are answered from per-profile compiled schedules: sorted
+# open/close intervals over HORIZON_DAYS (must exceed the 30-day next-opening
+# search), held in a per-process LRU of CACHE_SIZE profiles. Saves bump the
+# profile's schedule version in the default cache; each worker compares it at
+# most every VERSION_CHECK_SECONDS.
+BUSINESS_HOURS_SCHEDULE = {
+    "HORIZON_DAYS": int(os.getenv("BUSINESS_HOURS_HORIZON_DAYS", "60")),
+    "CACHE_SIZE": int(os.getenv("BUSINESS_HOURS_SCHEDULE_CACHE_SIZE", "256")),
+    "VERSION_CHECK_SECONDS": float(os.getenv("BUSINESS_HOURS_VERSION_CHECK_SECONDS", "1.0")),
+}
+
+# RequestMetricsMiddleware measures a SAMPLE_RATE fraction of requests (SQL
+# count/time, cache hits/misses per tier, serializer time, response bytes) and
+# aggregates them per route into histograms per BUCKET_SECONDS, kept for
+# WINDOW_SECONDS. Workers publish their aggregates to the default cache every
+# PUBLISH_SECONDS for `manage.py request_metrics` and /api/metrics/requests/.
+# SERVER_TIMING adds a Server-Timing header to sampled responses; it exposes
+# query counts to clients, so it follows DEBUG unless set explicitly.
+REQUEST_METRICS = {
+    "SAMPLE_RATE": float(os.getenv("REQUEST_METRICS_SAMPLE_RATE", "0.01")),
+    "SERVER_TIMING": os.getenv("REQUEST_METRICS_SERVER_TIMING", str(DEBUG)).lower() == "true",
+    "BUCKET_SECONDS": int(os.getenv("REQUEST_METRICS_BUCKET_SECONDS", "60")),
+    "WINDOW_SECONDS": int(os.getenv("REQUEST_METRICS_WINDOW_SECONDS", "3600")),
+    "PUBLISH_SECONDS": float(os.getenv("REQUEST_METRICS_PUBLISH_SECONDS", "10")),
+}
+
+# Item add/update/remove move order totals by the changed lines' deltas instead
+# of a full recalculation, unless discounts or one-off adjustments make the
+# change non-local. VERIFY_ON_COMPLETE checks every completed order against a
+# full recalculation; the periodic sweep repairs open orders edited within
+# VERIFY_WINDOW_MINUTES. Saving a tenant's settings recalculates its open orders
+# in Celery tasks of CONFIG_RECALC_CHUNK_SIZE orders each.
+ORDER_CALCULATION = {
+    "INCREMENTAL_TOTALS": os.getenv("ORDER_INCREMENTAL_TOTALS", "True").lower() == "true",
+    "VERIFY_ON_COMPLETE": os.getenv("ORDER_VERIFY_TOTALS_ON_COMPLETE", "True").lower() == "true",
+    "VERIFY_WINDOW_MINUTES": int(os.getenv("ORDER_VERIFY_WINDOW_MINUTES", "30")),
+    "CONFIG_RECALC_CHUNK_SIZE": int(os.getenv("ORDER_CONFIG_RECALC_CHUNK_SIZE", "50")),
+}
+
+# Opt-in delta protocol for the order cart WebSocket. Clients connecting with
+# ?protocol=delta receive versioned RFC 6902 patches ("cart_patch") against the
+# last state broadcast to the order group, and send "resync" to get a full
+# snapshot after a version gap. The group state lives in the default cache.
+# A "batch" message applies up to MAX_BATCH_OPERATIONS item operations with one
+# recalculation and broadcast; with COALESCE_WINDOW_MS > 0, item messages that
+# arrive on a connection within that window are batched the same way. Coalesced
+# messages that fail still get their own error/stock_error reply, but the
+# applied ones share one cart_update tagged with the last applied operationId.
+ORDER_WEBSOCKET = {
+    "DELTA_PROTOCOL": os.getenv("ORDER_WS_DELTA_PROTOCOL", "True").lower() == "true",
+    "STATE_TTL_SECONDS": int(os.getenv("ORDER_WS_STATE_TTL_SECONDS", "3600")),
+    "MAX_BATCH_OPERATIONS": int(os.getenv("ORDER_WS_MAX_BATCH_OPERATIONS", "100")),
+    "COALESCE_WINDOW_MS": int(os.getenv("ORDER_WS_COALESCE_WINDOW_MS", "0")),
+}
+
 # Logging configuration
 LOGGING = {
     "version": 1,
@@ -906,6 +1020,9 @@ CELERY_TASK_ROUTES = {
         "queue": "maintenance"
     },
     "core_backend.infrastructure.tasks.backup_database": {"queue": "maintenance"},
+    # Order totals verification
+    "orders.tasks.verify_completed_order_totals": {"queue": "maintenance"},
+    "orders.tasks.verify_open_order_totals": {"queue": "maintenance"},
     # Approval management tasks
     "approvals.tasks.expire_pending_approvals": {"queue": "maintenance"},
     "approvals.tasks.cleanup_old_approvals": {"queue": "maintenance"},
@@ -947,6 +1064,12 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(hour=5, minute=0, day_of_week=0),  # Every Sunday at 2:00 AM
         "options": {"expires": 7200},  # Task expires after 2 hours if not run
     },
+    # Full recalculation check of incrementally maintained order totals
+    "verify-open-order-totals": {
+        "task": "orders.tasks.verify_open_order_totals",
+        "schedule": 900.0,  # Every 15 minutes
+        "options": {"expires": 600},
+    },
     # ========================================================================
     # COMPREHENSIVE CACHE WARMING TASKS
     # ========================================================================
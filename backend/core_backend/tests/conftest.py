@@ -39,6 +39,9 @@ def clear_cache_after_test():
     yield  # Run the test
     cache.clear()  # Clear all cache keys
 
+    from core_backend.infrastructure.cache import LocalCacheTier
+    LocalCacheTier.clear()  # Per-worker L1 entries outlive cache.clear()
+
 
 # ============================================================================
 # OPTIONAL FIXTURES (Use explicitly when needed)
@@ -216,6 +216,28 @@ def modifier_option_tenant_a(tenant_a, modifier_set_tenant_a):
     )
 
 
+@pytest.fixture
+def menu_tenant_a(tenant_a, category_tenant_a, product_type_tenant_a, tax_rate_tenant_a):
+    """Products covering each tax source: direct tax, product type default tax, location rate"""
+    set_current_tenant(tenant_a)
+    drinks = ProductType.objects.create(name='Drinks', tenant=tenant_a)
+    drinks.default_taxes.add(Tax.objects.create(name='Beverage Tax', rate=Decimal('0.05'), tenant=tenant_a))
+
+    taxed = Product.objects.create(
+        name='Garlic Knots', price=Decimal('3.33'), tenant=tenant_a,
+        category=category_tenant_a, product_type=product_type_tenant_a
+    )
+    taxed.taxes.add(tax_rate_tenant_a)
+    soda = Product.objects.create(
+        name='Soda', price=Decimal('7.49'), tenant=tenant_a, category=category_tenant_a, product_type=drinks
+    )
+    plain = Product.objects.create(
+        name='Breadstick', price=Decimal('2.15'), tenant=tenant_a,
+        category=category_tenant_a, product_type=product_type_tenant_a
+    )
+    return [taxed, soda, plain]
+
+
 # ============================================================================
 # ORDER FIXTURES
 # ============================================================================
@@ -644,3 +666,35 @@ def csrf_exempt_client():
     """
     from rest_framework.test import APIClient
     return APIClient()
+
+
+# ============================================================================
+# CACHE FAILURE FIXTURES
+# ============================================================================
+
+class _UnavailableCache:
+    """Cache whose every operation fails, like Redis during an outage"""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("cache unavailable")
+        return fail
+
+
+@pytest.fixture
+def cache_unavailable(monkeypatch):
+    """
+    Make every cache handed out by AdvancedCacheManager fail.
+
+    Usage:
+        def test_outage(cache_unavailable, tenant_a):
+            # generations read as None, bumps return False
+            ...
+    """
+    from core_backend.infrastructure.cache import AdvancedCacheManager
+
+    # Failures trip the circuit breaker; keep that state local to the test
+    monkeypatch.setattr(AdvancedCacheManager, '_circuit_breaker_state', {})
+    monkeypatch.setattr(
+        AdvancedCacheManager, 'get_cache', classmethod(lambda cls, cache_name='default': _UnavailableCache())
+    )
@@ -0,0 +1,130 @@
+"""
+Pytest plugin enforcing the query budgets in core_backend.tests.query_budgets.
+
+The `query_budget_runner` fixture requests a budget's endpoint at its small
+and large data size. Every query is attributed to its ORM call site: the
+innermost frame in project code (outside this plugin and the builders), plus
+the serializer field being rendered when it ran. A budget fails when the
+large size runs more queries than the small one (beyond `allowed_growth`) or
+more than `max_queries`; the failure, and the terminal summary at the end of
+the run, list the call sites whose query count grew with N.
+"""
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+import pytest
+from django.conf import settings
+from django.db import connections
+
+PROJECT_ROOT = str(Path(settings.BASE_DIR).resolve())
+_IGNORED_FILES = {
+    str(Path(__file__).resolve()),
+    str(Path(__file__).with_name('query_budgets.py').resolve()),
+}
+_TABLE_RE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+"?(\w+)"?', re.IGNORECASE)
+
+_failed_budgets = []
+
+
+def _call_site():
+    """
+    file:line (function) of the innermost project frame running the ORM,
+    followed by the serializer field being rendered, if any: relations loaded
+    lazily by DRF fields otherwise all point at the same base serializer line.
+    """
+    site = '<framework>'
+    serializer_field = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            site == '<framework>'
+            and filename.startswith(PROJECT_ROOT)
+            and 'site-packages' not in filename
+            and filename not in _IGNORED_FILES
+        ):
+            relative = filename[len(PROJECT_ROOT):].lstrip('/')
+            site = f"{relative}:{frame.f_lineno} ({frame.f_code.co_name})"
+        if serializer_field is None and frame.f_code.co_name == 'to_representation':
+            field = frame.f_locals.get('field')
+            if getattr(field, 'field_name', None):
+                serializer_field = f"{type(frame.f_locals['self']).__name__}.{field.field_name}"
+        frame = frame.f_back
+    return f"{site} {serializer_field}" if serializer_field else site
+
+
+class QueryRecorder:
+    """execute_wrapper counting queries per (call site, table)"""
+
+    def __init__(self):
+        self.sites = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        match = _TABLE_RE.search(sql)
+        self.sites[(_call_site(), match.group(1) if match else '?')] += 1
+        return execute(sql, params, many, context)
+
+    @property
+    def total(self):
+        return sum(self.sites.values())
+
+
+def record_queries(client, path):
+    """Request `path` once to warm caches, then again under a QueryRecorder"""
+    warm_up = client.get(path)
+    assert warm_up.status_code == 200, f"GET {path} returned {warm_up.status_code}"
+
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        response = client.get(path)
+    assert response.status_code == 200, f"GET {path} returned {response.status_code}"
+    return recorder
+
+
+def growth_report(budget, small, large):
+    """Call sites whose query count grew between the two sizes, largest growth first"""
+    small_n, large_n = budget.sizes
+    lines = [
+        f"{budget.name} (GET {budget.path}): {small.total} queries at N={small_n}, "
+        f"{large.total} at N={large_n} (budget {budget.max_queries}, allowed growth {budget.allowed_growth})"
+    ]
+    grown = large.sites.copy()
+    grown.subtract(small.sites)
+    for (site, table), extra in sorted(grown.items(), key=lambda item: -item[1]):
+        if extra > 0:
+            lines.append(f"  +{extra:<3} {table:<40} {site}")
+    return "\n".join(lines)
+
+
+@pytest.fixture
+def query_budget_runner(db):
+    """Check a QueryBudget: run(budget, context, client) fails with a call-site report"""
+
+    def run(budget, context, client):
+        small_n, large_n = budget.sizes
+        budget.build(context, small_n)
+        small = record_queries(client, budget.path)
+        budget.build(context, large_n - small_n)
+        large = record_queries(client, budget.path)
+
+        growth = large.total - small.total
+        if growth > budget.allowed_growth or large.total > budget.max_queries:
+            report = growth_report(budget, small, large)
+            _failed_budgets.append(report)
+            pytest.fail(f"Query budget exceeded\n{report}", pytrace=False)
+        return small, large
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _failed_budgets:
+        return
+    terminalreporter.section('query budgets exceeded')
+    for report in _failed_budgets:
+        terminalreporter.write_line(report)
@@ -0,0 +1,228 @@
+"""
+Query budgets for list endpoints.
+
+Each QueryBudget names an endpoint, a builder that adds `n` rows behind it,
+the two data sizes to request it at, and the most queries it may run. The
+query_budget_plugin requests the endpoint at both sizes: the query count must
+not grow with N (beyond `allowed_growth`) and must stay within `max_queries`.
+
+Builders create every row with its own related objects (order, payment,
+product, user...), so a relation the view forgets to select_related or
+prefetch shows up as one extra query per row.
+
+To cover a new endpoint, add a builder and a QueryBudget to BUDGETS;
+test_query_budgets picks it up.
+"""
+import itertools
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Callable, Tuple
+
+from django.utils import timezone
+
+from approvals.models import ActionType, ManagerApprovalRequest
+from inventory.models import InventoryStock
+from orders.models import Order, OrderItem
+from payments.models import Payment, PaymentTransaction
+from products.models import Product
+from refunds.models import ExchangeSession, RefundAuditLog, RefundItem
+from reports.models import ReportType, SavedReport
+from users.models import User
+
+_sequence = itertools.count(1)
+
+
+@dataclass
+class BudgetContext:
+    """Tenant-A objects shared by the builders"""
+    tenant: Any
+    user: Any
+    store_location: Any
+    category: Any
+    product_type: Any
+    location: Any
+    customer: Any = None
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    name: str
+    path: str
+    build: Callable[[BudgetContext, int], None]
+    max_queries: int
+    sizes: Tuple[int, int] = (2, 8)
+    allowed_growth: int = 0
+    # 'staff' requests as the tenant admin, 'customer' with the customer's cookie
+    auth: str = 'staff'
+
+
+# ============================================================================
+# BUILDERS
+# ============================================================================
+
+def _product(ctx):
+    return Product.objects.create(
+        tenant=ctx.tenant,
+        name=f'Budget Product {next(_sequence)}',
+        price=Decimal('10.00'),
+        category=ctx.category,
+        product_type=ctx.product_type,
+        is_active=True,
+    )
+
+
+def _cashier(ctx):
+    number = next(_sequence)
+    return User.objects.create_user(
+        email=f'budget-cashier-{number}@test.com',
+        username=f'budget-cashier-{number}',
+        password='password123',
+        tenant=ctx.tenant,
+        role=User.Role.CASHIER,
+        is_pos_staff=True,
+    )
+
+
+def _paid_order(ctx, customer=None):
+    """A completed order with one item, its payment and a successful transaction"""
+    number = next(_sequence)
+    order = Order.objects.create(
+        tenant=ctx.tenant,
+        store_location=ctx.store_location,
+        order_number=f'QB-{number}',
+        order_type=Order.OrderType.POS,
+        status=Order.OrderStatus.COMPLETED,
+        cashier=_cashier(ctx),
+        customer=customer,
+        subtotal=Decimal('20.00'),
+        tax_total=Decimal('2.00'),
+        grand_total=Decimal('22.00'),
+    )
+    order_item = OrderItem.objects.create(
+        tenant=ctx.tenant,
+        order=order,
+        product=_product(ctx),
+        quantity=2,
+        price_at_sale=Decimal('10.00'),
+        status=OrderItem.ItemStatus.SERVED,
+        tax_amount=Decimal('2.00'),
+    )
+    payment = Payment.objects.create(
+        tenant=ctx.tenant,
+        order=order,
+        payment_number=f'QB-PAY-{number}',
+        status=Payment.PaymentStatus.PAID,
+        total_amount_due=Decimal('22.00'),
+        amount_paid=Decimal('22.00'),
+    )
+    transaction = PaymentTransaction.objects.create(
+        tenant=ctx.tenant,
+        payment=payment,
+        transaction_id=f'qb_txn_{uuid.uuid4()}',
+        amount=Decimal('22.00'),
+        method=PaymentTransaction.PaymentMethod.CARD_ONLINE,
+        status=PaymentTransaction.TransactionStatus.SUCCESSFUL,
+    )
+    return order, order_item, payment, transaction
+
+
+def build_refund_items(ctx, n):
+    for _ in range(n):
+        _, order_item, _, transaction = _paid_order(ctx)
+        RefundItem.objects.create(
+            tenant=ctx.tenant,
+            payment_transaction=transaction,
+            order_item=order_item,
+            quantity_refunded=1,
+            amount_per_unit=Decimal('10.00'),
+            total_refund_amount=Decimal('11.00'),
+        )
+
+
+def build_refund_audit_logs(ctx, n):
+    for _ in range(n):
+        _, _, payment, transaction = _paid_order(ctx)
+        RefundAuditLog.objects.create(
+            tenant=ctx.tenant,
+            payment=payment,
+            payment_transaction=transaction,
+            action='refund_completed',
+            source='POS',
+            refund_amount=Decimal('11.00'),
+            initiated_by=_cashier(ctx),
+            status='success',
+        )
+
+
+def build_exchange_sessions(ctx, n):
+    for _ in range(n):
+        order, _, payment, _ = _paid_order(ctx)
+        ExchangeSession.objects.create(
+            tenant=ctx.tenant,
+            original_order=order,
+            original_payment=payment,
+            processed_by=_cashier(ctx),
+            session_status='initiated',
+            refund_amount=Decimal('11.00'),
+        )
+
+
+def build_approval_requests(ctx, n):
+    for _ in range(n):
+        order, order_item, _, _ = _paid_order(ctx)
+        ManagerApprovalRequest.objects.create(
+            tenant=ctx.tenant,
+            store_location=ctx.store_location,
+            initiator=_cashier(ctx),
+            action_type=ActionType.ORDER_VOID,
+            order=order,
+            order_item=order_item,
+            reason='Query budget',
+            expires_at=timezone.now() + timedelta(minutes=30),
+        )
+
+
+def build_inventory_stock(ctx, n):
+    for _ in range(n):
+        InventoryStock.objects.create(
+            tenant=ctx.tenant,
+            store_location=ctx.store_location,
+            product=_product(ctx),
+            location=ctx.location,
+            quantity=Decimal('25.00'),
+        )
+
+
+def build_customer_orders(ctx, n):
+    for _ in range(n):
+        _paid_order(ctx, customer=ctx.customer)
+
+
+def build_saved_reports(ctx, n):
+    for _ in range(n):
+        SavedReport.objects.create(
+            tenant=ctx.tenant,
+            store_location=ctx.store_location,
+            user=ctx.user,
+            name=f'Budget Report {next(_sequence)}',
+            report_type=ReportType.SALES,
+            parameters={'start_date': '2024-01-01', 'end_date': '2024-01-31'},
+        )
+
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+BUDGETS = (
+    QueryBudget('refund-items', '/api/refunds/items/', build_refund_items, max_queries=4),
+    QueryBudget('refund-audit-logs', '/api/refunds/audit-logs/', build_refund_audit_logs, max_queries=4),
+    QueryBudget('exchange-sessions', '/api/refunds/exchanges/', build_exchange_sessions, max_queries=4),
+    QueryBudget('approval-requests', '/api/approvals/requests/', build_approval_requests, max_queries=4),
+    QueryBudget('inventory-stock', '/api/inventory/stock/', build_inventory_stock, max_queries=4),
+    QueryBudget('customer-orders', '/api/customers/orders/', build_customer_orders, max_queries=4,
+                auth='customer'),
+    QueryBudget('saved-reports', '/api/reports/saved-reports/', build_saved_reports, max_queries=4),
+)
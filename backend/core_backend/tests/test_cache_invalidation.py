@@ -0,0 +1,251 @@
+"""
+Cache Invalidation Tests
+
+Tests generation-counter invalidation for simple_cache families and the
+per-worker L1 tier that relies on it for coherence.
+
+Test Categories:
+1. Generation Counter Invalidation (7 tests)
+2. Pattern Mode Compatibility (1 test)
+3. L1 Tier Coherence (5 tests)
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from tenant.managers import set_current_tenant
+from core_backend.infrastructure.cache import AdvancedCacheManager, CacheMonitor, LocalCacheTier
+from core_backend.infrastructure.cache_utils import (
+    cache_static_data,
+    simple_cache,
+    invalidate_cache_pattern,
+)
+
+
+CALLS = []
+
+
+@simple_cache(timeout=300, key_prefix='test', log_performance=False)
+def cached_generation_probe(value):
+    CALLS.append(value)
+    return {'value': value, 'call': len(CALLS)}
+
+
+@simple_cache(timeout=300, key_prefix='test', log_performance=False, use_l1=True)
+def cached_l1_probe(value):
+    CALLS.append(value)
+    return {'value': value, 'call': len(CALLS)}
+
+
+@cache_static_data(log_performance=False)
+def cached_static_probe(value):
+    CALLS.append(value)
+    return {'value': value, 'call': len(CALLS)}
+
+
+class FirstProbeOwner:
+    @staticmethod
+    @simple_cache(timeout=300, key_prefix='test', log_performance=False)
+    def shared_name_probe(value):
+        CALLS.append(('first', value))
+        return 'first'
+
+
+class SecondProbeOwner:
+    @staticmethod
+    @simple_cache(timeout=300, key_prefix='test', log_performance=False)
+    def shared_name_probe(value):
+        CALLS.append(('second', value))
+        return 'second'
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    CALLS.clear()
+    LocalCacheTier.clear()
+    yield
+    CALLS.clear()
+
+
+# ============================================================================
+# GENERATION COUNTER INVALIDATION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestGenerationInvalidation:
+    """Test that invalidation bumps family generations instead of scanning keys."""
+
+    def test_invalidation_forces_recompute(self, tenant_a):
+        set_current_tenant(tenant_a)
+        first = cached_generation_probe(1)
+        assert cached_generation_probe(1) == first
+        assert len(CALLS) == 1
+
+        invalidate_cache_pattern('*cached_generation_probe*', tenant=tenant_a)
+
+        second = cached_generation_probe(1)
+        assert len(CALLS) == 2
+        assert second['call'] == 2
+
+    def test_invalidation_is_tenant_scoped(self, tenant_a, tenant_b):
+        set_current_tenant(tenant_a)
+        cached_generation_probe(1)
+        set_current_tenant(tenant_b)
+        cached_generation_probe(1)
+        assert len(CALLS) == 2
+
+        invalidate_cache_pattern('*cached_generation_probe*', tenant=tenant_a)
+
+        # Tenant 2 keeps its entry
+        cached_generation_probe(1)
+        assert len(CALLS) == 2
+
+        # Tenant 1 recomputes
+        set_current_tenant(tenant_a)
+        cached_generation_probe(1)
+        assert len(CALLS) == 3
+
+    def test_invalidation_does_not_scan_keyspace(self, tenant_a):
+        set_current_tenant(tenant_a)
+        cached_generation_probe(1)
+
+        with patch.object(AdvancedCacheManager, 'invalidate_pattern') as mock_scan:
+            assert invalidate_cache_pattern('cached_generation_probe', tenant=tenant_a) is True
+
+        mock_scan.assert_not_called()
+
+    def test_unmatched_pattern_leaves_families_untouched(self, tenant_a):
+        set_current_tenant(tenant_a)
+        cached_generation_probe(1)
+        family = cached_generation_probe.cache_family
+        generation = AdvancedCacheManager.get_generation(family, str(tenant_a.id))
+
+        invalidate_cache_pattern('*product_12345*', tenant=tenant_a)
+
+        assert AdvancedCacheManager.get_generation(family, str(tenant_a.id)) == generation
+        cached_generation_probe(1)
+        assert len(CALLS) == 1
+
+    def test_unmatched_pattern_falls_back_to_pattern_deletion(self, tenant_a):
+        set_current_tenant(tenant_a)
+        with patch.object(AdvancedCacheManager, 'invalidate_pattern', return_value=True) as mock_scan:
+            assert invalidate_cache_pattern('*product_12345*', tenant=tenant_a) is True
+
+        assert mock_scan.call_count == 2
+        assert mock_scan.call_args_list[0].args[0] == f"**product_12345**tenant_id={tenant_a.id}*"
+
+    def test_same_named_functions_have_separate_families(self, tenant_a):
+        set_current_tenant(tenant_a)
+        assert FirstProbeOwner.shared_name_probe.cache_family != SecondProbeOwner.shared_name_probe.cache_family
+
+        FirstProbeOwner.shared_name_probe(1)
+        SecondProbeOwner.shared_name_probe(1)
+        invalidate_cache_pattern('*FirstProbeOwner.shared_name_probe*', tenant=tenant_a)
+
+        assert FirstProbeOwner.shared_name_probe(1) == 'first'
+        assert SecondProbeOwner.shared_name_probe(1) == 'second'
+        assert CALLS == [('first', 1), ('second', 1), ('first', 1)]
+
+    def test_product_cache_invalidation_goes_through_generations(self, tenant_a):
+        set_current_tenant(tenant_a)
+        from products.models import Product, ProductType
+        from products.services import ProductService
+
+        product_type = ProductType.objects.create(name="Food", tenant=tenant_a)
+        Product.objects.create(
+            name="Pizza", price=Decimal('10.00'), product_type=product_type, tenant=tenant_a
+        )
+
+        assert len(ProductService.get_cached_products_list()) == 1
+        with CaptureQueriesContext(connection) as ctx:
+            ProductService.get_cached_products_list()
+        assert len(ctx) == 0
+
+        ProductService.invalidate_product_cache(product_id=1, tenant=tenant_a)
+
+        with CaptureQueriesContext(connection) as ctx:
+            ProductService.get_cached_products_list()
+        assert len(ctx) > 0, "Invalidated family should be recomputed"
+
+
+# ============================================================================
+# PATTERN MODE COMPATIBILITY TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestPatternModeInvalidation:
+    """Test that the legacy SCAN-based mode is still available."""
+
+    @override_settings(CACHE_INVALIDATION_MODE='pattern')
+    def test_pattern_mode_uses_delete_pattern(self, tenant_a):
+        set_current_tenant(tenant_a)
+        cached_generation_probe(1)
+
+        with patch.object(AdvancedCacheManager, 'invalidate_pattern', return_value=True) as mock_scan:
+            invalidate_cache_pattern('*cached_generation_probe*', tenant=tenant_a)
+
+        assert mock_scan.call_count == 2
+        assert f"tenant_id={tenant_a.id}" in mock_scan.call_args_list[0].args[0]
+
+
+# ============================================================================
+# L1 TIER COHERENCE TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestLocalCacheTier:
+    """Test the per-worker LRU in front of Redis."""
+
+    def test_repeat_lookup_served_from_l1(self, tenant_a):
+        set_current_tenant(tenant_a)
+        first = cached_l1_probe(1)
+        static_cache = AdvancedCacheManager.get_cache('static_data')
+
+        with patch.object(static_cache, 'get', wraps=static_cache.get) as mock_get:
+            second = cached_l1_probe(1)
+
+        mock_get.assert_not_called()
+        assert second is first
+        assert len(CALLS) == 1
+
+    def test_invalidation_bypasses_stale_l1_entry(self, tenant_a):
+        set_current_tenant(tenant_a)
+        cached_l1_probe(1)
+        invalidate_cache_pattern('*cached_l1_probe*', tenant=tenant_a)
+
+        result = cached_l1_probe(1)
+        assert len(CALLS) == 2
+        assert result['call'] == 2
+
+    def test_tier_hit_miss_counters(self, tenant_a):
+        set_current_tenant(tenant_a)
+        CacheMonitor.clear_cache_performance_stats()
+
+        cached_l1_probe(1)  # L1 miss, L2 miss
+        cached_l1_probe(1)  # L1 hit
+
+        tiers = CacheMonitor.get_cache_performance_stats()['tiers']
+        assert tiers['l1']['hits'] == 1
+        assert tiers['l1']['misses'] == 1
+        assert tiers['l2']['misses'] == 1
+
+    @override_settings(CACHE_L1={'ENABLED': True, 'MAX_ENTRIES': 2, 'TIMEOUT': 60})
+    def test_l1_is_bounded(self, tenant_a):
+        set_current_tenant(tenant_a)
+        for value in range(5):
+            cached_l1_probe(value)
+
+        assert LocalCacheTier.size() == 2
+
+    def test_static_data_skips_l1_unless_opted_in(self, tenant_a):
+        set_current_tenant(tenant_a)
+        first = cached_static_probe(1)
+        second = cached_static_probe(1)
+
+        # Served from L2: callers get their own copy of a mutable result
+        assert second == first and second is not first
+        assert len(CALLS) == 1
+        assert LocalCacheTier.size() == 0
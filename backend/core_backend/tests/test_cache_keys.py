@@ -0,0 +1,138 @@
+"""
+Cache Key Builder Tests
+
+Tests that cached function arguments are digested by identity rather than
+by their display string.
+
+Test Categories:
+1. Argument Normalisation (6 tests)
+2. Decorator Integration (3 tests)
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from datetime import timedelta
+
+from tenant.managers import set_current_tenant
+from settings.models import StoreLocation
+from core_backend.infrastructure.cache import CacheKeyBuilder
+from core_backend.infrastructure.cache_utils import simple_cache
+
+
+CALLS = []
+
+
+@simple_cache(timeout=300, key_prefix='test', log_performance=False)
+def cached_key_probe(value):
+    CALLS.append(value)
+    return len(CALLS)
+
+
+@pytest.fixture
+def twin_locations(tenant_a):
+    """Two locations whose __str__ is identical"""
+    set_current_tenant(tenant_a)
+    return [
+        StoreLocation.objects.create(tenant=tenant_a, name="Main Location", tax_rate=rate)
+        for rate in (Decimal('0.0800'), Decimal('0.1000'))
+    ]
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    CALLS.clear()
+    yield
+    CALLS.clear()
+
+
+# ============================================================================
+# ARGUMENT NORMALISATION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestCacheKeyBuilder:
+    """Test argument normalisation and digesting."""
+
+    def test_instances_with_same_str_get_distinct_keys(self, twin_locations):
+        first, second = twin_locations
+        assert str(first) == str(second)
+        assert CacheKeyBuilder.digest((first,)) != CacheKeyBuilder.digest((second,))
+
+    def test_key_ignores_display_string(self, twin_locations):
+        location = twin_locations[0]
+        before = CacheKeyBuilder.digest((location,))
+
+        location.name = "Renamed Location"
+
+        assert CacheKeyBuilder.digest((location,)) == before
+
+    def test_key_follows_updated_at_version(self, tenant_a):
+        before = CacheKeyBuilder.digest((tenant_a,))
+
+        tenant_a.updated_at = tenant_a.updated_at + timedelta(seconds=1)
+
+        assert CacheKeyBuilder.digest((tenant_a,)) != before
+
+    def test_querysets_and_unsaved_instances_are_rejected(self, tenant_a):
+        with pytest.raises(TypeError):
+            CacheKeyBuilder.digest((StoreLocation.objects.all(),))
+        with pytest.raises(TypeError):
+            CacheKeyBuilder.digest((StoreLocation(tenant=tenant_a, name="Unsaved"),))
+
+    def test_objects_need_a_stable_identity(self):
+        class Opaque:
+            pass
+
+        class Identified:
+            def __cache_key__(self):
+                return ("identified", 1)
+
+        with pytest.raises(TypeError):
+            CacheKeyBuilder.digest((Opaque(),))
+        assert CacheKeyBuilder.digest((Identified(),)) == CacheKeyBuilder.digest((Identified(),))
+
+    def test_full_digest_and_kwarg_order_independence(self):
+        key = CacheKeyBuilder.digest((1,), {'a': 1, 'b': Decimal('2.50')})
+
+        assert len(key) == 64
+        assert key == CacheKeyBuilder.digest((1,), {'b': Decimal('2.50'), 'a': 1})
+        assert key != CacheKeyBuilder.digest(('1',), {'a': 1, 'b': Decimal('2.50')})
+
+
+# ============================================================================
+# DECORATOR INTEGRATION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestDecoratorKeys:
+    """Test that the decorators use the key builder."""
+
+    def test_tax_matrix_is_cached_per_location(self, twin_locations):
+        from orders.services.calculation_service import OrderCalculationService
+
+        first, second = twin_locations
+        first_matrix = OrderCalculationService.get_tax_calculation_matrix(first)
+        second_matrix = OrderCalculationService.get_tax_calculation_matrix(second)
+
+        assert first_matrix['store_location_id'] == first.id
+        assert second_matrix['store_location_id'] == second.id
+        assert first_matrix['tax_rate'] != second_matrix['tax_rate']
+
+    def test_prebuilt_key_skips_rehashing(self, tenant_a):
+        set_current_tenant(tenant_a)
+        args_key = cached_key_probe.make_args_key(7)
+        assert cached_key_probe(7) == 1
+
+        with patch.object(CacheKeyBuilder, 'digest', wraps=CacheKeyBuilder.digest) as mock_digest:
+            assert cached_key_probe(7, _args_key=args_key) == 1
+
+        mock_digest.assert_not_called()
+        assert CALLS == [7]
+
+    def test_uncacheable_arguments_run_uncached(self, tenant_a):
+        set_current_tenant(tenant_a)
+        unsaved = StoreLocation(tenant=tenant_a, name="Unsaved")
+
+        assert cached_key_probe(unsaved) == 1
+        assert cached_key_probe(unsaved) == 2
+        assert CALLS == [unsaved, unsaved]
@@ -0,0 +1,151 @@
+"""
+Cache Stampede Protection Tests
+
+Tests single-flight fills, stale-while-revalidate and probabilistic early
+expiration for cached service functions.
+
+Test Categories:
+1. Single-Flight Fills (3 tests)
+2. Stale-While-Revalidate (2 tests)
+3. Probabilistic Early Expiration (2 tests)
+"""
+import threading
+import time
+
+import pytest
+
+from tenant.managers import set_current_tenant
+from core_backend.infrastructure.cache import (
+    AdvancedCacheManager,
+    CacheEnvelope,
+    SingleFlight,
+    advanced_cache,
+)
+from core_backend.infrastructure.cache_utils import simple_cache
+
+
+CALLS = []
+
+FAST_STAMPEDE = {
+    'LOCK_TIMEOUT': 5,
+    'WAIT_TIMEOUT': 2,
+    'POLL_INTERVAL': 0.01,
+    'BACKGROUND_REFRESH': False,
+}
+
+
+@simple_cache(timeout=1, key_prefix='test', log_performance=False, stale_ttl=60)
+def cached_swr_probe():
+    CALLS.append(1)
+    return len(CALLS)
+
+
+@advanced_cache(timeout=60, key_prefix='test', warm_on_miss=True, serialize_complex=False)
+def advanced_warm_probe():
+    CALLS.append(1)
+    return 'computed'
+
+
+@pytest.fixture(autouse=True)
+def fast_stampede(settings):
+    settings.CACHE_STAMPEDE = FAST_STAMPEDE
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    CALLS.clear()
+    yield
+    CALLS.clear()
+
+
+def _fill_later(cache, key, value, delay=0.1):
+    timer = threading.Timer(delay, cache.set, args=(key, value, 60))
+    timer.start()
+    return timer
+
+
+# ============================================================================
+# SINGLE-FLIGHT TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestSingleFlight:
+    """Test that only the lock holder recomputes a missing entry."""
+
+    def test_lock_holder_computes(self):
+        cache = AdvancedCacheManager.get_cache('default')
+
+        def produce():
+            CALLS.append(1)
+            cache.set('sf:holder', 'fresh', 60)
+            return 'fresh'
+
+        assert SingleFlight.fill(cache, 'sf:holder', produce) == 'fresh'
+        assert len(CALLS) == 1
+
+    def test_loser_waits_for_holder_result(self):
+        cache = AdvancedCacheManager.get_cache('default')
+        cache.add('lock:fill:sf:loser', 'locked', 5)  # another worker is computing
+        _fill_later(cache, 'sf:loser', 'from-holder')
+
+        def produce():
+            CALLS.append(1)
+            return 'computed-locally'
+
+        assert SingleFlight.fill(cache, 'sf:loser', produce) == 'from-holder'
+        assert CALLS == []
+
+    def test_advanced_cache_warm_on_miss_losers_do_not_compute(self):
+        cache = AdvancedCacheManager.get_cache('default')
+        cache_key = AdvancedCacheManager.cache_key(
+            'function', 'test:advanced_warm_probe', 'result',
+            args_digest=advanced_warm_probe.make_args_key()
+        )
+        cache.add(f"lock:fill:{cache_key}", 'locked', 5)
+        _fill_later(cache, cache_key, 'from-holder')
+
+        assert advanced_warm_probe() == 'from-holder'
+        assert CALLS == []
+
+
+# ============================================================================
+# STALE-WHILE-REVALIDATE TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestStaleWhileRevalidate:
+    """Test that stale entries are served while one worker refreshes them."""
+
+    def test_stale_value_served_then_refreshed(self, tenant_a):
+        set_current_tenant(tenant_a)
+        assert cached_swr_probe() == 1
+
+        time.sleep(1.1)  # past the soft expiry, inside stale_ttl
+
+        assert cached_swr_probe() == 1, "Stale value should be served immediately"
+        assert len(CALLS) == 2, "One refresh should have run"
+        assert cached_swr_probe() == 2
+
+    def test_refresh_runs_once_per_lock(self):
+        lock_cache = AdvancedCacheManager.get_cache('default')
+        lock_cache.add('lock:refresh:swr:busy', 'locked', 5)
+
+        assert SingleFlight.refresh('swr:busy', lambda: CALLS.append(1)) is False
+        assert CALLS == []
+
+
+# ============================================================================
+# PROBABILISTIC EARLY EXPIRATION TESTS
+# ============================================================================
+
+class TestEarlyExpiration:
+    """Test the XFetch early-refresh decision on CacheEnvelope."""
+
+    def test_disabled_without_beta(self):
+        envelope = CacheEnvelope('value', timeout=60, compute_time=10.0)
+        assert envelope.should_refresh_early(0) is False
+        assert envelope.is_stale() is False
+
+    def test_expensive_entry_near_expiry_refreshes_early(self):
+        envelope = CacheEnvelope('value', timeout=1, compute_time=1e6)
+        assert envelope.should_refresh_early(1.0) is True
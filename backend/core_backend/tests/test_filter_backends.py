@@ -0,0 +1,112 @@
+"""
+Filter Backend Tests
+
+Tests that ProjectFilterBackend builds a FilterSet for views declaring only
+filterset_fields once per (view class, model, filterset_fields), and that the
+generated FilterSets still filter as before.
+
+Test Categories:
+1. FilterSet Cache (4 tests)
+2. Generated Filters (2 tests)
+"""
+import pytest
+
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from core_backend.base.filters import FlexibleDateTimeFilter
+from core_backend.filter_backends import ProjectFilterBackend
+from products.views import ProductViewSet
+from users.models import User
+from users.views import UserViewSet
+
+
+@pytest.fixture
+def filterset_cache():
+    ProjectFilterBackend.clear_filterset_cache()
+    yield ProjectFilterBackend.filterset_cache
+    ProjectFilterBackend.clear_filterset_cache()
+
+
+def _view(view_class, **attrs):
+    view = view_class()
+    view.request = Request(RequestFactory().get('/'))
+    view.action = 'list'
+    view.format_kwarg = None
+    for name, value in attrs.items():
+        setattr(view, name, value)
+    return view
+
+
+# ============================================================================
+# FILTERSET CACHE TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestFilterSetCache:
+    """Test that generated FilterSets are built once and reused."""
+
+    def test_generated_filterset_reused_across_requests(self, filterset_cache):
+        queryset = User.all_objects.all()
+
+        first = ProjectFilterBackend().get_filterset_class(_view(UserViewSet), queryset)
+        second = ProjectFilterBackend().get_filterset_class(_view(UserViewSet), queryset)
+
+        assert first is second
+        assert list(filterset_cache.values()) == [first]
+
+    def test_different_filterset_fields_get_their_own_filterset(self, filterset_cache):
+        queryset = User.all_objects.all()
+
+        default = ProjectFilterBackend().get_filterset_class(_view(UserViewSet), queryset)
+        narrowed = ProjectFilterBackend().get_filterset_class(
+            _view(UserViewSet, filterset_fields=['role']), queryset
+        )
+
+        assert default is not narrowed
+        assert 'is_pos_staff' not in narrowed.base_filters
+        assert len(filterset_cache) == 2
+
+    def test_explicit_filterset_class_is_not_cached(self, filterset_cache):
+        view = _view(ProductViewSet)
+
+        filterset_class = ProjectFilterBackend().get_filterset_class(view, view.queryset)
+
+        assert filterset_class is ProductViewSet.filterset_class
+        assert filterset_cache == {}
+
+    def test_dict_filterset_fields_are_cached(self, filterset_cache):
+        view = _view(UserViewSet, filterset_fields={'date_joined': ['gte', 'lte'], 'role': ['exact']})
+
+        first = ProjectFilterBackend().get_filterset_class(view, User.all_objects.all())
+        second = ProjectFilterBackend().get_filterset_class(view, User.all_objects.all())
+
+        assert first is second
+
+
+# ============================================================================
+# GENERATED FILTERS TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestGeneratedFilters:
+    """Test the filters of generated FilterSets."""
+
+    def test_datetime_fields_use_flexible_filter(self, filterset_cache):
+        view = _view(UserViewSet, filterset_fields={'date_joined': ['gte', 'lte'], 'role': ['exact']})
+
+        filterset_class = ProjectFilterBackend().get_filterset_class(view, User.all_objects.all())
+
+        assert isinstance(filterset_class.base_filters['date_joined__gte'], FlexibleDateTimeFilter)
+        assert 'role' in filterset_class.base_filters
+
+    def test_cached_filterset_filters_each_request(self, filterset_cache, tenant_a, admin_user_tenant_a):
+        queryset = User.all_objects.filter(tenant=tenant_a)
+        backend = ProjectFilterBackend()
+
+        for role, expected in ((admin_user_tenant_a.role, 1), (User.Role.CASHIER, 0)):
+            request = Request(RequestFactory().get('/', {'role': role}))
+            view = _view(UserViewSet)
+            view.request = request
+            filtered = backend.filter_queryset(request, queryset, view)
+            assert filtered.count() == expected
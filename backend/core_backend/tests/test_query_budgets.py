@@ -0,0 +1,126 @@
+"""
+Query Budget Tests
+
+Tests that list endpoints run a fixed number of queries however many rows
+they return, using the budgets in core_backend.tests.query_budgets and the
+query_budget_plugin runner.
+
+Test Categories:
+1. Endpoint Budgets (7 tests)
+2. Growth Reports (3 tests)
+"""
+import os
+
+import pytest
+from django.db import connection
+
+from core_backend.tests.query_budget_plugin import QueryRecorder, growth_report, record_queries
+from core_backend.tests.query_budgets import BUDGETS, BudgetContext, QueryBudget, build_customer_orders
+from customers.models import Customer
+from customers.services import CustomerAuthService
+from orders.models import Order
+from orders.serializers import UnifiedOrderSerializer
+from tenant.managers import set_current_tenant
+
+
+@pytest.fixture
+def budget_context(tenant_a, admin_user_tenant_a, store_location_tenant_a, category_tenant_a,
+                   product_type_tenant_a, location_tenant_a):
+    set_current_tenant(tenant_a)
+    return BudgetContext(
+        tenant=tenant_a,
+        user=admin_user_tenant_a,
+        store_location=store_location_tenant_a,
+        category=category_tenant_a,
+        product_type=product_type_tenant_a,
+        location=location_tenant_a,
+        customer=Customer.objects.create_customer(
+            email='budget-customer@example.com',
+            password='password123',
+            first_name='Budget',
+            last_name='Customer',
+            tenant=tenant_a,
+        ),
+    )
+
+
+@pytest.fixture
+def budget_client(budget_context, authenticated_client_tenant_a, api_client_factory):
+    def client_for(budget):
+        if budget.auth == 'customer':
+            client = api_client_factory(user=None, tenant=budget_context.tenant)
+            tokens = CustomerAuthService.generate_customer_tokens(budget_context.customer)
+            client.cookies['access_token_customer'] = tokens['access']
+            return client
+        return authenticated_client_tenant_a
+
+    return client_for
+
+
+# ============================================================================
+# ENDPOINT BUDGET TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+@pytest.mark.performance
+class TestEndpointBudgets:
+    """Test every registered endpoint against its query budget."""
+
+    @pytest.mark.parametrize('budget', BUDGETS, ids=[budget.name for budget in BUDGETS])
+    def test_queries_do_not_grow_with_rows(self, budget, budget_context, budget_client, query_budget_runner):
+        small, large = query_budget_runner(budget, budget_context, budget_client(budget))
+
+        assert large.total <= budget.max_queries
+
+
+# ============================================================================
+# GROWTH REPORT TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestGrowthReports:
+    """Test that reports point at the call sites producing the extra queries."""
+
+    def test_per_row_query_is_attributed_to_its_call_site(self, budget_context):
+        def load_cashier_emails():
+            emails = []
+            for order in Order.objects.all():
+                emails.append(order.cashier.email)
+            return emails
+
+        budget = QueryBudget('orders', '/api/orders/', build_customer_orders, max_queries=5)
+        recorders = []
+        for n in (budget.sizes[0], budget.sizes[1] - budget.sizes[0]):
+            budget.build(budget_context, n)
+            recorder = QueryRecorder()
+            with connection.execute_wrapper(recorder):
+                load_cashier_emails()
+            recorders.append(recorder)
+
+        report = growth_report(budget, *recorders)
+
+        assert recorders[1].total - recorders[0].total == budget.sizes[1] - budget.sizes[0]
+        assert os.path.basename(__file__) in report
+        assert 'load_cashier_emails' in report
+        assert 'users' in report
+
+    def test_serializer_field_is_named_in_call_site(self, budget_context):
+        build_customer_orders(budget_context, 3)
+        recorder = QueryRecorder()
+
+        with connection.execute_wrapper(recorder):
+            UnifiedOrderSerializer(Order.objects.all(), many=True, context={'view_mode': 'list'}).data
+
+        sites = [site for site, table in recorder.sites if table == 'orders_orderitem']
+        assert len(sites) == 1
+        assert recorder.sites[(sites[0], 'orders_orderitem')] == 3
+        assert sites[0].endswith('(get_item_count) UnifiedOrderSerializer.item_count')
+
+    def test_flat_endpoint_records_same_call_sites(self, budget_context, budget_client):
+        client = budget_client(BUDGETS[0])
+
+        first = record_queries(client, '/api/users/')
+        second = record_queries(client, '/api/users/')
+
+        assert first.sites == second.sites
+
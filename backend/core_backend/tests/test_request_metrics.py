@@ -0,0 +1,173 @@
+"""
+Request Metrics Tests
+
+Tests that sampled requests record SQL, cache, serializer and response
+metrics, emit Server-Timing, and are aggregated per route into histograms
+that every worker publishes to the shared cache.
+
+Test Categories:
+1. Sampling (3 tests)
+2. Measurement (3 tests)
+3. Aggregation (4 tests)
+"""
+import pytest
+from io import StringIO
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from core_backend.infrastructure.cache import CacheMonitor
+from core_backend.infrastructure.request_metrics import (
+    RequestMetrics, RequestMetricsStore, measure_request, request_metrics_store, summarize,
+)
+from core_backend.infrastructure.request_metrics_middleware import RequestMetricsMiddleware
+from users.models import User
+from users.serializers import UnifiedUserSerializer
+
+
+@pytest.fixture
+def metrics_settings(settings):
+    settings.REQUEST_METRICS = {
+        'SAMPLE_RATE': 1.0,
+        'SERVER_TIMING': True,
+        'BUCKET_SECONDS': 60,
+        'WINDOW_SECONDS': 3600,
+        'PUBLISH_SECONDS': 0,
+    }
+    request_metrics_store.clear()
+    yield settings.REQUEST_METRICS
+    request_metrics_store.clear()
+
+
+def _metrics(sql_count=0, sql_ms=0.0, cache=None):
+    metrics = RequestMetrics()
+    metrics.sql_count = sql_count
+    metrics.sql_ms = sql_ms
+    metrics.cache = cache or {}
+    return metrics
+
+
+# ============================================================================
+# SAMPLING TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestSampling:
+    """Test the middleware on sampled and unsampled requests."""
+
+    def test_sampled_api_request_is_measured(self, authenticated_client_tenant_a, metrics_settings):
+        response = authenticated_client_tenant_a.get('/api/users/')
+
+        assert response.status_code == 200
+        assert 'db;dur=' in response['Server-Timing']
+        routes = request_metrics_store.collect()
+        [(route, stats)] = [(r, s) for r, s in routes.items() if r.startswith('GET /api/users/')]
+        assert stats['count'] == 1
+        assert stats['sql_count'] > 0
+        assert stats['serializer_ms'] > 0
+        assert stats['response_bytes'] == len(response.content)
+
+    def test_unsampled_requests_pass_through(self, authenticated_client_tenant_a, metrics_settings):
+        metrics_settings['SAMPLE_RATE'] = 0
+
+        response = authenticated_client_tenant_a.get('/api/users/')
+
+        assert 'Server-Timing' not in response
+        assert request_metrics_store.snapshot() == {}
+
+    def test_server_timing_can_be_disabled(self, metrics_settings):
+        metrics_settings['SERVER_TIMING'] = False
+        middleware = RequestMetricsMiddleware(lambda request: HttpResponse(b'ok'))
+
+        response = middleware(RequestFactory().get('/api/health/'))
+
+        assert 'Server-Timing' not in response
+        assert request_metrics_store.snapshot() != {}
+
+
+# ============================================================================
+# MEASUREMENT TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestMeasurement:
+    """Test what a measured block records."""
+
+    def test_queries_and_cache_tiers_are_counted(self, admin_user_tenant_a):
+        with measure_request() as metrics:
+            User.all_objects.filter(pk=admin_user_tenant_a.pk).exists()
+            CacheMonitor.record_tier_access('l1', True)
+            CacheMonitor.record_tier_access('l2', False)
+
+        assert metrics.sql_count == 1
+        assert metrics.cache == {'l1': [1, 0], 'l2': [0, 1]}
+        assert 'cache-l1;desc="1 hits, 0 misses"' in metrics.server_timing(1.0)
+
+    def test_nothing_is_recorded_outside_a_measured_block(self, admin_user_tenant_a):
+        with measure_request() as metrics:
+            pass
+        User.all_objects.count()
+        CacheMonitor.record_tier_access('l1', True)
+
+        assert metrics.sql_count == 0
+        assert metrics.cache == {}
+
+    def test_serializer_time_counts_outermost_serializer_once(self, admin_user_tenant_a):
+        with measure_request() as metrics:
+            UnifiedUserSerializer(admin_user_tenant_a).data
+
+        assert metrics.serializer_ms > 0
+        assert metrics._serializer_depth == 0
+
+
+# ============================================================================
+# AGGREGATION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestAggregation:
+    """Test per-route histograms, publishing and the query interfaces."""
+
+    def test_workers_are_merged_per_route(self, metrics_settings):
+        other_worker = RequestMetricsStore()
+        other_worker.worker_id = 'other-host:1'
+
+        request_metrics_store.record('GET /api/orders/', _metrics(sql_count=3, cache={'l2': [1, 1]}), 12.0, 200)
+        other_worker.record('GET /api/orders/', _metrics(sql_count=7, cache={'l2': [2, 0]}), 700.0, 500)
+
+        stats = request_metrics_store.collect()['GET /api/orders/']
+        assert stats['count'] == 2
+        assert stats['errors'] == 1
+        assert stats['sql_count'] == 10
+        assert stats['sql_count_max'] == 7
+        assert stats['cache'] == {'l2': [3, 1]}
+        assert sum(stats['duration_histogram']) == 2
+
+    def test_summary_estimates_percentiles_from_histogram(self, metrics_settings):
+        for duration in [3.0] * 95 + [400.0] * 5:
+            request_metrics_store.record('GET /api/products/', _metrics(), duration, 200)
+
+        [row] = summarize(request_metrics_store.collect())
+
+        assert row['count'] == 100
+        assert row['p50_ms'] == 5
+        assert row['p95_ms'] == 5
+        assert row['p99_ms'] == 500
+
+    def test_management_command_lists_routes(self, metrics_settings):
+        request_metrics_store.record('GET /api/reports/sales/', _metrics(sql_count=4), 80.0, 200)
+        out = StringIO()
+
+        call_command('request_metrics', stdout=out)
+
+        assert 'GET /api/reports/sales/' in out.getvalue()
+
+    def test_endpoint_returns_route_rows(self, authenticated_client_tenant_a, metrics_settings):
+        request_metrics_store.record('GET /api/reports/sales/', _metrics(sql_count=4), 80.0, 200)
+        metrics_settings['SAMPLE_RATE'] = 0
+
+        response = authenticated_client_tenant_a.get('/api/metrics/requests/')
+
+        assert response.status_code == 200
+        assert [row['route'] for row in response.json()['routes']] == ['GET /api/reports/sales/']
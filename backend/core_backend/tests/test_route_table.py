@@ -0,0 +1,131 @@
+"""
+Route Table Tests
+
+Tests that request paths are classified once through the shared route table
+and that the middlewares reading the flags make the decisions they made with
+their own startswith lists.
+
+Test Categories:
+1. Classification (4 tests)
+2. Middleware Decisions (4 tests)
+3. Benchmark (1 test)
+"""
+import pytest
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import RequestFactory
+
+from core_backend.infrastructure import routes
+from core_backend.infrastructure.csrf_api_middleware import CSRFApiMiddleware
+from core_backend.infrastructure.middleware import (
+    AdminHostRestrictionMiddleware, BusinessHoursMiddleware
+)
+from core_backend.infrastructure.routes import RouteTable, get_route_flags, route_table
+from tenant.middleware import TenantMiddleware
+
+
+# ============================================================================
+# CLASSIFICATION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestClassification:
+    """Test prefix matching and per-request flags."""
+
+    @pytest.mark.parametrize('path, expected, unexpected', [
+        ('/api/products/12/', routes.API | routes.BUSINESS_HOURS_EXEMPT, routes.TENANT_EXEMPT),
+        ('/api/orders/create/', routes.API | routes.ORDERS_OR_PAYMENTS | routes.BUSINESS_HOURS_RESTRICTED, 0),
+        ('/api/payments/webhooks/stripe/', routes.TENANT_EXEMPT | routes.CSRF_EXEMPT | routes.ORDERS_OR_PAYMENTS,
+         routes.BUSINESS_HOURS_RESTRICTED),
+        ('/admin/orders/order/', routes.DJANGO_ADMIN | routes.TENANT_EXEMPT, routes.API),
+        ('/media/logo.png', routes.STATIC, routes.API),
+    ])
+    def test_path_gets_flags_of_every_matching_prefix(self, path, expected, unexpected):
+        flags = route_table.classify(path)
+
+        assert flags & expected == expected
+        assert not flags & unexpected
+
+    def test_prefixes_match_whole_segments_only(self):
+        assert route_table.classify('/api/cartography/') == routes.API
+        assert route_table.classify('/api') == 0
+        assert route_table.classify('/administrator/') == 0
+
+    def test_prefixes_must_end_at_a_segment_boundary(self):
+        with pytest.raises(ValueError):
+            RouteTable([('/api/orders', routes.API)])
+
+    def test_request_is_classified_once(self):
+        request = RequestFactory().post('/api/orders/123/', HTTP_WEBSITE_ORDER='1')
+
+        with mock.patch.object(routes, 'classify_request', wraps=routes.classify_request) as classify:
+            first = get_route_flags(request)
+            second = get_route_flags(request)
+
+        assert classify.call_count == 1
+        assert first == second
+        assert first & routes.EXTERNAL
+
+
+# ============================================================================
+# MIDDLEWARE DECISIONS TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestMiddlewareDecisions:
+    """Test that each middleware acts on the shared flags."""
+
+    def test_tenant_middleware_skips_exempt_paths(self):
+        seen = []
+        middleware = TenantMiddleware(lambda request: seen.append(request.tenant))
+
+        with mock.patch.object(TenantMiddleware, 'get_tenant_from_request') as resolve:
+            middleware(RequestFactory().post('/api/users/login/pos/'))
+            middleware(RequestFactory().get('/admin/'))
+
+        resolve.assert_not_called()
+        assert seen == [None, None]
+
+    def test_business_hours_restriction(self):
+        middleware = BusinessHoursMiddleware(lambda request: None)
+        factory = RequestFactory()
+
+        assert middleware._should_restrict_request(factory.post('/api/orders/create/')) is True
+        assert middleware._should_restrict_request(factory.post('/api/cart/add/', HTTP_CUSTOMER_APP='1')) is False
+        assert middleware._should_restrict_request(factory.patch('/api/orders/9/', HTTP_ONLINE_ORDERING='1')) is True
+        assert middleware._should_restrict_request(factory.patch('/api/orders/9/')) is False
+
+    def test_csrf_middleware_whitelist(self, settings):
+        settings.ENABLE_CSRF_HEADER_CHECK = True
+        middleware = CSRFApiMiddleware(lambda request: None)
+        factory = RequestFactory()
+
+        assert middleware.process_request(factory.post('/api/orders/')).status_code == 403
+        assert middleware.process_request(factory.post('/api/payments/webhooks/stripe/')) is None
+        assert middleware.process_request(factory.post('/accounts/login/')) is None
+
+    def test_admin_host_restriction_only_on_admin_paths(self, monkeypatch):
+        monkeypatch.setenv('ADMIN_HOST', 'system.example.com')
+        middleware = AdminHostRestrictionMiddleware(lambda request: None)
+        factory = RequestFactory()
+
+        assert middleware.process_request(factory.get('/admin/', HTTP_HOST='pizza.example.com')).status_code == 404
+        assert middleware.process_request(factory.get('/admin/', HTTP_HOST='system.example.com')) is None
+        assert middleware.process_request(factory.get('/api/admin/', HTTP_HOST='pizza.example.com')) is None
+
+
+# ============================================================================
+# BENCHMARK TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestBenchmark:
+    """Test the micro-benchmark command."""
+
+    def test_benchmark_agrees_with_legacy_checks(self):
+        out = StringIO()
+        call_command('benchmark_middleware_routing', iterations=1, stdout=out)
+
+        assert 'ns/request' in out.getvalue()
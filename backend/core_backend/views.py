@@ -121,6 +121,32 @@ def cache_statistics(request):
             'details': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+@permission_classes([IsAdminOrHigher])
+def request_metrics_statistics(request):
+    """API endpoint for per-route request metrics (?window=seconds, default the full window)"""
+    from .infrastructure.request_metrics import request_metrics_store, summarize
+
+    try:
+        window = int(request.query_params.get('window', 0)) or None
+    except ValueError:
+        return Response({
+            'error': 'window must be a number of seconds'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        return Response({
+            'sample_rate': settings.REQUEST_METRICS['SAMPLE_RATE'],
+            'window_seconds': window or settings.REQUEST_METRICS['WINDOW_SECONDS'],
+            'routes': summarize(request_metrics_store.collect(window)),
+        })
+    except Exception as e:
+        logger.error(f"Failed to get request metrics: {e}")
+        return Response({
+            'error': 'Failed to get request metrics',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 def ratelimited429(request, exception=None):
     """Default JSON response for rate-limited requests (HTTP 429)."""
     return JsonResponse({"error": "Too many requests"}, status=429)
@@ -12,6 +12,25 @@ from payments.money import quantize
 logger = logging.getLogger(__name__)
 
 
+def _order_items(order: Order):
+    """
+    Items of the order with product, category and product type loaded.
+
+    Uses the order's prefetched items when the caller loaded them (the
+    recalculation engine does), so strategies add no queries per discount.
+    """
+    if "items" in getattr(order, "_prefetched_objects_cache", {}):
+        return order.items.all()
+    return order.items.select_related("product", "product__category", "product__product_type")
+
+
+def _related_ids(manager) -> set:
+    """IDs from a many-to-many manager, honouring prefetched results"""
+    if manager.prefetch_cache_name in getattr(manager.instance, "_prefetched_objects_cache", {}):
+        return {obj.id for obj in manager.all()}
+    return set(manager.values_list("id", flat=True))
+
+
 class DiscountStrategy(ABC):
     """The interface for a discount strategy."""
 
@@ -37,7 +56,7 @@ class OrderPercentageDiscountStrategy(DiscountStrategy):
 
         # Calculate subtotal only from items that allow discounts
         discountable_subtotal = Decimal("0.00")
-        for item in order.items.select_related('product', 'product__product_type').all():
+        for item in _order_items(order):
             # Skip items with product types that exclude discounts
             if item.product and item.product.product_type and item.product.product_type.exclude_from_discounts:
                 continue
@@ -67,7 +86,7 @@ class OrderFixedAmountDiscountStrategy(DiscountStrategy):
 
         # Calculate subtotal only from items that allow discounts
         discountable_subtotal = Decimal("0.00")
-        for item in order.items.select_related('product', 'product__product_type').all():
+        for item in _order_items(order):
             # Skip items with product types that exclude discounts
             if item.product and item.product.product_type and item.product.product_type.exclude_from_discounts:
                 continue
@@ -87,9 +106,7 @@ class ProductPercentageDiscountStrategy(DiscountStrategy):
 
     def apply(self, order: Order, discount: Discount) -> Decimal:
         total_discount = Decimal("0.00")
-        applicable_products_ids = list(
-            discount.applicable_products.values_list("id", flat=True)
-        )
+        applicable_products_ids = _related_ids(discount.applicable_products)
 
         # --- DIAGNOSTIC LOGGING ---
         logger.debug(f"Checking product discount for discount_id: {discount.id}")
@@ -97,9 +114,8 @@ class ProductPercentageDiscountStrategy(DiscountStrategy):
         if not applicable_products_ids:
             return total_discount
 
-        # FIX: Use select_related to prevent N+1 queries when accessing item.product.name
-        for item in order.items.select_related('product', 'product__product_type').all():
-            if item.product.id in applicable_products_ids:
+        for item in _order_items(order):
+            if item.product_id in applicable_products_ids:
                 # Check if the product type excludes this product from discounts
                 if item.product.product_type and item.product.product_type.exclude_from_discounts:
                     continue
@@ -118,9 +134,7 @@ class CategoryPercentageDiscountStrategy(DiscountStrategy):
 
     def apply(self, order: Order, discount: Discount) -> Decimal:
         total_discount = Decimal("0.00")
-        applicable_category_ids = list(
-            discount.applicable_categories.values_list("id", flat=True)
-        )
+        applicable_category_ids = _related_ids(discount.applicable_categories)
 
         # --- DIAGNOSTIC LOGGING ---
         logger.debug(f"Checking category discount for discount_id: {discount.id}")
@@ -128,9 +142,8 @@ class CategoryPercentageDiscountStrategy(DiscountStrategy):
         if not applicable_category_ids:
             return total_discount
 
-        # FIX: Use select_related to prevent N+1 queries when accessing item.product.name and item.product.category_id
-        for item in order.items.select_related('product', 'product__category', 'product__product_type').all():
-            if item.product.category_id in applicable_category_ids:
+        for item in _order_items(order):
+            if item.product is not None and item.product.category_id in applicable_category_ids:
                 # Check if the product type excludes this product from discounts
                 if item.product.product_type and item.product.product_type.exclude_from_discounts:
                     continue
@@ -152,13 +165,12 @@ class ProductFixedAmountDiscountStrategy(DiscountStrategy):
     def apply(self, order: Order, discount: Discount) -> Decimal:
         # (Add similar logging as the percentage version if needed)
         total_discount = Decimal("0.00")
-        applicable_products_ids = list(
-            discount.applicable_products.values_list("id", flat=True)
-        )
+        applicable_products_ids = _related_ids(discount.applicable_products)
         if not applicable_products_ids:
             return total_discount
-        # FIX: Add select_related to prevent N+1 queries
-        for item in order.items.filter(product_id__in=applicable_products_ids).select_related('product', 'product__product_type'):
+        for item in _order_items(order):
+            if item.product_id not in applicable_products_ids:
+                continue
             # Check if the product type excludes this product from discounts
             if item.product.product_type and item.product.product_type.exclude_from_discounts:
                 continue
@@ -174,15 +186,12 @@ class CategoryFixedAmountDiscountStrategy(DiscountStrategy):
     def apply(self, order: Order, discount: Discount) -> Decimal:
         # (Add similar logging as the percentage version if needed)
         total_discount = Decimal("0.00")
-        applicable_category_ids = list(
-            discount.applicable_categories.values_list("id", flat=True)
-        )
+        applicable_category_ids = _related_ids(discount.applicable_categories)
         if not applicable_category_ids:
             return total_discount
-        # FIX: Add select_related to prevent N+1 queries
-        for item in order.items.filter(
-            product__category_id__in=applicable_category_ids
-        ).select_related('product', 'product__category', 'product__product_type'):
+        for item in _order_items(order):
+            if item.product is None or item.product.category_id not in applicable_category_ids:
+                continue
             # Check if the product type excludes this product from discounts
             if item.product.product_type and item.product.product_type.exclude_from_discounts:
                 continue
@@ -215,16 +224,15 @@ class BuyXGetYDiscountStrategy(DiscountStrategy):
         ):
             return total_discount
 
-        applicable_product_ids = list(
-            discount.applicable_products.values_list("id", flat=True)
-        )
+        applicable_product_ids = _related_ids(discount.applicable_products)
         if not applicable_product_ids:
             return total_discount
 
         # Create a flat list of all eligible items in the cart, respecting their quantities
         eligible_items_prices = []
-        # FIX: Add select_related to prevent N+1 queries when accessing item.price_at_sale
-        for item in order.items.filter(product_id__in=applicable_product_ids).select_related('product'):
+        for item in _order_items(order):
+            if item.product_id not in applicable_product_ids:
+                continue
             for _ in range(item.quantity):
                 eligible_items_prices.append(item.price_at_sale)
 
@@ -139,14 +139,8 @@ class GlobalPOSConsumer(AsyncWebsocketConsumer):
         Called when a web order is ready for notification.
         """
         try:
-            data = event["data"]
-
             # Send notification to the connected terminal
-            await self.send(
-                text_data=json.dumps(
-                    {"type": "web_order_notification", "data": data}
-                )
-            )
+            await self.send(text_data=self.encode_event(event))
 
             logger.info(f"Web order notification sent to terminal {self.device_id}")
 
@@ -161,12 +155,8 @@ class GlobalPOSConsumer(AsyncWebsocketConsumer):
         Can be extended for other types of system-wide events.
         """
         try:
-            data = event["data"]
-
             # Send notification to the connected terminal
-            await self.send(
-                text_data=json.dumps({"type": "system_notification", "data": data})
-            )
+            await self.send(text_data=self.encode_event(event))
 
             logger.info(f"System notification sent to terminal {self.device_id}")
 
@@ -175,6 +165,17 @@ class GlobalPOSConsumer(AsyncWebsocketConsumer):
                 f"Error sending system notification to terminal {self.device_id}: {e}"
             )
 
+    @staticmethod
+    def encode_event(event):
+        """
+        Client frame for a notification event. Group senders encode it once
+        (see pre_encoded_event) and it is forwarded verbatim; events without
+        text are encoded here.
+        """
+        if "text" in event:
+            return event["text"]
+        return json.dumps({"type": event["type"], "data": event["data"]})
+
     def get_timestamp(self):
         """
         Get current timestamp in ISO format.
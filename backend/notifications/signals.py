@@ -10,6 +10,8 @@ from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
 
+from core_backend.infrastructure.websocket import pre_encoded_event
+
 # Import the custom signal from orders app
 from orders.signals import web_order_ready_for_notification
 
@@ -139,16 +141,16 @@ def handle_web_order_notification(sender, **kwargs):
         # Ensure the entire payload is serializable before sending to channels
         serializable_payload = convert_payload_to_str(notification_payload)
 
+        # Encode the frame once; each terminal consumer forwards it verbatim
+        event = pre_encoded_event({"type": "web_order_notification", "data": serializable_payload})
+
         # Send WebSocket notifications to selected terminals at this location
         for terminal in selected_terminals:
             # Use tenant-scoped channel group
             terminal_group = f"tenant_{terminal.tenant.id}_terminal_{terminal.device_id}"
 
             try:
-                async_to_sync(channel_layer.group_send)(
-                    terminal_group,
-                    {"type": "web_order_notification", "data": serializable_payload},
-                )
+                async_to_sync(channel_layer.group_send)(terminal_group, event)
                 logger.info(f"Notification sent to terminal {terminal.device_id} at location {store_location.name} (tenant: {terminal.tenant.slug})")
             except Exception as e:
                 logger.error(
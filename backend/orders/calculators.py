@@ -6,6 +6,8 @@ ensuring consistent financial calculations across the application.
 
 Design Pattern: Strategy Pattern
 - OrderCalculator: Base calculator for subtotal, tax, totals
+- OrderRecalculationEngine: Loads a persisted Order graph once and recalculates it in memory
+- IncrementalTotalsCalculator: Applies line changes to a persisted Order's totals as deltas
 - DiscountCalculator: Handles discount application (integrates with discounts app)
 
 Usage:
@@ -19,13 +21,35 @@ Usage:
     totals = calculator.calculate_totals()
 """
 
+import logging
 from decimal import Decimal
-from typing import Union, Dict, Any, List, Optional
+from typing import Union, Dict, Any, List, NamedTuple, Optional
 from django.db.models import QuerySet
 
 # Import money precision helpers
 from payments.money import to_minor, from_minor, quantize
 
+logger = logging.getLogger(__name__)
+
+
+def proportional_discount_rate(subtotal: Decimal, post_discount_subtotal: Optional[Decimal]) -> Decimal:
+    """Share of the subtotal removed by discounts, spread across lines for tax"""
+    if post_discount_subtotal is not None and post_discount_subtotal < subtotal:
+        return (subtotal - post_discount_subtotal) / subtotal
+    return Decimal('0.0')
+
+
+def calculate_line_tax_minor(currency: str, item_price: Decimal, discount_rate: Decimal, tax_rate: Decimal) -> int:
+    """
+    Tax for one line in minor units.
+
+    The discounted price is quantized BEFORE the tax is applied, which keeps
+    sum(line taxes) == order tax with zero penny drift.
+    """
+    discounted_item_price = quantize(currency, item_price * (Decimal('1.0') - discount_rate))
+    item_tax_quantized = quantize(currency, discounted_item_price * tax_rate)
+    return to_minor(currency, item_tax_quantized)
+
 
 class OrderCalculator:
     """
@@ -133,15 +157,24 @@ class OrderCalculator:
         currency = getattr(self.source, 'currency', 'USD') or 'USD'
 
         # Calculate proportional discount rate if discounts applied
-        proportional_discount_rate = Decimal('0.0')
-        if post_discount_subtotal is not None and post_discount_subtotal < subtotal:
-            discount_amount = subtotal - post_discount_subtotal
-            proportional_discount_rate = discount_amount / subtotal
+        discount_rate = proportional_discount_rate(subtotal, post_discount_subtotal)
+
+        from products.services import TaxRateService
+        tax_rates = TaxRateService.get_table(self.source.tenant_id)
 
         items = self.source.items.all()
         line_tax_amounts_minor = []
         items_to_update = []  # Collect items for bulk update
 
+        # Items with an item-level tax exemption (used for custom items that should be tax exempt)
+        exempt_item_ids = set()
+        if not self._is_cart and hasattr(self.source, 'adjustments'):
+            from orders.models import OrderAdjustment
+            exempt_item_ids = set(self.source.adjustments.filter(
+                adjustment_type=OrderAdjustment.AdjustmentType.TAX_EXEMPT,
+                order_item__isnull=False,
+            ).values_list('order_item_id', flat=True))
+
         for item in items:
             # Get item price (method vs property based on source type)
             if self._is_cart:
@@ -149,59 +182,15 @@ class OrderCalculator:
             else:
                 item_price = item.total_price
 
-            # Apply proportional discount to this item
-            discounted_item_price = item_price * (Decimal('1.0') - proportional_discount_rate)
-
-            # Quantize BEFORE converting to minor units (CRITICAL)
-            discounted_item_price_quantized = quantize(currency, discounted_item_price)
-
-            # Check if this specific item has a tax exemption (item-level adjustment)
-            # This is used for custom items that should be tax exempt
-            if not self._is_cart and hasattr(self.source, 'adjustments') and hasattr(item, 'id'):
-                from orders.models import OrderAdjustment
-                has_item_tax_exemption = self.source.adjustments.filter(
-                    adjustment_type=OrderAdjustment.AdjustmentType.TAX_EXEMPT,
-                    order_item_id=item.id  # Use explicit ID comparison
-                ).exists()
-                if has_item_tax_exemption:
-                    # Skip tax calculation for this item
-                    line_tax_amounts_minor.append(0)
-                    if not self._is_cart and hasattr(item, 'id') and item.id:
-                        item.tax_amount = Decimal('0.00')
-                        items_to_update.append(item)
-                    continue
-
-            # Get tax rate for this item's product (hierarchical lookup)
-            product = item.product
-            tax_rate = None
-
-            # 1. Check if product has direct taxes assigned (M2M)
-            if hasattr(product, 'taxes'):
-                product_taxes = product.taxes.all()
-                if product_taxes.exists():
-                    # Use the first tax rate (or sum if multiple taxes)
-                    tax_rate = sum(t.rate for t in product_taxes)
-
-            # 2. If no product taxes, check product_type's default_taxes
-            if tax_rate is None and hasattr(product, 'product_type') and product.product_type:
-                product_type = product.product_type
-                if hasattr(product_type, 'default_taxes'):
-                    product_type_taxes = product_type.default_taxes.all()
-                    if product_type_taxes.exists():
-                        # Use the sum of default taxes from product type
-                        tax_rate = sum(t.rate for t in product_type_taxes)
-
-            # 3. If still no tax rate, use location's default tax rate
-            if tax_rate is None:
-                tax_rate = self.source.store_location.get_effective_tax_rate()
-
-            # Calculate tax on QUANTIZED price (prevents drift)
-            item_tax_decimal = discounted_item_price_quantized * tax_rate
-            item_tax_quantized = quantize(currency, item_tax_decimal)
-            item_tax_minor = to_minor(currency, item_tax_quantized)
+            if getattr(item, 'id', None) in exempt_item_ids:
+                # Skip tax calculation for this item
+                item_tax_minor = 0
+            else:
+                tax_rate = tax_rates.rate_for(item.product_id, self.source.store_location)
+                item_tax_minor = calculate_line_tax_minor(currency, item_price, discount_rate, tax_rate)
 
             # Store tax_amount on OrderItem (for Orders, not Carts)
-            if not self._is_cart and hasattr(item, 'id') and item.id:
+            if not self._is_cart and getattr(item, 'id', None):
                 # Set the tax amount but don't save yet (collect for bulk update)
                 item.tax_amount = from_minor(currency, item_tax_minor)
                 items_to_update.append(item)
@@ -315,6 +304,431 @@ class OrderCalculator:
         }
 
 
+class OrderRecalculationEngine:
+    """
+    Recalculates a persisted Order from a single load of its graph.
+
+    The order, its items (with product, category and product type), applied
+    discounts (with their applicable products/categories) and adjustments are
+    fetched once with a fixed number of queries; line tax rates come from the
+    tenant's compiled TaxRateTable. Subtotal,
+    discounts, one-off adjustments and per-line tax are then computed in
+    memory, and only changed rows are written back with bulk_update - so the
+    query count does not grow with the number of items.
+
+    Uses the same rounding helpers as OrderCalculator, so totals match it to
+    the cent.
+
+    Usage:
+        engine = OrderRecalculationEngine.load(order)
+        engine.recalculate()
+        engine.save()
+    """
+
+    ORDER_UPDATE_FIELDS = [
+        "subtotal",
+        "total_discounts_amount",
+        "total_adjustments_amount",
+        "surcharges_total",
+        "tax_total",
+        "grand_total",
+        "updated_at",
+    ]
+
+    def __init__(self, order):
+        self.order = order
+        self.currency = getattr(order, 'currency', 'USD') or 'USD'
+        self.items = list(order.items.all())
+        self._items_by_id = {item.id: item for item in self.items}
+        self.applied_discounts = list(order.applied_discounts.all())
+        self.adjustments = list(order.adjustments.all())
+        self._changed_items = []
+        self._changed_discounts = []
+        self._changed_adjustments = []
+
+    @classmethod
+    def load(cls, order, for_update=False):
+        """
+        Fetch a fresh copy of the order graph (prefetched relations go stale after item edits).
+
+        With for_update the order row is locked before its lines are read (see load_many).
+        """
+        queryset = cls._graph_queryset()
+        if for_update:
+            queryset = queryset.select_for_update(of=("self",))
+        return cls(queryset.get(id=order.id, tenant_id=order.tenant_id))
+
+    @classmethod
+    def load_many(cls, tenant_id, for_update=False, **filters):
+        """
+        Engines for all of a tenant's orders matching ``filters``, from one load
+        of their graphs - the same number of queries as loading a single order.
+
+        With for_update the order rows are locked (in id order) before their
+        lines are read, so edits made through OrderItemService wait for the
+        caller's transaction instead of being overwritten by its save().
+        """
+        queryset = cls._graph_queryset().filter(tenant_id=tenant_id, **filters)
+        if for_update:
+            queryset = queryset.select_for_update(of=("self",)).order_by("id")
+        return [cls(order) for order in queryset]
+
+    @staticmethod
+    def _graph_queryset():
+        from django.db.models import Prefetch
+        from orders.models import Order, OrderItem, OrderDiscount
+
+        return Order.objects.select_related("store_location").prefetch_related(
+            Prefetch(
+                "items",
+                queryset=OrderItem.objects.select_related(
+                    "product", "product__category", "product__product_type"
+                ),
+            ),
+            Prefetch(
+                "applied_discounts",
+                queryset=OrderDiscount.objects.select_related("discount").prefetch_related(
+                    "discount__applicable_products", "discount__applicable_categories"
+                ),
+            ),
+            "adjustments",
+        )
+
+    def recalculate(self):
+        """Compute every financial field in memory (no queries)"""
+        from orders.models import OrderAdjustment
+
+        order = self.order
+        AdjustmentType = OrderAdjustment.AdjustmentType
+
+        # 1. Subtotal
+        order.subtotal = sum((item.total_price for item in self.items), Decimal('0.00'))
+
+        # 2. Predefined discounts - strategies read the prefetched items and applicable sets
+        from discounts.factories import DiscountStrategyFactory
+
+        total_discount_amount = Decimal("0.00")
+        for order_discount in self.applied_discounts:
+            strategy = DiscountStrategyFactory.get_strategy(order_discount.discount)
+            calculated_amount = strategy.apply(order, order_discount.discount)
+            if calculated_amount != order_discount.amount:
+                order_discount.amount = calculated_amount
+                self._changed_discounts.append(order_discount)
+            total_discount_amount += calculated_amount
+        order.total_discounts_amount = total_discount_amount
+
+        # 3. One-off adjustments follow the current item totals / subtotal
+        for adjustment in self.adjustments:
+            if adjustment.adjustment_type != AdjustmentType.ONE_OFF_DISCOUNT:
+                continue
+            new_amount = self._recalculate_one_off_amount(adjustment)
+            if new_amount is not None and adjustment.amount != new_amount:
+                logger.info(
+                    f"Recalculating {adjustment.discount_type.lower()} adjustment {adjustment.id}: "
+                    f"{adjustment.amount} → {new_amount} "
+                    f"({'item' if adjustment.order_item_id else 'order'}-level)"
+                )
+                adjustment.amount = new_amount
+                self._changed_adjustments.append(adjustment)
+
+        # All adjustments for reporting/display
+        order.total_adjustments_amount = sum(
+            (adjustment.amount for adjustment in self.adjustments), Decimal('0.00')
+        )
+
+        # Only one-off discounts reduce the total:
+        # - PRICE_OVERRIDE: already included in price_at_sale
+        # - TAX_EXEMPT / FEE_EXEMPT: handled separately
+        excluded_types = {AdjustmentType.PRICE_OVERRIDE, AdjustmentType.TAX_EXEMPT, AdjustmentType.FEE_EXEMPT}
+        applied_adjustments_amount = sum(
+            (adjustment.amount for adjustment in self.adjustments if adjustment.adjustment_type not in excluded_types),
+            Decimal('0.00'),
+        )
+
+        # 4. Post-discount-and-adjustment subtotal
+        post_discount_subtotal = order.subtotal - order.total_discounts_amount + applied_adjustments_amount
+
+        # Surcharges are only calculated during payment processing
+        order.surcharges_total = Decimal("0.00")
+
+        # 5. Tax - an ORDER-LEVEL exemption zeroes it, item-level exemptions zero single lines
+        tax_exemptions = [a for a in self.adjustments if a.adjustment_type == AdjustmentType.TAX_EXEMPT]
+        if any(a.order_item_id is None for a in tax_exemptions):
+            order.tax_total = Decimal("0.00")
+        else:
+            exempt_item_ids = {a.order_item_id for a in tax_exemptions}
+            order.tax_total = self._calculate_item_level_tax(post_discount_subtotal, exempt_item_ids)
+
+        # 6. Grand total
+        order.grand_total = post_discount_subtotal + order.tax_total
+        return order
+
+    def _item_total(self, order_item_id):
+        item = self._items_by_id.get(order_item_id)
+        if item is None:
+            return None
+        return (item.price_at_sale * item.quantity) or Decimal('0.00')
+
+    def _recalculate_one_off_amount(self, adjustment):
+        """
+        New amount for a one-off discount adjustment.
+
+        - Percentage: re-applied to the item total (item-level) or order subtotal
+        - Fixed: capped at the applicable total, restored up to discount_value
+        """
+        from orders.models import OrderAdjustment
+
+        if adjustment.order_item_id:
+            applicable_total = self._item_total(adjustment.order_item_id)
+            if applicable_total is None:
+                return None
+        else:
+            applicable_total = self.order.subtotal
+
+        if adjustment.discount_type == OrderAdjustment.DiscountType.PERCENTAGE:
+            from settings.config import AppSettings
+
+            new_amount = -(applicable_total * (adjustment.discount_value / Decimal('100.00')))
+            # Round to currency precision using banker's rounding
+            return quantize(AppSettings().currency, new_amount)
+
+        if adjustment.discount_type == OrderAdjustment.DiscountType.FIXED:
+            # max() because both are negative
+            return max(-adjustment.discount_value, -applicable_total)
+
+        return None
+
+    def _calculate_item_level_tax(self, post_discount_subtotal, exempt_item_ids):
+        """Per-line tax in minor units, same arithmetic as OrderCalculator.calculate_item_level_tax"""
+        order = self.order
+        if not order.store_location or order.subtotal == 0:
+            return Decimal('0.00')
+
+        discount_rate = proportional_discount_rate(order.subtotal, post_discount_subtotal)
+
+        from products.services import TaxRateService
+        tax_rates = TaxRateService.get_table(order.tenant_id)
+
+        total_tax_minor = 0
+        for item in self.items:
+            if item.id in exempt_item_ids:
+                item_tax_minor = 0
+            else:
+                tax_rate = tax_rates.rate_for(item.product_id, order.store_location)
+                item_tax_minor = calculate_line_tax_minor(self.currency, item.total_price, discount_rate, tax_rate)
+
+            tax_amount = from_minor(self.currency, item_tax_minor)
+            if item.tax_amount != tax_amount:
+                item.tax_amount = tax_amount
+                self._changed_items.append(item)
+            total_tax_minor += item_tax_minor
+
+        # Invariant guaranteed: sum(item.tax_amount) == tax_total
+        return from_minor(self.currency, total_tax_minor)
+
+    def rows_changed(self):
+        """Whether recalculate() changed any line tax, discount or adjustment amount"""
+        return bool(self._changed_items or self._changed_discounts or self._changed_adjustments)
+
+    def save(self):
+        """Write changed rows back - one bulk UPDATE per table at most, plus the order itself"""
+        from orders.models import OrderItem, OrderDiscount, OrderAdjustment
+
+        if self._changed_items:
+            OrderItem.objects.bulk_update(self._changed_items, ['tax_amount'])
+        if self._changed_discounts:
+            OrderDiscount.objects.bulk_update(self._changed_discounts, ['amount'])
+            # bulk_update sends no post_save - drop the session totals cache ourselves
+            from core_backend.infrastructure.cache_utils import invalidate_cache_pattern
+            invalidate_cache_pattern('get_cached_order_totals')
+        if self._changed_adjustments:
+            OrderAdjustment.objects.bulk_update(self._changed_adjustments, ['amount'])
+
+        self.order.save(update_fields=self.ORDER_UPDATE_FIELDS)
+        return self.order
+
+
+class LineChange(NamedTuple):
+    """
+    One order line changed by an item operation.
+
+    `item` holds the line after the change; previous_total and previous_tax
+    are its stored values before it (zero for a new line). Read those values
+    after lock_order_lines(), or a concurrent edit of the same line can move
+    the totals from a quantity that is no longer stored.
+    """
+    item: Any
+    previous_total: Decimal
+    previous_tax: Decimal
+    removed: bool = False
+
+    @classmethod
+    def added(cls, item):
+        return cls(item, Decimal('0.00'), Decimal('0.00'))
+
+    @classmethod
+    def updated(cls, item, previous_quantity):
+        """Quantity change - call before item.tax_amount is touched"""
+        return cls(item, item.price_at_sale * previous_quantity, item.tax_amount)
+
+    @classmethod
+    def deleted(cls, item):
+        return cls(item, item.total_price, item.tax_amount, removed=True)
+
+
+def lock_order_lines(order, items=()):
+    """
+    Lock the order row and reload the stored quantity, price and tax of `items`.
+
+    Item operations call this inside their transaction before building a
+    LineChange, so two edits of the same order queue on the lock and each
+    computes its delta from the values the other committed. load() takes the
+    same lock again; the order row is always locked before its item rows.
+    """
+    from orders.models import Order, OrderItem
+
+    list(Order.objects.select_for_update(of=("self",)).filter(id=order.id, tenant_id=order.tenant_id).only("id"))
+    items = [item for item in items if item.pk is not None]
+    if not items:
+        return
+    stored = {
+        row["id"]: row
+        for row in OrderItem.objects.filter(id__in=[item.pk for item in items]).values(
+            "id", "quantity", "price_at_sale", "tax_amount"
+        )
+    }
+    for item in items:
+        row = stored.get(item.pk)
+        if row is not None:
+            item.quantity = row["quantity"]
+            item.price_at_sale = row["price_at_sale"]
+            item.tax_amount = row["tax_amount"]
+
+
+class IncrementalTotalsCalculator:
+    """
+    Applies line changes to a persisted Order's totals without loading its other lines.
+
+    Without predefined discounts or one-off discount adjustments the
+    proportional discount rate is zero, so each line's tax depends only on
+    that line and subtotal / tax_total can be moved by the changed lines'
+    deltas. Discounts and one-off adjustments spread over the whole subtotal:
+    load() returns None for those orders and the caller falls back to
+    OrderRecalculationEngine.
+
+    The order row is locked while the deltas are applied. Callers read a
+    line's previous values after lock_order_lines() in the same transaction,
+    so concurrent edits of one order are applied one after another. Uses the
+    same rounding helpers as OrderRecalculationEngine.
+
+    Usage:
+        calculator = IncrementalTotalsCalculator.load(order)
+        if calculator is not None:
+            calculator.apply([LineChange.added(item)])
+            calculator.save()
+    """
+
+    ORDER_UPDATE_FIELDS = OrderRecalculationEngine.ORDER_UPDATE_FIELDS
+
+    def __init__(self, order, adjustments):
+        self.order = order
+        self.currency = getattr(order, 'currency', 'USD') or 'USD'
+        self.adjustments = adjustments
+        self._changed_items = []
+        self._tax_rates = None
+
+    @classmethod
+    def load(cls, order):
+        """Lock the order row; None when the change is not local to its lines"""
+        from django.db.models import Exists, OuterRef
+        from orders.models import Order, OrderAdjustment, OrderDiscount
+
+        fresh_order = (
+            Order.objects.select_for_update(of=("self",))
+            .select_related("store_location")
+            .annotate(has_discounts=Exists(OrderDiscount.objects.filter(order_id=OuterRef("pk"))))
+            .get(id=order.id, tenant_id=order.tenant_id)
+        )
+
+        # Stored totals must be discount-free and taxed line by line to be moved by deltas
+        if (
+            fresh_order.has_discounts
+            or not fresh_order.store_location
+            or fresh_order.subtotal == 0
+            or fresh_order.total_discounts_amount != 0
+            or fresh_order.grand_total != fresh_order.subtotal + fresh_order.tax_total
+        ):
+            return None
+
+        adjustments = list(fresh_order.adjustments.all())
+        if any(a.adjustment_type == OrderAdjustment.AdjustmentType.ONE_OFF_DISCOUNT for a in adjustments):
+            return None
+
+        return cls(fresh_order, adjustments)
+
+    def apply(self, changes):
+        """Move subtotal and tax_total by the changed lines' deltas"""
+        from orders.models import OrderAdjustment
+
+        order = self.order
+        tax_exemptions = [
+            a for a in self.adjustments if a.adjustment_type == OrderAdjustment.AdjustmentType.TAX_EXEMPT
+        ]
+        exempt_item_ids = {a.order_item_id for a in tax_exemptions}
+
+        subtotal = order.subtotal
+        tax_total_minor = to_minor(self.currency, order.tax_total)
+        line_taxes = []
+        for change in changes:
+            item = change.item
+            if change.removed:
+                new_total, item_tax_minor = Decimal('0.00'), 0
+            else:
+                new_total = item.total_price
+                if item.id in exempt_item_ids:
+                    item_tax_minor = 0
+                else:
+                    tax_rate = self._tax_rate(item.product_id)
+                    item_tax_minor = calculate_line_tax_minor(self.currency, new_total, Decimal('0.0'), tax_rate)
+                line_taxes.append((item, from_minor(self.currency, item_tax_minor)))
+
+            subtotal += new_total - change.previous_total
+            tax_total_minor += item_tax_minor - to_minor(self.currency, change.previous_tax)
+
+        order.subtotal = subtotal
+        order.total_discounts_amount = Decimal('0.00')
+        order.total_adjustments_amount = sum((a.amount for a in self.adjustments), Decimal('0.00'))
+        order.surcharges_total = Decimal('0.00')
+
+        # Same rules as the full engine: an ORDER-LEVEL exemption or an empty subtotal zeroes tax
+        if any(a.order_item_id is None for a in tax_exemptions) or order.subtotal == 0:
+            order.tax_total = Decimal('0.00')
+        else:
+            order.tax_total = from_minor(self.currency, tax_total_minor)
+            for item, tax_amount in line_taxes:
+                if item.tax_amount != tax_amount:
+                    item.tax_amount = tax_amount
+                    self._changed_items.append(item)
+
+        # PRICE_OVERRIDE is in price_at_sale and exemptions carry no amount
+        order.grand_total = order.subtotal + order.tax_total
+        return order
+
+    def _tax_rate(self, product_id):
+        if self._tax_rates is None:
+            from products.services import TaxRateService
+            self._tax_rates = TaxRateService.get_table(self.order.tenant_id)
+        return self._tax_rates.rate_for(product_id, self.order.store_location)
+
+    def save(self):
+        from orders.models import OrderItem
+
+        if self._changed_items:
+            OrderItem.objects.bulk_update(self._changed_items, ['tax_amount'])
+        self.order.save(update_fields=self.ORDER_UPDATE_FIELDS)
+        return self.order
+
+
 class DiscountCalculator:
     """
     Calculator for applying discounts to Cart or Order.
@@ -1,17 +1,22 @@
+import asyncio
 import json
 import logging
 import time
 from decimal import Decimal  # 1. Import Decimal
+from urllib.parse import parse_qs
 from uuid import UUID
 from channels.generic.websocket import AsyncWebsocketConsumer
 from asgiref.sync import sync_to_async
+from django.conf import settings
 
 from .models import Order, OrderItem, Product
 from .services import (
     OrderService,
     OrderCalculationService,
     OrderItemService,
+    OrderBatchService,
     OrderDiscountService,
+    OrderStateBroadcastService,
 )
 from .serializers import UnifiedOrderSerializer
 
@@ -40,6 +45,17 @@ class OrderConsumer(AsyncWebsocketConsumer):
         self._cached_order_instance = None
         self._cached_serialized_payload = None
         self._cached_payload_metadata = None
+        # Delta protocol state: the group version this consumer last delivered,
+        # the version the client holds, and the state this consumer last published
+        self.delta_protocol = False
+        self._state_version = None
+        self._client_version = None
+        self._published_state = None
+        # Item messages waiting for the coalescing window, and the lock that
+        # keeps a window flush from interleaving with a directly handled message
+        self._coalesced_messages = []
+        self._coalesce_task = None
+        self._operation_lock = asyncio.Lock()
 
     def _cache_payload(self, payload):
         """
@@ -95,6 +111,11 @@ class OrderConsumer(AsyncWebsocketConsumer):
             await self.close(code=4004)  # Not found
             return
 
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        self.delta_protocol = (
+            query.get("protocol") == ["delta"] and OrderStateBroadcastService.is_enabled()
+        )
+
         await self.channel_layer.group_add(self.order_group_name, self.channel_name)
         logging.info(f"OrderConsumer: Joined tenant-scoped group {self.order_group_name}")
         await self.accept()
@@ -143,10 +164,26 @@ class OrderConsumer(AsyncWebsocketConsumer):
         return order_instance
 
     async def disconnect(self, close_code):
+        # Messages the client already sent still apply (and reach the other screens)
+        await self.flush_coalesced()
         await self.channel_layer.group_discard(self.order_group_name, self.channel_name)
 
     async def receive(self, text_data):
         data = json.loads(text_data)
+
+        if data.get("type") in OrderBatchService.OPERATIONS and settings.ORDER_WEBSOCKET.get("COALESCE_WINDOW_MS"):
+            # Scanner/cashier bursts: apply item messages together once the window closes
+            self._coalesced_messages.append(data)
+            if self._coalesce_task is None:
+                self._coalesce_task = asyncio.create_task(self._flush_coalesced_later())
+            return
+
+        # Anything queued before this message is applied first, keeping the client's order
+        await self.flush_coalesced()
+        async with self._operation_lock:
+            await self.handle_message(data)
+
+    async def handle_message(self, data):
         message_type = data.get("type")
         payload = data.get("payload", {})
         operation_id = data.get("operationId")
@@ -154,6 +191,17 @@ class OrderConsumer(AsyncWebsocketConsumer):
         # Store operation ID for use in response
         self._current_operation_id = operation_id
 
+        if message_type == "resync":
+            # Delta client detected a version gap - resend the full state to it only
+            await self.send_snapshot()
+            self._current_operation_id = None
+            return
+
+        if message_type == "batch":
+            await self.process_batch(payload.get("operations") or [], operation_id)
+            self._current_operation_id = None
+            return
+
         # Clear all caches to ensure fresh data for this operation
         self._cached_order_instance = None
         self._cached_serialized_payload = None
@@ -183,6 +231,135 @@ class OrderConsumer(AsyncWebsocketConsumer):
         # Clear operation ID after sending response
         self._current_operation_id = None
 
+    async def process_batch(self, operations, operation_id=None, coalesced=False):
+        """
+        Applies a list of item operations in one transaction with one
+        recalculation and one broadcast, then sends the client a
+        'batch_result' with the outcome of each operation.
+
+        Coalesced messages were sent one by one, so instead of a
+        'batch_result' each failed one gets the error reply its single-message
+        handler would have sent.
+        """
+        limit = settings.ORDER_WEBSOCKET["MAX_BATCH_OPERATIONS"]
+        if len(operations) > limit:
+            await self.send(text_data=json.dumps({
+                "type": "error",
+                "message": f"A batch can carry at most {limit} operations",
+                "error_type": "validation",
+                "operationId": operation_id,
+            }))
+            return
+
+        self._cached_order_instance = None
+        self._cached_serialized_payload = None
+        self._cached_payload_metadata = None
+
+        order = await sync_to_async(Order.objects.get)(id=self.order_id, tenant=self.tenant)
+        order_instance, results = await sync_to_async(OrderBatchService.apply_operations)(
+            order, operations, self.user
+        )
+
+        if order_instance is not None:
+            # Tag the single broadcast with the batch's id, or the last applied operation's
+            self._current_operation_id = operation_id or next(
+                (result["operationId"] for result in reversed(results) if result["status"] == "ok"), None
+            )
+            await self.send_full_order_state(order_instance)
+
+        if coalesced:
+            for operation, result in zip(operations, results):
+                if result["status"] != "ok":
+                    await self.send(text_data=json.dumps(self._operation_error_reply(operation, result)))
+            return
+
+        response = {"type": "batch_result", "results": results}
+        if operation_id:
+            response["operationId"] = operation_id
+        await self.send(text_data=json.dumps(response))
+
+    @staticmethod
+    def _operation_error_reply(operation, result):
+        """The 'error' / 'stock_error' message the single-message handler sends for a failed operation"""
+        payload = operation.get("payload") or {}
+        reply = {
+            "type": "error",
+            "message": result["message"],
+            "error_type": result["error_type"],
+            "operationId": result["operationId"],
+        }
+        if result["error_type"] == "stock_validation":
+            reply.update(type="stock_error", can_override=True)
+            if operation.get("type") == "update_item_quantity":
+                reply.update(
+                    item_id=payload.get("item_id"),
+                    requested_quantity=payload.get("quantity"),
+                    action_type="quantity_update",
+                )
+            else:
+                reply["product_id"] = payload.get("product_id")
+        return reply
+
+    async def _flush_coalesced_later(self):
+        await asyncio.sleep(settings.ORDER_WEBSOCKET["COALESCE_WINDOW_MS"] / 1000)
+        self._coalesce_task = None
+        await self.flush_coalesced()
+
+    async def flush_coalesced(self):
+        """
+        Applies item messages held for the coalescing window, in the order
+        they arrived: a lone message exactly as if it had been handled
+        directly, runs of several as batches. Messages the batch cannot apply
+        (raising the quantity of a customized line) go through handle_message
+        between the runs.
+
+        Applied messages are acknowledged by the run's single state broadcast,
+        tagged with the last applied operationId; failed ones get their usual
+        'error' / 'stock_error' reply.
+        """
+        if self._coalesce_task is not None:
+            self._coalesce_task.cancel()
+            self._coalesce_task = None
+        messages, self._coalesced_messages = self._coalesced_messages, []
+        if not messages:
+            return
+
+        async with self._operation_lock:
+            if len(messages) == 1:
+                await self.handle_message(messages[0])
+                return
+
+            logging.info(f"OrderConsumer: Coalesced {len(messages)} messages for order {self.order_id}")
+            operations = [
+                {"type": message.get("type"), "payload": message.get("payload", {}),
+                 "operationId": message.get("operationId")}
+                for message in messages
+            ]
+
+            run = []
+            for message, operation in zip(messages, operations):
+                # Only quantity updates need a look at the line
+                if operation["type"] != "update_item_quantity" or await sync_to_async(OrderBatchService.can_batch)(
+                    self.order_id, operation
+                ):
+                    run.append((message, operation))
+                    continue
+                await self._apply_coalesced_run(run)
+                run = []
+                await self.handle_message(message)
+            await self._apply_coalesced_run(run)
+            self._current_operation_id = None
+
+    async def _apply_coalesced_run(self, run):
+        """Applies (message, operation) pairs the batch can handle, MAX_BATCH_OPERATIONS at a time"""
+        if len(run) == 1:
+            await self.handle_message(run[0][0])
+            return
+        operations = [operation for _, operation in run]
+        limit = settings.ORDER_WEBSOCKET["MAX_BATCH_OPERATIONS"]
+        for start in range(0, len(operations), limit):
+            await self.process_batch(operations[start:start + limit], coalesced=True)
+
     async def add_item(self, payload):
         product_id = payload.get("product_id")
         quantity = payload.get("quantity", 1)
@@ -511,16 +688,9 @@ class OrderConsumer(AsyncWebsocketConsumer):
 
                 # Regular quantity update logic - use service layer for consistency
                 try:
-                    if force_update and not is_custom_item:
-                        # Force update: bypass validation for non-custom items
-                        item.quantity = new_quantity
-                        await sync_to_async(item.save)()
-                        order_obj = await sync_to_async(lambda i: i.order)(item)
-                        await self.recalculate_and_cache_order(order_obj)
-                    elif is_custom_item:
-                        # Custom items: no stock validation needed
-                        item.quantity = new_quantity
-                        await sync_to_async(item.save)()
+                    if force_update or is_custom_item:
+                        # Force updates and custom items bypass stock validation
+                        await sync_to_async(OrderItemService.set_item_quantity)(item, new_quantity)
                         order_obj = await sync_to_async(lambda i: i.order)(item)
                         await self.recalculate_and_cache_order(order_obj)
                     else:
@@ -595,16 +765,11 @@ class OrderConsumer(AsyncWebsocketConsumer):
 
         try:
             item = await sync_to_async(OrderItem.objects.get)(id=item_id)
-            product = await sync_to_async(lambda: item.product)()
             order = await sync_to_async(lambda: item.order)()
 
-            # Remove the old item
-            await sync_to_async(item.delete)()
-
-            # Add new item with updated modifiers
-            await sync_to_async(OrderItemService.add_item_to_order)(
-                order=order,
-                product=product,
+            # Replace the old item with one carrying the updated modifiers
+            await sync_to_async(OrderItemService.replace_item)(
+                item,
                 quantity=quantity,
                 selected_modifiers=selected_modifiers,
                 notes=notes
@@ -629,18 +794,8 @@ class OrderConsumer(AsyncWebsocketConsumer):
     async def remove_item(self, payload):
         item_id = payload.get("item_id")
         item = await sync_to_async(OrderItem.objects.get)(id=item_id)
-        order = await sync_to_async(lambda i: i.order)(item)
-        await sync_to_async(item.delete)()
-
-        # If no items left in the cart, remove order-level discounts and adjustments
-        def cleanup_empty_cart(order):
-            if not order.items.exists():
-                # Remove order-level discounts (not item-level)
-                order.discounts.all().delete()
-                # Remove order-level adjustments (not item-level)
-                order.adjustments.filter(order_item__isnull=True).delete()
-
-        await sync_to_async(cleanup_empty_cart)(order)
+        # If no items are left in the cart this also removes order-level discounts and adjustments
+        order = await sync_to_async(OrderItemService.remove_item_from_order)(item)
         await self.recalculate_and_cache_order(order)
 
     async def apply_discount(self, payload):
@@ -825,19 +980,71 @@ class OrderConsumer(AsyncWebsocketConsumer):
             payload_bytes,
         )
 
-        await self.channel_layer.group_send(
-            self.order_group_name, {
-                "type": "cart_update",
-                "payload": final_payload,
-                "operationId": getattr(self, '_current_operation_id', None)
-            }
+        # Encode the client frame once here; every consumer in the group forwards it verbatim
+        event = await sync_to_async(OrderStateBroadcastService.build_cart_event)(
+            self.order_group_name,
+            final_payload,
+            operation_id=getattr(self, '_current_operation_id', None),
+            payload_json=(self._cached_payload_metadata or {}).get('payload_json'),
         )
+        if "version" in event:
+            self._published_state = (event["version"], final_payload)
+
+        await self.channel_layer.group_send(self.order_group_name, event)
+
+    async def send_snapshot(self):
+        """
+        Sends the group's latest full state to this client only (delta resync).
+        """
+        state = await sync_to_async(OrderStateBroadcastService.snapshot)(self.order_group_name)
+        if state is None:
+            # Group state expired - rebuild and broadcast it, which re-seeds every client
+            self._cached_order_instance = None
+            self._cached_serialized_payload = None
+            await self.send_full_order_state()
+            return
+
+        self._state_version = state["version"]
+        await self._send_cart_state(state["payload"], state["version"], self._current_operation_id)
+
+    async def _resolve_broadcast_payload(self, event):
+        """
+        Full payload for a versioned event sent to a delta client without the
+        base version: our own published state, or the group snapshot from the
+        shared cache, or - if that expired - a fresh serialization.
+        """
+        version = event["version"]
+        if self._published_state is not None and self._published_state[0] == version:
+            return self._published_state
+
+        state = await sync_to_async(OrderStateBroadcastService.snapshot)(self.order_group_name)
+        if state is not None and state["version"] >= version:
+            return state["version"], state["payload"]
 
+        order = await self.get_order_instance()
+        return version, convert_complex_types_to_str(await self.serialize_order(order))
+
+    async def _send_cart_state(self, payload, version, operation_id):
+        response = {"type": "cart_update", "payload": payload}
+        if self.delta_protocol:
+            response["version"] = version
+            self._client_version = version
+        if operation_id:
+            response["operationId"] = operation_id
+        await self.send(text_data=json.dumps(response))
 
     async def cart_update(self, event):
         """
         Handles the 'cart_update' event from the channel layer and sends it to the client.
         """
+        if "version" in event:
+            await self.versioned_cart_update(event)
+            return
+        if "text" in event:
+            # Pre-encoded by the sender - no per-consumer serialization
+            await self.send(text_data=event["text"])
+            return
+
         payload = event["payload"]
         operation_id = event.get("operationId")
 
@@ -852,6 +1059,34 @@ class OrderConsumer(AsyncWebsocketConsumer):
         # 4. No special encoder needed here anymore because the payload is already clean.
         await self.send(text_data=json.dumps(response))
 
+    async def versioned_cart_update(self, event):
+        """
+        Delivers a versioned group event: legacy clients get the pre-encoded full
+        frame, delta clients holding the base version the pre-encoded
+        'cart_patch', and delta clients that missed a version a full state.
+        """
+        version = event["version"]
+        if self._state_version is not None and version <= self._state_version:
+            return  # Out-of-order delivery; a newer state was already sent
+
+        if not self.delta_protocol:
+            self._state_version = version
+            await self.send(text_data=event["text"])
+            return
+
+        if (
+            "patch_text" in event
+            and self._client_version is not None
+            and self._client_version == event["base_version"]
+        ):
+            self._state_version = self._client_version = version
+            await self.send(text_data=event["patch_text"])
+            return
+
+        version, payload = await self._resolve_broadcast_payload(event)
+        self._state_version = version
+        await self._send_cart_state(payload, version, event.get("operationId"))
+
     async def configuration_update(self, event):
         """
         Handles configuration change notifications and refreshes the order state.
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.16 on 2026-10-16 20:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('settings', '0031_storelocation_manager_approvals_enabled'),
+        ('tenant', '0006_tenant_internal_notes_tenant_ownership_type_and_more'),
+        ('orders', '0030_order_total_adjustments_amount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_number', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('store_location', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='order_number_sequences', to='settings.storelocation')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_number_sequences', to='tenant.tenant')),
+            ],
+            options={
+                'verbose_name': 'Order Number Sequence',
+                'verbose_name_plural': 'Order Number Sequences',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ordernumbersequence',
+            constraint=models.UniqueConstraint(fields=('tenant', 'store_location'), name='unique_order_sequence_per_location'),
+        ),
+        migrations.AddConstraint(
+            model_name='ordernumbersequence',
+            constraint=models.UniqueConstraint(condition=models.Q(('store_location__isnull', True)), fields=('tenant',), name='unique_order_sequence_no_location'),
+        ),
+    ]
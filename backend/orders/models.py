@@ -1,6 +1,6 @@
 import uuid
 from decimal import Decimal
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
@@ -600,24 +600,25 @@ class Order(models.Model):
             total += self.payment_details.total_tips
         return total
 
+    ORDER_NUMBER_PREFIX = "ORD-"
+
     def save(self, *args, **kwargs):
         # Generate order_number only if it's not already set
         if not self.order_number:
-            max_retries = 5  # Prevent infinite loop in extreme race conditions
-            for _ in range(max_retries):
+            max_retries = 2  # A collision only happens once, with numbers set outside the allocator
+            for attempt in range(max_retries):
                 try:
-                    self.order_number = self._generate_sequential_order_number()
-                    super().save(*args, **kwargs)
+                    # The counter increment and the INSERT commit or roll back together - no gaps
+                    with transaction.atomic():
+                        self.order_number = self._generate_sequential_order_number()
+                        super().save(*args, **kwargs)
                     break  # Break if save is successful
-                except Exception as e:  # Catch potential IntegrityError on unique field
-                    if (
-                        "duplicate key value" in str(e).lower()
-                        or "unique constraint failed" in str(e).lower()
-                    ):
-                        # Another process might have taken the number, retry
-                        continue
-                    else:
-                        raise  # Re-raise if it's another type of error
+                except IntegrityError as e:
+                    if "order_number" not in str(e) and "unique_order_number_per_location" not in str(e):
+                        raise  # Another constraint (e.g. one pending order per guest)
+                    # Catch the counter up with numbers assigned outside the allocator, then retry
+                    self.order_number = None
+                    OrderNumberSequence.reconcile(self.tenant_id, self.store_location_id)
             else:  # If loop finishes without breaking (max_retries reached)
                 raise Exception(
                     "Failed to generate a unique order number after multiple retries."
@@ -632,7 +633,7 @@ class Order(models.Model):
         Generates the next sequential order number PER LOCATION.
         Each location has independent numbering starting from 1.
 
-        CRITICAL: Both tenant AND store_location filtering for proper isolation.
+        CRITICAL: Both tenant AND store_location scope the sequence.
 
         Architecture:
         - Tenant isolation: Orders belong to one tenant (security boundary)
@@ -643,42 +644,111 @@ class Order(models.Model):
             Airport:   ORD-00001, ORD-00002, ORD-00003
             (Same tenant, different locations, independent sequences)
 
-        Benefits:
-        - Clean sequences per location (no gaps)
-        - Matches operational reality (staff work at one location)
-        - Aligns with location-separated reports
-        - Natural fit for terminal context (terminals are location-bound)
+        Numbers come from the location's OrderNumberSequence counter row, so
+        allocation is one locked UPDATE instead of sorting order_number strings
+        (which misordered numbers past ORD-99999) and retrying on collisions.
         """
-        prefix = "ORD-"
-        # Get the highest existing order number for THIS TENANT + LOCATION
-        last_order = (
-            Order.objects.filter(
-                tenant=self.tenant,           # ← Tenant isolation (security)
-                store_location=self.store_location,  # ← Location scoping (operations)
-                order_number__startswith=prefix
-            )
-            .order_by("-order_number")
-            .first()
-        )
+        next_number = OrderNumberSequence.allocate(self.tenant_id, self.store_location_id)
+        return OrderNumberSequence.format(next_number, self.ORDER_NUMBER_PREFIX)
 
-        if last_order and last_order.order_number:
-            # Extract the numeric part using regex
-            match = re.match(rf"^{re.escape(prefix)}(\d+)$", last_order.order_number)
-            if match:
-                last_number = int(match.group(1))
-                next_number = last_number + 1
-            else:
-                # If existing numbers don't follow the pattern, start from 1
-                next_number = 1
-        else:
-            # No existing order numbers with the prefix at this location, start from 1
-            next_number = 1
-
-        # Format with leading zeros (e.g., 00001) for a fixed width
-        # Adjust the padding (5 in this case) based on your expected maximum order number.
-        # e.g., if you expect up to 999,999 orders, use 6.
-        padded_number = f"{next_number:05d}"  # Ensures 5 digits, e.g., 1 -> "00001"
-        return f"{prefix}{padded_number}"
+
+class OrderNumberSequence(models.Model):
+    """
+    Order number counter for one (tenant, store location).
+
+    allocate() increments the row with a single UPDATE, which row-locks it
+    until the surrounding transaction ends: concurrent terminals queue on the
+    lock instead of colliding on the order_number unique constraint, and a
+    rolled-back order also rolls back its number, keeping the sequence
+    gap-free. A missing row is seeded from the highest existing number.
+    """
+
+    tenant = models.ForeignKey(
+        'tenant.Tenant',
+        on_delete=models.CASCADE,
+        related_name='order_number_sequences'
+    )
+    store_location = models.ForeignKey(
+        'settings.StoreLocation',
+        on_delete=models.CASCADE,
+        related_name='order_number_sequences',
+        null=True,
+        blank=True,
+    )
+    last_number = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        verbose_name = _("Order Number Sequence")
+        verbose_name_plural = _("Order Number Sequences")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "store_location"],
+                name="unique_order_sequence_per_location",
+            ),
+            models.UniqueConstraint(
+                fields=["tenant"],
+                condition=models.Q(store_location__isnull=True),
+                name="unique_order_sequence_no_location",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Order numbers for location {self.store_location_id}: {self.last_number}"
+
+    @staticmethod
+    def format(number, prefix=Order.ORDER_NUMBER_PREFIX):
+        """ORD-00001 ... ORD-99999, then ORD-100000 (width grows, never truncates)"""
+        return f"{prefix}{number:05d}"
+
+    @classmethod
+    def allocate(cls, tenant_id, store_location_id):
+        """Next number for the location - call inside the transaction that saves the order"""
+        for _ in range(2):
+            sequence = cls.all_objects.filter(tenant_id=tenant_id, store_location_id=store_location_id)
+            if sequence.update(last_number=models.F("last_number") + 1, updated_at=timezone.now()):
+                # Our UPDATE holds the row lock, so this reads our own increment
+                return sequence.values_list("last_number", flat=True).get()
+            cls._seed(tenant_id, store_location_id)
+        raise Exception("Failed to allocate an order number.")
+
+    @classmethod
+    def _seed(cls, tenant_id, store_location_id):
+        """Create the counter at the highest existing number (a concurrent creator may win)"""
+        try:
+            with transaction.atomic():
+                cls.all_objects.create(
+                    tenant_id=tenant_id,
+                    store_location_id=store_location_id,
+                    last_number=cls.highest_assigned(tenant_id, store_location_id),
+                )
+        except IntegrityError:
+            pass  # Created by a concurrent allocation - just increment it
+
+    @classmethod
+    def reconcile(cls, tenant_id, store_location_id):
+        """Move the counter up to the highest number already assigned at the location"""
+        highest = cls.highest_assigned(tenant_id, store_location_id)
+        cls.all_objects.filter(
+            tenant_id=tenant_id, store_location_id=store_location_id, last_number__lt=highest
+        ).update(last_number=highest, updated_at=timezone.now())
+
+    @staticmethod
+    def highest_assigned(tenant_id, store_location_id, prefix=Order.ORDER_NUMBER_PREFIX):
+        """Numeric maximum of existing ORD-<digits> numbers (string order breaks past 99999)"""
+        from django.db.models import BigIntegerField, Max
+        from django.db.models.functions import Cast, Substr
+
+        return Order.all_objects.filter(
+            tenant_id=tenant_id,
+            store_location_id=store_location_id,
+            order_number__regex=rf"^{re.escape(prefix)}[0-9]+$",
+        ).aggregate(
+            highest=Max(Cast(Substr("order_number", len(prefix) + 1), BigIntegerField()))
+        )["highest"] or 0
 
 
 class OrderItem(models.Model):
@@ -63,7 +63,7 @@ class UnifiedOrderSerializer(
     total_collected = serializers.SerializerMethodField()
 
     # List mode computed fields
-    item_count = serializers.IntegerField(source="items.count", read_only=True)
+    item_count = serializers.SerializerMethodField()
     cashier_name = serializers.CharField(source="cashier.get_full_name", read_only=True)
 
     # Model properties
@@ -276,6 +276,13 @@ class UnifiedOrderSerializer(
             return StoreLocationSerializer(obj.store_location).data
         return None
 
+    def get_item_count(self, obj):
+        """Use the list views' Count('items') annotation; items.count() would query per order"""
+        annotated = getattr(obj, "item_count_annotation", None)
+        if annotated is not None:
+            return annotated
+        return obj.items.count()
+
     def get_total_with_tip(self, obj):
         """Get total with tip from prefetched payment details"""
         if hasattr(obj, "payment_details") and obj.payment_details:
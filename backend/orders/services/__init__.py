@@ -5,12 +5,14 @@ This package splits the original monolithic OrderService into focused, maintaina
 - OrderService: Core order lifecycle (create, update, complete, void)
 - OrderCalculationService: Tax and totals calculation
 - OrderItemService: Item management (add, update, remove)
+- OrderBatchService: Multi-operation cart batches with one recalculation
 - OrderDiscountService: Discount operations
 - OrderAdjustmentService: One-off discounts and price overrides
 - KitchenService: Kitchen operations (receipts, grouping, printing)
 - GuestSessionService: Guest sessions and conversion
 - GuestConversionService: Guest to user conversion
 - WebOrderNotificationService: Web order notifications
+- OrderStateBroadcastService: Versioned order state for WebSocket delta broadcasts
 """
 
 # Core order operations
@@ -21,6 +23,7 @@ from .calculation_service import OrderCalculationService
 
 # Item management
 from .item_service import OrderItemService
+from .batch_service import OrderBatchService
 
 # Discount operations
 from .discount_service import OrderDiscountService
@@ -37,6 +40,9 @@ from .guest_service import GuestSessionService, GuestConversionService
 # Notification operations
 from .notification_service import WebOrderNotificationService, web_order_notification_service
 
+# Realtime broadcast state
+from .broadcast_service import OrderStateBroadcastService
+
 __all__ = [
     # Core
     'OrderService',
@@ -44,6 +50,7 @@ __all__ = [
     'OrderCalculationService',
     # Items
     'OrderItemService',
+    'OrderBatchService',
     # Discounts
     'OrderDiscountService',
     # Adjustments
@@ -56,4 +63,6 @@ __all__ = [
     # Notifications
     'WebOrderNotificationService',
     'web_order_notification_service',
+    # Broadcasts
+    'OrderStateBroadcastService',
 ]
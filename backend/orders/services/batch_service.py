@@ -0,0 +1,157 @@
+from decimal import Decimal
+import logging
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+
+from orders.models import Order, OrderItem
+from products.models import Product
+
+from .calculation_service import OrderCalculationService
+from .item_service import OrderItemService
+
+logger = logging.getLogger(__name__)
+
+
+class BatchOperationUnsupported(ValueError):
+    """Raised for an operation that has to be sent on its own"""
+
+
+class OrderBatchService:
+    """
+    Applies an ordered list of cart operations - the OrderConsumer message
+    types sent in bursts by scanners and fast cashiers - in one transaction
+    with a single totals recalculation.
+
+    Each operation runs in its own savepoint, so a failing one is rolled back
+    and reported while the rest of the batch still applies.
+    """
+
+    OPERATIONS = ("add_item", "add_custom_item", "update_item_quantity", "remove_item")
+
+    # error_type reported for ValueErrors, matching the single-message handlers
+    VALIDATION_ERROR_TYPES = {
+        "add_item": "stock_validation",
+        "update_item_quantity": "stock_validation",
+    }
+
+    @classmethod
+    def can_batch(cls, order_id, operation: dict) -> bool:
+        """
+        Whether apply_operations can apply ``operation``; the rest have to go
+        through the OrderConsumer's single-message handlers.
+        """
+        if operation.get("type") not in cls.OPERATIONS:
+            return False
+        if operation.get("type") == "update_item_quantity":
+            payload = operation.get("payload") or {}
+            # Increasing a customized line splits it into new lines (see _update_item_quantity)
+            return not OrderItem.objects.filter(
+                id=payload.get("item_id"),
+                order_id=order_id,
+                product__isnull=False,
+                quantity__lt=payload.get("quantity") or 0,
+                selected_modifiers_snapshot__isnull=False,
+            ).exists()
+        return True
+
+    @classmethod
+    def apply_operations(cls, order: Order, operations: list, user=None):
+        """
+        Apply ``operations`` (dicts with type, payload and operationId) to the order.
+
+        Returns:
+            tuple: (recalculated order, or None if nothing was applied,
+                    per-operation results in request order)
+        """
+        results = []
+        with transaction.atomic():
+            with OrderCalculationService.batched_item_changes() as recalculated:
+                for operation in operations:
+                    results.append(cls._apply_operation(order, operation, user))
+
+        applied = sum(1 for result in results if result["status"] == "ok")
+        logger.info(
+            f"OrderBatchService: Applied {applied}/{len(operations)} operations to order {order.id} "
+            f"with {len(recalculated)} recalculation(s)"
+        )
+        return recalculated.get(order.pk), results
+
+    @classmethod
+    def _apply_operation(cls, order, operation, user):
+        operation_type = operation.get("type")
+        result = {"operationId": operation.get("operationId"), "type": operation_type}
+
+        if operation_type not in cls.OPERATIONS:
+            return {
+                **result, "status": "error", "error_type": "unsupported",
+                "message": f"'{operation_type}' cannot be sent in a batch",
+            }
+
+        try:
+            with transaction.atomic():
+                getattr(cls, f"_{operation_type}")(order, operation.get("payload") or {}, user)
+        except BatchOperationUnsupported as e:
+            return {**result, "status": "error", "error_type": "unsupported", "message": str(e)}
+        except ObjectDoesNotExist as e:
+            return {**result, "status": "error", "error_type": "not_found", "message": str(e)}
+        except ValueError as e:
+            error_type = cls.VALIDATION_ERROR_TYPES.get(operation_type, "validation")
+            return {
+                **result, "status": "error", "error_type": error_type, "message": str(e),
+                "can_override": error_type == "stock_validation",
+            }
+        except Exception as e:
+            logger.error(f"OrderBatchService: ❌ {operation_type} failed on order {order.id}: {e}")
+            return {**result, "status": "error", "error_type": "general", "message": str(e)}
+
+        return {**result, "status": "ok"}
+
+    @staticmethod
+    def _add_item(order, payload, user):
+        product = Product.objects.select_related("category", "product_type").get(
+            id=payload.get("product_id"), tenant=order.tenant
+        )
+        OrderItemService.add_item_to_order(
+            order=order,
+            product=product,
+            quantity=payload.get("quantity", 1),
+            selected_modifiers=payload.get("selected_modifiers", []),
+            notes=payload.get("notes", ""),
+            force_add=payload.get("force_add", False),
+        )
+
+    @staticmethod
+    def _add_custom_item(order, payload, user):
+        OrderItemService.add_custom_item_to_order(
+            order=order,
+            name=payload.get("name"),
+            price=Decimal(str(payload.get("price"))),
+            quantity=payload.get("quantity", 1),
+            notes=payload.get("notes", ""),
+            tax_exempt=payload.get("tax_exempt", False),
+            applied_by=user,
+        )
+
+    @classmethod
+    def _update_item_quantity(cls, order, payload, user):
+        item = OrderItem.objects.get(id=payload.get("item_id"), order=order)
+        new_quantity = payload.get("quantity")
+
+        if new_quantity <= 0:
+            OrderItemService.remove_item_from_order(item)
+            return
+
+        if new_quantity > item.quantity and item.product_id and item.selected_modifiers_snapshot.exists():
+            # The single-message handler splits these into individual customized lines
+            raise BatchOperationUnsupported("Increase the quantity of items with modifiers individually")
+
+        if payload.get("force_update") or item.product_id is None:
+            # Forced updates and custom items skip stock validation
+            OrderItemService.set_item_quantity(item, new_quantity)
+        else:
+            OrderItemService.update_item_quantity(item, new_quantity)
+
+    @staticmethod
+    def _remove_item(order, payload, user):
+        OrderItemService.remove_item_from_order(OrderItem.objects.get(id=payload.get("item_id"), order=order))
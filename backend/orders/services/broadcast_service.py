@@ -0,0 +1,151 @@
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core_backend.infrastructure.json_patch import make_patch
+from core_backend.infrastructure.websocket import RawJSON, encode_message, pre_encoded_event
+
+logger = logging.getLogger(__name__)
+
+
+class OrderStateBroadcastService:
+    """
+    Versioned order state for the optional WebSocket delta protocol.
+
+    The last payload broadcast to each order group is kept in the shared cache
+    with a monotonically increasing version, so every Daphne worker can turn
+    the next state into an RFC 6902 patch against it - or rebuild the full
+    state when it missed a version.
+    """
+
+    @staticmethod
+    def is_enabled():
+        return settings.ORDER_WEBSOCKET.get("DELTA_PROTOCOL", False)
+
+    @staticmethod
+    def _state_key(group_name):
+        return f"order_ws_state:{group_name}"
+
+    @staticmethod
+    def _version_key(group_name):
+        return f"order_ws_version:{group_name}"
+
+    @classmethod
+    def publish(cls, group_name, payload, payload_bytes=None):
+        """
+        Record ``payload`` as the group's latest state.
+
+        Returns the channel-layer event fields: the new ``version``, and either
+        ``base_version`` + ``patch`` or - when there is no usable base or the
+        patch would not be smaller - the full ``payload``.
+        """
+        ttl = settings.ORDER_WEBSOCKET["STATE_TTL_SECONDS"]
+        state_key, version_key = cls._state_key(group_name), cls._version_key(group_name)
+
+        base = cache.get(state_key)
+        cache.add(version_key, 0, ttl)
+        version = cache.incr(version_key)
+        cache.touch(version_key, ttl)
+        cache.set(state_key, {"version": version, "payload": payload}, ttl)
+
+        if base is not None:
+            patch = make_patch(base["payload"], payload)
+            if payload_bytes is None:
+                payload_bytes = len(json.dumps(payload).encode("utf-8"))
+            if len(json.dumps(patch).encode("utf-8")) < payload_bytes:
+                return {"version": version, "base_version": base["version"], "patch": patch}
+
+        return {"version": version, "payload": payload}
+
+    @classmethod
+    def build_cart_event(cls, group_name, payload, operation_id=None, payload_json=None):
+        """
+        Channel-layer 'cart_update' event with the client frames encoded once.
+
+        ``text`` is the full cart_update frame for legacy clients. With the
+        delta protocol enabled the event is also versioned and, when a patch
+        against the previous version is smaller, carries the encoded
+        cart_patch frame as ``patch_text``.
+        """
+        if payload_json is None:
+            payload_json = json.dumps(payload)
+        frame = {"type": "cart_update", "payload": RawJSON(payload_json)}
+        if operation_id:
+            frame["operationId"] = operation_id
+        if not cls.is_enabled():
+            return pre_encoded_event(frame)
+
+        state = cls.publish(group_name, payload, len(payload_json.encode("utf-8")))
+        event = pre_encoded_event(frame, version=state["version"], operationId=operation_id)
+        if "patch" in state:
+            patch_frame = {
+                "type": "cart_patch",
+                "version": state["version"],
+                "base_version": state["base_version"],
+                "patch": state["patch"],
+            }
+            if operation_id:
+                patch_frame["operationId"] = operation_id
+            event["base_version"] = state["base_version"]
+            event["patch_text"] = encode_message(patch_frame)
+        return event
+
+    @classmethod
+    def snapshot(cls, group_name):
+        """Latest ``{"version", "payload"}`` for the group, or None if expired"""
+        return cache.get(cls._state_key(group_name))
+
+    @classmethod
+    def clear(cls, group_name):
+        cache.delete_many([cls._state_key(group_name), cls._version_key(group_name)])
+
+    @staticmethod
+    def group_name(order):
+        return f"tenant_{order.tenant_id}_order_{order.id}"
+
+    @classmethod
+    def broadcast_order_states(cls, orders):
+        """
+        Send each order's current state to its tenant-scoped order group.
+
+        Every state is serialized and encoded once here, and all group sends
+        go out together in one async_to_sync call rather than one event-loop
+        round trip per order.
+
+        Returns:
+            int: number of groups notified
+        """
+        import asyncio
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+        from orders.consumers import convert_complex_types_to_str
+        from orders.serializers import UnifiedOrderSerializer
+
+        channel_layer = get_channel_layer()
+        if not channel_layer:
+            logger.warning("No channel layer configured for order state broadcasts")
+            return 0
+
+        sends = []
+        for order in orders:
+            group_name = cls.group_name(order)
+            payload = convert_complex_types_to_str(
+                UnifiedOrderSerializer(order, context={"view_mode": "websocket"}).data
+            )
+            sends.append((group_name, cls.build_cart_event(group_name, payload)))
+
+        async def send_all():
+            return await asyncio.gather(
+                *(channel_layer.group_send(group_name, event) for group_name, event in sends),
+                return_exceptions=True,
+            )
+
+        notified = 0
+        for (group_name, _), result in zip(sends, async_to_sync(send_all)() if sends else []):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to send order state to {group_name}: {result}")
+            else:
+                notified += 1
+        return notified
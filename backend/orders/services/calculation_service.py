@@ -1,15 +1,20 @@
 from decimal import Decimal
+from django.conf import settings
 from django.db import transaction
 import hashlib
 import logging
+import threading
 import time
+from contextlib import contextmanager
 
 from core_backend.infrastructure.cache_utils import cache_session_data, cache_static_data
 from payments.money import quantize
-from settings.config import AppSettings
 
 logger = logging.getLogger(__name__)
 
+# Orders whose item-change totals are deferred by batched_item_changes(), by id
+_deferred_totals = threading.local()
+
 
 class OrderCalculationService:
     """Service for calculating order totals, taxes, and managing calculation caching."""
@@ -95,234 +100,187 @@ class OrderCalculationService:
     @transaction.atomic
     def recalculate_order_totals(order):
         """
-        Recalculates all financial fields for an order using OrderCalculator (DRY).
+        Recalculates all financial fields for an order using OrderRecalculationEngine.
 
-        Delegates to OrderCalculator for subtotal, tax, and grand_total calculations.
-        Discounts are handled separately using DiscountStrategyFactory.
+        The order graph (items, taxes, discounts, adjustments) is loaded once and
+        every total is computed in memory, so the query count is constant no
+        matter how many items the order has. Changed rows are written back with
+        bulk_update.
         """
-        from orders.models import Order, OrderAdjustment
-        from orders.calculators import OrderCalculator
-        from orders.services import OrderAdjustmentService
-        from discounts.factories import DiscountStrategyFactory
+        from orders.calculators import OrderRecalculationEngine
 
         start_time = time.monotonic()
 
         # Prefetched relations on the Order instance become stale immediately after we mutate
         # related objects (e.g. adding/removing items via the WebSocket consumer). Always fetch
         # a fresh copy so calculations operate on accurate data.
-        original_order_reference = order
-        order = Order.objects.prefetch_related(
-            "items__product__taxes", "applied_discounts__discount", "adjustments"
-        ).select_related("store_location").get(id=order.id, tenant=order.tenant)
-        setattr(original_order_reference, "_recalculated_order_instance", order)
-
-        # Pre-fetch items with related data to prevent N+1 queries
-        items_queryset = order.items.select_related("product", "product__product_type").prefetch_related("product__taxes").all()
-        items = list(items_queryset)
-        item_count = len(items)
-
-        # Use OrderCalculator for DRY financial calculations
-        calculator = OrderCalculator(order)
-
-        # 1. Calculate subtotal (delegated to calculator)
-        order.subtotal = calculator.calculate_subtotal()
-
-        # 2. Recalculate discounts using DiscountService (NOT in calculator yet)
-        # TODO: Move this logic to DiscountCalculator class
-        total_discount_amount = Decimal("0.00")
-
-        applied_discounts = list(order.applied_discounts.all())
-        if applied_discounts:
-            for order_discount in applied_discounts:
-                strategy = DiscountStrategyFactory.get_strategy(order_discount.discount)
-                calculated_amount = strategy.apply(order, order_discount.discount)
-                if calculated_amount != order_discount.amount:
-                    order_discount.amount = calculated_amount
-                    order_discount.save()
-                total_discount_amount += calculated_amount
-        order.total_discounts_amount = total_discount_amount
-
-        # 3. Calculate total adjustments amount (one-off discounts only)
-        # IMPORTANT: Price overrides are NOT included here because they already modified price_at_sale
-        # Including them would double-count the price change. We still save the total for reporting.
-
-        # Recalculate percentage-based adjustments (similar to how we recalculate predefined discounts)
-        # This ensures percentage discounts stay accurate if order subtotal changes
-        percentage_adjustments = order.adjustments.select_related('order_item').filter(
-            adjustment_type=OrderAdjustment.AdjustmentType.ONE_OFF_DISCOUNT,
-            discount_type=OrderAdjustment.DiscountType.PERCENTAGE
-        )
-        for adjustment in percentage_adjustments:
-            # Recalculate amount based on item total (if item-level) or order subtotal (if order-level)
-            if adjustment.order_item_id:  # Use _id to avoid extra query
-                # Item-level: Calculate based on specific item's total
-                item_total = (adjustment.order_item.price_at_sale * adjustment.order_item.quantity) or Decimal('0.00')
-                new_amount = -(item_total * (adjustment.discount_value / Decimal('100.00')))
-                logger.info(
-                    f"Item-level percentage adjustment {adjustment.id}: "
-                    f"item_total={item_total}, discount_value={adjustment.discount_value}%, new_amount={new_amount}"
-                )
-            else:
-                # Order-level: Calculate based on order subtotal
-                new_amount = -(order.subtotal * (adjustment.discount_value / Decimal('100.00')))
-                logger.info(
-                    f"Order-level percentage adjustment {adjustment.id}: "
-                    f"subtotal={order.subtotal}, discount_value={adjustment.discount_value}%, new_amount={new_amount}"
-                )
-
-            # Round to currency precision using banker's rounding
-            currency = AppSettings().currency
-            new_amount = quantize(currency, new_amount)
-            if adjustment.amount != new_amount:
-                logger.info(
-                    f"Recalculating percentage adjustment {adjustment.id}: "
-                    f"{adjustment.amount} → {new_amount} "
-                    f"({'item' if adjustment.order_item_id else 'order'}-level)"
-                )
-                adjustment.amount = new_amount
-                adjustment.save(update_fields=['amount'])
-
-        # Recalculate fixed-amount discounts to respect current applicable total
-        # - Cap down if discount exceeds total (prevent negative totals)
-        # - Restore up if items added back (up to original discount_value)
-        fixed_adjustments = order.adjustments.filter(
-            adjustment_type=OrderAdjustment.AdjustmentType.ONE_OFF_DISCOUNT,
-            discount_type=OrderAdjustment.DiscountType.FIXED
-        )
-        for adjustment in fixed_adjustments:
-            # Original discount amount based on discount_value
-            original_discount = -adjustment.discount_value
-
-            # Max allowed discount depends on whether it's item-level or order-level
-            if adjustment.order_item:
-                # Item-level: Check against item total
-                item_total = (adjustment.order_item.price_at_sale * adjustment.order_item.quantity) or Decimal('0.00')
-                max_allowed_discount = -item_total
-            else:
-                # Order-level: Check against order subtotal
-                max_allowed_discount = -order.subtotal
-
-            # Apply the smaller of: original discount or max allowed (to prevent negative)
-            # This handles both capping down and restoring up
-            new_amount = max(original_discount, max_allowed_discount)  # max() because both are negative
-
-            if adjustment.amount != new_amount:
-                old_amount = adjustment.amount
-                adjustment.amount = new_amount
-                adjustment.save(update_fields=['amount'])
-                logger.info(
-                    f"Adjusted fixed discount {adjustment.id} "
-                    f"({'item' if adjustment.order_item else 'order'}-level): "
-                    f"{old_amount} → {new_amount} (original: {original_discount})"
-                )
-
-        # Clear prefetch cache and reload adjustments to ensure serializer gets updated values
-        # This is necessary because we modified the adjustments after prefetching them
-        if hasattr(order, '_prefetched_objects_cache') and 'adjustments' in order._prefetched_objects_cache:
-            del order._prefetched_objects_cache['adjustments']
-
-        # Get all adjustments for reporting/display
-        all_adjustments_total = OrderAdjustmentService.get_total_adjustments_amount(order)
-        order.total_adjustments_amount = all_adjustments_total
-
-        # Only apply one-off discounts to the calculation
-        # Exclude:
-        # - PRICE_OVERRIDE: already included in price_at_sale
-        # - TAX_EXEMPT: handled separately by setting tax_total to 0
-        # - FEE_EXEMPT: handled separately by setting surcharges_total to 0
-        total_adjustments_amount = OrderAdjustmentService.get_total_adjustments_amount(
-            order,
-            exclude_types=[
-                OrderAdjustment.AdjustmentType.PRICE_OVERRIDE,
-                OrderAdjustment.AdjustmentType.TAX_EXEMPT,
-                OrderAdjustment.AdjustmentType.FEE_EXEMPT,
-            ]
-        )
+        engine = OrderRecalculationEngine.load(order)
+        setattr(order, "_recalculated_order_instance", engine.order)
 
-        # 4. Calculate post-discount-and-adjustment subtotal
-        post_discount_subtotal = order.subtotal - order.total_discounts_amount + total_adjustments_amount
-
-        # 4. Surcharges are NOT calculated here - only during payment processing
-        # Fee exemptions are checked during payment, not here
-        order.surcharges_total = Decimal("0.00")
-
-        # 5. Calculate tax (delegated to calculator with discount-aware logic)
-        # Check if there's an ORDER-LEVEL tax exemption - if so, tax should be $0
-        # Note: Item-level tax exemptions are handled in the calculator
-        has_tax_exemption = order.adjustments.filter(
-            adjustment_type=OrderAdjustment.AdjustmentType.TAX_EXEMPT,
-            order_item__isnull=True  # Only order-level exemptions
-        ).exists()
-
-        if has_tax_exemption:
-            order.tax_total = Decimal("0.00")
-        else:
-            order.tax_total = calculator.calculate_item_level_tax(post_discount_subtotal)
-
-        # 6. Calculate grand total (delegated to calculator)
-        # Note: Calculator already applies discounts internally
-        order.grand_total = post_discount_subtotal + order.tax_total
-
-        order.save(
-            update_fields=[
-                "subtotal",
-                "total_discounts_amount",
-                "total_adjustments_amount",
-                "surcharges_total",
-                "tax_total",
-                "grand_total",
-                "updated_at",
-            ]
-        )
+        engine.recalculate()
+        order = engine.save()
 
         elapsed_ms = (time.monotonic() - start_time) * 1000
-        discount_count = len(applied_discounts)
-        adjustment_count = order.adjustments.count()
         logger.info(
-            "OrderCalculationService.recalculate_order_totals order_id=%s items=%d discounts=%d adjustments=%d elapsed_ms=%.2f (DRY via OrderCalculator)",
+            "OrderCalculationService.recalculate_order_totals order_id=%s items=%d discounts=%d adjustments=%d elapsed_ms=%.2f (in-memory engine)",
             order.id,
-            item_count,
-            discount_count,
-            adjustment_count,
+            len(engine.items),
+            len(engine.applied_discounts),
+            len(engine.adjustments),
             elapsed_ms,
         )
 
-        # Refresh items to get updated tax_amount values from bulk_update
-        # The items relationship is cached, so we need to invalidate it
+        # Serializers load items with their own relations (modifiers etc.) - drop the
+        # calculation prefetch so they don't reuse it
         if hasattr(order, '_prefetched_objects_cache') and 'items' in order._prefetched_objects_cache:
             del order._prefetched_objects_cache['items']
 
-        # Also clear the Django ORM cache for the items relationship
-        if 'items' in order.__dict__:
-            del order.__dict__['items']
-
         return order
 
     @staticmethod
     @transaction.atomic
-    def recalculate_in_progress_orders():
+    def apply_item_changes(order, changes):
         """
-        Recalculates totals for all in-progress orders when configuration changes.
-        This ensures tax rates and surcharges are applied consistently across all orders.
+        Updates order totals after item add/update/remove, incrementally when possible.
+
+        Only the changed lines are taxed and the order aggregates are moved by
+        their deltas (IncrementalTotalsCalculator). Orders with applied
+        discounts or one-off discount adjustments - where one line changes
+        every line's tax - fall back to recalculate_order_totals, as does
+        everything when ORDER_CALCULATION['INCREMENTAL_TOTALS'] is off.
+
+        Args:
+            order: Order whose lines changed
+            changes: LineChange entries describing the changed lines
         """
-        from orders.models import Order
+        from orders.calculators import IncrementalTotalsCalculator
+
+        pending = getattr(_deferred_totals, 'orders', None)
+        if pending is not None:
+            pending.setdefault(order.pk, order)
+            return order
+
+        if not getattr(settings, 'ORDER_CALCULATION', {}).get('INCREMENTAL_TOTALS', False):
+            return OrderCalculationService.recalculate_order_totals(order)
+
+        start_time = time.monotonic()
+
+        calculator = IncrementalTotalsCalculator.load(order)
+        if calculator is None:
+            return OrderCalculationService.recalculate_order_totals(order)
 
-        # Import app_settings locally to ensure we always get the fresh configuration
-        from settings.config import app_settings
+        calculator.apply(changes)
+        order_instance = calculator.save()
+        setattr(order, "_recalculated_order_instance", order_instance)
 
-        in_progress_orders = Order.objects.filter(
-            status__in=[Order.OrderStatus.PENDING, Order.OrderStatus.HOLD]
+        elapsed_ms = (time.monotonic() - start_time) * 1000
+        logger.info(
+            "OrderCalculationService.apply_item_changes order_id=%s lines=%d elapsed_ms=%.2f (incremental)",
+            order_instance.id,
+            len(changes),
+            elapsed_ms,
         )
+        return order_instance
+
+    @staticmethod
+    @contextmanager
+    def batched_item_changes():
+        """
+        Defers apply_item_changes calls inside the block to one full
+        recalculation per order when the block exits, for multi-operation
+        batches that would otherwise update totals after every line.
+
+        Yields a dict of the affected orders by id; after a clean exit it maps
+        each id to the recalculated order. Nested blocks join the outer one.
+        """
+        pending = getattr(_deferred_totals, 'orders', None)
+        if pending is not None:
+            yield pending
+            return
+
+        _deferred_totals.orders = pending = {}
+        try:
+            yield pending
+        finally:
+            _deferred_totals.orders = None
+        for order_id, order in list(pending.items()):
+            pending[order_id] = OrderCalculationService.recalculate_order_totals(order)
 
-        count = 0
-        for order in in_progress_orders:
-            old_grand_total = order.grand_total
-            OrderCalculationService.recalculate_order_totals(order)
-            new_grand_total = order.grand_total
+    # Fields both calculation paths own (surcharges are set at payment time)
+    VERIFIED_FIELDS = ("subtotal", "total_discounts_amount", "total_adjustments_amount", "tax_total", "grand_total")
 
-            if old_grand_total != new_grand_total:
-                count += 1
-                logger.info(f"Order #{order.id}: Grand total updated due to configuration change")
+    @staticmethod
+    @transaction.atomic
+    def verify_order_totals(order, repair=False):
+        """
+        Re-runs the full calculation in memory and compares it with the stored totals.
+
+        Guards the incremental path: both must agree to the cent. Drift is
+        logged as an error and, with repair=True, overwritten by the full result.
+        A repair locks the order before reading it, so an item edit made
+        meanwhile waits for the repair instead of being overwritten by it.
+
+        Returns:
+            dict: {field: (stored, expected)} for every field that differs
+        """
+        from orders.calculators import OrderRecalculationEngine
+
+        engine = OrderRecalculationEngine.load(order, for_update=repair)
+        stored = {field: getattr(engine.order, field) for field in OrderCalculationService.VERIFIED_FIELDS}
+        stored_line_taxes = {item.id: item.tax_amount for item in engine.items}
+
+        engine.recalculate()
+
+        drift = {
+            field: (stored[field], getattr(engine.order, field))
+            for field in OrderCalculationService.VERIFIED_FIELDS
+            if stored[field] != getattr(engine.order, field)
+        }
+        for item in engine.items:
+            if stored_line_taxes[item.id] != item.tax_amount:
+                drift[f"item:{item.id}:tax_amount"] = (stored_line_taxes[item.id], item.tax_amount)
+
+        if drift:
+            logger.error(f"❌ Order {engine.order.id} totals drifted from full recalculation: {drift}")
+            if repair:
+                engine.save()
+                logger.info(f"🔧 Repaired totals for order {engine.order.id}")
+        return drift
+
+    # Orders whose totals follow configuration changes
+    OPEN_STATUSES = ("PENDING", "HOLD")
 
-        logger.info(f"Recalculated {count} in-progress orders due to configuration change")
-        return count
+    @staticmethod
+    @transaction.atomic
+    def recalculate_open_orders(tenant_id, order_ids):
+        """
+        Full recalculation of a chunk of a tenant's in-progress orders.
+
+        All order graphs are loaded at once (OrderRecalculationEngine.load_many),
+        so the read queries don't grow with the chunk; only orders whose totals
+        or line taxes changed are written back. Orders that left PENDING/HOLD
+        since they were queued are skipped. The orders stay locked until the
+        chunk commits, so a cashier's concurrent item edit is applied after
+        the recalculation rather than lost to it.
+
+        Returns:
+            list: the recalculated orders whose totals changed
+        """
+        from orders.calculators import OrderRecalculationEngine
+
+        engines = OrderRecalculationEngine.load_many(
+            tenant_id, for_update=True, id__in=order_ids, status__in=OrderCalculationService.OPEN_STATUSES
+        )
+
+        changed = []
+        for engine in engines:
+            stored = {field: getattr(engine.order, field) for field in OrderCalculationService.VERIFIED_FIELDS}
+            engine.recalculate()
+            if engine.rows_changed() or any(stored[field] != getattr(engine.order, field) for field in stored):
+                changed.append(engine.save())
+                logger.info(f"Order #{engine.order.id}: Totals updated due to configuration change")
+
+        logger.info(
+            f"Recalculated {len(engines)} in-progress orders for tenant {tenant_id}, {len(changed)} changed"
+        )
+        return changed
@@ -3,6 +3,7 @@ from django.db import transaction
 from django.db.models import F, Sum
 import logging
 
+from orders.calculators import LineChange, lock_order_lines
 from orders.models import Order, OrderItem, OrderItemModifier
 from products.models import Product, ModifierOption
 from products.services import ModifierValidationService
@@ -172,8 +173,11 @@ class OrderItemService:
 
             # Return the first created item for backwards compatibility
             order_item = created_items[0] if created_items else None
+            line_changes = [LineChange.added(item) for item in created_items]
         else:
-            # For items without modifiers, check if we can merge with existing
+            # For items without modifiers, check if we can merge with existing.
+            # Under the order lock the merged line's quantity is the committed one.
+            lock_order_lines(order)
             existing_item = OrderItem.objects.filter(
                 order=order,
                 product=product,
@@ -187,8 +191,10 @@ class OrderItemService:
                 OrderItem.objects.filter(id=existing_item.id).update(
                     quantity=F('quantity') + quantity
                 )
+                previous_quantity = existing_item.quantity
                 existing_item.refresh_from_db()
                 order_item = existing_item
+                line_changes = [LineChange.updated(existing_item, previous_quantity)]
             else:
                 # Create new item without modifiers
                 existing_count = OrderItem.objects.filter(
@@ -206,6 +212,7 @@ class OrderItemService:
                     variation_group=variation_group,
                     tenant=order.tenant
                 )
+                line_changes = [LineChange.added(order_item)]
 
         # Create snapshot records for the selected modifiers
         # Handle both individual items (with modifiers) and regular items
@@ -243,7 +250,7 @@ class OrderItemService:
                         logger.warning(f"ModifierOption with id {option_id} not found")
                         continue
 
-        OrderCalculationService.recalculate_order_totals(order)
+        OrderCalculationService.apply_item_changes(order, line_changes)
         return order_item
 
     @staticmethod
@@ -303,7 +310,7 @@ class OrderItemService:
                 approved_by=None,
             )
 
-        OrderCalculationService.recalculate_order_totals(order)
+        OrderCalculationService.apply_item_changes(order, [LineChange.added(order_item)])
         return order_item
 
     @staticmethod
@@ -324,6 +331,7 @@ class OrderItemService:
         if new_quantity <= 0:
             raise ValueError("Quantity must be greater than 0")
 
+        lock_order_lines(order_item.order, [order_item])
         current_quantity = order_item.quantity
         if new_quantity == current_quantity:
             return  # No change needed
@@ -393,8 +401,78 @@ class OrderItemService:
         order_item.quantity = new_quantity
         order_item.save()
 
-        # Recalculate order totals
-        OrderCalculationService.recalculate_order_totals(order_item.order)
+        # Update order totals for this line
+        OrderCalculationService.apply_item_changes(
+            order_item.order, [LineChange.updated(order_item, current_quantity)]
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def set_item_quantity(order_item: 'OrderItem', new_quantity: int):
+        """
+        Sets an item's quantity without stock validation (forced overrides and
+        custom items) and moves the order totals by the change.
+        """
+        from orders.services.calculation_service import OrderCalculationService
+
+        lock_order_lines(order_item.order, [order_item])
+        current_quantity = order_item.quantity
+        order_item.quantity = new_quantity
+        order_item.save()
+
+        OrderCalculationService.apply_item_changes(
+            order_item.order, [LineChange.updated(order_item, current_quantity)]
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def replace_item(order_item: 'OrderItem', quantity: int = 1, selected_modifiers=None, notes: str = "") -> OrderItem:
+        """
+        Replaces an item with a new line for the same product carrying new
+        modifiers and notes. Unlike remove_item_from_order, replacing the only
+        item keeps the order's discounts and adjustments.
+        """
+        from orders.services.calculation_service import OrderCalculationService
+
+        order = order_item.order
+        product = order_item.product
+        lock_order_lines(order, [order_item])
+        removed_line = LineChange.deleted(order_item)
+        order_item.delete()
+        OrderCalculationService.apply_item_changes(order, [removed_line])
+
+        return OrderItemService.add_item_to_order(
+            order=order,
+            product=product,
+            quantity=quantity,
+            selected_modifiers=selected_modifiers,
+            notes=notes,
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def remove_item_from_order(order_item: 'OrderItem') -> Order:
+        """
+        Deletes an item and updates the order totals. Removing the last item
+        also clears the order-level discounts and adjustments.
+
+        Returns the order; like the other item operations it carries the
+        updated instance as ``_recalculated_order_instance``.
+        """
+        from orders.services.calculation_service import OrderCalculationService
+
+        order = order_item.order
+        lock_order_lines(order, [order_item])
+        removed_line = LineChange.deleted(order_item)
+        order_item.delete()
+
+        if not order.items.exists():
+            # Item-level adjustments cascade with the items
+            order.applied_discounts.all().delete()
+            order.adjustments.filter(order_item__isnull=True).delete()
+
+        OrderCalculationService.apply_item_changes(order, [removed_line])
+        return order
 
     @staticmethod
     @transaction.atomic
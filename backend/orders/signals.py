@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.db import transaction
 from django.dispatch import Signal
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
@@ -131,22 +133,44 @@ def handle_web_order_notifications(sender, instance, created, **kwargs):
         f"Web order notification event broadcasted for order {instance.order_number}"
     )
 
+@receiver(post_save, sender=Order)
+def handle_order_completion_totals_verification(sender, instance, created, **kwargs):
+    """
+    Queues a full-recalculation check of a completed order's totals.
+
+    Item edits maintain totals incrementally; this asserts both paths agree
+    on every order that gets paid. Queued after commit so the task reads the
+    final rows.
+    """
+    if created or instance.status != Order.OrderStatus.COMPLETED:
+        return
+    if kwargs.get("update_fields") and "status" not in kwargs["update_fields"]:
+        return
+
+    calculation_settings = getattr(settings, "ORDER_CALCULATION", {})
+    if not (calculation_settings.get("INCREMENTAL_TOTALS") and calculation_settings.get("VERIFY_ON_COMPLETE")):
+        return
+
+    def queue_verification():
+        try:
+            from .tasks import verify_completed_order_totals
+
+            verify_completed_order_totals.delay(str(instance.id))
+        except Exception as e:
+            logger.error(f"Failed to queue totals verification for order {instance.id}: {e}")
+
+    transaction.on_commit(queue_verification)
+
+
 # Cache invalidation signal handlers for Phase 3B
+# Report invalidation is only recorded here and flushed once per transaction on commit
 @receiver([post_save, post_delete], sender=Order)
 def handle_order_changes_for_reports(sender, instance=None, **kwargs):
-    """Invalidate report caches when orders change"""
+    """Mark the order's report scope dirty when orders change"""
     try:
-        # Invalidate report caches that depend on order data
-        invalidate_cache_pattern('*get_cached_business_kpis*')
-        invalidate_cache_pattern('*sales_report*')
-        invalidate_cache_pattern('*summary_report*')
-        invalidate_cache_pattern('*payment_report*')
-        invalidate_cache_pattern('*operations_report*')
-        
-        # Also invalidate ReportCache entries in the database
-        _invalidate_report_cache_entries()
-        
-        logger.debug(f"Invalidated report caches after order change: {instance.order_number if instance else 'unknown'}")
+        from reports.invalidation import ReportInvalidationCollector
+
+        ReportInvalidationCollector.mark_order_dirty(instance)
         
     except Exception as e:
         logger.error(f"Failed to invalidate report caches: {e}")
@@ -158,12 +182,10 @@ def handle_order_item_changes(sender, instance=None, **kwargs):
         # Invalidate session-level calculation caches
         invalidate_cache_pattern('get_cached_order_totals')
         
-        # Also invalidate report caches since order totals affect reports
-        invalidate_cache_pattern('*get_cached_business_kpis*')
-        invalidate_cache_pattern('*sales_report*')
-        
-        # Invalidate database report cache entries
-        _invalidate_report_cache_entries()
+        # Order totals affect reports - collected and flushed on commit
+        from reports.invalidation import ReportInvalidationCollector, ORDER_TOTALS_REPORT_PATTERNS
+
+        ReportInvalidationCollector.mark_order_dirty(instance.order, ORDER_TOTALS_REPORT_PATTERNS)
         
         logger.debug(f"Invalidated order calculation caches after item change")
         
@@ -177,40 +199,12 @@ def handle_order_discount_changes(sender, instance=None, **kwargs):
         # Invalidate session-level calculation caches
         invalidate_cache_pattern('get_cached_order_totals')
         
-        # Also invalidate report caches since discounts affect totals
-        invalidate_cache_pattern('*get_cached_business_kpis*')
-        invalidate_cache_pattern('*sales_report*')
-        
-        # Invalidate database report cache entries
-        _invalidate_report_cache_entries()
+        # Discounts affect totals - collected and flushed on commit
+        from reports.invalidation import ReportInvalidationCollector, ORDER_TOTALS_REPORT_PATTERNS
+
+        ReportInvalidationCollector.mark_order_dirty(instance.order, ORDER_TOTALS_REPORT_PATTERNS)
         
         logger.debug(f"Invalidated order calculation caches after discount change")
         
     except Exception as e:
         logger.error(f"Failed to invalidate order discount caches: {e}")
-
-def _invalidate_report_cache_entries():
-    """Helper function to invalidate database report cache entries"""
-    try:
-        from reports.models import ReportCache
-        from django.utils import timezone
-        
-        # Debug: log the ReportCache model fields
-        logger.debug(f"ReportCache model fields: {[field.name for field in ReportCache._meta.fields]}")
-        
-        # Mark recent report cache entries as expired
-        one_hour_ago = timezone.now() - timezone.timedelta(hours=1)
-        
-        # Debug: try to identify the exact query that's failing
-        logger.debug(f"Attempting to filter ReportCache with generated_at__gte={one_hour_ago}")
-        
-        ReportCache.objects.filter(
-            generated_at__gte=one_hour_ago
-        ).update(expires_at=timezone.now())
-        
-        logger.debug("Invalidated recent database report cache entries")
-        
-    except Exception as e:
-        import traceback
-        logger.error(f"Failed to invalidate database report cache entries: {e}")
-        logger.error(f"Full traceback: {traceback.format_exc()}")
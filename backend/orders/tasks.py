@@ -0,0 +1,148 @@
+from celery import shared_task
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def verify_completed_order_totals(order_id):
+    """
+    Compare a completed order's stored totals with a full recalculation.
+
+    Queued on completion when incremental totals are enabled. Completed orders
+    have been paid, so drift is only logged - never rewritten.
+
+    Args:
+        order_id: UUID of the completed order
+    """
+    from orders.models import Order
+    from orders.services import OrderCalculationService
+    from tenant.managers import set_current_tenant
+
+    try:
+        order = Order.all_objects.select_related("tenant").get(id=order_id)
+        set_current_tenant(order.tenant)
+
+        drift = OrderCalculationService.verify_order_totals(order)
+        return {
+            "status": "drift" if drift else "ok",
+            "order_id": str(order_id),
+            "fields": sorted(drift),
+        }
+
+    except Order.DoesNotExist:
+        logger.error(f"Order {order_id} not found for totals verification")
+        return {"status": "failed", "error": "Order not found", "order_id": str(order_id)}
+    except Exception as exc:
+        logger.error(f"Error verifying totals for order {order_id}: {exc}")
+        return {"status": "failed", "error": str(exc), "order_id": str(order_id)}
+    finally:
+        set_current_tenant(None)
+
+
+@shared_task
+def verify_open_order_totals():
+    """
+    Periodic sweep: full recalculation of recently edited open orders.
+
+    Repairs any PENDING/HOLD order whose incrementally maintained totals
+    disagree with the full calculation before it reaches payment.
+    """
+    from orders.models import Order
+    from orders.services import OrderCalculationService
+    from tenant.managers import set_current_tenant
+
+    window = getattr(settings, "ORDER_CALCULATION", {}).get("VERIFY_WINDOW_MINUTES", 30)
+    since = timezone.now() - timedelta(minutes=window)
+
+    orders = Order.all_objects.select_related("tenant").filter(
+        status__in=[Order.OrderStatus.PENDING, Order.OrderStatus.HOLD],
+        updated_at__gte=since,
+    )
+
+    checked = repaired = 0
+    try:
+        for order in orders.iterator():
+            set_current_tenant(order.tenant)
+            try:
+                if OrderCalculationService.verify_order_totals(order, repair=True):
+                    repaired += 1
+                checked += 1
+            except Exception as exc:
+                logger.error(f"Error verifying totals for order {order.id}: {exc}")
+    finally:
+        set_current_tenant(None)
+
+    logger.info(f"Verified totals for {checked} open orders, repaired {repaired}")
+    return {"status": "completed", "checked": checked, "repaired": repaired}
+
+
+@shared_task
+def recalculate_open_orders_for_tenant(tenant_id):
+    """
+    Fan out a full recalculation of a tenant's in-progress orders after its
+    configuration changed, one recalculate_open_order_chunk task per
+    ORDER_CALCULATION['CONFIG_RECALC_CHUNK_SIZE'] orders.
+
+    Args:
+        tenant_id: UUID of the tenant whose settings were saved
+    """
+    from orders.models import Order
+    from orders.services import OrderCalculationService
+
+    order_ids = [
+        str(order_id)
+        for order_id in Order.all_objects.filter(
+            tenant_id=tenant_id, status__in=OrderCalculationService.OPEN_STATUSES
+        ).order_by("created_at").values_list("id", flat=True)
+    ]
+
+    chunk_size = settings.ORDER_CALCULATION["CONFIG_RECALC_CHUNK_SIZE"]
+    chunks = [order_ids[start:start + chunk_size] for start in range(0, len(order_ids), chunk_size)]
+    for chunk in chunks:
+        recalculate_open_order_chunk.delay(str(tenant_id), chunk)
+
+    logger.info(f"Queued recalculation of {len(order_ids)} open orders for tenant {tenant_id} in {len(chunks)} chunks")
+    return {"status": "queued", "orders": len(order_ids), "chunks": len(chunks)}
+
+
+@shared_task
+def recalculate_open_order_chunk(tenant_id, order_ids):
+    """
+    Recalculate a chunk of a tenant's in-progress orders and push the orders
+    whose totals changed to their open carts.
+
+    Args:
+        tenant_id: UUID of the tenant
+        order_ids: UUIDs of the orders in this chunk
+    """
+    from orders.models import Order
+    from orders.services import OrderCalculationService, OrderStateBroadcastService
+    from tenant.managers import set_current_tenant
+    from tenant.models import Tenant
+
+    try:
+        set_current_tenant(Tenant.objects.get(id=tenant_id))
+
+        changed = OrderCalculationService.recalculate_open_orders(tenant_id, order_ids)
+        notified = 0
+        if changed:
+            # Serializers need relations the calculation graph doesn't load
+            orders = Order.objects.prefetch_related("items__product", "applied_discounts__discount").filter(
+                id__in=[order.id for order in changed]
+            )
+            notified = OrderStateBroadcastService.broadcast_order_states(orders)
+
+        return {"status": "completed", "orders": len(order_ids), "changed": len(changed), "notified": notified}
+
+    except Tenant.DoesNotExist:
+        logger.error(f"Tenant {tenant_id} not found for open order recalculation")
+        return {"status": "failed", "error": "Tenant not found"}
+    except Exception as exc:
+        logger.error(f"Error recalculating open orders for tenant {tenant_id}: {exc}")
+        return {"status": "failed", "error": str(exc)}
+    finally:
+        set_current_tenant(None)
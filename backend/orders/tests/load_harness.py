@@ -0,0 +1,374 @@
+"""
+WebSocket load harness for order editing.
+
+Drives concurrent ``WebsocketCommunicator`` clients through the production
+middleware stack (tenant + JWT cookie auth) into OrderConsumer, replays cart
+editing sequences and measures, per message type:
+
+- latency from send until the client receives the reply for its operationId
+- database queries executed while the consumer handled the message
+- bytes of the reply frame, and of the broadcasts observer screens received
+
+Optionally, POS terminals connected to GlobalPOSConsumer receive web order
+notifications sent to their terminal groups while the carts are edited; the
+report records their delivery latency and frame size under "notifications".
+
+Queries are attributed through a context variable set by the consumer while
+it handles a message; sync_to_async copies the context into the database
+thread, so attribution holds while clients interleave.
+
+Results are written as JSON (see ``write_report``) so runs on different
+commits can be compared with ``compare_reports``.
+"""
+import asyncio
+import contextvars
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.db.backends.utils import CursorWrapper
+from django.urls import re_path
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core_backend.infrastructure.json_patch import apply_patch
+from core_backend.infrastructure.websocket import pre_encoded_event
+from core_backend.jwt_websocket_middleware import JWTAuthMiddleware
+from notifications.consumers import GlobalPOSConsumer
+from orders.consumers import OrderConsumer
+from tenant.websocket_middleware import TenantWebSocketMiddleware
+
+REPORT_VERSION = 1
+REPLY_TIMEOUT_SECONDS = 30
+
+_current_message = contextvars.ContextVar("load_harness_message", default=None)
+
+
+class MeasuredOrderConsumer(OrderConsumer):
+    """OrderConsumer that labels the queries of each handled message"""
+
+    async def handle_message(self, data):
+        token = _current_message.set(data.get("type"))
+        try:
+            await super().handle_message(data)
+        finally:
+            _current_message.reset(token)
+
+
+def build_application():
+    """The websocket stack from core_backend.asgi, routed to MeasuredOrderConsumer and GlobalPOSConsumer"""
+    from channels.routing import URLRouter
+
+    return TenantWebSocketMiddleware(JWTAuthMiddleware(URLRouter([
+        re_path(r"ws/cart/(?P<order_id>[\w-]+)/$", MeasuredOrderConsumer.as_asgi()),
+        re_path(r"ws/notifications/$", GlobalPOSConsumer.as_asgi()),
+    ])))
+
+
+@contextmanager
+def count_queries():
+    """Counts every query executed in any thread, keyed by the message being handled"""
+    counts = defaultdict(int)
+    original = CursorWrapper._execute_with_wrappers
+
+    def counted(cursor, sql, params, many, executor):
+        counts[_current_message.get() or "connect"] += 1
+        return original(cursor, sql, params, many, executor)
+
+    with patch.object(CursorWrapper, "_execute_with_wrappers", counted):
+        yield counts
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of ``values`` (0 < fraction <= 1)"""
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summarize(latencies_ms, reply_bytes, queries, broadcast_bytes=()):
+    samples = len(latencies_ms)
+    return {
+        "samples": samples,
+        "p50_ms": round(percentile(latencies_ms, 0.50), 3),
+        "p95_ms": round(percentile(latencies_ms, 0.95), 3),
+        "p99_ms": round(percentile(latencies_ms, 0.99), 3),
+        "max_ms": round(max(latencies_ms), 3),
+        "queries_per_op": round(queries / samples, 2),
+        "reply_bytes_avg": round(sum(reply_bytes) / samples),
+        "reply_bytes_max": max(reply_bytes),
+        "broadcast_bytes_avg": round(sum(broadcast_bytes) / len(broadcast_bytes)) if broadcast_bytes else 0,
+    }
+
+
+class CartClient:
+    """One POS screen editing an order, tracking the cart it was last sent"""
+
+    def __init__(self, application, order_id, access_token, protocol="legacy"):
+        query = "?protocol=delta" if protocol == "delta" else ""
+        self.communicator = WebsocketCommunicator(
+            application,
+            f"/ws/cart/{order_id}/{query}",
+            headers=[(b"cookie", f"access_token={access_token}".encode())],
+        )
+        self.cart = None
+        self.version = None
+        self.received_bytes = []
+
+    async def connect(self):
+        connected, _ = await self.communicator.connect()
+        if not connected:
+            raise RuntimeError("WebSocket connection was rejected")
+
+    async def disconnect(self):
+        await self.communicator.disconnect()
+
+    def _track(self, message):
+        if message.get("type") == "cart_update":
+            self.cart = message["payload"]
+            self.version = message.get("version")
+        elif message.get("type") == "cart_patch":
+            self.cart = apply_patch(self.cart, message["patch"])
+            self.version = message["version"]
+
+    async def receive(self, timeout=REPLY_TIMEOUT_SECONDS):
+        text = await self.communicator.receive_from(timeout=timeout)
+        message = json.loads(text)
+        self._track(message)
+        self.received_bytes.append(len(text.encode("utf-8")))
+        return message, len(text.encode("utf-8"))
+
+    async def request(self, message_type, payload, operation_id):
+        """Send one message; returns (latency ms, reply bytes, reply) once its reply arrives"""
+        started = time.perf_counter()
+        await self.communicator.send_json_to({"type": message_type, "payload": payload, "operationId": operation_id})
+        while True:
+            reply, size = await self.receive()
+            if reply.get("operationId") == operation_id or reply.get("type") in ("error", "approval_required"):
+                return (time.perf_counter() - started) * 1000, size, reply
+
+    async def drain(self):
+        """Receive everything already delivered (observer screens)"""
+        while not await self.communicator.receive_nothing(timeout=0.01):
+            await self.receive()
+
+    def line_for(self, product_id):
+        return next(
+            item for item in self.cart["items"]
+            if str((item.get("product") or {}).get("id")) == str(product_id)
+        )
+
+
+class TerminalClient:
+    """One POS terminal listening for system-wide notifications"""
+
+    def __init__(self, application, device_id, access_token):
+        self.device_id = device_id
+        self.communicator = WebsocketCommunicator(
+            application,
+            f"/ws/notifications/?device_id={device_id}",
+            headers=[(b"cookie", f"access_token={access_token}".encode())],
+        )
+
+    async def connect(self):
+        connected, _ = await self.communicator.connect()
+        if not connected:
+            raise RuntimeError(f"Terminal {self.device_id} was rejected")
+        await self.communicator.receive_json_from(timeout=REPLY_TIMEOUT_SECONDS)  # connection_established
+
+    async def disconnect(self):
+        await self.communicator.disconnect()
+
+    async def listen(self, expected, sent_at, latencies_ms, frame_bytes):
+        """Receive ``expected`` notifications, timing each from when it was sent"""
+        for _ in range(expected):
+            text = await self.communicator.receive_from(timeout=REPLY_TIMEOUT_SECONDS)
+            received = time.perf_counter()
+            notification_id = json.loads(text)["data"]["notification_id"]
+            latencies_ms.append((received - sent_at[notification_id]) * 1000)
+            frame_bytes.append(len(text.encode("utf-8")))
+
+
+async def send_web_order_notification(tenant_id, device_ids, notification_id, order_data):
+    """Notify each terminal's group the way notifications.signals does for a web order"""
+    event = pre_encoded_event({"type": "web_order_notification", "data": {
+        "type": "web_order_notification",
+        "notification_id": notification_id,
+        "order": order_data,
+        "timestamp": datetime.now().isoformat(),
+        "settings": {"play_notification_sound": True, "auto_print_receipt": False, "auto_print_kitchen": False},
+    }})
+    channel_layer = get_channel_layer()
+    for device_id in device_ids:
+        await channel_layer.group_send(f"tenant_{tenant_id}_terminal_{device_id}", event)
+
+
+def access_token_for(user):
+    """Access token carrying the tenant claim TenantWebSocketMiddleware reads"""
+    refresh = RefreshToken.for_user(user)
+    refresh["tenant_id"] = str(user.tenant_id)
+    return str(refresh.access_token)
+
+
+def editing_sequence(client, products, discount_id, rounds):
+    """
+    A cashier ringing up a ticket: add items (including repeats that merge
+    into an existing line), change a quantity, and apply a discount part way.
+    Yields (message type, payload builder) so payloads can use the current cart.
+    """
+    for round_index in range(rounds):
+        product = products[round_index % len(products)]
+        yield "add_item", lambda product=product: {"product_id": str(product.id), "quantity": 1}
+        yield "add_item", lambda product=product: {"product_id": str(product.id), "quantity": 1}
+        yield "update_item_quantity", lambda product=product: {
+            "item_id": client.line_for(product.id)["id"],
+            "quantity": client.line_for(product.id)["quantity"] + 1,
+        }
+        if round_index == rounds // 2 and discount_id:
+            yield "apply_discount", lambda: {"discount_id": str(discount_id)}
+
+
+async def run_load(application, orders, user, products, discount_id=None, rounds=3,
+                   observers=1, protocol="legacy", terminals=(), notifications=2):
+    """
+    Run one editing client plus ``observers`` passive screens per order, all
+    orders concurrently. With ``terminals`` (device ids of registered
+    TerminalRegistrations), each order's editor also announces its cart as a
+    web order to every terminal after each of its first ``notifications``
+    edits. Returns the report dict (see ``write_report``).
+    """
+    access_token = await database_sync_to_async(access_token_for)(user)
+
+    samples = defaultdict(lambda: {"latency_ms": [], "reply_bytes": [], "broadcast_bytes": []})
+    notified = {"latency_ms": [], "frame_bytes": []}
+    sent_at = {}
+    errors = []
+
+    async def drive(order):
+        editor = CartClient(application, order.id, access_token, protocol)
+        screens = [CartClient(application, order.id, access_token, protocol) for _ in range(observers)]
+        for client in (editor, *screens):
+            await client.connect()
+        try:
+            for index, (message_type, build_payload) in enumerate(
+                editing_sequence(editor, products, discount_id, rounds)
+            ):
+                operation_id = f"{order.id}-{index}"
+                latency_ms, size, reply = await editor.request(message_type, build_payload(), operation_id)
+                if reply.get("type") in ("error", "approval_required"):
+                    errors.append({"type": message_type, "reply": reply})
+                sample = samples[message_type]
+                sample["latency_ms"].append(latency_ms)
+                sample["reply_bytes"].append(size)
+                for screen in screens:
+                    screen.received_bytes = []
+                    await screen.drain()
+                    sample["broadcast_bytes"].extend(screen.received_bytes)
+                if terminals and index < notifications:
+                    sent_at[operation_id] = time.perf_counter()
+                    await send_web_order_notification(user.tenant_id, terminals, operation_id, editor.cart)
+        finally:
+            for client in (editor, *screens):
+                await client.disconnect()
+
+    terminal_clients = [TerminalClient(application, device_id, access_token) for device_id in terminals]
+    for terminal in terminal_clients:
+        await terminal.connect()
+    expected_notifications = len(orders) * notifications if terminals else 0
+
+    started = time.perf_counter()
+    try:
+        with count_queries() as query_counts:
+            await asyncio.gather(
+                *(drive(order) for order in orders),
+                *(terminal.listen(expected_notifications, sent_at, notified["latency_ms"], notified["frame_bytes"])
+                  for terminal in terminal_clients),
+            )
+    finally:
+        for terminal in terminal_clients:
+            await terminal.disconnect()
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    operations = {
+        message_type: summarize(
+            sample["latency_ms"], sample["reply_bytes"], query_counts[message_type], sample["broadcast_bytes"]
+        )
+        for message_type, sample in samples.items()
+    }
+    all_latencies = [value for sample in samples.values() for value in sample["latency_ms"]]
+    total_ops = len(all_latencies)
+    return {
+        "report_version": REPORT_VERSION,
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "orders": len(orders), "observers_per_order": observers,
+            "rounds": rounds, "protocol": protocol,
+            "terminals": len(terminals), "notifications_per_order": notifications if terminals else 0,
+        },
+        "summary": {
+            "operations": total_ops,
+            "wall_ms": round(wall_ms, 3),
+            "ops_per_second": round(total_ops / (wall_ms / 1000), 2),
+            "p50_ms": round(percentile(all_latencies, 0.50), 3),
+            "p95_ms": round(percentile(all_latencies, 0.95), 3),
+            "p99_ms": round(percentile(all_latencies, 0.99), 3),
+            "queries_per_op": round(sum(query_counts[t] for t in samples) / total_ops, 2),
+            "connect_queries": query_counts["connect"],
+            "errors": len(errors),
+        },
+        "operations": operations,
+        # Delivered through the channel layer only: no queries, and the frame is the reply
+        "notifications": {
+            "web_order_notification": summarize(notified["latency_ms"], notified["frame_bytes"], 0),
+        } if notified["latency_ms"] else {},
+        "errors": errors[:20],
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def write_report(report, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
+
+
+def compare_reports(baseline, current, metrics=("p50_ms", "p95_ms", "p99_ms", "queries_per_op", "reply_bytes_avg")):
+    """
+    Per-operation changes between two reports: {type: {metric: (before, after, % change)}}.
+    Terminal notifications are compared alongside the operations; types
+    missing from either report are skipped.
+    """
+    before_types = {**baseline.get("operations", {}), **baseline.get("notifications", {})}
+    changes = {}
+    for message_type, after in {**current["operations"], **current.get("notifications", {})}.items():
+        before = before_types.get(message_type)
+        if before is None:
+            continue
+        changes[message_type] = {
+            metric: (
+                before[metric], after[metric],
+                round((after[metric] - before[metric]) * 100 / before[metric], 1) if before[metric] else None,
+            )
+            for metric in metrics
+        }
+    return changes
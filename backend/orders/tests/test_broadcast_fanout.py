@@ -0,0 +1,168 @@
+"""
+WebSocket Broadcast Fan-out Tests
+
+Tests that group broadcasts are encoded once by the sender and forwarded
+verbatim by every receiving consumer, and benchmarks fan-out to 1, 10 and 50
+consumers on the in-memory channel layer against per-consumer encoding.
+
+Test Categories:
+1. Frame Encoding (2 tests)
+2. Notification Forwarding (1 test)
+3. Fan-out Benchmark (3 tests)
+
+Run the benchmark with: pytest orders/tests/test_broadcast_fanout.py -s -m performance
+"""
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+from channels.layers import InMemoryChannelLayer
+
+from core_backend.infrastructure.websocket import RawJSON, encode_message, pre_encoded_event
+from notifications.consumers import GlobalPOSConsumer
+from orders.consumers import OrderConsumer
+from orders.services import OrderStateBroadcastService
+
+GROUP = "tenant_bench_order_1"
+
+
+def large_cart(lines=60):
+    """A tab roughly the size of a busy table's order (~20 KB encoded)"""
+    return {
+        'id': 'order-1',
+        'status': 'PENDING',
+        'grand_total': '412.50',
+        'items': [
+            {
+                'id': f'item-{index}',
+                'product': {'id': f'product-{index}', 'name': f'Menu Item {index}', 'price': '6.75'},
+                'quantity': index % 4 + 1,
+                'notes': 'no onions, extra sauce on the side',
+                'selected_modifiers_snapshot': [
+                    {'modifier_set_name': 'Size', 'option_name': 'Large', 'price_at_sale': '1.50'},
+                    {'modifier_set_name': 'Toppings', 'option_name': 'Mushrooms', 'price_at_sale': '0.75'},
+                ],
+            }
+            for index in range(lines)
+        ],
+    }
+
+
+def make_consumer(consumer_class=OrderConsumer):
+    consumer = consumer_class()
+    consumer.order_id = 'order-1'
+    consumer.order_group_name = GROUP
+    consumer.device_id = 'terminal-1'
+    consumer.sent = []
+
+    async def send(text_data):
+        consumer.sent.append(text_data)
+    consumer.send = send
+    return consumer
+
+
+# ============================================================================
+# FRAME ENCODING TESTS
+# ============================================================================
+
+class TestFrameEncoding:
+    """Test that pre-encoded frames match what receivers used to encode."""
+
+    def test_raw_json_spliced_verbatim(self):
+        payload = large_cart(3)
+        message = {'type': 'cart_update', 'payload': RawJSON(json.dumps(payload)), 'operationId': 'op-1'}
+
+        assert encode_message(message) == json.dumps(
+            {'type': 'cart_update', 'payload': payload, 'operationId': 'op-1'}
+        )
+
+    def test_cart_event_carries_client_frame(self, settings):
+        settings.ORDER_WEBSOCKET = {'DELTA_PROTOCOL': False, 'STATE_TTL_SECONDS': 60}
+        payload = large_cart(3)
+
+        event = OrderStateBroadcastService.build_cart_event(GROUP, payload, operation_id='op-2')
+
+        assert event == {
+            'type': 'cart_update',
+            'text': json.dumps({'type': 'cart_update', 'payload': payload, 'operationId': 'op-2'}),
+        }
+
+
+# ============================================================================
+# NOTIFICATION FORWARDING TESTS
+# ============================================================================
+
+@pytest.mark.asyncio
+class TestNotificationForwarding:
+    """Test that GlobalPOSConsumer forwards pre-encoded notifications."""
+
+    async def test_pre_encoded_and_plain_events(self):
+        consumer = make_consumer(GlobalPOSConsumer)
+        data = {'order': {'id': 'order-1', 'order_number': 'ORD-00042'}}
+
+        await consumer.web_order_notification(pre_encoded_event({'type': 'web_order_notification', 'data': data}))
+        await consumer.system_notification({'type': 'system_notification', 'data': {'message': 'refresh'}})
+
+        assert [json.loads(frame) for frame in consumer.sent] == [
+            {'type': 'web_order_notification', 'data': data},
+            {'type': 'system_notification', 'data': {'message': 'refresh'}},
+        ]
+
+
+# ============================================================================
+# FAN-OUT BENCHMARK TESTS
+# ============================================================================
+
+ROUNDS = 20
+
+
+def document_encodes(mock_dumps):
+    """json.dumps calls on whole documents (encode_message also dumps scalar keys and values)"""
+    return sum(1 for call in mock_dumps.call_args_list if isinstance(call.args[0], (dict, list)))
+
+
+async def fan_out(consumers, build_event):
+    """Broadcast ROUNDS events and deliver each to every consumer; returns ms per broadcast"""
+    layer = InMemoryChannelLayer(capacity=ROUNDS)
+    for consumer in consumers:
+        consumer.channel_name = await layer.new_channel()
+        await layer.group_add(GROUP, consumer.channel_name)
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        await layer.group_send(GROUP, build_event())
+        for consumer in consumers:
+            await consumer.cart_update(await layer.receive(consumer.channel_name))
+    return (time.perf_counter() - started) * 1000 / ROUNDS
+
+
+@pytest.mark.performance
+@pytest.mark.asyncio
+class TestFanoutBenchmark:
+    """Benchmark per-consumer encoding against encode-once broadcasts."""
+
+    @pytest.mark.parametrize('consumer_count', [1, 10, 50])
+    async def test_receivers_do_not_encode(self, settings, consumer_count):
+        settings.ORDER_WEBSOCKET = {'DELTA_PROTOCOL': False, 'STATE_TTL_SECONDS': 60}
+        payload = large_cart()
+        legacy = [make_consumer() for _ in range(consumer_count)]
+        encoded = [make_consumer() for _ in range(consumer_count)]
+
+        with patch.object(json, 'dumps', wraps=json.dumps) as legacy_dumps:
+            legacy_ms = await fan_out(
+                legacy, lambda: {'type': 'cart_update', 'payload': payload, 'operationId': 'op-1'}
+            )
+        with patch.object(json, 'dumps', wraps=json.dumps) as encoded_dumps:
+            encoded_ms = await fan_out(
+                encoded, lambda: OrderStateBroadcastService.build_cart_event(GROUP, payload, 'op-1')
+            )
+
+        print(
+            f"\nfan-out to {consumer_count:>2} consumers: per-consumer encoding {legacy_ms:8.2f} ms, "
+            f"encode-once {encoded_ms:8.2f} ms ({len(json.dumps(payload)) // 1024} KB payload)"
+        )
+        assert document_encodes(legacy_dumps) == 2 * consumer_count * ROUNDS
+        # One payload encode per broadcast, on the sender, whatever the group size
+        assert document_encodes(encoded_dumps) == ROUNDS
+        assert legacy[0].sent[0] == encoded[-1].sent[-1]
@@ -0,0 +1,161 @@
+"""
+Configuration Change Recalculation Tests
+
+Tests that saving a tenant's GlobalSettings queues a background fan-out
+instead of recalculating in the save, that chunks load their orders in one
+pass and only write and notify orders whose totals changed, and that
+notifications reach the tenant-scoped order groups.
+
+Test Categories:
+1. Settings Save (1 test)
+2. Chunk Recalculation (4 tests)
+3. Fan-out and Notifications (2 tests)
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import connection
+from django.db.models.query import QuerySet
+from django.test.utils import CaptureQueriesContext
+
+from tenant.managers import set_current_tenant
+from orders.models import Order
+from orders.services import OrderCalculationService, OrderItemService
+from orders.tasks import recalculate_open_order_chunk, recalculate_open_orders_for_tenant
+from settings.models import GlobalSettings
+
+
+@pytest.fixture
+def open_orders(tenant_a, store_location_tenant_a, product_tenant_a, tax_rate_tenant_a):
+    set_current_tenant(tenant_a)
+    product_tenant_a.taxes.add(tax_rate_tenant_a)
+    orders = []
+    for quantity in (1, 2, 3):
+        order = Order.objects.create(
+            tenant=tenant_a, order_type=Order.OrderType.POS, store_location=store_location_tenant_a
+        )
+        OrderItemService.add_item_to_order(order, product_tenant_a, quantity)
+        orders.append(order)
+    return orders
+
+
+def make_stale(order):
+    Order.objects.filter(pk=order.pk).update(grand_total=Decimal('999.99'))
+
+
+@pytest.fixture
+def in_memory_layer(settings):
+    settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+    settings.ORDER_WEBSOCKET = {**settings.ORDER_WEBSOCKET, 'DELTA_PROTOCOL': False}
+    return get_channel_layer()
+
+
+# ============================================================================
+# SETTINGS SAVE TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestSettingsSave:
+    """Test that saving settings queues recalculation instead of running it."""
+
+    def test_save_queues_tenant_fan_out_on_commit(self, tenant_a, open_orders, django_capture_on_commit_callbacks):
+        make_stale(open_orders[0])
+        global_settings, _ = GlobalSettings.objects.get_or_create(tenant=tenant_a)
+
+        with patch.object(recalculate_open_orders_for_tenant, 'delay') as delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                global_settings.save()
+
+        delay.assert_called_once_with(str(tenant_a.id))
+        # Nothing was recalculated inside the save
+        assert Order.objects.get(pk=open_orders[0].pk).grand_total == Decimal('999.99')
+
+
+# ============================================================================
+# CHUNK RECALCULATION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestChunkRecalculation:
+    """Test bulk loading and change-only writes for a chunk of open orders."""
+
+    def test_only_changed_orders_are_written(self, tenant_a, open_orders):
+        make_stale(open_orders[1])
+
+        with patch.object(Order, 'save', autospec=True, side_effect=Order.save) as save:
+            changed = OrderCalculationService.recalculate_open_orders(tenant_a.id, [o.id for o in open_orders])
+
+        assert [order.id for order in changed] == [open_orders[1].id]
+        assert save.call_count == 1
+        # Restored from the stale total
+        assert Order.objects.get(pk=open_orders[1].pk).grand_total == changed[0].grand_total < Decimal('999.99')
+
+    def test_chunk_reads_do_not_grow_with_orders(self, tenant_a, open_orders):
+        with CaptureQueriesContext(connection) as one:
+            OrderCalculationService.recalculate_open_orders(tenant_a.id, [open_orders[0].id])
+        with CaptureQueriesContext(connection) as three:
+            OrderCalculationService.recalculate_open_orders(tenant_a.id, [o.id for o in open_orders])
+
+        assert len(three) == len(one)
+
+    def test_closed_and_other_tenant_orders_skipped(self, tenant_a, tenant_b, open_orders):
+        Order.objects.filter(pk=open_orders[0].pk).update(status=Order.OrderStatus.COMPLETED, grand_total=Decimal('1.00'))
+        make_stale(open_orders[1])
+
+        changed = OrderCalculationService.recalculate_open_orders(tenant_b.id, [o.id for o in open_orders])
+        assert changed == []
+
+        changed = OrderCalculationService.recalculate_open_orders(tenant_a.id, [o.id for o in open_orders])
+        assert [order.id for order in changed] == [open_orders[1].id]
+        assert Order.all_objects.get(pk=open_orders[0].pk).grand_total == Decimal('1.00')
+
+    def test_chunk_locks_orders_before_reading_lines(self, tenant_a, open_orders):
+        with patch.object(QuerySet, 'select_for_update', autospec=True, side_effect=QuerySet.select_for_update) as lock:
+            OrderCalculationService.recalculate_open_orders(tenant_a.id, [o.id for o in open_orders])
+
+        lock.assert_called_once()
+        queryset = lock.call_args.args[0]
+        assert queryset.model is Order
+        assert lock.call_args.kwargs == {'of': ('self',)}
+
+
+# ============================================================================
+# FAN-OUT AND NOTIFICATION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestFanOutAndNotifications:
+    """Test chunked task fan-out and tenant-scoped order group notifications."""
+
+    def test_orders_split_into_chunks(self, settings, tenant_a, tenant_b, open_orders, product_tenant_b):
+        settings.ORDER_CALCULATION = {**settings.ORDER_CALCULATION, 'CONFIG_RECALC_CHUNK_SIZE': 2}
+        set_current_tenant(tenant_b)
+        Order.objects.create(tenant=tenant_b, order_type=Order.OrderType.POS)
+
+        with patch.object(recalculate_open_order_chunk, 'delay') as delay:
+            result = recalculate_open_orders_for_tenant(str(tenant_a.id))
+
+        assert result == {'status': 'queued', 'orders': 3, 'chunks': 2}
+        chunks = [call.args[1] for call in delay.call_args_list]
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        assert sorted(sum(chunks, [])) == sorted(str(order.id) for order in open_orders)
+
+    def test_changed_orders_pushed_to_tenant_groups(self, in_memory_layer, tenant_a, open_orders):
+        make_stale(open_orders[2])
+        channels = {}
+        for order in open_orders:
+            channels[order.id] = async_to_sync(in_memory_layer.new_channel)()
+            async_to_sync(in_memory_layer.group_add)(f"tenant_{tenant_a.id}_order_{order.id}", channels[order.id])
+
+        result = recalculate_open_order_chunk(str(tenant_a.id), [str(order.id) for order in open_orders])
+
+        assert result == {'status': 'completed', 'orders': 3, 'changed': 1, 'notified': 1}
+        event = async_to_sync(in_memory_layer.receive)(channels[open_orders[2].id])
+        assert event['type'] == 'cart_update'
+        # The task leaves no tenant context behind
+        assert f'"grand_total": "{Order.all_objects.get(pk=open_orders[2].pk).grand_total}"' in event['text']
+        # Unchanged orders are not re-sent
+        assert all(not in_memory_layer.channels.get(channels[order.id]) for order in open_orders[:2])
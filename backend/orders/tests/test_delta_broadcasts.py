@@ -0,0 +1,173 @@
+"""
+WebSocket Delta Broadcast Tests
+
+Tests the optional cart delta protocol: RFC 6902 patches between order
+payloads, the versioned group state in the shared cache, and how
+OrderConsumer delivers versioned events to delta and legacy clients.
+
+Test Categories:
+1. JSON Patch (3 tests)
+2. Versioned Group State (2 tests)
+3. Consumer Delivery (4 tests)
+"""
+import copy
+import json
+import uuid
+
+import pytest
+
+from core_backend.infrastructure.json_patch import JsonPatchError, apply_patch, make_patch
+from orders.consumers import OrderConsumer
+from orders.services import OrderStateBroadcastService
+
+
+def cart(*lines, total='0.00'):
+    return {
+        'id': 'order-1',
+        'grand_total': total,
+        'items': [{'id': f'item-{name}', 'product': {'name': name}, 'quantity': qty} for name, qty in lines],
+    }
+
+
+@pytest.fixture
+def group_name(settings):
+    settings.ORDER_WEBSOCKET = {'DELTA_PROTOCOL': True, 'STATE_TTL_SECONDS': 60}
+    name = f"tenant_test_order_{uuid.uuid4()}"
+    yield name
+    OrderStateBroadcastService.clear(name)
+
+
+def make_consumer(group_name, delta_protocol):
+    """A consumer wired to the group without a socket; sent frames are collected"""
+    consumer = OrderConsumer()
+    consumer.order_id = 'order-1'
+    consumer.order_group_name = group_name
+    consumer.delta_protocol = delta_protocol
+    consumer.sent = []
+
+    async def send(text_data):
+        consumer.sent.append(json.loads(text_data))
+    consumer.send = send
+    return consumer
+
+
+# ============================================================================
+# JSON PATCH TESTS
+# ============================================================================
+
+class TestJsonPatch:
+    """Test that patches rebuild the target and stay small for cart edits."""
+
+    def test_cart_edits_round_trip(self):
+        before = cart(('Pizza', 1), ('Soda', 2), ('Salad', 1), total='18.00')
+        edits = [
+            cart(('Pizza', 1), ('Soda', 2), ('Salad', 1), ('Wings', 1), total='26.00'),  # add
+            cart(('Pizza', 1), ('Salad', 1), total='14.00'),  # remove middle line
+            cart(('Pizza', 3), ('Soda', 2), ('Salad', 1), total='38.00'),  # quantity change
+            cart(total='0.00'),  # clear cart
+        ]
+
+        for after in edits:
+            snapshot = copy.deepcopy(before)
+            assert apply_patch(before, make_patch(before, after)) == after
+            assert before == snapshot
+
+        assert make_patch(before, edits[1]) == [
+            {'op': 'replace', 'path': '/grand_total', 'value': '14.00'},
+            {'op': 'remove', 'path': '/items/1'},
+        ]
+
+    def test_keys_are_escaped(self):
+        before = {'a/b': 1, 'm~n': [1]}
+        after = {'a/b': 2, 'm~n': [1, 2], 'new': None}
+
+        patch = make_patch(before, after)
+
+        assert {op['path'] for op in patch} == {'/a~1b', '/m~0n/1', '/new'}
+        assert apply_patch(before, patch) == after
+
+    def test_mismatched_base_rejected(self):
+        patch = make_patch(cart(('Pizza', 1), ('Soda', 1)), cart(('Pizza', 1)))
+
+        with pytest.raises(JsonPatchError):
+            apply_patch(cart(), patch)
+
+
+# ============================================================================
+# VERSIONED GROUP STATE TESTS
+# ============================================================================
+
+class TestVersionedGroupState:
+    """Test version allocation and patch-vs-payload selection."""
+
+    def test_patch_against_previous_version(self, group_name):
+        first = OrderStateBroadcastService.publish(group_name, cart(('Pizza', 1)))
+        second = OrderStateBroadcastService.publish(group_name, cart(('Pizza', 2)))
+
+        assert first == {'version': 1, 'payload': cart(('Pizza', 1))}
+        assert second['version'] == 2 and second['base_version'] == 1
+        assert second['patch'] == [{'op': 'replace', 'path': '/items/0/quantity', 'value': 2}]
+        assert OrderStateBroadcastService.snapshot(group_name) == {'version': 2, 'payload': cart(('Pizza', 2))}
+
+    def test_full_payload_when_patch_not_smaller(self, group_name):
+        OrderStateBroadcastService.publish(group_name, {'id': 'order-1', 'status': 'PENDING'})
+
+        event = OrderStateBroadcastService.publish(group_name, {'id': 'order-2', 'status': 'HOLD'})
+
+        assert event == {'version': 2, 'payload': {'id': 'order-2', 'status': 'HOLD'}}
+
+
+# ============================================================================
+# CONSUMER DELIVERY TESTS
+# ============================================================================
+
+def versioned_event(group_name, payload, operation_id=None):
+    return OrderStateBroadcastService.build_cart_event(group_name, payload, operation_id=operation_id)
+
+
+@pytest.mark.asyncio
+class TestConsumerDelivery:
+    """Test what delta and legacy clients receive for versioned events."""
+
+    async def test_delta_client_receives_patch(self, group_name):
+        consumer = make_consumer(group_name, delta_protocol=True)
+        await consumer.cart_update(versioned_event(group_name, cart(('Pizza', 1))))
+
+        await consumer.cart_update(versioned_event(group_name, cart(('Pizza', 2)), operation_id='op-7'))
+
+        initial, update = consumer.sent
+        assert initial == {'type': 'cart_update', 'payload': cart(('Pizza', 1)), 'version': 1}
+        assert update == {
+            'type': 'cart_patch', 'version': 2, 'base_version': 1, 'operationId': 'op-7',
+            'patch': [{'op': 'replace', 'path': '/items/0/quantity', 'value': 2}],
+        }
+
+    async def test_legacy_client_receives_full_state(self, group_name):
+        consumer = make_consumer(group_name, delta_protocol=False)
+        await consumer.cart_update(versioned_event(group_name, cart(('Pizza', 1))))
+
+        await consumer.cart_update(versioned_event(group_name, cart(('Pizza', 1), ('Soda', 1))))
+
+        assert consumer.sent[-1] == {'type': 'cart_update', 'payload': cart(('Pizza', 1), ('Soda', 1))}
+
+    async def test_missed_version_falls_back_to_snapshot(self, group_name):
+        consumer = make_consumer(group_name, delta_protocol=True)
+        await consumer.cart_update(versioned_event(group_name, cart(('Pizza', 1))))
+        versioned_event(group_name, cart(('Pizza', 2)))  # never delivered to this consumer
+
+        await consumer.cart_update(versioned_event(group_name, cart(('Pizza', 3))))
+        await consumer.cart_update({'type': 'cart_update', 'version': 2, 'text': json.dumps(cart(('Pizza', 2)))})
+
+        assert consumer.sent[-1] == {'type': 'cart_update', 'payload': cart(('Pizza', 3)), 'version': 3}
+        assert len(consumer.sent) == 2  # the late version 2 event is dropped
+
+    async def test_resync_sends_snapshot_to_client_only(self, group_name):
+        consumer = make_consumer(group_name, delta_protocol=True)
+        versioned_event(group_name, cart(('Pizza', 1)))
+        versioned_event(group_name, cart(('Pizza', 4)))
+
+        await consumer.receive(json.dumps({'type': 'resync', 'payload': {'version': 1}, 'operationId': 'op-9'}))
+
+        assert consumer.sent == [
+            {'type': 'cart_update', 'payload': cart(('Pizza', 4)), 'version': 2, 'operationId': 'op-9'}
+        ]
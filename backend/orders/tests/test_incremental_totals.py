@@ -0,0 +1,313 @@
+"""
+Incremental Order Totals Tests
+
+Tests that item add/update/remove move order totals by the changed lines'
+deltas, agree with the full recalculation to the cent, and fall back to it
+when discounts or one-off adjustments make a change non-local.
+
+Test Categories:
+1. Delta Parity (5 tests)
+2. Full Recalculation Fallback (3 tests)
+3. Query Cost (1 test)
+4. Totals Verification (5 tests)
+"""
+import threading
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from django.db import connection
+from django.db.models.query import QuerySet
+from django.test.utils import CaptureQueriesContext
+
+from tenant.managers import set_current_tenant
+from orders.calculators import LineChange, OrderRecalculationEngine
+from orders.models import Order, OrderAdjustment, OrderDiscount, OrderItem
+from orders.services import OrderCalculationService, OrderItemService
+
+
+@pytest.fixture(autouse=True)
+def incremental_totals(settings):
+    settings.ORDER_CALCULATION = {
+        'INCREMENTAL_TOTALS': True, 'VERIFY_ON_COMPLETE': True, 'VERIFY_WINDOW_MINUTES': 30,
+    }
+    return settings.ORDER_CALCULATION
+
+
+@pytest.fixture
+def order(tenant_a, store_location_tenant_a):
+    set_current_tenant(tenant_a)
+    store_location_tenant_a.tax_rate = Decimal('0.0825')
+    store_location_tenant_a.save()
+    return Order.objects.create(
+        tenant=tenant_a, order_type=Order.OrderType.POS, store_location=store_location_tenant_a
+    )
+
+
+def stored(order):
+    return Order.all_objects.values(
+        'subtotal', 'total_discounts_amount', 'total_adjustments_amount', 'tax_total', 'grand_total'
+    ).get(pk=order.pk)
+
+
+# ============================================================================
+# DELTA PARITY TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestDeltaParity:
+    """Test that incremental totals match the full recalculation."""
+
+    def test_add_update_remove_match_full(self, order, menu_tenant_a):
+        taxed, soda, plain = menu_tenant_a
+        OrderItemService.add_item_to_order(order, taxed, 3)
+        assert OrderCalculationService.verify_order_totals(order) == {}
+
+        soda_line = OrderItemService.add_item_to_order(order, soda, 1)
+        OrderItemService.add_item_to_order(order, plain, 2)
+        OrderItemService.add_item_to_order(order, taxed, 2)  # merges into the first line
+        assert OrderCalculationService.verify_order_totals(order) == {}
+
+        OrderItemService.update_item_quantity(soda_line, 4)
+        assert OrderCalculationService.verify_order_totals(order) == {}
+
+        OrderItemService.remove_item_from_order(OrderItem.objects.get(order=order, product=plain))
+        assert OrderCalculationService.verify_order_totals(order) == {}
+
+        # 5 x 3.33 + 4 x 7.49; taxes 10% of 16.65 -> 1.66 (banker's), 5% of 29.96 -> 1.50
+        totals = stored(order)
+        assert totals['subtotal'] == Decimal('46.61')
+        assert totals['tax_total'] == Decimal('3.16')
+        assert totals['grand_total'] == Decimal('49.77')
+
+    def test_tax_exempt_custom_item(self, order, menu_tenant_a, admin_user_tenant_a):
+        OrderItemService.add_item_to_order(order, menu_tenant_a[0], 1)
+
+        OrderItemService.add_custom_item_to_order(
+            order, 'Delivery', Decimal('5.00'), tax_exempt=True, applied_by=admin_user_tenant_a
+        )
+
+        custom_line = OrderItem.objects.get(order=order, product__isnull=True)
+        assert custom_line.tax_amount == Decimal('0.00')
+        assert stored(order)['tax_total'] == Decimal('0.33')
+        assert OrderCalculationService.verify_order_totals(order) == {}
+
+    def test_consumer_sees_updated_instance(self, order, menu_tenant_a):
+        OrderItemService.add_item_to_order(order, menu_tenant_a[0], 1)
+
+        line = OrderItemService.add_item_to_order(order, menu_tenant_a[1], 2)
+
+        updated = order._recalculated_order_instance
+        assert updated.subtotal == Decimal('18.31')
+        assert updated.tax_total == stored(order)['tax_total']
+        assert OrderItem.objects.get(pk=line.pk).tax_amount == Decimal('0.75')
+
+    def test_stale_line_instances_use_stored_quantity(self, order, menu_tenant_a):
+        line = OrderItemService.add_item_to_order(order, menu_tenant_a[1], 1)
+        first, second = OrderItem.objects.get(pk=line.pk), OrderItem.objects.get(pk=line.pk)
+
+        # Two cashiers loaded the line at quantity 1 before either edit committed
+        OrderItemService.update_item_quantity(first, 3)
+        OrderItemService.set_item_quantity(second, 5)
+        assert OrderCalculationService.verify_order_totals(order) == {}
+
+        OrderItemService.remove_item_from_order(first)
+        assert OrderCalculationService.verify_order_totals(order) == {}
+        assert stored(order)['subtotal'] == Decimal('0.00')
+
+    def test_replace_item_keeps_totals(self, order, menu_tenant_a):
+        OrderItemService.add_item_to_order(order, menu_tenant_a[0], 2)
+        line = OrderItemService.add_item_to_order(order, menu_tenant_a[1], 1)
+
+        OrderItemService.replace_item(line, quantity=2, notes='No ice')
+
+        assert OrderItem.objects.get(order=order, product=menu_tenant_a[1]).quantity == 2
+        assert OrderCalculationService.verify_order_totals(order) == {}
+
+
+# ============================================================================
+# FULL RECALCULATION FALLBACK TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestFullRecalculationFallback:
+    """Test that non-local changes run the full recalculation."""
+
+    def add_with_spy(self, order, product):
+        with patch.object(
+            OrderCalculationService, 'recalculate_order_totals',
+            wraps=OrderCalculationService.recalculate_order_totals
+        ) as full:
+            OrderItemService.add_item_to_order(order, product, 1)
+        return full
+
+    def test_applied_discount_falls_back(self, order, menu_tenant_a, tenant_a, discount_tenant_a):
+        OrderItemService.add_item_to_order(order, menu_tenant_a[0], 2)
+        OrderDiscount.objects.create(tenant=tenant_a, order=order, discount=discount_tenant_a, amount=Decimal('0.00'))
+        OrderCalculationService.recalculate_order_totals(order)
+
+        full = self.add_with_spy(order, menu_tenant_a[1])
+
+        full.assert_called_once()
+        assert OrderCalculationService.verify_order_totals(order) == {}
+
+    def test_one_off_discount_falls_back(self, order, menu_tenant_a, tenant_a, admin_user_tenant_a):
+        OrderItemService.add_item_to_order(order, menu_tenant_a[0], 2)
+        OrderAdjustment.objects.create(
+            tenant=tenant_a, order=Order.objects.get(pk=order.pk),
+            adjustment_type=OrderAdjustment.AdjustmentType.ONE_OFF_DISCOUNT,
+            discount_type=OrderAdjustment.DiscountType.PERCENTAGE, discount_value=Decimal('10.00'),
+            amount=Decimal('-0.67'), reason='Regular', applied_by=admin_user_tenant_a
+        )
+        OrderCalculationService.recalculate_order_totals(order)
+
+        full = self.add_with_spy(order, menu_tenant_a[1])
+
+        full.assert_called_once()
+        assert OrderCalculationService.verify_order_totals(order) == {}
+
+    def test_disabled_setting_always_recalculates(self, order, menu_tenant_a, incremental_totals):
+        OrderItemService.add_item_to_order(order, menu_tenant_a[0], 2)
+        incremental_totals['INCREMENTAL_TOTALS'] = False
+
+        full = self.add_with_spy(order, menu_tenant_a[1])
+
+        full.assert_called_once()
+
+
+# ============================================================================
+# QUERY COST TESTS
+# ============================================================================
+
+# Locked order row + adjustments + the line's taxes, then the line and order UPDATEs
+DELTA_QUERY_BUDGET = 8
+
+@pytest.mark.django_db
+class TestQueryCost:
+    """Test that a delta update does not load the order's other lines."""
+
+    def test_delta_skips_order_graph(self, order, menu_tenant_a, tenant_a):
+        for index in range(30):
+            OrderItem.objects.create(
+                tenant=tenant_a, order=order, product=menu_tenant_a[index % 3], quantity=1,
+                price_at_sale=menu_tenant_a[index % 3].price, notes=f'line {index}'
+            )
+        OrderCalculationService.recalculate_order_totals(order)
+        line = OrderItem.objects.select_related('product__product_type').filter(order=order).first()
+        previous_quantity = line.quantity
+        line.quantity = 2
+        line.save()
+
+        with CaptureQueriesContext(connection) as ctx:
+            OrderCalculationService.apply_item_changes(order, [LineChange.updated(line, previous_quantity)])
+
+        item_reads = [q['sql'] for q in ctx.captured_queries
+                      if q['sql'].startswith('SELECT') and 'FROM "orders_orderitem"' in q['sql']]
+        assert item_reads == []
+        assert len(ctx) <= DELTA_QUERY_BUDGET
+        assert OrderCalculationService.verify_order_totals(order) == {}
+
+
+# ============================================================================
+# TOTALS VERIFICATION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestTotalsVerification:
+    """Test that drift between stored and full totals is detected and repaired."""
+
+    def test_drift_detected_and_repaired(self, order, menu_tenant_a):
+        OrderItemService.add_item_to_order(order, menu_tenant_a[0], 2)
+        Order.objects.filter(pk=order.pk).update(tax_total=Decimal('9.99'), grand_total=Decimal('16.65'))
+
+        drift = OrderCalculationService.verify_order_totals(order, repair=True)
+
+        assert drift['tax_total'] == (Decimal('9.99'), Decimal('0.67'))
+        assert OrderCalculationService.verify_order_totals(order) == {}
+
+    def test_completion_queues_verification(self, order, menu_tenant_a, django_capture_on_commit_callbacks):
+        OrderItemService.add_item_to_order(order, menu_tenant_a[0], 1)
+
+        with patch('orders.tasks.verify_completed_order_totals.delay') as mock_delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                order.status = Order.OrderStatus.COMPLETED
+                order.save(update_fields=['status', 'updated_at'])
+
+        mock_delay.assert_called_once_with(str(order.id))
+
+    def test_open_order_sweep_repairs(self, order, menu_tenant_a):
+        from orders.tasks import verify_open_order_totals
+
+        OrderItemService.add_item_to_order(order, menu_tenant_a[0], 2)
+        Order.objects.filter(pk=order.pk).update(subtotal=Decimal('1.00'))
+
+        result = verify_open_order_totals()
+
+        assert result['repaired'] == 1
+        assert stored(order)['subtotal'] == Decimal('6.66')
+
+    def test_repair_reads_order_after_pending_edit(self, order, menu_tenant_a):
+        line = OrderItemService.add_item_to_order(order, menu_tenant_a[0], 1)
+        Order.objects.filter(pk=order.pk).update(subtotal=Decimal('1.00'))
+
+        select_for_update = QuerySet.select_for_update
+        locked = []
+
+        def edit_then_lock(queryset, *args, **kwargs):
+            if not locked:
+                locked.append(queryset.model)
+                # The cashier's edit commits while the repair waits for the order lock
+                OrderItemService.update_item_quantity(line, 3)
+            return select_for_update(queryset, *args, **kwargs)
+
+        with patch.object(QuerySet, 'select_for_update', autospec=True, side_effect=edit_then_lock):
+            OrderCalculationService.verify_order_totals(order, repair=True)
+
+        assert locked == [Order]
+        assert stored(order)['subtotal'] == Decimal('9.99')
+        assert OrderCalculationService.verify_order_totals(order) == {}
+
+
+@pytest.mark.skipif(not connection.features.has_select_for_update, reason='needs row locks')
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentRepair:
+    """Test that an item edit made during a repair is applied after it, not lost."""
+
+    def test_edit_during_repair_waits_and_is_kept(self, order, menu_tenant_a, tenant_a):
+        line = OrderItemService.add_item_to_order(order, menu_tenant_a[0], 1)
+        Order.objects.filter(pk=order.pk).update(subtotal=Decimal('1.00'))
+        repair_read = threading.Event()
+        edit_done = threading.Event()
+        edit_errors = []
+
+        def edit():
+            set_current_tenant(tenant_a)
+            repair_read.wait(5)
+            try:
+                OrderItemService.update_item_quantity(line, 3)
+                edit_done.set()
+            except Exception as exc:
+                edit_errors.append(exc)
+            finally:
+                connection.close()
+
+        recalculate = OrderRecalculationEngine.recalculate
+        finished_while_repairing = []
+
+        def read_then_pause(engine):
+            if threading.current_thread() is threading.main_thread() and not repair_read.is_set():
+                repair_read.set()
+                # Give the edit time to commit if nothing holds it back
+                finished_while_repairing.append(edit_done.wait(1))
+            return recalculate(engine)
+
+        editor = threading.Thread(target=edit)
+        editor.start()
+        with patch.object(OrderRecalculationEngine, 'recalculate', autospec=True, side_effect=read_then_pause):
+            OrderCalculationService.verify_order_totals(order, repair=True)
+        editor.join(10)
+
+        assert edit_errors == []
+        assert finished_while_repairing == [False]
+        assert OrderItem.objects.get(pk=line.pk).quantity == 3
+        assert stored(order)['subtotal'] == Decimal('9.99')
+        assert OrderCalculationService.verify_order_totals(order) == {}
@@ -0,0 +1,232 @@
+"""
+Order Batch Operation Tests
+
+Tests that multi-operation cart batches apply in one transaction with one
+totals recalculation and per-operation results, and that OrderConsumer
+coalesces item messages arriving within the configured window.
+
+Test Categories:
+1. Batch Application (4 tests)
+2. Empty Cart Cleanup (1 test)
+3. Message Coalescing (5 tests)
+"""
+import asyncio
+import json
+import pytest
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from tenant.managers import set_current_tenant
+from orders.consumers import OrderConsumer
+from orders.models import Order, OrderDiscount, OrderItem, OrderItemModifier
+from orders.services import OrderBatchService, OrderCalculationService, OrderItemService
+
+
+@pytest.fixture
+def order(tenant_a, store_location_tenant_a):
+    set_current_tenant(tenant_a)
+    return Order.objects.create(
+        tenant=tenant_a, order_type=Order.OrderType.POS, store_location=store_location_tenant_a
+    )
+
+
+def operation(operation_type, operation_id, **payload):
+    return {'type': operation_type, 'operationId': operation_id, 'payload': payload}
+
+
+def apply_with_spy(order, operations, user=None):
+    with patch.object(
+        OrderCalculationService, 'recalculate_order_totals',
+        wraps=OrderCalculationService.recalculate_order_totals
+    ) as full:
+        order_instance, results = OrderBatchService.apply_operations(order, operations, user)
+    return order_instance, results, full
+
+
+# ============================================================================
+# BATCH APPLICATION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestBatchApplication:
+    """Test one transaction, one recalculation and per-operation results."""
+
+    def test_burst_recalculates_once(self, order, menu_tenant_a, admin_user_tenant_a):
+        taxed, _, plain = menu_tenant_a
+        line = OrderItemService.add_item_to_order(order, plain, 1)
+
+        order_instance, results, full = apply_with_spy(order, [
+            operation('add_item', 'op-1', product_id=str(taxed.id), quantity=1),
+            operation('add_item', 'op-2', product_id=str(taxed.id), quantity=2),  # merges into op-1's line
+            operation('update_item_quantity', 'op-3', item_id=str(line.id), quantity=3),
+            operation('add_custom_item', 'op-4', name='Delivery', price='5.00'),
+        ], admin_user_tenant_a)
+
+        assert [result['status'] for result in results] == ['ok'] * 4
+        assert [result['operationId'] for result in results] == ['op-1', 'op-2', 'op-3', 'op-4']
+        full.assert_called_once()
+        # 3 x 3.33 + 3 x 2.15 + 5.00
+        assert order_instance.subtotal == Decimal('21.44')
+        assert OrderCalculationService.verify_order_totals(order) == {}
+
+    def test_failed_operation_rolls_back_alone(self, order, menu_tenant_a, product_tenant_b):
+        taxed, _, plain = menu_tenant_a
+
+        order_instance, results, _ = apply_with_spy(order, [
+            operation('add_item', 'op-1', product_id=str(taxed.id), quantity=1),
+            operation('add_item', 'op-2', product_id=str(product_tenant_b.id), quantity=1),  # other tenant
+            operation('add_custom_item', 'op-3', name='Refund', price='-1.00'),
+            operation('add_item', 'op-4', product_id=str(plain.id), quantity=2),
+        ])
+
+        assert [(result['status'], result.get('error_type')) for result in results] == [
+            ('ok', None), ('error', 'not_found'), ('error', 'validation'), ('ok', None),
+        ]
+        assert OrderItem.objects.filter(order=order).count() == 2
+        assert order_instance.subtotal == Decimal('7.63')
+
+    def test_unsupported_operation_reported(self, order, menu_tenant_a, discount_tenant_a):
+        _, results, full = apply_with_spy(order, [
+            operation('apply_discount', 'op-1', discount_id=str(discount_tenant_a.id)),
+        ])
+
+        assert results[0]['status'] == 'error' and results[0]['error_type'] == 'unsupported'
+        full.assert_not_called()
+        assert not OrderDiscount.objects.filter(order=order).exists()
+
+    def test_customized_line_increase_cannot_batch(self, order, menu_tenant_a, tenant_a):
+        taxed, _, plain = menu_tenant_a
+        customized = OrderItemService.add_item_to_order(order, taxed, 1)
+        OrderItemModifier.objects.create(
+            tenant=tenant_a, order_item=customized, modifier_set_name='Sauce', option_name='Ranch',
+            price_at_sale=Decimal('0.50'),
+        )
+        line = OrderItemService.add_item_to_order(order, plain, 1)
+
+        def can_batch(item, quantity):
+            return OrderBatchService.can_batch(order.id, operation(
+                'update_item_quantity', 'op-1', item_id=str(item.id), quantity=quantity
+            ))
+
+        assert not can_batch(customized, 2)
+        assert can_batch(customized, 0)
+        assert can_batch(line, 2)
+        assert not OrderBatchService.can_batch(order.id, operation('apply_discount', 'op-2'))
+
+
+# ============================================================================
+# EMPTY CART CLEANUP TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestEmptyCartCleanup:
+    """Test that removing the last item clears order-level discounts."""
+
+    def test_last_item_removal_clears_applied_discounts(self, order, menu_tenant_a, tenant_a, discount_tenant_a):
+        line = OrderItemService.add_item_to_order(order, menu_tenant_a[0], 1)
+        OrderDiscount.objects.create(tenant=tenant_a, order=order, discount=discount_tenant_a, amount=Decimal('0.33'))
+
+        OrderItemService.remove_item_from_order(OrderItem.objects.get(pk=line.pk))
+
+        assert not OrderDiscount.objects.filter(order=order).exists()
+        discount_tenant_a.refresh_from_db()  # the discount itself is untouched
+        assert Order.objects.get(pk=order.pk).grand_total == Decimal('0.00')
+
+
+# ============================================================================
+# MESSAGE COALESCING TESTS
+# ============================================================================
+
+@pytest.fixture
+def coalescing_consumer(settings):
+    settings.ORDER_WEBSOCKET = {
+        'DELTA_PROTOCOL': False, 'STATE_TTL_SECONDS': 60, 'MAX_BATCH_OPERATIONS': 100, 'COALESCE_WINDOW_MS': 5,
+    }
+    consumer = OrderConsumer()
+    consumer.order_id = 'order-1'
+    consumer.handle_message = AsyncMock()
+    consumer.process_batch = AsyncMock()
+    return consumer
+
+
+@pytest.mark.asyncio
+class TestMessageCoalescing:
+    """Test which messages OrderConsumer holds back and how it applies them."""
+
+    async def test_burst_becomes_one_batch(self, coalescing_consumer):
+        for index in range(3):
+            await coalescing_consumer.receive(json.dumps(
+                {'type': 'add_item', 'operationId': f'op-{index}', 'payload': {'product_id': 'p'}}
+            ))
+        coalescing_consumer.process_batch.assert_not_called()
+
+        await asyncio.sleep(0.05)
+
+        coalescing_consumer.process_batch.assert_awaited_once_with([
+            {'type': 'add_item', 'payload': {'product_id': 'p'}, 'operationId': f'op-{index}'} for index in range(3)
+        ], coalesced=True)
+        coalescing_consumer.handle_message.assert_not_called()
+
+    async def test_other_message_flushes_queue_first(self, coalescing_consumer):
+        calls = []
+        coalescing_consumer.handle_message.side_effect = lambda data: calls.append(data['type'])
+        await coalescing_consumer.receive(json.dumps({'type': 'add_item', 'payload': {}}))
+
+        await coalescing_consumer.receive(json.dumps({'type': 'apply_discount', 'payload': {}}))
+
+        # A lone queued message is handled exactly like an uncoalesced one
+        assert calls == ['add_item', 'apply_discount']
+        assert coalescing_consumer._coalesce_task is None
+
+    async def test_disabled_window_handles_immediately(self, coalescing_consumer, settings):
+        settings.ORDER_WEBSOCKET['COALESCE_WINDOW_MS'] = 0
+
+        await coalescing_consumer.receive(json.dumps({'type': 'add_item', 'payload': {}}))
+
+        coalescing_consumer.handle_message.assert_awaited_once()
+        assert coalescing_consumer._coalesced_messages == []
+
+    async def test_unbatchable_message_is_handled_in_order(self, coalescing_consumer):
+        calls = []
+        coalescing_consumer.handle_message.side_effect = lambda data: calls.append(data['operationId'])
+        coalescing_consumer.process_batch.side_effect = lambda operations, **kwargs: calls.append(
+            [operation['operationId'] for operation in operations]
+        )
+        for index, message_type in enumerate(['add_item', 'update_item_quantity', 'add_item', 'add_item']):
+            await coalescing_consumer.receive(json.dumps(
+                {'type': message_type, 'operationId': f'op-{index}', 'payload': {'item_id': 'i', 'quantity': 2}}
+            ))
+
+        with patch.object(OrderBatchService, 'can_batch', return_value=False):
+            await coalescing_consumer.flush_coalesced()
+
+        assert calls == ['op-0', 'op-1', ['op-2', 'op-3']]
+
+    async def test_coalesced_failures_get_single_message_replies(self, settings):
+        settings.ORDER_WEBSOCKET = {
+            'DELTA_PROTOCOL': False, 'STATE_TTL_SECONDS': 60, 'MAX_BATCH_OPERATIONS': 100, 'COALESCE_WINDOW_MS': 5,
+        }
+        consumer = OrderConsumer()
+        consumer.order_id, consumer.tenant, consumer.user = 'order-1', None, None
+        consumer.send = AsyncMock()
+        consumer.send_full_order_state = AsyncMock()
+        results = [
+            {'operationId': 'op-0', 'status': 'ok'},
+            {'operationId': 'op-1', 'status': 'error', 'error_type': 'stock_validation', 'message': 'Out of stock'},
+        ]
+        operations = [
+            operation('add_item', 'op-0', product_id='p'),
+            operation('update_item_quantity', 'op-1', item_id='i', quantity=5),
+        ]
+
+        with patch.object(Order.objects, 'get', MagicMock()), \
+                patch.object(OrderBatchService, 'apply_operations', return_value=(MagicMock(), results)):
+            await consumer.process_batch(operations, coalesced=True)
+
+        consumer.send_full_order_state.assert_awaited_once()
+        assert consumer._current_operation_id == 'op-0'
+        assert [json.loads(call.kwargs['text_data']) for call in consumer.send.await_args_list] == [{
+            'type': 'stock_error', 'message': 'Out of stock', 'error_type': 'stock_validation',
+            'operationId': 'op-1', 'can_override': True, 'item_id': 'i', 'requested_quantity': 5,
+            'action_type': 'quantity_update',
+        }]
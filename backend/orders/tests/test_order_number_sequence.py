@@ -0,0 +1,90 @@
+"""
+Order Number Sequence Tests
+
+Tests that order numbers come from the per-location counter row: numeric
+(not string) ordering, seeding from existing numbers, and no gaps when an
+order's transaction rolls back.
+
+Test Categories:
+1. Number Allocation (3 tests)
+2. Gap-Free Sequence (2 tests)
+"""
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from tenant.managers import set_current_tenant
+from orders.models import Order, OrderNumberSequence
+
+
+@pytest.fixture
+def make_order(tenant_a, store_location_tenant_a):
+    set_current_tenant(tenant_a)
+
+    def _make_order(order_number=None):
+        return Order.objects.create(
+            tenant=tenant_a, order_type=Order.OrderType.POS,
+            store_location=store_location_tenant_a, order_number=order_number
+        )
+    return _make_order
+
+
+# ============================================================================
+# NUMBER ALLOCATION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestNumberAllocation:
+    """Test counter-based allocation and its seeding."""
+
+    def test_sequence_past_99999(self, make_order):
+        make_order('ORD-99999')
+
+        # 'ORD-99999' sorts after 'ORD-100000' as a string
+        assert make_order().order_number == 'ORD-100000'
+        assert make_order().order_number == 'ORD-100001'
+
+    def test_seeded_from_existing_numbers(self, make_order, tenant_a, store_location_tenant_a):
+        make_order('ORD-00007')
+        make_order('CUSTOM-12345')
+
+        assert make_order().order_number == 'ORD-00008'
+        assert OrderNumberSequence.all_objects.get(
+            tenant=tenant_a, store_location=store_location_tenant_a
+        ).last_number == 8
+
+    def test_allocation_does_not_scan_orders(self, make_order):
+        make_order()
+
+        with CaptureQueriesContext(connection) as ctx:
+            order = make_order()
+
+        assert order.order_number == 'ORD-00002'
+        assert not [q for q in ctx.captured_queries if 'ORDER BY "orders_order"."order_number"' in q['sql']]
+
+
+# ============================================================================
+# GAP-FREE SEQUENCE TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestGapFreeSequence:
+    """Test that numbers are only consumed by committed orders."""
+
+    def test_rolled_back_order_releases_number(self, make_order):
+        make_order()
+
+        try:
+            with transaction.atomic():
+                assert make_order().order_number == 'ORD-00002'
+                raise RuntimeError("payment terminal went offline")
+        except RuntimeError:
+            pass
+
+        assert make_order().order_number == 'ORD-00002'
+
+    def test_manual_number_ahead_of_counter(self, make_order):
+        make_order()
+        make_order('ORD-00002')  # assigned outside the allocator
+
+        assert make_order().order_number == 'ORD-00003'
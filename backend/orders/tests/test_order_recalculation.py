@@ -0,0 +1,147 @@
+"""
+Order Recalculation Engine Tests
+
+Tests that OrderCalculationService.recalculate_order_totals computes the same
+cents as the per-line calculator while loading the order graph once.
+
+Test Categories:
+1. Rounding Parity (3 tests)
+2. Query Budget (2 tests)
+"""
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from discounts.models import Discount
+from orders.calculators import OrderCalculator
+from orders.models import Order, OrderAdjustment, OrderDiscount, OrderItem
+from orders.services import OrderCalculationService
+from products.services import TaxRateService
+
+
+@pytest.fixture
+def tax_location(tenant_a, store_location_tenant_a):
+    store_location_tenant_a.tax_rate = Decimal('0.0825')
+    store_location_tenant_a.save()
+    return store_location_tenant_a
+
+
+@pytest.fixture
+def make_order(tenant_a, tax_location):
+    """Build an order with `lines` items cycling through the given products"""
+    def _make_order(products, lines, quantities=(3, 1, 2)):
+        order = Order.objects.create(tenant=tenant_a, order_type=Order.OrderType.POS, store_location=tax_location)
+        for index in range(lines):
+            product = products[index % len(products)]
+            OrderItem.objects.create(
+                tenant=tenant_a, order=order, product=product,
+                quantity=quantities[index % len(quantities)], price_at_sale=product.price
+            )
+        return order
+    return _make_order
+
+
+@pytest.fixture
+def order_discount(tenant_a, discount_tenant_a):
+    def _apply(order):
+        return OrderDiscount.objects.create(tenant=tenant_a, order=order, discount=discount_tenant_a, amount=Decimal('0.00'))
+    return _apply
+
+
+# ============================================================================
+# ROUNDING PARITY TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestRoundingParity:
+    """Test that in-memory totals match the per-line minor-unit arithmetic."""
+
+    def test_discounted_order_totals(self, menu_tenant_a, make_order, order_discount):
+        order = make_order(menu_tenant_a, 3)
+        order_discount(order)
+
+        order = OrderCalculationService.recalculate_order_totals(order)
+
+        # 9.99 + 7.49 + 4.30; 10% discount 2.178 -> 2.18; line taxes 0.90 + 0.34 + 0.32
+        assert order.subtotal == Decimal('21.78')
+        assert order.total_discounts_amount == Decimal('2.18')
+        assert order.tax_total == Decimal('1.56')
+        assert order.grand_total == Decimal('21.16')
+        assert sorted(OrderItem.objects.filter(order=order).values_list('tax_amount', flat=True)) == [
+            Decimal('0.32'), Decimal('0.34'), Decimal('0.90')
+        ]
+        assert OrderDiscount.objects.get(order=order).amount == Decimal('2.18')
+
+    def test_matches_order_calculator(self, menu_tenant_a, make_order, order_discount):
+        order = make_order(menu_tenant_a, 30, quantities=(1, 2, 5, 3))
+        order_discount(order)
+
+        order = OrderCalculationService.recalculate_order_totals(order)
+        expected = OrderCalculator(Order.objects.get(pk=order.pk)).calculate_totals()
+
+        assert order.subtotal == expected['subtotal']
+        assert order.total_discounts_amount == expected['discount_total']
+        assert order.tax_total == expected['tax_total']
+        assert order.grand_total == expected['grand_total']
+        assert sum(OrderItem.objects.filter(order=order).values_list('tax_amount', flat=True)) == order.tax_total
+
+    def test_adjustments_and_item_exemption(self, menu_tenant_a, make_order, admin_user_tenant_a, tenant_a):
+        order = OrderCalculationService.recalculate_order_totals(make_order(menu_tenant_a, 3))
+        plain_line = OrderItem.objects.get(order=order, product=menu_tenant_a[2])
+        OrderAdjustment.objects.create(
+            tenant=tenant_a, order=order, adjustment_type=OrderAdjustment.AdjustmentType.ONE_OFF_DISCOUNT,
+            discount_type=OrderAdjustment.DiscountType.PERCENTAGE, discount_value=Decimal('15.00'),
+            amount=Decimal('-1.00'), reason='Regular', applied_by=admin_user_tenant_a
+        )
+        OrderAdjustment.objects.create(
+            tenant=tenant_a, order=order, order_item=plain_line,
+            adjustment_type=OrderAdjustment.AdjustmentType.TAX_EXEMPT,
+            amount=Decimal('0.00'), reason='Exempt', applied_by=admin_user_tenant_a
+        )
+
+        order = OrderCalculationService.recalculate_order_totals(order)
+
+        # 15% of 21.78 = 3.267 -> -3.27; exempt line taxes nothing
+        assert OrderAdjustment.objects.get(order=order, order_item__isnull=True).amount == Decimal('-3.27')
+        assert order.total_adjustments_amount == Decimal('-3.27')
+        assert OrderItem.objects.get(pk=plain_line.pk).tax_amount == Decimal('0.00')
+        assert order.grand_total == order.subtotal - Decimal('3.27') + order.tax_total
+
+
+# ============================================================================
+# QUERY BUDGET TESTS
+# ============================================================================
+
+# Order + items + discounts (+ their applicable sets) + adjustments, then bulk
+# writes and the order UPDATE; tax rates come from the compiled TaxRateTable
+RECALCULATION_QUERY_BUDGET = 12
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+    """Test that recalculation cost does not grow with the number of items."""
+
+    def recalculation_queries(self, order):
+        with CaptureQueriesContext(connection) as ctx:
+            OrderCalculationService.recalculate_order_totals(order)
+        return len(ctx)
+
+    def test_query_count_independent_of_items(self, menu_tenant_a, make_order, order_discount):
+        small, large = make_order(menu_tenant_a, 3), make_order(menu_tenant_a, 30)
+        order_discount(small)
+        order_discount(large)
+        # Persist first-pass amounts so both runs write the same set of rows
+        OrderCalculationService.recalculate_order_totals(small)
+        OrderCalculationService.recalculate_order_totals(large)
+
+        OrderItem.objects.filter(order__in=[small, large]).update(tax_amount=Decimal('0.00'))
+
+        assert self.recalculation_queries(large) == self.recalculation_queries(small)
+
+    def test_thirty_item_order_within_budget(self, menu_tenant_a, make_order, order_discount):
+        order = make_order(menu_tenant_a, 30)
+        order_discount(order)
+        TaxRateService.get_table(order.tenant_id)  # compiled once per tenant, then cached
+
+        assert self.recalculation_queries(order) <= RECALCULATION_QUERY_BUDGET
@@ -0,0 +1,170 @@
+"""
+Order WebSocket Load Tests
+
+Runs the load harness (orders/tests/load_harness.py): concurrent cashiers
+editing their own orders over OrderConsumer, each order also watched by
+passive screens, through the production tenant/JWT middleware on the
+in-memory channel layer, while POS terminals on GlobalPOSConsumer receive
+web order notifications. Reports p50/p95/p99 latency, queries per message
+and frame sizes per message type, and writes them to a JSON report.
+
+Test Categories:
+1. Report Helpers (2 tests)
+2. Editing Load (2 tests)
+
+Run the load test with: pytest orders/tests/test_websocket_load.py -s -m performance
+
+Scale and output are set through the environment:
+    WS_LOAD_ORDERS     concurrent editing clients, one order each (default 4)
+    WS_LOAD_OBSERVERS  passive screens per order (default 1)
+    WS_LOAD_ROUNDS     add/add/update rounds per order (default 3)
+    WS_LOAD_TERMINALS  terminals receiving web order notifications (default 2)
+    WS_LOAD_REPORT     report path; '{protocol}' is replaced (default: pytest tmp dir)
+    WS_LOAD_BASELINE   earlier report to print per-operation changes against
+"""
+import json
+import os
+from decimal import Decimal
+
+import pytest
+
+from orders.models import Order
+from products.models import Product
+from tenant.managers import set_current_tenant
+from terminals.models import TerminalRegistration
+
+from .load_harness import build_application, compare_reports, percentile, run_load, write_report
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+@pytest.fixture
+def menu(tenant_a, category_tenant_a, product_type_tenant_a, tax_rate_tenant_a):
+    set_current_tenant(tenant_a)
+    products = []
+    for index in range(6):
+        product = Product.objects.create(
+            name=f'Load Item {index}', price=Decimal('4.25') + index, tenant=tenant_a,
+            category=category_tenant_a, product_type=product_type_tenant_a
+        )
+        product.taxes.add(tax_rate_tenant_a)
+        products.append(product)
+    return products
+
+
+@pytest.fixture
+def load_orders(tenant_a, store_location_tenant_a):
+    set_current_tenant(tenant_a)
+    return [
+        Order.objects.create(tenant=tenant_a, order_type=Order.OrderType.POS, store_location=store_location_tenant_a)
+        for _ in range(env_int('WS_LOAD_ORDERS', 4))
+    ]
+
+
+@pytest.fixture
+def load_terminals(tenant_a, store_location_tenant_a):
+    terminals = [
+        TerminalRegistration.objects.create(
+            tenant=tenant_a, device_id=f'LOAD-TERMINAL-{index}', device_fingerprint=f'LOAD-FINGERPRINT-{index}',
+            nickname=f'Load Terminal {index}', store_location=store_location_tenant_a,
+        )
+        for index in range(env_int('WS_LOAD_TERMINALS', 2))
+    ]
+    return [terminal.device_id for terminal in terminals]
+
+
+@pytest.fixture
+def in_memory_layer(settings):
+    settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+    settings.ORDER_WEBSOCKET = {
+        **settings.ORDER_WEBSOCKET, 'DELTA_PROTOCOL': True, 'COALESCE_WINDOW_MS': 0,
+    }
+
+
+# ============================================================================
+# REPORT HELPER TESTS
+# ============================================================================
+
+class TestReportHelpers:
+    """Test percentile and report comparison helpers."""
+
+    def test_nearest_rank_percentiles(self):
+        values = list(range(1, 101))
+
+        assert [percentile(values, fraction) for fraction in (0.50, 0.95, 0.99, 1.0)] == [50, 95, 99, 100]
+        assert percentile([7.5], 0.99) == 7.5
+
+    def test_compare_reports(self):
+        baseline = {'operations': {'add_item': {'p95_ms': 20.0, 'queries_per_op': 10}}}
+        current = {'operations': {
+            'add_item': {'p95_ms': 15.0, 'queries_per_op': 12},
+            'apply_discount': {'p95_ms': 30.0, 'queries_per_op': 9},
+        }}
+
+        assert compare_reports(baseline, current, metrics=('p95_ms', 'queries_per_op')) == {
+            'add_item': {'p95_ms': (20.0, 15.0, -25.0), 'queries_per_op': (10, 12, 20.0)},
+        }
+
+
+# ============================================================================
+# EDITING LOAD TESTS
+# ============================================================================
+
+@pytest.mark.performance
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True, serialized_rollback=True)
+class TestEditingLoad:
+    """Test concurrent order editing and record latency, queries and bytes."""
+
+    @pytest.mark.parametrize('protocol', ['legacy', 'delta'])
+    async def test_concurrent_editing(
+        self, protocol, in_memory_layer, load_orders, load_terminals, menu, admin_user_tenant_a, discount_tenant_a,
+        tmp_path
+    ):
+        report = await run_load(
+            build_application(), load_orders, admin_user_tenant_a, menu,
+            discount_id=discount_tenant_a.id,
+            rounds=env_int('WS_LOAD_ROUNDS', 3),
+            observers=env_int('WS_LOAD_OBSERVERS', 1),
+            protocol=protocol,
+            terminals=load_terminals,
+        )
+
+        path = os.environ.get('WS_LOAD_REPORT', str(tmp_path / 'websocket_load_{protocol}.json'))
+        path = path.replace('{protocol}', protocol)
+        write_report(report, path)
+
+        summary = report['summary']
+        print(f"\n{protocol}: {summary['operations']} ops over {len(load_orders)} orders, "
+              f"p50 {summary['p50_ms']} ms, p95 {summary['p95_ms']} ms, p99 {summary['p99_ms']} ms, "
+              f"{summary['queries_per_op']} queries/op -> {path}")
+        for message_type, stats in sorted(report['operations'].items()):
+            print(f"  {message_type:<22} p95 {stats['p95_ms']:8.2f} ms  {stats['queries_per_op']:6.2f} queries  "
+                  f"reply {stats['reply_bytes_avg']:>6} B  broadcast {stats['broadcast_bytes_avg']:>6} B")
+        for message_type, stats in sorted(report['notifications'].items()):
+            print(f"  {message_type:<22} p95 {stats['p95_ms']:8.2f} ms  to {len(load_terminals)} terminals  "
+                  f"frame {stats['reply_bytes_avg']:>6} B")
+
+        baseline_path = os.environ.get('WS_LOAD_BASELINE')
+        if baseline_path:
+            with open(baseline_path.replace('{protocol}', protocol)) as baseline_file:
+                changes = compare_reports(json.load(baseline_file), report)
+            for message_type, metrics in sorted(changes.items()):
+                print(f"  vs baseline {message_type}: " + ", ".join(
+                    f"{metric} {before} -> {after} ({change:+}%)" if change is not None else f"{metric} {before} -> {after}"
+                    for metric, (before, after, change) in metrics.items()
+                ))
+
+        assert report['errors'] == []
+        rounds = env_int('WS_LOAD_ROUNDS', 3)
+        assert report['operations']['add_item']['samples'] == 2 * rounds * len(load_orders)
+        assert report['operations']['apply_discount']['samples'] == len(load_orders)
+        assert all(stats['queries_per_op'] > 0 for stats in report['operations'].values())
+        if load_terminals:
+            assert report['notifications']['web_order_notification']['samples'] == (
+                report['config']['notifications_per_order'] * len(load_orders) * len(load_terminals)
+            )
+        with open(path) as report_file:
+            assert json.load(report_file)['summary'] == summary
@@ -5,7 +5,6 @@ from django.dispatch import receiver
 from .models import Payment, PaymentTransaction
 from orders.models import Order
 from decimal import Decimal
-from core_backend.infrastructure.cache_utils import invalidate_cache_pattern
 import logging
 
 logger = logging.getLogger(__name__)
@@ -70,55 +69,27 @@ def update_payment_totals(sender, instance, **kwargs):
     )
 
 # Cache invalidation signal handlers for payments
+# Report scopes are collected and flushed once per transaction on commit
+# (see reports.invalidation), so a checkout's payment and transaction saves
+# share one invalidation with its order saves.
 @receiver([post_save, post_delete], sender=Payment)
 def handle_payment_changes_for_reports(sender, instance=None, **kwargs):
-    """Invalidate report caches when payments change"""
+    """Mark the payment's report scope dirty"""
     try:
-        # Invalidate report caches that depend on payment data
-        invalidate_cache_pattern('*get_cached_business_kpis*')
-        invalidate_cache_pattern('*payment_report*')
-        invalidate_cache_pattern('*sales_report*')
-        invalidate_cache_pattern('*summary_report*')
-        
-        # Invalidate database report cache entries
-        _invalidate_payment_report_cache_entries()
-        
-        logger.debug(f"Invalidated payment report caches after payment change")
-        
+        from reports.invalidation import ReportInvalidationCollector
+
+        ReportInvalidationCollector.mark_payment_dirty(instance)
+
     except Exception as e:
         logger.error(f"Failed to invalidate payment report caches: {e}")
 
 @receiver([post_save, post_delete], sender=PaymentTransaction)
 def handle_payment_transaction_changes_for_reports(sender, instance=None, **kwargs):
-    """Invalidate report caches when payment transactions change"""
+    """Mark the report scope of the day the transaction was taken dirty"""
     try:
-        # Invalidate payment-related report caches
-        invalidate_cache_pattern('*get_cached_business_kpis*')
-        invalidate_cache_pattern('*payment_report*')
-        invalidate_cache_pattern('*sales_report*')
-        
-        # Invalidate database report cache entries
-        _invalidate_payment_report_cache_entries()
-        
-        logger.debug(f"Invalidated payment transaction report caches after transaction change")
-        
-    except Exception as e:
-        logger.error(f"Failed to invalidate payment transaction report caches: {e}")
+        from reports.invalidation import ReportInvalidationCollector
+
+        ReportInvalidationCollector.mark_payment_dirty(instance.payment, instance.created_at)
 
-def _invalidate_payment_report_cache_entries():
-    """Helper function to invalidate payment-related database report cache entries"""
-    try:
-        from reports.models import ReportCache
-        from django.utils import timezone
-        
-        # Mark payment-related report cache entries as expired
-        one_hour_ago = timezone.now() - timezone.timedelta(hours=1)
-        ReportCache.objects.filter(
-            generated_at__gte=one_hour_ago,
-            report_type__in=['payment', 'sales', 'summary']
-        ).update(expires_at=timezone.now())
-        
-        logger.debug("Invalidated payment-related database report cache entries")
-        
     except Exception as e:
-        logger.error(f"Failed to invalidate payment database report cache entries: {e}")
\ No newline at end of file
+        logger.error(f"Failed to invalidate payment transaction report caches: {e}")
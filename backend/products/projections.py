@@ -0,0 +1,354 @@
+"""
+Compact projections of menu data for the product caches.
+
+The cached product lists used to be lists of Product instances with five
+prefetched relations, which made every cache entry a multi-megabyte pickle
+and every hit pay for ORM model re-instantiation. A ProductProjection keeps
+only the fields the POS serializers read, as `__slots__` records, and is
+stored in Redis as a single zlib-compressed msgpack blob.
+
+POSMenuSnapshot goes one step further for the POS product list: it holds the
+final JSON bytes the endpoint returns, plus their content hash for ETags.
+
+Records keep the attribute names of the models they replace (`product.id`,
+`product.category.parent`, `product.product_type.name`), so existing callers
+that only read attributes keep working.
+
+TaxRateTable is the tax counterpart: the tenant's product -> tax rate
+hierarchy compiled once into a flat map, so order and cart calculations
+resolve each line's rate without touching the Tax M2M tables.
+"""
+import gzip
+import hashlib
+import zlib
+from collections.abc import Sequence
+from decimal import Decimal
+
+import msgpack
+
+
+class CategoryRecord:
+    """Category fields read by the POS views (id, name, order, parent)"""
+
+    __slots__ = ('id', 'name', 'order', 'parent')
+
+    def __init__(self, id, name, order, parent=None):
+        self.id = id
+        self.name = name
+        self.order = order
+        self.parent = parent
+
+    @property
+    def parent_id(self):
+        return self.parent.id if self.parent else None
+
+    @classmethod
+    def from_instance(cls, category):
+        parent = cls.from_instance(category.parent) if category.parent_id else None
+        return cls(category.id, category.name, category.order, parent)
+
+    @classmethod
+    def from_row(cls, row):
+        if row is None:
+            return None
+        id, name, order, parent = row
+        return cls(id, name, order, cls.from_row(parent))
+
+    def to_row(self):
+        return (self.id, self.name, self.order, self.parent.to_row() if self.parent else None)
+
+    def as_dict(self):
+        """Same shape as ProductSerializer.get_category"""
+        data = {'id': self.id, 'name': self.name, 'order': self.order}
+        if self.parent is not None:
+            data['parent'] = {'id': self.parent.id, 'name': self.parent.name, 'order': self.parent.order}
+        else:
+            data['parent'] = None
+        return data
+
+
+class ProductTypeRecord:
+    """Product type fields read by the POS views (id, name, description)"""
+
+    __slots__ = ('id', 'name', 'description')
+
+    def __init__(self, id, name, description):
+        self.id = id
+        self.name = name
+        self.description = description
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(*row) if row is not None else None
+
+    def to_row(self):
+        return (self.id, self.name, self.description)
+
+    def as_dict(self):
+        """Same shape as ProductSerializer.get_product_type"""
+        return {'id': self.id, 'name': self.name, 'description': self.description}
+
+
+class ProductRecord:
+    """
+    One product as the POS terminal sees it.
+
+    `modifier_groups` is the already-structured output of
+    ProductSerializer.get_modifier_groups, so hits never rebuild it.
+    """
+
+    __slots__ = (
+        'id', 'name', 'price', 'barcode', 'is_active', 'track_inventory',
+        'category', 'product_type', 'image', 'modifier_count', 'modifier_groups',
+    )
+
+    def __init__(self, id, name, price, barcode, is_active, track_inventory,
+                 category, product_type, image, modifier_count, modifier_groups):
+        self.id = id
+        self.name = name
+        self.price = price
+        self.barcode = barcode
+        self.is_active = is_active
+        self.track_inventory = track_inventory
+        self.category = category
+        self.product_type = product_type
+        self.image = image
+        self.modifier_count = modifier_count
+        self.modifier_groups = modifier_groups
+
+    @property
+    def category_id(self):
+        return self.category.id if self.category else None
+
+    @property
+    def product_type_id(self):
+        return self.product_type.id if self.product_type else None
+
+    @property
+    def has_modifiers(self):
+        return self.modifier_count > 0
+
+    @classmethod
+    def from_row(cls, row):
+        (id, name, price, barcode, is_active, track_inventory,
+         category, product_type, image, modifier_count, modifier_groups) = row
+        return cls(
+            id, name, Decimal(price), barcode, is_active, track_inventory,
+            CategoryRecord.from_row(category), ProductTypeRecord.from_row(product_type),
+            image, modifier_count, modifier_groups,
+        )
+
+    def to_row(self):
+        return (
+            self.id, self.name, str(self.price), self.barcode, self.is_active, self.track_inventory,
+            self.category.to_row() if self.category else None,
+            self.product_type.to_row() if self.product_type else None,
+            self.image, self.modifier_count, self.modifier_groups,
+        )
+
+    def as_pos_dict(self, request=None):
+        """
+        Render the record exactly as ProductSerializer renders the 'pos' fieldset.
+
+        The image is stored as its storage-relative URL and made absolute here,
+        matching DRF's ImageField behaviour.
+        """
+        image = self.image
+        if image and request is not None:
+            image = request.build_absolute_uri(image)
+        return {
+            'id': self.id,
+            'name': self.name,
+            'price': str(self.price),
+            'barcode': self.barcode,
+            'is_active': self.is_active,
+            'category': self.category.as_dict() if self.category else None,
+            'product_type': self.product_type.as_dict() if self.product_type else None,
+            'has_modifiers': self.has_modifiers,
+            'modifier_summary': self.modifier_count,
+            'modifier_groups': self.modifier_groups,
+            'image': image,
+        }
+
+
+class ProductProjection(Sequence):
+    """
+    Immutable sequence of ProductRecord objects with a compact pickled form.
+
+    The packed blob is produced once when the projection is built, so storing
+    it in Redis costs no re-encoding; unpickling decodes the records once.
+    """
+
+    __slots__ = ('_records', '_blob')
+
+    def __init__(self, records=(), blob=None):
+        self._records = tuple(records)
+        self._blob = blob if blob is not None else self.pack(self._records)
+
+    @classmethod
+    def from_queryset(cls, queryset):
+        """Build a projection from a queryset prefetched like ProductSerializer expects"""
+        from .serializers import ProductSerializer
+
+        # Reuse the serializer's modifier-group logic so cached and live output can't drift
+        serializer = ProductSerializer(context={'view_mode': 'pos'})
+        records = []
+        for product in queryset:
+            modifier_sets = list(product.product_modifier_sets.all())
+            modifier_groups = serializer.get_modifier_groups(product) if modifier_sets else []
+            product_type = product.product_type
+            records.append(ProductRecord(
+                product.id,
+                product.name,
+                product.price,
+                product.barcode,
+                product.is_active,
+                product.track_inventory,
+                CategoryRecord.from_instance(product.category) if product.category_id else None,
+                ProductTypeRecord(product_type.id, product_type.name, product_type.description)
+                if product_type else None,
+                product.image.url if product.image else None,
+                len(modifier_sets),
+                modifier_groups,
+            ))
+        # Round-trip through the packed form so fresh and cached projections hold identical data
+        return cls.unpack(cls.pack(records))
+
+    @staticmethod
+    def pack(records):
+        return zlib.compress(msgpack.packb([record.to_row() for record in records], use_bin_type=True))
+
+    @classmethod
+    def unpack(cls, blob):
+        rows = msgpack.unpackb(zlib.decompress(blob), raw=False)
+        return cls((ProductRecord.from_row(row) for row in rows), blob=blob)
+
+    def as_pos_data(self, request=None):
+        return [record.as_pos_dict(request) for record in self._records]
+
+    def __getstate__(self):
+        return self._blob
+
+    def __setstate__(self, blob):
+        unpacked = self.unpack(blob)
+        self._records = unpacked._records
+        self._blob = blob
+
+    def __getitem__(self, index):
+        return self._records[index]
+
+    def __len__(self):
+        return len(self._records)
+
+    def __eq__(self, other):
+        if isinstance(other, ProductProjection):
+            return self._blob == other._blob
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._blob)
+
+    def __repr__(self):
+        return f"<ProductProjection: {len(self._records)} products, {len(self._blob)} bytes>"
+
+
+class POSMenuSnapshot:
+    """
+    Final rendered POS product list, gzip-compressed, with its content hash.
+
+    The ETag is the SHA-256 of the uncompressed JSON, so rebuilding a snapshot
+    with identical content keeps terminals on 304s.
+    """
+
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, body, etag):
+        self.body = body
+        self.etag = etag
+
+    @classmethod
+    def build(cls, data):
+        from rest_framework.renderers import JSONRenderer
+
+        # Same renderer as the regular Response path, so the bytes are identical
+        content = JSONRenderer().render(data)
+        etag = f'"{hashlib.sha256(content).hexdigest()}"'
+        return cls(gzip.compress(content, mtime=0), etag)
+
+    def content(self, gzipped=False):
+        return self.body if gzipped else gzip.decompress(self.body)
+
+    def matches(self, if_none_match):
+        """True if an If-None-Match header value names this snapshot"""
+        if not if_none_match:
+            return False
+        tags = {tag.strip() for tag in if_none_match.split(',')}
+        # Weak comparison per RFC 9110 - proxies may weaken the tag
+        return '*' in tags or self.etag in tags or f"W/{self.etag}" in tags
+
+    def __getstate__(self):
+        return (self.body, self.etag)
+
+    def __setstate__(self, state):
+        self.body, self.etag = state
+
+
+class TaxRateTable:
+    """
+    Compiled tax-rate hierarchy for one tenant: product_id -> summed rate.
+
+    Only products with their own taxes or product type default taxes have an
+    entry; everything else (including custom lines without a product) falls
+    through to the store location's rate, which is read from the location
+    passed in - so one table serves every location of the tenant.
+    """
+
+    __slots__ = ('rates',)
+
+    def __init__(self, rates):
+        self.rates = rates
+
+    @classmethod
+    def compile(cls, tenant_id):
+        """Build the table with three queries, independent of catalog size"""
+        from .models import Product, ProductType
+
+        product_taxes = {}
+        for product_id, rate in Product.taxes.through.objects.filter(
+            product__tenant_id=tenant_id
+        ).values_list('product_id', 'tax__rate'):
+            product_taxes[product_id] = product_taxes.get(product_id, Decimal('0')) + rate
+
+        type_taxes = {}
+        for product_type_id, rate in ProductType.default_taxes.through.objects.filter(
+            producttype__tenant_id=tenant_id
+        ).values_list('producttype_id', 'tax__rate'):
+            type_taxes[product_type_id] = type_taxes.get(product_type_id, Decimal('0')) + rate
+
+        rates = dict(product_taxes)
+        if type_taxes:
+            for product_id, product_type_id in Product.all_objects.filter(
+                tenant_id=tenant_id, product_type_id__in=type_taxes
+            ).values_list('id', 'product_type_id'):
+                # A product's own taxes win over its type's defaults
+                rates.setdefault(product_id, type_taxes[product_type_id])
+        return cls(rates)
+
+    def rate_for(self, product_id, store_location):
+        """Same hierarchy as the per-line lookup: product taxes, type defaults, location rate"""
+        rate = self.rates.get(product_id)
+        if rate is not None:
+            return rate
+        return store_location.get_effective_tax_rate()
+
+    def __getstate__(self):
+        return self.rates
+
+    def __setstate__(self, rates):
+        self.rates = rates
+
+    def __len__(self):
+        return len(self.rates)
+
+    def __repr__(self):
+        return f"<TaxRateTable: {len(self.rates)} products>"
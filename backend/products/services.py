@@ -1,9 +1,13 @@
 from .models import Product, Category, Tax, ProductType, ModifierSet, ModifierOption, ProductModifierSet
 from django.db import transaction
 from rest_framework.exceptions import ValidationError
+from core_backend.infrastructure.cache import AdvancedCacheManager
 from core_backend.infrastructure.cache_utils import cache_static_data, cache_dynamic_data
 from collections import defaultdict
 from typing import Optional, Dict, Any, List
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class ProductService:
@@ -102,19 +106,15 @@ class ProductService:
         return product
 
     @staticmethod
-    @cache_static_data(timeout=3600*2)  # 2 hours in static cache
-    def get_cached_products_list():
-        """Cache the most common product query in static data cache with hierarchical ordering"""
+    def get_menu_products_queryset():
+        """Active products in hierarchical menu order, prefetched for ProductProjection"""
         from django.db import models
-        return list(Product.objects.select_related(
+        return Product.objects.select_related(
             "category", "category__parent", "product_type"
         ).prefetch_related(
-            "taxes",
-            "modifier_sets",
             "product_modifier_sets__modifier_set__options",
             "product_modifier_sets__hidden_options",
             "product_modifier_sets__extra_options",
-            "product_type__default_taxes"
         ).filter(is_active=True).annotate(
             # Calculate parent order for hierarchical sorting
             parent_order=models.Case(
@@ -128,36 +128,30 @@ class ProductService:
                 default=models.Value(1),
                 output_field=models.IntegerField()
             )
-        ).order_by('parent_order', 'category_level', 'category__order', 'category__name', 'name'))
+        ).order_by('parent_order', 'category_level', 'category__order', 'category__name', 'name')
+
+    @staticmethod
+    @cache_static_data(timeout=3600*2, stale_ttl=600, early_expiration_beta=1.0, use_l1=True)  # 2 hours, refreshed in background
+    def get_cached_products_list():
+        """
+        Cache the most common product query in static data cache with hierarchical ordering.
+
+        Returns a ProductProjection (compact records, not ORM instances).
+        """
+        from .projections import ProductProjection
+        return ProductProjection.from_queryset(ProductService.get_menu_products_queryset())
 
     @staticmethod
-    @cache_static_data(timeout=3600*2)  # 2 hours in static cache
+    @cache_static_data(timeout=3600*2, stale_ttl=600, early_expiration_beta=1.0, use_l1=True)  # 2 hours, refreshed in background
     def get_cached_active_products_list():
-        """Cache specifically for is_active=true POS requests with hierarchical ordering"""
-        from django.db import models
-        return list(Product.objects.select_related(
-            "category", "category__parent", "product_type"
-        ).prefetch_related(
-            "taxes",
-            "modifier_sets",
-            "product_modifier_sets__modifier_set__options",
-            "product_modifier_sets__hidden_options",
-            "product_modifier_sets__extra_options",
-            "product_type__default_taxes"
-        ).filter(is_active=True).annotate(
-            # Calculate parent order for hierarchical sorting
-            parent_order=models.Case(
-                models.When(category__parent_id__isnull=True, then=models.F('category__order')),
-                default=models.F('category__parent__order'),
-                output_field=models.IntegerField()
-            ),
-            # Mark category level (0 for parent, 1 for child)
-            category_level=models.Case(
-                models.When(category__parent_id__isnull=True, then=models.Value(0)),
-                default=models.Value(1),
-                output_field=models.IntegerField()
-            )
-        ).order_by('parent_order', 'category_level', 'category__order', 'category__name', 'name'))
+        """
+        Cache specifically for is_active=true POS requests with hierarchical ordering.
+
+        Returns a ProductProjection (compact records, not ORM instances) that
+        ProductViewSet.list renders without running the serializer.
+        """
+        from .projections import ProductProjection
+        return ProductProjection.from_queryset(ProductService.get_menu_products_queryset())
     
     @staticmethod
     @cache_static_data(timeout=3600*8)  # 8 hours - categories change rarely
@@ -216,14 +210,14 @@ class ProductService:
                 ],
                 'products': [
                     {
-                        'id': prod.id if hasattr(prod, 'id') else prod['id'],
-                        'name': prod.name if hasattr(prod, 'name') else prod['name'],
-                        'price': float(prod.price if hasattr(prod, 'price') else prod['price']),
-                        'category_id': prod.category_id if hasattr(prod, 'category_id') else prod.get('category_id'),
-                        'product_type_id': prod.product_type_id if hasattr(prod, 'product_type_id') else prod.get('product_type_id'),
-                        'is_active': prod.is_active if hasattr(prod, 'is_active') else prod.get('is_active', True),
-                        'track_inventory': prod.track_inventory if hasattr(prod, 'track_inventory') else prod.get('track_inventory', False),
-                        'availability': availability.get(prod.id if hasattr(prod, 'id') else prod['id'], {
+                        'id': prod.id,
+                        'name': prod.name,
+                        'price': float(prod.price),
+                        'category_id': prod.category_id,
+                        'product_type_id': prod.product_type_id,
+                        'is_active': prod.is_active,
+                        'track_inventory': prod.track_inventory,
+                        'availability': availability.get(prod.id, {
                             'status': 'unknown',
                             'stock_level': 0,
                             'can_make': False
@@ -387,7 +381,8 @@ class ProductService:
             '*get_cached_products_by_category*',
             '*get_cached_products_with_inventory_status*',
             '*get_pos_menu_layout*',
-            '*get_cached_category_tree*'
+            '*get_cached_category_tree*',
+            '*pos_menu_snapshot*'
         ]
 
         # CRITICAL: Pass tenant to ensure proper tenant-scoped cache invalidation
@@ -1061,6 +1056,168 @@ class ProductSearchService:
         )
 
 
+class POSMenuSnapshotService:
+    """
+    Pre-rendered POS product list (?is_active=true) with a content-hash ETag.
+
+    One snapshot is kept per tenant, store location and origin (image URLs are
+    absolute, so the host is part of the variant). Its version is the tenant's
+    'pos_menu_snapshot' cache generation: the product, category, product type
+    and modifier signals bump it, and the next terminal request rebuilds the
+    snapshot once (single-flight) from the cached product projection.
+    """
+
+    FAMILY = 'pos_menu_snapshot'
+    CACHE_NAME = 'static_data'
+    TIMEOUT = 3600 * 2
+
+    @classmethod
+    def snapshot_key(cls, request, tenant_id):
+        from core_backend.infrastructure.cache import AdvancedCacheManager, CacheKeyBuilder
+
+        key_params = {
+            'tenant_id': tenant_id,
+            'location': getattr(request, 'store_location_id', None) or 'all',
+            'origin': CacheKeyBuilder.digest((request.build_absolute_uri('/'),))[:16],
+        }
+        if AdvancedCacheManager.uses_generation_invalidation():
+            generation = AdvancedCacheManager.get_generation(cls.FAMILY, tenant_id)
+            if generation is None:
+                return None
+            key_params['gen'] = generation
+        return AdvancedCacheManager.cache_key(cls.FAMILY, 'products', 'pos', **key_params)
+
+    @classmethod
+    def get_snapshot(cls, request):
+        """Return the POSMenuSnapshot for this request, building it on a miss"""
+        from core_backend.infrastructure.cache import AdvancedCacheManager, LocalCacheTier, SingleFlight
+        from tenant.managers import get_current_tenant
+        from .projections import POSMenuSnapshot
+
+        def build():
+            products = ProductService.get_cached_active_products_list()
+            return POSMenuSnapshot.build(products.as_pos_data(request))
+
+        tenant = get_current_tenant()
+        tenant_id = str(tenant.id) if tenant else 'none'
+        cache = AdvancedCacheManager.get_cache(cls.CACHE_NAME)
+        cache_key = cls.snapshot_key(request, tenant_id) if cache else None
+        if cache_key is None:
+            # No cache or no generation to version the snapshot with - render uncached
+            return build()
+
+        local_key = f"{cls.CACHE_NAME}:{cache_key}"
+        use_local = LocalCacheTier.is_enabled()
+        if use_local:
+            hit, snapshot = LocalCacheTier.get(local_key)
+            if hit:
+                return snapshot
+
+        def produce():
+            snapshot = build()
+            cache.set(cache_key, snapshot, cls.TIMEOUT)
+            return snapshot
+
+        try:
+            snapshot = cache.get(cache_key)
+            if snapshot is None:
+                snapshot = SingleFlight.fill(cache, cache_key, produce)
+        except Exception as e:
+            logger.error(f"POS menu snapshot cache error: {e}")
+            return build()
+
+        if use_local:
+            LocalCacheTier.set(local_key, snapshot, cls.TIMEOUT)
+        return snapshot
+
+    @classmethod
+    def invalidate(cls, tenant=None):
+        """Bump the tenant's snapshot version; the next request rebuilds it"""
+        from core_backend.infrastructure.cache_utils import invalidate_cache_pattern
+        invalidate_cache_pattern(f'*{cls.FAMILY}*', tenant=tenant)
+
+
+AdvancedCacheManager.register_family(POSMenuSnapshotService.FAMILY, f"{POSMenuSnapshotService.FAMILY}:products:pos")
+
+
+class TaxRateService:
+    """
+    Per-tenant compiled TaxRateTable for order and cart tax calculations.
+
+    The table is versioned by the tenant's 'tax_rate_table' cache generation;
+    the Tax, Product and ProductType signals (including the tax M2M changes)
+    bump it. Store location rates are not compiled in - TaxRateTable.rate_for
+    reads them from the location it is given.
+    """
+
+    FAMILY = 'tax_rate_table'
+    CACHE_NAME = 'static_data'
+    TIMEOUT = 3600 * 4
+
+    @classmethod
+    def table_key(cls, tenant_id):
+        key_params = {'tenant_id': tenant_id}
+        if AdvancedCacheManager.uses_generation_invalidation():
+            generation = AdvancedCacheManager.get_generation(cls.FAMILY, tenant_id)
+            if generation is None:
+                return None
+            key_params['gen'] = generation
+        return AdvancedCacheManager.cache_key(cls.FAMILY, 'products', 'tax_rates', **key_params)
+
+    @classmethod
+    def get_table(cls, tenant_id):
+        """Return the tenant's TaxRateTable, compiling it on a miss"""
+        from core_backend.infrastructure.cache import LocalCacheTier, SingleFlight
+        from .projections import TaxRateTable
+
+        tenant_id = str(tenant_id)
+        cache = AdvancedCacheManager.get_cache(cls.CACHE_NAME)
+        cache_key = cls.table_key(tenant_id) if cache else None
+        if cache_key is None:
+            # No cache or no generation to version the table with - compile uncached
+            return TaxRateTable.compile(tenant_id)
+
+        local_key = f"{cls.CACHE_NAME}:{cache_key}"
+        use_local = LocalCacheTier.is_enabled()
+        if use_local:
+            hit, table = LocalCacheTier.get(local_key)
+            if hit:
+                return table
+
+        def produce():
+            table = TaxRateTable.compile(tenant_id)
+            cache.set(cache_key, table, cls.TIMEOUT)
+            return table
+
+        try:
+            table = cache.get(cache_key)
+            if table is None:
+                table = SingleFlight.fill(cache, cache_key, produce)
+        except Exception as e:
+            logger.error(f"Tax rate table cache error: {e}")
+            return TaxRateTable.compile(tenant_id)
+
+        if use_local:
+            LocalCacheTier.set(local_key, table, cls.TIMEOUT)
+        return table
+
+    @classmethod
+    def invalidate(cls, tenant=None):
+        """Bump the tenant's table version now and again on commit"""
+        from core_backend.infrastructure.cache_utils import invalidate_cache_pattern
+
+        def bump():
+            invalidate_cache_pattern(f'*{cls.FAMILY}*', tenant=tenant)
+
+        bump()
+        # A table compiled by a concurrent request before this transaction commits
+        # would otherwise be cached under the new version with the old rates
+        transaction.on_commit(bump)
+
+
+AdvancedCacheManager.register_family(TaxRateService.FAMILY, f"{TaxRateService.FAMILY}:products:tax_rates")
+
+
 class ProductImageService:
     """
     Service layer for product image handling.
@@ -1,4 +1,4 @@
-from django.db.models.signals import post_save, post_delete, pre_save
+from django.db.models.signals import post_save, post_delete, pre_save, m2m_changed
 from django.dispatch import receiver
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
@@ -9,6 +9,7 @@ from django.conf import settings
 
 from .models import Product, Category, ProductType, Tax, ModifierSet, ProductModifierSet, ModifierOption
 from .image_service import ImageService  # Import ImageService
+from .services import POSMenuSnapshotService, TaxRateService
 from core_backend.infrastructure.cache_utils import invalidate_cache_pattern
 import os  # Import os
 
@@ -180,6 +181,7 @@ def handle_category_change(sender, instance, created, **kwargs):
     invalidate_cache_pattern('*get_cached_products_list*', tenant=instance.tenant)
     invalidate_cache_pattern('*get_cached_active_products_list*', tenant=instance.tenant)
     invalidate_cache_pattern('*get_pos_menu_layout*', tenant=instance.tenant)  # Also invalidate menu layout cache
+    POSMenuSnapshotService.invalidate(tenant=instance.tenant)  # Terminals get the new menu on their next poll
 
     # Proactively warm product caches in background
     try:
@@ -200,6 +202,7 @@ def handle_category_delete(sender, instance, **kwargs):
     invalidate_cache_pattern('*get_cached_products_list*', tenant=instance.tenant)
     invalidate_cache_pattern('*get_cached_active_products_list*', tenant=instance.tenant)
     invalidate_cache_pattern('*get_pos_menu_layout*', tenant=instance.tenant)  # Also invalidate menu layout cache
+    POSMenuSnapshotService.invalidate(tenant=instance.tenant)  # Terminals get the new menu on their next poll
 
     # Proactively warm product caches in background
     try:
@@ -221,6 +224,10 @@ def handle_product_type_change(sender, instance, created, **kwargs):
     # Invalidate product type cache using broader patterns
     invalidate_cache_pattern('*get_cached_product_types*')
     invalidate_cache_pattern('*get_pos_menu_layout*')  # Also invalidate menu layout cache
+    # Product type names are embedded in the cached POS product list
+    invalidate_cache_pattern('*get_cached_products_list*', tenant=instance.tenant)
+    invalidate_cache_pattern('*get_cached_active_products_list*', tenant=instance.tenant)
+    POSMenuSnapshotService.invalidate(tenant=instance.tenant)
 
 
 @receiver(post_delete, sender=ProductType)
@@ -231,6 +238,10 @@ def handle_product_type_delete(sender, instance, **kwargs):
     # Invalidate product type cache using broader patterns
     invalidate_cache_pattern('*get_cached_product_types*')
     invalidate_cache_pattern('*get_pos_menu_layout*')  # Also invalidate menu layout cache
+    # Product type names are embedded in the cached POS product list
+    invalidate_cache_pattern('*get_cached_products_list*', tenant=instance.tenant)
+    invalidate_cache_pattern('*get_cached_active_products_list*', tenant=instance.tenant)
+    POSMenuSnapshotService.invalidate(tenant=instance.tenant)
 
 
 # === TAX SIGNALS ===
@@ -256,6 +267,48 @@ def handle_tax_delete(sender, instance, **kwargs):
     invalidate_cache_pattern('*get_pos_menu_layout*')  # Also invalidate menu layout cache
 
 
+# === TAX RATE TABLE SIGNALS ===
+
+
+@receiver(post_save, sender=Tax)
+@receiver(post_delete, sender=Tax)
+@receiver(post_save, sender=ProductType)
+@receiver(post_delete, sender=ProductType)
+@receiver(post_delete, sender=Product)
+def handle_tax_rate_source_change(sender, instance, **kwargs):
+    """Rates, type defaults or products removed - recompile the tenant's tax rate table"""
+    TaxRateService.invalidate(tenant=instance.tenant)
+
+
+@receiver(pre_save, sender=Product)
+def track_product_type_change(sender, instance, **kwargs):
+    """
+    Note whether this save moves an existing product to another product type.
+    Price, name or image edits leave its rate alone and must not recompile the table.
+    """
+    update_fields = kwargs.get("update_fields")
+    if instance._state.adding or (update_fields is not None and "product_type" not in update_fields):
+        instance._product_type_changed = False
+        return
+    previous_type_id = Product.all_objects.filter(pk=instance.pk).values_list('product_type_id', flat=True).first()
+    instance._product_type_changed = previous_type_id != instance.product_type_id
+
+
+@receiver(post_save, sender=Product)
+def handle_product_tax_rate_change(sender, instance, created, **kwargs):
+    """New or re-typed products change which rate they resolve to"""
+    if created or instance.__dict__.pop('_product_type_changed', False):
+        TaxRateService.invalidate(tenant=instance.tenant)
+
+
+@receiver(m2m_changed, sender=Product.taxes.through)
+@receiver(m2m_changed, sender=ProductType.default_taxes.through)
+def handle_tax_assignment_change(sender, instance, action, **kwargs):
+    """Taxes added to or removed from a product or product type"""
+    if action in ("post_add", "post_remove", "post_clear"):
+        TaxRateService.invalidate(tenant=instance.tenant)
+
+
 # === MODIFIER SET SIGNALS ===
 
 @receiver(post_save, sender=ModifierSet)
@@ -267,6 +320,10 @@ def handle_modifier_set_change(sender, instance, created, **kwargs):
     # Invalidate modifier set cache using broader patterns
     invalidate_cache_pattern('*get_cached_modifier_sets*')
     invalidate_cache_pattern('*get_pos_menu_layout*')  # Also invalidate menu layout cache
+    # Modifier groups are pre-structured inside the cached POS product list
+    invalidate_cache_pattern('*get_cached_products_list*', tenant=instance.tenant)
+    invalidate_cache_pattern('*get_cached_active_products_list*', tenant=instance.tenant)
+    POSMenuSnapshotService.invalidate(tenant=instance.tenant)
 
 
 @receiver(post_delete, sender=ModifierSet)
@@ -277,6 +334,10 @@ def handle_modifier_set_delete(sender, instance, **kwargs):
     # Invalidate modifier set cache using broader patterns
     invalidate_cache_pattern('*get_cached_modifier_sets*')
     invalidate_cache_pattern('*get_pos_menu_layout*')  # Also invalidate menu layout cache
+    # Modifier groups are pre-structured inside the cached POS product list
+    invalidate_cache_pattern('*get_cached_products_list*', tenant=instance.tenant)
+    invalidate_cache_pattern('*get_cached_active_products_list*', tenant=instance.tenant)
+    POSMenuSnapshotService.invalidate(tenant=instance.tenant)
 
 
 # === PRODUCT MODIFIER SET SIGNALS ===
@@ -321,3 +382,11 @@ def cleanup_product_specific_options(sender, instance, **kwargs):
     except Exception as e:
         logger.error(f"Error cleaning up product-specific options for ProductModifierSet {instance.id}: {e}")
         # Don't raise the exception to prevent the deletion from failing
+
+
+@receiver(post_save, sender=ProductModifierSet)
+@receiver(post_delete, sender=ProductModifierSet)
+def handle_product_modifier_set_change(sender, instance, **kwargs):
+    """Product/modifier-set links are part of the cached POS product list"""
+    from .services import ProductService
+    ProductService.invalidate_product_cache(instance.product_id, tenant=instance.tenant)
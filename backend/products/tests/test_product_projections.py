@@ -0,0 +1,166 @@
+"""
+Product Projection Cache Tests
+
+Tests the compact menu projection stored by the product list caches and the
+pre-rendered POS menu snapshot served with ETags.
+
+Test Categories:
+1. Projection Encoding (3 tests)
+2. POS Rendering Parity (2 tests)
+3. POS Menu Snapshot (4 tests)
+"""
+import gzip
+import json
+import pickle
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from unittest.mock import patch
+from rest_framework.test import APIRequestFactory
+
+from tenant.managers import set_current_tenant
+from products.models import Category, ModifierSet, ModifierOption, Product, ProductModifierSet
+from products.projections import POSMenuSnapshot, ProductProjection, ProductRecord
+from products.serializers import ProductSerializer
+from products.services import ProductService
+
+
+@pytest.fixture
+def menu(tenant_a, category_tenant_a, product_type_tenant_a):
+    """A child category, a plain product and a product with modifiers"""
+    set_current_tenant(tenant_a)
+    child = Category.objects.create(name='Specialty', parent=category_tenant_a, tenant=tenant_a)
+    plain = Product.objects.create(
+        name='Cheese Pizza', price=Decimal('9.50'), tenant=tenant_a,
+        category=category_tenant_a, product_type=product_type_tenant_a, barcode='111'
+    )
+    custom = Product.objects.create(
+        name='Build Your Own', price=Decimal('12.00'), tenant=tenant_a,
+        category=child, product_type=product_type_tenant_a
+    )
+    toppings = ModifierSet.objects.create(name='Toppings', internal_name='toppings', tenant=tenant_a)
+    ModifierOption.objects.create(modifier_set=toppings, name='Olives', price_delta=Decimal('0.75'), tenant=tenant_a)
+    ModifierOption.objects.create(modifier_set=toppings, name='Basil', price_delta=Decimal('0.50'), display_order=1, tenant=tenant_a)
+    ProductModifierSet.objects.create(product=custom, modifier_set=toppings, tenant=tenant_a)
+    return [plain, custom]
+
+
+# ============================================================================
+# PROJECTION ENCODING TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestProjectionEncoding:
+    """Test the record format and its packed representation."""
+
+    def test_cached_list_holds_records_not_models(self, menu):
+        products = ProductService.get_cached_active_products_list()
+
+        assert isinstance(products, ProductProjection)
+        assert all(isinstance(product, ProductRecord) for product in products)
+        assert {product.id for product in products} == {product.id for product in menu}
+
+    def test_pickle_round_trip_is_compact_and_equal(self, menu):
+        products = ProductService.get_cached_active_products_list()
+
+        restored = pickle.loads(pickle.dumps(products))
+        model_pickle = pickle.dumps(list(ProductService.get_menu_products_queryset()))
+
+        assert restored == products
+        assert restored[0].category.name == products[0].category.name
+        assert len(pickle.dumps(products)) < len(model_pickle) / 4
+
+    def test_cache_hit_needs_no_queries(self, menu):
+        ProductService.get_cached_active_products_list()
+
+        with CaptureQueriesContext(connection) as ctx:
+            products = ProductService.get_cached_active_products_list()
+
+        assert len(ctx) == 0
+        assert products[0].product_type.name == 'Food'
+
+
+# ============================================================================
+# POS RENDERING PARITY TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestPOSRenderingParity:
+    """Test that records render exactly like ProductSerializer's 'pos' fieldset."""
+
+    def test_records_match_serializer_output(self, menu):
+        request = APIRequestFactory().get('/api/products/', {'is_active': 'true'})
+        queryset = ProductService.get_menu_products_queryset()
+        expected = ProductSerializer(
+            queryset, many=True, context={'view_mode': 'pos', 'request': request}
+        ).data
+
+        products = ProductService.get_cached_active_products_list()
+
+        assert pickle.loads(pickle.dumps(products)).as_pos_data(request) == expected
+
+    def test_pos_list_endpoint_serves_projection(self, api_client_factory, tenant_a, menu):
+        client = api_client_factory(user=None, set_csrf=True, tenant=tenant_a)
+
+        response = client.get('/api/products/', {'is_active': 'true'})
+
+        assert response.status_code == 200
+        custom = next(item for item in json.loads(response.content) if item['name'] == 'Build Your Own')
+        assert custom['has_modifiers'] is True
+        assert custom['category']['parent']['name'] == 'Pizzas'
+        assert [option['name'] for option in custom['modifier_groups'][0]['options']] == ['Olives', 'Basil']
+
+
+# ============================================================================
+# POS MENU SNAPSHOT TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestPOSMenuSnapshot:
+    """Test the pre-rendered ?is_active=true response and its revalidation."""
+
+    def test_unchanged_menu_returns_304(self, api_client_factory, tenant_a, menu):
+        client = api_client_factory(user=None, set_csrf=True, tenant=tenant_a)
+
+        first = client.get('/api/products/', {'is_active': 'true'})
+        etag = first['ETag']
+        second = client.get('/api/products/', {'is_active': 'true'}, HTTP_IF_NONE_MATCH=etag)
+
+        assert first.status_code == 200
+        assert len(json.loads(first.content)) == 2
+        assert second.status_code == 304
+        assert second['ETag'] == etag
+        assert second.content == b''
+
+    def test_revalidation_skips_rendering(self, api_client_factory, tenant_a, menu):
+        client = api_client_factory(user=None, set_csrf=True, tenant=tenant_a)
+        etag = client.get('/api/products/', {'is_active': 'true'})['ETag']
+
+        with patch.object(POSMenuSnapshot, 'build', wraps=POSMenuSnapshot.build) as mock_build:
+            response = client.get('/api/products/', {'is_active': 'true'}, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        mock_build.assert_not_called()
+
+    def test_category_change_rebuilds_snapshot(self, api_client_factory, tenant_a, category_tenant_a, menu):
+        client = api_client_factory(user=None, set_csrf=True, tenant=tenant_a)
+        etag = client.get('/api/products/', {'is_active': 'true'})['ETag']
+
+        category_tenant_a.name = 'Pies'
+        category_tenant_a.save()
+
+        response = client.get('/api/products/', {'is_active': 'true'}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+        assert 'Pies' in {item['category']['name'] for item in json.loads(response.content)}
+
+    def test_gzip_body_when_accepted(self, api_client_factory, tenant_a, menu):
+        client = api_client_factory(user=None, set_csrf=True, tenant=tenant_a)
+        plain = client.get('/api/products/', {'is_active': 'true'})
+
+        response = client.get('/api/products/', {'is_active': 'true'}, HTTP_ACCEPT_ENCODING='gzip, br')
+
+        assert response['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.content) == plain.content
+        assert 'Accept-Encoding' in response['Vary']
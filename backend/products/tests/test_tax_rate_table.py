@@ -0,0 +1,147 @@
+"""
+Tax Rate Table Tests
+
+Tests the compiled per-tenant product -> tax rate map used by order and cart
+calculations, and its version bumps from the tax signals.
+
+Test Categories:
+1. Rate Resolution (2 tests)
+2. Table Caching (2 tests)
+3. Signal Invalidation (5 tests)
+"""
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tenant.managers import set_current_tenant
+from orders.models import Order, OrderItem
+from orders.services import OrderCalculationService
+from products.models import Tax
+from products.projections import TaxRateTable
+from products.services import TaxRateService
+
+
+@pytest.fixture
+def location(tenant_a, store_location_tenant_a):
+    set_current_tenant(tenant_a)
+    store_location_tenant_a.tax_rate = Decimal('0.0825')
+    store_location_tenant_a.save()
+    return store_location_tenant_a
+
+
+@pytest.fixture
+def menu(tenant_a, menu_tenant_a):
+    """menu_tenant_a by role, with a second direct tax on the taxed product"""
+    taxed, soda, plain = menu_tenant_a
+    taxed.taxes.add(Tax.objects.create(name='City Tax', rate=Decimal('0.01'), tenant=tenant_a))
+    return {'taxed': taxed, 'soda': soda, 'plain': plain, 'drinks': soda.product_type}
+
+
+# ============================================================================
+# RATE RESOLUTION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestRateResolution:
+    """Test that the compiled table follows the product -> type -> location hierarchy."""
+
+    def test_hierarchy(self, tenant_a, location, menu):
+        table = TaxRateTable.compile(tenant_a.id)
+
+        assert table.rate_for(menu['taxed'].id, location) == Decimal('0.11')
+        assert table.rate_for(menu['soda'].id, location) == Decimal('0.05')
+        assert table.rate_for(menu['plain'].id, location) == Decimal('0.0825')
+        assert table.rate_for(None, location) == Decimal('0.0825')  # custom items
+
+    def test_other_tenants_excluded(self, tenant_a, tenant_b, location, menu, product_tenant_b, tax_rate_tenant_b):
+        product_tenant_b.taxes.add(tax_rate_tenant_b)
+
+        table = TaxRateTable.compile(tenant_a.id)
+
+        assert product_tenant_b.id not in table.rates
+        assert len(table) == 2
+
+
+# ============================================================================
+# TABLE CACHING TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestTableCaching:
+    """Test that calculations read rates from the cached table."""
+
+    def test_cached_table_needs_no_queries(self, tenant_a, location, menu):
+        TaxRateService.get_table(tenant_a.id)
+
+        with CaptureQueriesContext(connection) as ctx:
+            table = TaxRateService.get_table(tenant_a.id)
+
+        assert len(ctx) == 0
+        assert table.rate_for(menu['soda'].id, location) == Decimal('0.05')
+
+    def test_recalculation_skips_tax_tables(self, tenant_a, location, menu):
+        order = Order.objects.create(tenant=tenant_a, order_type=Order.OrderType.POS, store_location=location)
+        for product in (menu['taxed'], menu['soda'], menu['plain']):
+            OrderItem.objects.create(tenant=tenant_a, order=order, product=product, quantity=2, price_at_sale=product.price)
+        TaxRateService.get_table(tenant_a.id)
+
+        with CaptureQueriesContext(connection) as ctx:
+            order = OrderCalculationService.recalculate_order_totals(order)
+
+        assert not [q for q in ctx.captured_queries if '"products_tax"' in q['sql']]
+        # 6.66 x 11% -> 0.73, 14.98 x 5% -> 0.75, 4.30 x 8.25% -> 0.35
+        assert order.tax_total == Decimal('1.83')
+
+
+# ============================================================================
+# SIGNAL INVALIDATION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestSignalInvalidation:
+    """Test that tax, product and product type changes reach the cached table."""
+
+    def test_product_tax_assignment(self, tenant_a, location, menu, tax_rate_tenant_a):
+        TaxRateService.get_table(tenant_a.id)
+
+        menu['plain'].taxes.add(tax_rate_tenant_a)
+
+        assert TaxRateService.get_table(tenant_a.id).rate_for(menu['plain'].id, location) == Decimal('0.10')
+
+    def test_tax_rate_change(self, tenant_a, location, menu):
+        TaxRateService.get_table(tenant_a.id)
+        beverage_tax = menu['drinks'].default_taxes.get()
+
+        beverage_tax.rate = Decimal('0.07')
+        beverage_tax.save()
+
+        assert TaxRateService.get_table(tenant_a.id).rate_for(menu['soda'].id, location) == Decimal('0.07')
+
+    def test_product_type_change(self, tenant_a, location, menu):
+        TaxRateService.get_table(tenant_a.id)
+
+        menu['plain'].product_type = menu['drinks']
+        menu['plain'].save(update_fields=['product_type'])
+
+        assert TaxRateService.get_table(tenant_a.id).rate_for(menu['plain'].id, location) == Decimal('0.05')
+
+    def test_full_save_with_new_type(self, tenant_a, location, menu):
+        TaxRateService.get_table(tenant_a.id)
+
+        menu['plain'].product_type = menu['drinks']
+        menu['plain'].save()
+
+        assert TaxRateService.get_table(tenant_a.id).rate_for(menu['plain'].id, location) == Decimal('0.05')
+
+    def test_product_edits_keep_table(self, tenant_a, location, menu):
+        TaxRateService.get_table(tenant_a.id)
+
+        with patch.object(TaxRateService, 'invalidate') as mock_invalidate:
+            menu['plain'].price = Decimal('2.50')
+            menu['plain'].save()
+            menu['plain'].name = 'Garlic Breadstick'
+            menu['plain'].save(update_fields=['name'])
+
+        mock_invalidate.assert_not_called()
@@ -1,4 +1,6 @@
 from django.shortcuts import render, get_object_or_404
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
 from django.utils.dateparse import parse_datetime
 from django.db import models
 from rest_framework import permissions, viewsets, generics, status
@@ -27,7 +29,7 @@ from .serializers import (
     ModifierOptionSerializer,
     ProductModifierSetSerializer,
 )
-from .services import ProductService
+from .services import ProductService, POSMenuSnapshotService
 from .filters import ProductFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from core_backend.base.viewsets import BaseViewSet
@@ -371,13 +373,30 @@ class ProductViewSet(TenantScopedQuerysetMixin, FieldsetQueryParamsMixin, BaseVi
 
         # Cache the most common POS query: ?is_active=true (returns all products, no pagination)
         if query_params == {"is_active": "true"}:
-            products = ProductService.get_cached_active_products_list()
-            serializer = self.get_serializer(products, many=True)
-            return Response(serializer.data)
+            # Terminals poll this all day - serve pre-rendered bytes, or 304 if unchanged
+            return self._pos_menu_snapshot_response(request)
 
         # For all other requests (including unfiltered ones), use standard pagination
         return super().list(request, *args, **kwargs)
 
+    def _pos_menu_snapshot_response(self, request):
+        """Serve the POS menu snapshot with ETag/If-None-Match revalidation"""
+        snapshot = POSMenuSnapshotService.get_snapshot(request)
+
+        if snapshot.matches(request.META.get("HTTP_IF_NONE_MATCH")):
+            response = HttpResponseNotModified()
+        else:
+            gzipped = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+            response = HttpResponse(snapshot.content(gzipped), content_type="application/json")
+            if gzipped:
+                response["Content-Encoding"] = "gzip"
+
+        response["ETag"] = snapshot.etag
+        # Clients may keep the body but must revalidate every time
+        response["Cache-Control"] = "no-cache"
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
     def get_serializer_class(self):
         """
         Return serializer class based on action.
@@ -491,6 +510,7 @@ class ProductViewSet(TenantScopedQuerysetMixin, FieldsetQueryParamsMixin, BaseVi
             invalidate_cache_pattern('*get_cached_products_by_category*', tenant=request.tenant)
             invalidate_cache_pattern('*get_cached_products_with_inventory_status*', tenant=request.tenant)
             invalidate_cache_pattern('*get_pos_menu_layout*', tenant=request.tenant)
+            invalidate_cache_pattern('*pos_menu_snapshot*', tenant=request.tenant)
 
         return response
 
@@ -513,6 +533,7 @@ class ProductViewSet(TenantScopedQuerysetMixin, FieldsetQueryParamsMixin, BaseVi
             invalidate_cache_pattern('*get_cached_products_by_category*', tenant=request.tenant)
             invalidate_cache_pattern('*get_cached_products_with_inventory_status*', tenant=request.tenant)
             invalidate_cache_pattern('*get_pos_menu_layout*', tenant=request.tenant)
+            invalidate_cache_pattern('*pos_menu_snapshot*', tenant=request.tenant)
 
         return response
 
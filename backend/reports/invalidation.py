@@ -0,0 +1,249 @@
+"""
+Transaction-coalesced report cache invalidation.
+
+Order, OrderItem, OrderDiscount, Payment and PaymentTransaction saves used to
+invalidate report caches synchronously on every post_save, so one cart edit
+over the WebSocket paid for several Redis invalidations and ReportCache
+UPDATEs. Signal handlers now only
+record the dirty report scope (tenant, store location, UTC date) with
+ReportInvalidationCollector; the collected scopes are flushed once when the
+surrounding transaction commits, and dropped if it rolls back. A flush only
+expires the ReportCache entries whose covered period and location include a
+dirty day, so historical reports in other periods and tenants stay cached.
+
+With REPORT_INVALIDATION['DEBOUNCE_SECONDS'] > 0 the flush only queues the
+scopes in Redis and a single Celery task applies everything queued during the
+debounce window, coalescing invalidations across transactions as well.
+"""
+import json
+import logging
+import threading
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Redis cache families that depend on completed-order data. Generated reports
+# (sales, summary, payments, operations) live in ReportCache and are expired by
+# scope in apply(); only list simple_cache families here, since a pattern that
+# matches no family falls back to a keyspace SCAN.
+ORDER_REPORT_PATTERNS = (
+    '*get_cached_business_kpis*',
+    'get_real_time_sales_summary',
+)
+
+# Line items and discounts only change totals
+ORDER_TOTALS_REPORT_PATTERNS = (
+    '*get_cached_business_kpis*',
+)
+
+# Payments and their transactions feed the payment analytics as well
+PAYMENT_REPORT_PATTERNS = (
+    '*get_cached_business_kpis*',
+    'get_payment_analytics',
+    'get_real_time_sales_summary',
+)
+
+
+def scope_date(value=None):
+    """UTC date bucket of an order timestamp (today when missing)"""
+    value = value or timezone.now()
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = value.astimezone(dt_timezone.utc)
+        return value.date()
+    return value
+
+
+class _PendingInvalidations:
+    """Dirty scopes collected inside one transaction"""
+
+    def __init__(self):
+        self.scopes = {}  # (tenant_id, location_id, date) -> set of cache patterns
+
+    def add(self, scope, patterns):
+        self.scopes.setdefault(scope, set()).update(patterns)
+
+    def flush(self):
+        ReportInvalidationCollector.flush(self)
+
+
+class ReportInvalidationCollector:
+    """
+    Collects dirty report scopes per thread and flushes them on commit.
+
+    Usage (in signal handlers):
+        ReportInvalidationCollector.mark_order_dirty(order)
+    """
+
+    PENDING_KEY = 'report_invalidation:pending'
+    SCHEDULED_KEY = 'report_invalidation:scheduled'
+
+    _local = threading.local()
+
+    @classmethod
+    def _settings(cls):
+        return getattr(settings, 'REPORT_INVALIDATION', {})
+
+    @classmethod
+    def _current_batch(cls):
+        """The batch for the open transaction, starting a new one after commit or rollback"""
+        connection = transaction.get_connection()
+        batch = getattr(cls._local, 'batch', None)
+        if batch is not None and connection.in_atomic_block:
+            # A rolled-back transaction discards our on_commit hook - don't reuse its batch
+            if any(entry[1] == batch.flush for entry in connection.run_on_commit):
+                return batch, False
+        batch = cls._local.batch = _PendingInvalidations()
+        return batch, True
+
+    @classmethod
+    def mark_dirty(cls, tenant_id, location_id=None, day=None, patterns=ORDER_REPORT_PATTERNS):
+        """Record that reports for this tenant/location/day must be invalidated on commit"""
+        if tenant_id is None:
+            return
+        batch, is_new = cls._current_batch()
+        batch.add((str(tenant_id), location_id, scope_date(day)), patterns)
+        if is_new:
+            # Runs immediately when not inside an atomic block
+            transaction.on_commit(batch.flush)
+
+    @classmethod
+    def mark_order_dirty(cls, order, patterns=ORDER_REPORT_PATTERNS):
+        """Record the report scope an order contributes to"""
+        if order is None:
+            return
+        cls.mark_dirty(
+            order.tenant_id,
+            order.store_location_id,
+            order.completed_at or order.created_at,
+            patterns,
+        )
+
+    @classmethod
+    def mark_payment_dirty(cls, payment, day=None):
+        """Record the report scope a payment (or one of its transactions, dated `day`) contributes to"""
+        if payment is None:
+            return
+        cls.mark_dirty(
+            payment.tenant_id,
+            payment.store_location_id,
+            day or payment.created_at,
+            PAYMENT_REPORT_PATTERNS,
+        )
+
+    @classmethod
+    def discard(cls):
+        """Forget scopes collected so far in this thread (their on_commit flush becomes a no-op)"""
+        batch = getattr(cls._local, 'batch', None)
+        if batch is not None:
+            batch.scopes.clear()
+        cls._local.batch = None
+
+    @classmethod
+    def flush(cls, batch):
+        """Apply a committed batch, or queue it for the debounced Celery flush"""
+        if getattr(cls._local, 'batch', None) is batch:
+            cls._local.batch = None
+        if not batch.scopes:
+            return
+
+        debounce = cls._settings().get('DEBOUNCE_SECONDS', 0)
+        if debounce and cls._enqueue(batch.scopes, debounce):
+            return
+        cls.apply(batch.scopes)
+
+    @classmethod
+    def _enqueue(cls, scopes, debounce):
+        """Queue scopes in Redis and schedule one flush task per debounce window"""
+        try:
+            from django_redis import get_redis_connection
+            from core_backend.infrastructure.cache import AdvancedCacheManager
+            from .tasks import flush_report_invalidations
+
+            client = get_redis_connection(AdvancedCacheManager.GENERATION_CACHE)
+            client.sadd(cls.PENDING_KEY, *(cls._encode(scope, patterns) for scope, patterns in scopes.items()))
+            if client.set(cls.SCHEDULED_KEY, 1, nx=True, ex=int(debounce) * 10):
+                flush_report_invalidations.apply_async(countdown=debounce)
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Could not queue report invalidation, applying inline: {e}")
+            return False
+
+    @classmethod
+    def drain(cls):
+        """Apply everything queued by debounced flushes (called by the Celery task)"""
+        from django_redis import get_redis_connection
+        from core_backend.infrastructure.cache import AdvancedCacheManager
+
+        client = get_redis_connection(AdvancedCacheManager.GENERATION_CACHE)
+        # Clear the schedule marker first so marks arriving now schedule another run
+        client.delete(cls.SCHEDULED_KEY)
+        pipe = client.pipeline()
+        pipe.smembers(cls.PENDING_KEY)
+        pipe.delete(cls.PENDING_KEY)
+        members, _ = pipe.execute()
+
+        scopes = {}
+        for member in members:
+            scope, patterns = cls._decode(member)
+            scopes.setdefault(scope, set()).update(patterns)
+        cls.apply(scopes)
+        return len(scopes)
+
+    @staticmethod
+    def _encode(scope, patterns):
+        tenant_id, location_id, day = scope
+        return json.dumps([tenant_id, location_id, day.isoformat(), sorted(patterns)])
+
+    @staticmethod
+    def _decode(member):
+        tenant_id, location_id, day, patterns = json.loads(member)
+        return (tenant_id, location_id, date.fromisoformat(day)), patterns
+
+    @classmethod
+    def apply(cls, scopes):
+        """Invalidate Redis report families and ReportCache rows for the given scopes"""
+        from core_backend.infrastructure.cache_utils import invalidate_cache_pattern
+        from tenant.managers import get_current_tenant
+        from tenant.models import Tenant
+        from .models import ReportCache
+
+        by_tenant = {}
+        for (tenant_id, location_id, day), patterns in scopes.items():
+            entry = by_tenant.setdefault(tenant_id, {'covering': Q(), 'patterns': set()})
+            day_start = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+            entry['covering'] |= ReportCache.covering(day_start, day_start + timedelta(days=1), location_id)
+            entry['patterns'].update(patterns)
+
+        current = get_current_tenant()
+        tenants = {str(current.id): current} if current and str(current.id) in by_tenant else {}
+        missing = set(by_tenant) - set(tenants)
+        if missing:
+            tenants.update({str(t.id): t for t in Tenant.objects.filter(id__in=missing)})
+
+        now = timezone.now()
+        for tenant_id, entry in by_tenant.items():
+            tenant = tenants.get(tenant_id)
+            if tenant is None:
+                continue
+            try:
+                for pattern in sorted(entry['patterns']):
+                    invalidate_cache_pattern(pattern, tenant=tenant)
+
+                # Expire only the reports whose period and location include a dirty day
+                expired = ReportCache.all_objects.filter(
+                    entry['covering'], tenant_id=tenant_id, expires_at__gt=now
+                ).update(expires_at=now)
+
+                logger.debug(
+                    f"Flushed report invalidation for tenant {tenant_id}: "
+                    f"{len(entry['patterns'])} families, {expired} ReportCache rows"
+                )
+            except Exception as e:
+                logger.error(f"Failed to flush report invalidation for tenant {tenant_id}: {e}")
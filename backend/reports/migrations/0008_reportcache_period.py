@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-16 19:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0007_add_store_location_with_backfill'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportcache',
+            name='period_end',
+            field=models.DateTimeField(blank=True, help_text='End of the order period this report covers (used for scoped invalidation)', null=True),
+        ),
+        migrations.AddField(
+            model_name='reportcache',
+            name='period_start',
+            field=models.DateTimeField(blank=True, help_text='Start of the order period this report covers (used for scoped invalidation)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='reportcache',
+            index=models.Index(fields=['tenant', 'period_start', 'period_end'], name='reports_cache_ten_period_idx'),
+        ),
+    ]
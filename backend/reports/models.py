@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
@@ -55,6 +56,16 @@ class ReportCache(models.Model):
     parameters_hash = models.CharField(max_length=64)
     parameters = models.JSONField()
     data = models.JSONField()
+    period_start = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='Start of the order period this report covers (used for scoped invalidation)'
+    )
+    period_end = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='End of the order period this report covers (used for scoped invalidation)'
+    )
     generated_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
 
@@ -66,6 +77,7 @@ class ReportCache(models.Model):
             models.Index(fields=["tenant", "report_type", "parameters_hash"]),
             models.Index(fields=["tenant", "expires_at"]),
             models.Index(fields=['tenant', 'store_location', 'report_type'], name='reports_cache_ten_loc_type_idx'),
+            models.Index(fields=['tenant', 'period_start', 'period_end'], name='reports_cache_ten_period_idx'),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -89,6 +101,19 @@ class ReportCache(models.Model):
         """Remove expired cache entries"""
         return cls.objects.filter(expires_at__lt=timezone.now()).delete()
 
+    @staticmethod
+    def covering(start, end, location_id=None):
+        """
+        Q matching entries whose period overlaps [start, end) at the given location.
+
+        Entries without a stored period (written before it was tracked) always
+        match, and all-location entries match any location.
+        """
+        q = Q(period_start__lt=end, period_end__gte=start)
+        if location_id is not None:
+            q &= Q(store_location__isnull=True) | Q(store_location_id=location_id)
+        return q | Q(period_start__isnull=True)
+
 
 class SavedReport(SoftDeleteMixin):
     """Extended saved reports with file management"""
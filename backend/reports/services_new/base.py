@@ -5,7 +5,7 @@ import hashlib
 import json
 import logging
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from typing import Dict, Any, List, Optional
 
 from django.db.models import Sum
@@ -30,6 +30,10 @@ class BaseReportService:
         "operations": 1,
     }
 
+    # Reports whose period has ended only change when an order inside the
+    # period changes, and those orders expire them through scoped invalidation
+    HISTORICAL_CACHE_TTL_HOURS = 24 * 30
+
     @staticmethod
     def _generate_cache_key(report_type: str, parameters: Dict[str, Any]) -> str:
         """Generate a unique cache key for the given report type and parameters."""
@@ -54,19 +58,58 @@ class BaseReportService:
         return None
 
     @staticmethod
-    def _cache_report(cache_key: str, data: Dict[str, Any], tenant, report_type: str = 'sales', ttl_hours: int = 1) -> None:
-        """Cache report data with the specified TTL."""
+    def _period_bound(value, end=False):
+        """Coerce a report date bound to an aware datetime (dates cover the whole day)"""
+        if value is None:
+            return None
+        if not isinstance(value, datetime):
+            value = datetime.combine(value, time.max if end else time.min)
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+    @classmethod
+    def _cache_report(
+        cls,
+        cache_key: str,
+        data: Dict[str, Any],
+        tenant,
+        report_type: str = 'sales',
+        ttl_hours: int = 1,
+        start_date=None,
+        end_date=None,
+        location_id: Optional[int] = None,
+    ) -> None:
+        """
+        Cache report data with the specified TTL.
+
+        The covered period and location are stored on the entry so order
+        changes only expire the reports whose period contains them.
+        """
         try:
-            expires_at = timezone.now() + timedelta(hours=ttl_hours)
+            now = timezone.now()
+            period_start = cls._period_bound(start_date)
+            period_end = cls._period_bound(end_date, end=True)
+            if period_end is not None and period_end < now:
+                ttl_hours = max(ttl_hours, cls.HISTORICAL_CACHE_TTL_HOURS)
+
+            store_location_id = None
+            if location_id is not None:
+                from settings.models import StoreLocation
+                if StoreLocation.objects.filter(id=location_id, tenant=tenant).exists():
+                    store_location_id = location_id
 
             ReportCache.objects.update_or_create(
                 tenant=tenant,
                 parameters_hash=cache_key,
                 defaults={
                     'data': data,  # data is JSONField, store directly
-                    'expires_at': expires_at,
+                    'expires_at': now + timedelta(hours=ttl_hours),
                     'report_type': report_type,
-                    'parameters': {'cached_at': timezone.now().isoformat()}  # Add parameters field
+                    'store_location_id': store_location_id,
+                    'period_start': period_start,
+                    'period_end': period_end,
+                    'parameters': {'cached_at': now.isoformat()}  # Add parameters field
                 }
             )
         except Exception as e:
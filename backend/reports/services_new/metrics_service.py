@@ -49,7 +49,7 @@ class BusinessMetricsService(BaseReportService):
     }
 
     @classmethod
-    @cache_static_data(timeout=3600 * 8)  # 8 hours - business metrics change slowly
+    @cache_static_data(timeout=3600 * 8, stale_ttl=3600, early_expiration_beta=1.0)  # 8 hours - served stale while refreshing
     def get_cached_business_kpis(cls):
         """Cache core business KPIs that don't change frequently."""
         try:
@@ -72,7 +72,8 @@ class OperationsReportService(BaseReportService):
             # Cache the result
             generation_time = time.time() - start_time
             OperationsReportService._cache_report(
-                cache_key, operations_data, tenant, report_type="operations", ttl_hours=OperationsReportService.CACHE_TTL_HOURS
+                cache_key, operations_data, tenant, report_type="operations", ttl_hours=OperationsReportService.CACHE_TTL_HOURS,
+                start_date=start_date, end_date=end_date, location_id=location_id,
             )
 
             logger.info(f"Operations report generated in {generation_time:.2f}s")
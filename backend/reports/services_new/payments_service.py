@@ -123,7 +123,8 @@ class PaymentsReportService(BaseReportService):
         # Cache the result
         generation_time = time.time() - start_time
         PaymentsReportService._cache_report(
-            cache_key, payments_data, tenant, report_type="payments", ttl_hours=PaymentsReportService.CACHE_TTL["payments"]
+            cache_key, payments_data, tenant, report_type="payments", ttl_hours=PaymentsReportService.CACHE_TTL["payments"],
+            start_date=start_date, end_date=end_date, location_id=location_id,
         )
 
         logger.info(f"Payments report generated in {generation_time:.2f}s")
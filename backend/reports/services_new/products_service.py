@@ -143,7 +143,8 @@ class ProductsReportService(BaseReportService):
         # Cache the result
         generation_time = time.time() - start_time
         ProductsReportService._cache_report(
-            cache_key, products_data, tenant, report_type="products", ttl_hours=ProductsReportService.CACHE_TTL["products"]
+            cache_key, products_data, tenant, report_type="products", ttl_hours=ProductsReportService.CACHE_TTL["products"],
+            start_date=start_date, end_date=end_date, location_id=location_id,
         )
 
         logger.info(f"Products report generated in {generation_time:.2f}s")
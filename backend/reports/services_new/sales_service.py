@@ -110,7 +110,8 @@ class SalesReportService(BaseReportService):
         # Cache the result
         generation_time = time.time() - start_time
         SalesReportService._cache_report(
-            cache_key, sales_data, tenant, report_type="sales", ttl_hours=SalesReportService.CACHE_TTL["sales"]
+            cache_key, sales_data, tenant, report_type="sales", ttl_hours=SalesReportService.CACHE_TTL["sales"],
+            start_date=start_date, end_date=end_date, location_id=location_id,
         )
 
         logger.info(f"Sales report generated in {generation_time:.2f}s")
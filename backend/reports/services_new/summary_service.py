@@ -92,7 +92,8 @@ class SummaryReportService(BaseReportService):
         # Cache the result
         generation_time = time.time() - start_time
         SummaryReportService._cache_report(
-            cache_key, summary_data, tenant, report_type="summary", ttl_hours=SummaryReportService.CACHE_TTL["summary"]
+            cache_key, summary_data, tenant, report_type="summary", ttl_hours=SummaryReportService.CACHE_TTL["summary"],
+            start_date=start_date, end_date=end_date, location_id=location_id,
         )
 
         logger.info(f"Summary report generated in {generation_time:.2f}s")
@@ -2,12 +2,10 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.core.cache import cache
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 import logging
 
-from orders.models import Order
 from products.models import Product
-from payments.models import PaymentTransaction
 from inventory.models import InventoryStock
 from users.models import User
 from .models import ReportCache
@@ -24,24 +22,20 @@ class ReportCacheInvalidator:
 
     @staticmethod
     def invalidate_cache_by_pattern(pattern: str):
-        """Invalidate cache entries matching a pattern"""
+        """Expire cache entries whose key matches a pattern"""
         try:
-            # Get all cache keys that match the pattern
-            cache_entries = ReportCache.objects.filter(
-                parameters_hash__icontains=pattern, expires_at__gt=timezone.now()
-            )
-
-            for entry in cache_entries:
-                cache.delete(entry.parameters_hash)
-                entry.delete()
-                logger.info(f"Invalidated cache key: {entry.parameters_hash}")
+            now = timezone.now()
+            expired = ReportCache.objects.filter(
+                parameters_hash__icontains=pattern, expires_at__gt=now
+            ).update(expires_at=now)
+            logger.info(f"Invalidated {expired} report caches matching: {pattern}")
 
         except Exception as e:
             logger.error(f"Error invalidating cache pattern {pattern}: {e}")
 
     @staticmethod
-    def invalidate_date_range_caches(start_date=None, end_date=None):
-        """Invalidate caches that might be affected by date range changes"""
+    def invalidate_date_range_caches(start_date=None, end_date=None, location_id=None):
+        """Expire caches whose covered period overlaps the changed date range"""
         try:
             # If no dates provided, invalidate recent caches (last 30 days)
             if not start_date:
@@ -49,87 +43,25 @@ class ReportCacheInvalidator:
             if not end_date:
                 end_date = timezone.now().date()
 
-            # Find and invalidate affected cache entries
-            cache_entries = ReportCache.objects.filter(
-                generated_at__date__range=[start_date, end_date]
-            )
+            range_start = timezone.make_aware(datetime.combine(start_date, time.min))
+            range_end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
 
-            for entry in cache_entries:
-                cache.delete(entry.parameters_hash)
-                entry.delete()
-                logger.info(f"Invalidated date-range cache: {entry.parameters_hash}")
+            # One scoped UPDATE for the affected entries (current tenant only)
+            now = timezone.now()
+            expired = ReportCache.objects.filter(
+                ReportCache.covering(range_start, range_end, location_id), expires_at__gt=now
+            ).update(expires_at=now)
+            logger.info(f"Invalidated {expired} date-range report caches")
 
         except Exception as e:
             logger.error(f"Error invalidating date range caches: {e}")
 
 
-# Order-related signals
-@receiver(post_save, sender=Order)
-def invalidate_order_related_caches(sender, instance, created, **kwargs):
-    """
-    Invalidate report caches when orders are created or updated.
-    This affects summary, sales, and operations reports.
-    """
-    try:
-        # Invalidate summary and sales reports
-        ReportCacheInvalidator.invalidate_cache_by_pattern("summary_report")
-        ReportCacheInvalidator.invalidate_cache_by_pattern("sales_report")
-        ReportCacheInvalidator.invalidate_cache_by_pattern("operations_report")
-
-        # Invalidate caches for the order's date range
-        order_date = instance.created_at.date()
-        ReportCacheInvalidator.invalidate_date_range_caches(
-            start_date=order_date, end_date=order_date
-        )
-
-        logger.info(
-            f"Order {instance.id} {'created' if created else 'updated'} - invalidated related caches"
-        )
-
-    except Exception as e:
-        logger.error(f"Error invalidating order caches for order {instance.id}: {e}")
-
-
-@receiver(post_delete, sender=Order)
-def invalidate_order_deletion_caches(sender, instance, **kwargs):
-    """Invalidate caches when orders are deleted"""
-    try:
-        ReportCacheInvalidator.invalidate_cache_by_pattern("summary_report")
-        ReportCacheInvalidator.invalidate_cache_by_pattern("sales_report")
-        ReportCacheInvalidator.invalidate_cache_by_pattern("operations_report")
-
-        logger.info(f"Order {instance.id} deleted - invalidated related caches")
-
-    except Exception as e:
-        logger.error(f"Error invalidating caches for deleted order {instance.id}: {e}")
-
-
-# Payment-related signals
-@receiver(post_save, sender=PaymentTransaction)
-def invalidate_payment_related_caches(sender, instance, created, **kwargs):
-    """
-    Invalidate report caches when payments are processed.
-    This affects summary, sales, and payments reports.
-    """
-    try:
-        ReportCacheInvalidator.invalidate_cache_by_pattern("summary_report")
-        ReportCacheInvalidator.invalidate_cache_by_pattern("sales_report")
-        ReportCacheInvalidator.invalidate_cache_by_pattern("payments_report")
-
-        # Invalidate caches for the payment's date range
-        payment_date = instance.created_at.date()
-        ReportCacheInvalidator.invalidate_date_range_caches(
-            start_date=payment_date, end_date=payment_date
-        )
-
-        logger.info(
-            f"Payment {instance.id} {'created' if created else 'updated'} - invalidated related caches"
-        )
-
-    except Exception as e:
-        logger.error(
-            f"Error invalidating payment caches for payment {instance.id}: {e}"
-        )
+# Order and payment signals
+# Order, OrderItem, OrderDiscount, Payment and PaymentTransaction changes are
+# collected by reports.invalidation.ReportInvalidationCollector (see
+# orders/signals.py and payments/signals.py) and flushed once per transaction
+# on commit, instead of invalidating here on every save.
 
 
 # Product-related signals
@@ -252,34 +184,6 @@ def invalidate_all_report_caches():
 
 # Phase 3C: Advanced cache invalidation handlers
 
-@receiver(post_save, sender=Order)
-def invalidate_phase3c_order_caches(sender, instance, created, **kwargs):
-    """Invalidate Phase 3C advanced caches when orders change"""
-    try:
-        # Invalidate business KPIs if order is completed
-        if instance.status == Order.OrderStatus.COMPLETED:
-            invalidate_cache_pattern('get_cached_business_kpis')
-            invalidate_cache_pattern('get_real_time_sales_summary')
-            invalidate_cache_pattern('get_historical_trends_data')
-        
-        logger.debug(f"Phase 3C: Invalidated advanced report caches for order {instance.id}")
-        
-    except Exception as e:
-        logger.error(f"Failed to invalidate Phase 3C order caches: {e}")
-
-@receiver(post_save, sender=PaymentTransaction)
-def invalidate_phase3c_payment_caches(sender, instance, created, **kwargs):
-    """Invalidate Phase 3C payment analytics caches when payments change"""
-    try:
-        # Invalidate payment analytics and real-time summaries
-        invalidate_cache_pattern('get_payment_analytics')
-        invalidate_cache_pattern('get_real_time_sales_summary')
-        
-        logger.debug(f"Phase 3C: Invalidated payment analytics caches for transaction {instance.id}")
-        
-    except Exception as e:
-        logger.error(f"Failed to invalidate Phase 3C payment caches: {e}")
-
 # Periodic cache cleanup for Phase 3C (would be called by Celery)
 def cleanup_phase3c_caches():
     """Clean up expired Phase 3C caches"""
@@ -628,3 +628,20 @@ def cleanup_export_files():
     except Exception as exc:
         logger.error(f"Error cleaning up export files: {exc}")
         return {"status": "failed", "error": str(exc)}
+
+
+@shared_task
+def flush_report_invalidations():
+    """
+    Apply report cache invalidations queued by debounced transaction flushes.
+    Scheduled by ReportInvalidationCollector at most once per debounce window.
+    """
+    from .invalidation import ReportInvalidationCollector
+
+    try:
+        flushed = ReportInvalidationCollector.drain()
+        return {"status": "completed", "scopes_flushed": flushed}
+
+    except Exception as exc:
+        logger.error(f"Error flushing report invalidations: {exc}")
+        return {"status": "failed", "error": str(exc)}
@@ -0,0 +1,244 @@
+"""
+Report Cache Invalidation Tests
+
+Tests that order and payment changes record dirty report scopes and flush them
+once per transaction on commit, optionally debounced through Celery.
+
+Test Categories:
+1. Transaction Coalescing (3 tests)
+2. ReportCache Expiry (1 test)
+3. Scoped Expiry (2 tests)
+4. Debounced Flush (1 test)
+5. Payment Scopes (2 tests)
+"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tenant.managers import set_current_tenant
+from orders.services import OrderItemService
+from payments.models import PaymentTransaction
+from reports.models import ReportCache
+from reports.services_new.base import BaseReportService
+from settings.models import StoreLocation
+from reports.invalidation import PAYMENT_REPORT_PATTERNS, ReportInvalidationCollector, scope_date
+from reports.signals import ReportCacheInvalidator
+
+
+def start_collecting():
+    """Fixture setup saves orders inside the test transaction - start from an empty batch"""
+    ReportInvalidationCollector.discard()
+
+
+@pytest.fixture
+def report_cache_rows(tenant_a, tenant_b):
+    """One live ReportCache row per tenant"""
+    expires_at = timezone.now() + timedelta(hours=4)
+    return [
+        ReportCache.all_objects.create(
+            tenant=tenant, report_type='sales', parameters_hash=f'report_sales_{tenant.slug}',
+            parameters={}, data={'total': 1}, expires_at=expires_at
+        )
+        for tenant in (tenant_a, tenant_b)
+    ]
+
+
+# ============================================================================
+# TRANSACTION COALESCING TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestTransactionCoalescing:
+    """Test that saves inside one transaction produce a single flush."""
+
+    def test_cart_edits_flush_once_on_commit(self, tenant_a, order_tenant_a, product_tenant_a,
+                                             django_capture_on_commit_callbacks):
+        set_current_tenant(tenant_a)
+        start_collecting()
+
+        with patch.object(ReportInvalidationCollector, 'apply') as mock_apply:
+            with django_capture_on_commit_callbacks(execute=True):
+                OrderItemService.add_item_to_order(order=order_tenant_a, product=product_tenant_a, quantity=1)
+                OrderItemService.add_item_to_order(order=order_tenant_a, product=product_tenant_a, quantity=2)
+                order_tenant_a.save()
+                mock_apply.assert_not_called()
+
+        mock_apply.assert_called_once()
+        scopes = mock_apply.call_args.args[0]
+        assert list(scopes) == [(str(tenant_a.id), None, scope_date())]
+
+    def test_nothing_flushes_before_commit(self, tenant_a, order_tenant_a, django_capture_on_commit_callbacks):
+        start_collecting()
+        with patch.object(ReportInvalidationCollector, 'apply') as mock_apply:
+            with django_capture_on_commit_callbacks(execute=False) as callbacks:
+                order_tenant_a.save()
+                order_tenant_a.save()
+
+        assert len(callbacks) == 1
+        mock_apply.assert_not_called()
+
+    def test_rolled_back_scopes_are_dropped(self, tenant_a, tenant_b, order_tenant_a, order_tenant_b,
+                                            django_capture_on_commit_callbacks):
+        start_collecting()
+        with patch.object(ReportInvalidationCollector, 'apply') as mock_apply:
+            with django_capture_on_commit_callbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        order_tenant_a.save()
+                        raise RuntimeError("rollback")
+                except RuntimeError:
+                    pass
+                order_tenant_b.save()
+
+        mock_apply.assert_called_once()
+        assert {scope[0] for scope in mock_apply.call_args.args[0]} == {str(tenant_b.id)}
+
+
+# ============================================================================
+# REPORTCACHE EXPIRY TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestReportCacheExpiry:
+    """Test that a flush only touches the dirty tenant's ReportCache rows."""
+
+    def test_flush_expires_only_dirty_tenant(self, tenant_a, order_tenant_a, report_cache_rows,
+                                             django_capture_on_commit_callbacks):
+        start_collecting()
+        with django_capture_on_commit_callbacks(execute=True):
+            order_tenant_a.save()
+
+        row_a, row_b = (ReportCache.all_objects.get(pk=row.pk) for row in report_cache_rows)
+        assert row_a.is_expired
+        assert not row_b.is_expired
+
+
+# ============================================================================
+# SCOPED EXPIRY TESTS
+# ============================================================================
+
+def cache_report(tenant, name, start, end, location=None):
+    BaseReportService._cache_report(
+        f'report_sales_{name}', {'total': 1}, tenant, report_type='sales',
+        start_date=start, end_date=end, location_id=location.id if location else None
+    )
+    return ReportCache.all_objects.get(tenant=tenant, parameters_hash=f'report_sales_{name}')
+
+
+@pytest.mark.django_db
+class TestScopedExpiry:
+    """Test that only reports covering the order's period and location expire."""
+
+    def test_cache_report_stores_period_and_location(self, tenant_a, store_location_tenant_a):
+        set_current_tenant(tenant_a)
+        now = timezone.now()
+
+        current = cache_report(tenant_a, 'current', now - timedelta(days=7), now + timedelta(days=1),
+                               store_location_tenant_a)
+        historical = cache_report(tenant_a, 'historical', (now - timedelta(days=60)).date(),
+                                  (now - timedelta(days=31)).date())
+
+        assert current.store_location_id == store_location_tenant_a.id
+        assert current.period_start == now - timedelta(days=7)
+        assert current.expires_at < now + timedelta(hours=3)
+        assert historical.store_location_id is None
+        assert timezone.localtime(historical.period_end).date() == (now - timedelta(days=31)).date()
+        assert historical.expires_at > now + timedelta(days=29)
+
+    def test_order_expires_only_covering_reports(self, tenant_a, order_tenant_a, store_location_tenant_a,
+                                                 django_capture_on_commit_callbacks):
+        set_current_tenant(tenant_a)
+        now = timezone.now()
+        other_location = StoreLocation.objects.create(tenant=tenant_a, name='Uptown')
+        this_week = cache_report(tenant_a, 'week', now - timedelta(days=7), now + timedelta(days=1))
+        this_location = cache_report(tenant_a, 'location', now - timedelta(days=1), now + timedelta(days=1),
+                                     store_location_tenant_a)
+        other = cache_report(tenant_a, 'other', now - timedelta(days=1), now + timedelta(days=1), other_location)
+        last_month = cache_report(tenant_a, 'month', now - timedelta(days=60), now - timedelta(days=31))
+
+        order_tenant_a.store_location = store_location_tenant_a
+        order_tenant_a.completed_at = now
+        start_collecting()
+        with django_capture_on_commit_callbacks(execute=True):
+            order_tenant_a.save()
+
+        expired = {
+            row.parameters_hash for row in ReportCache.all_objects.filter(tenant=tenant_a) if row.is_expired
+        }
+        assert expired == {this_week.parameters_hash, this_location.parameters_hash}
+        assert other.parameters_hash not in expired
+        assert last_month.parameters_hash not in expired
+
+
+# ============================================================================
+# DEBOUNCED FLUSH TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestDebouncedFlush:
+    """Test that debounced flushes coalesce across transactions."""
+
+    def test_one_task_per_window(self, settings, tenant_a, tenant_b, order_tenant_a, order_tenant_b,
+                                 django_capture_on_commit_callbacks):
+        start_collecting()
+        settings.REPORT_INVALIDATION = {'DEBOUNCE_SECONDS': 5}
+        ReportInvalidationCollector.drain()  # start from an empty queue
+
+        with patch('reports.tasks.flush_report_invalidations.apply_async') as mock_schedule, \
+                patch.object(ReportInvalidationCollector, 'apply') as mock_apply:
+            with django_capture_on_commit_callbacks(execute=True):
+                order_tenant_a.save()
+            with django_capture_on_commit_callbacks(execute=True):
+                order_tenant_b.save()
+
+            mock_schedule.assert_called_once()
+            mock_apply.assert_not_called()
+
+            assert ReportInvalidationCollector.drain() == 2
+
+        assert {scope[0] for scope in mock_apply.call_args.args[0]} == {str(tenant_a.id), str(tenant_b.id)}
+
+
+# ============================================================================
+# PAYMENT SCOPE TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestPaymentScopes:
+    """Test that payment changes go through the collector instead of per-save invalidation."""
+
+    def test_payment_saves_flush_once_on_commit(self, tenant_a, payment_tenant_a, store_location_tenant_a,
+                                                django_capture_on_commit_callbacks):
+        set_current_tenant(tenant_a)
+        payment_tenant_a.store_location = store_location_tenant_a
+        start_collecting()
+
+        with patch.object(ReportInvalidationCollector, 'apply') as mock_apply:
+            with django_capture_on_commit_callbacks(execute=True):
+                payment_tenant_a.save()
+                PaymentTransaction.objects.create(
+                    tenant=tenant_a, payment=payment_tenant_a, amount=Decimal('10.00'),
+                    method=PaymentTransaction.PaymentMethod.CASH,
+                    status=PaymentTransaction.TransactionStatus.SUCCESSFUL,
+                )
+                mock_apply.assert_not_called()
+
+        mock_apply.assert_called_once()
+        scopes = mock_apply.call_args.args[0]
+        assert set(scopes) == {(str(tenant_a.id), store_location_tenant_a.id, scope_date(payment_tenant_a.created_at))}
+        assert set(PAYMENT_REPORT_PATTERNS) <= next(iter(scopes.values()))
+
+    def test_date_range_invalidation_is_one_update(self, tenant_a, report_cache_rows):
+        set_current_tenant(tenant_a)
+
+        with CaptureQueriesContext(connection) as ctx:
+            ReportCacheInvalidator.invalidate_date_range_caches()
+
+        assert len(ctx) == 1
+        row_a, row_b = (ReportCache.all_objects.get(pk=row.pk) for row in report_cache_rows)
+        assert row_a.is_expired
+        assert not row_b.is_expired
@@ -1,86 +1,66 @@
 """
-Centralized configuration management using the Singleton pattern.
-This module provides a single point of access to global application settings,
-eliminating the need for direct database queries from business logic.
+Centralized configuration management.
+This module provides a single point of access to each tenant's application
+settings, eliminating the need for direct database queries from business logic.
+
+Settings are served from immutable per-tenant snapshots held in a per-process
+LRU and rebuilt lazily when the tenant's settings generation in the shared
+cache changes, so a save in one worker reaches all of them.
 """
 
-from decimal import Decimal
+import copy
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
 from typing import Optional, List, Dict, Any
+from django.conf import settings as django_settings
 from django.core.exceptions import ImproperlyConfigured
-from core_backend.infrastructure.cache_utils import cache_static_data, cache_dynamic_data
+from core_backend.infrastructure.cache import AdvancedCacheManager
+from core_backend.infrastructure.cache_utils import cache_static_data
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class AppSettings:
+class SettingsSnapshot:
     """
-    A LAZY singleton class that provides centralized access to global application settings.
-    It defers database loading until the first setting is accessed, allowing management
-    commands like 'makemigrations' to run before the database schema is up to date.
+    Immutable copy of one tenant's GlobalSettings and PrinterConfiguration
+    at a settings version. Attribute reads are dict lookups.
     """
 
-    _instance: Optional["AppSettings"] = None
-    _initialized: bool = False
+    __slots__ = ("tenant_id", "version", "_values")
 
-    def __new__(cls) -> "AppSettings":
-        """
-        Implement the singleton pattern to ensure only one instance exists.
-        """
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-
-    def __init__(self):
-        """
-        Initialization is deferred to the first attribute access.
-        """
-        pass
-
-    def _setup(self):
-        """
-        The actual setup and loading method. Called only once.
-        """
-        if not self._initialized:
-            self.load_settings()
-            self._initialized = True
+    def __init__(self, tenant_id, version: Optional[int], values: Dict[str, Any]):
+        object.__setattr__(self, "tenant_id", tenant_id)
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "_values", MappingProxyType(dict(values)))
 
     def __getattr__(self, name: str) -> Any:
-        """
-        Lazily loads settings on first access, then retrieves the attribute.
-        """
-        # First, check if settings are initialized. If not, set them up.
-        if not self._initialized:
-            self._setup()
-
-        # After setup, the attribute should exist in the instance's __dict__.
-        # This check prevents infinite recursion for attributes that truly don't exist.
         try:
-            return self.__dict__[name]
+            return self._values[name]
         except KeyError:
-            raise AttributeError(f"'AppSettings' object has no attribute '{name}'")
+            raise AttributeError(f"'SettingsSnapshot' object has no attribute '{name}'")
 
-    def load_settings(self) -> None:
-        """
-        Load settings from the database and populate instance attributes.
-        This method performs the database query and caches the results.
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("SettingsSnapshot is immutable")
 
-        Multi-tenant: TenantManager automatically filters by current tenant.
-        Each tenant gets their own GlobalSettings instance.
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(self._values)
+
+    @classmethod
+    def build(cls, tenant, version: Optional[int]) -> "SettingsSnapshot":
+        """
+        Load the tenant's settings from the database, creating the default
+        GlobalSettings/PrinterConfiguration rows if they don't exist yet.
         """
         # Import here to avoid circular imports
         from .models import GlobalSettings
-        from tenant.managers import get_current_tenant
 
         try:
-            tenant = get_current_tenant()
-            if not tenant:
-                raise ImproperlyConfigured("No tenant context available for settings")
-
             # Try to get existing settings for this tenant
             try:
-                settings_obj = GlobalSettings.objects.get(tenant=tenant)
-                created = False
+                settings_obj = GlobalSettings.all_objects.get(tenant=tenant)
             except GlobalSettings.DoesNotExist:
                 # Create new settings for this tenant
                 # Note: Don't use get_or_create due to potential id sequence conflicts
@@ -90,99 +70,180 @@ class AppSettings:
                     brand_name=f"{tenant.name}",
                 )
                 settings_obj.save()
-                created = True
-
-            # === FINANCIAL SETTINGS (Tenant-wide) ===
-            self.surcharge_percentage: Decimal = settings_obj.surcharge_percentage
-            self.currency: str = settings_obj.currency
-            self.allow_discount_stacking: bool = settings_obj.allow_discount_stacking
-
-            # === BRAND IDENTITY (Tenant-wide) ===
-            self.brand_name: str = settings_obj.brand_name
-            self.brand_primary_color: str = settings_obj.brand_primary_color
-            self.brand_secondary_color: str = settings_obj.brand_secondary_color
-
-            # === RECEIPT TEMPLATES (Brand-level, locations can override) ===
-            self.brand_receipt_header: str = settings_obj.brand_receipt_header
-            self.brand_receipt_footer: str = settings_obj.brand_receipt_footer
-
-            # === PAYMENT PROCESSING (Tenant-wide) ===
-            self.active_terminal_provider: str = settings_obj.active_terminal_provider
-
-            if created:
                 logger.info("Created default GlobalSettings instance")
 
-            # Load extended configurations from their own singleton models
-            self._load_printer_config()
-
-            # Set hardcoded web order defaults (no tenant-wide settings anymore)
-            # Location-specific overrides are managed via StoreLocation.get_effective_web_order_settings()
-            self.enable_web_order_notifications: bool = True
-            self.web_order_notification_sound: bool = True
-            self.web_order_auto_print_receipt: bool = True
-            self.web_order_auto_print_kitchen: bool = True
+            values = {
+                # === FINANCIAL SETTINGS (Tenant-wide) ===
+                "surcharge_percentage": settings_obj.surcharge_percentage,
+                "currency": settings_obj.currency,
+                "allow_discount_stacking": settings_obj.allow_discount_stacking,
+                # === BRAND IDENTITY (Tenant-wide) ===
+                "brand_name": settings_obj.brand_name,
+                "brand_primary_color": settings_obj.brand_primary_color,
+                "brand_secondary_color": settings_obj.brand_secondary_color,
+                # === RECEIPT TEMPLATES (Brand-level, locations can override) ===
+                "brand_receipt_header": settings_obj.brand_receipt_header,
+                "brand_receipt_footer": settings_obj.brand_receipt_footer,
+                # === PAYMENT PROCESSING (Tenant-wide) ===
+                "active_terminal_provider": settings_obj.active_terminal_provider,
+                # Hardcoded web order defaults (no tenant-wide settings anymore)
+                # Location-specific overrides are managed via StoreLocation.get_effective_web_order_settings()
+                "enable_web_order_notifications": True,
+                "web_order_notification_sound": True,
+                "web_order_auto_print_receipt": True,
+                "web_order_auto_print_kitchen": True,
+            }
+            values.update(cls._load_printer_config(tenant))
 
         except Exception as e:
             raise ImproperlyConfigured(f"Failed to load settings: {e}")
 
-    def _load_printer_config(self) -> None:
+        return cls(tenant.id, version, values)
+
+    @staticmethod
+    def _load_printer_config(tenant) -> Dict[str, Any]:
         """
         Load printer configurations from tenant-scoped PrinterConfiguration model.
-        TenantManager automatically filters by current tenant.
         """
         from .models import PrinterConfiguration
-        from tenant.managers import get_current_tenant
 
         try:
-            tenant = get_current_tenant()
-            if not tenant:
-                raise Exception("No tenant context available")
-
             # Try to get existing config for this tenant
             try:
-                printer_config = PrinterConfiguration.objects.get(tenant=tenant)
-                created = False
+                printer_config = PrinterConfiguration.all_objects.get(tenant=tenant)
             except PrinterConfiguration.DoesNotExist:
                 # Create new config - avoid get_or_create due to id sequence conflicts
                 printer_config = PrinterConfiguration(tenant=tenant)
                 printer_config.save()
-                created = True
-            self.receipt_printers: List[Dict[str, Any]] = (
-                printer_config.receipt_printers
-            )
-            self.kitchen_printers: List[Dict[str, Any]] = (
-                printer_config.kitchen_printers
-            )
-            self.kitchen_zones: List[Dict[str, Any]] = printer_config.kitchen_zones
-            if created:
                 logger.info("Created default PrinterConfiguration instance")
+            return {
+                "receipt_printers": copy.deepcopy(printer_config.receipt_printers),
+                "kitchen_printers": copy.deepcopy(printer_config.kitchen_printers),
+                "kitchen_zones": copy.deepcopy(printer_config.kitchen_zones),
+            }
         except Exception as e:
             # If loading fails, default to empty lists to prevent crashes
             logger.warning(f"Failed to load printer configuration: {e}")
-            self.receipt_printers = []
-            self.kitchen_printers = []
-            self.kitchen_zones = []
+            return {"receipt_printers": [], "kitchen_printers": [], "kitchen_zones": []}
+
+
+class TenantSettingsStore:
+    """
+    Per-process LRU of SettingsSnapshots, one per tenant.
+
+    Each tenant's settings version is its "tenant_settings" cache generation
+    (AdvancedCacheManager), bumped whenever its settings are saved. A held
+    snapshot is served until its version no longer matches - checked at most
+    every TENANT_SETTINGS['VERSION_CHECK_SECONDS'] - so every worker picks up
+    a save made by any other, and tenants never share values. While the cache
+    is unavailable held snapshots keep being served.
+    """
+
+    GENERATION_FAMILY = "tenant_settings"
+
+    def __init__(self):
+        self._entries: "OrderedDict[Any, List]" = OrderedDict()  # tenant_id -> [snapshot, checked_at]
+        self._lock = threading.Lock()
 
-    # _load_web_order_config() REMOVED - WebOrderSettings model no longer exists
-    # Web order settings are now hardcoded defaults in load_settings()
-    # Location-specific overrides managed via StoreLocation.get_effective_web_order_settings()
+    def current_version(self, tenant_id) -> Optional[int]:
+        """Tenant's settings generation, or None when the cache is unavailable"""
+        return AdvancedCacheManager.get_generation(self.GENERATION_FAMILY, tenant_id)
+
+    def get(self, tenant) -> SettingsSnapshot:
+        config = django_settings.TENANT_SETTINGS
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(tenant.id)
+            if entry is not None:
+                self._entries.move_to_end(tenant.id)
+                if now - entry[1] < config["VERSION_CHECK_SECONDS"]:
+                    return entry[0]
+
+        version = self.current_version(tenant.id)
+        if entry is not None and (version is None or entry[0].version == version):
+            entry[1] = now
+            return entry[0]
+
+        snapshot = SettingsSnapshot.build(tenant, version)
+        with self._lock:
+            self._entries[tenant.id] = [snapshot, now]
+            self._entries.move_to_end(tenant.id)
+            while len(self._entries) > config["SNAPSHOT_CACHE_SIZE"]:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, tenant_id) -> None:
+        """Bump the tenant's settings version so every worker rebuilds its snapshot"""
+        AdvancedCacheManager.bump_generation(self.GENERATION_FAMILY, tenant_id)
+        with self._lock:
+            self._entries.pop(tenant_id, None)
+
+    def clear(self) -> None:
+        """Drop this process's snapshots (versions in the shared cache are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+
+tenant_settings = TenantSettingsStore()
+
+
+class AppSettings:
+    """
+    Access to the current tenant's settings.
+
+    Attributes resolve against the tenant's SettingsSnapshot from
+    ``tenant_settings``, so reads are dict lookups and always reflect the
+    tenant in context. ``AppSettings()`` returns the shared instance.
+    """
+
+    _instance: Optional["AppSettings"] = None
+
+    def __new__(cls) -> "AppSettings":
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __cache_key__(self):
+        """
+        Stable identity for cached methods. The singleton's default repr embeds a
+        memory address that differs per worker; tenant scoping is already part of the key.
+        """
+        return ("AppSettings",)
+
+    def snapshot(self) -> SettingsSnapshot:
+        """The current tenant's settings snapshot"""
+        from tenant.managers import get_current_tenant
+
+        tenant = get_current_tenant()
+        if not tenant:
+            raise ImproperlyConfigured("No tenant context available for settings")
+        return tenant_settings.get(tenant)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        try:
+            return getattr(self.snapshot(), name)
+        except AttributeError:
+            raise AttributeError(f"'AppSettings' object has no attribute '{name}'")
 
     def reload(self) -> None:
         """
-        Reload settings from the database.
-        This method is called when settings are updated to refresh the cache.
+        Invalidate the current tenant's settings in every worker.
+        Saving GlobalSettings or PrinterConfiguration does this automatically.
         """
-        self.load_settings()
-        logger.info("AppSettings cache reloaded")
+        from tenant.managers import get_current_tenant
 
+        tenant = get_current_tenant()
+        if tenant:
+            tenant_settings.invalidate(tenant.id)
+        logger.info("AppSettings cache reloaded")
 
-    @cache_static_data(timeout=3600*24)  # 24 hours in static cache
     def get_cached_global_settings(self):
-        """Cache global settings - very stable data"""
-        if not self._initialized:
-            self._setup()
-        return self
-    
+        """The current tenant's settings snapshot"""
+        return self.snapshot()
+
     @cache_static_data(timeout=3600*8)  # 8 hours in static cache
     def get_store_locations(self):
         """Cache store locations - changes infrequently"""
@@ -226,12 +287,8 @@ class AppSettings:
             return False
     
     
-    @cache_static_data(timeout=3600*6)  # 6 hours in static cache  
     def get_cached_payment_config(self):
-        """Cache payment configuration for POS systems"""
-        if not self._initialized:
-            self._setup()
-            
+        """Payment configuration for POS systems"""
         return {
             'active_terminal_provider': self.active_terminal_provider,
             'currency': self.currency,
@@ -239,12 +296,8 @@ class AppSettings:
             'allow_discount_stacking': self.allow_discount_stacking
         }
     
-    @cache_static_data(timeout=3600*12)  # 12 hours in static cache
     def get_cached_brand_info(self):
-        """Cache brand information for receipts and displays"""
-        if not self._initialized:
-            self._setup()
-
+        """Brand information for receipts and displays"""
         return {
             'brand_name': self.brand_name,
             'brand_primary_color': self.brand_primary_color,
@@ -307,6 +360,10 @@ class AppSettings:
         }
 
     def __str__(self) -> str:
+        from tenant.managers import get_current_tenant
+
+        if not get_current_tenant():
+            return "AppSettings(no tenant)"
         return (
             f"AppSettings(brand='{self.brand_name}', "
             f"currency={self.currency}, "
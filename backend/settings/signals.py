@@ -8,7 +8,9 @@ from django.dispatch import receiver
 from .models import GlobalSettings, StoreLocation, Printer, KitchenZone, PrinterConfiguration
 from django.utils import timezone
 from django.db import transaction
+from core_backend.infrastructure.cache import invalidate_now_and_on_commit
 from core_backend.infrastructure.cache_utils import invalidate_cache_pattern
+from core_backend.infrastructure.websocket import pre_encoded_event
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,113 +23,44 @@ def reload_app_settings(sender, instance, **kwargs):
     This ensures that configuration changes are immediately available throughout
     the application without requiring a restart.
 
-    Additionally, this triggers recalculation of all in-progress orders to ensure
-    tax rate and surcharge changes are immediately applied.
+    Additionally, this queues recalculation of the tenant's in-progress orders
+    to ensure tax rate and surcharge changes are immediately applied.
     """
-    # Import here to avoid circular imports and ensure the singleton is loaded
+    # Import here to avoid circular imports
     from .config import app_settings
 
-    app_settings.reload()
-    logger.info(f"Configuration cache updated: {app_settings}")
-    
+    _invalidate_tenant_settings(instance.tenant_id)
+    logger.info(f"Configuration cache updated for tenant {instance.tenant_id}")
+
     # Invalidate comprehensive settings caches
     invalidate_cache_pattern('*global_settings*')
     invalidate_cache_pattern('*get_cached_business_hours*')
-    invalidate_cache_pattern('*get_cached_payment_config*')
     invalidate_cache_pattern('*get_cached_store_branding*')
     
     # Warm cache with new values
     app_settings.warm_settings_cache()
 
-    # Recalculate all in-progress orders to apply new rates immediately
-    try:
-        from orders.services import OrderService
-        from orders.models import Order
-
-        recalculated_count = OrderService.recalculate_in_progress_orders()
-        logger.info(f"Applied configuration changes to {recalculated_count} in-progress orders")
-
-        # Use transaction.on_commit to ensure WebSocket notifications are sent
-        # AFTER all database changes are fully committed to prevent race conditions
-        transaction.on_commit(lambda: _notify_frontend_of_config_changes())
+    # Recalculate this tenant's in-progress orders in the background so new rates
+    # apply immediately without holding up the save. Queued after commit so the
+    # tasks read the saved configuration.
+    tenant_id = instance.tenant_id
 
-    except Exception as e:
-        logger.warning(f"Failed to recalculate in-progress orders: {e}")
-
-
-def _notify_frontend_of_config_changes():
-    """
-    Sends WebSocket notifications to all connected clients about configuration changes.
-    This ensures the frontend immediately reflects the updated configuration and order totals.
-    """
-    import time
+    def queue_recalculation():
+        try:
+            from orders.tasks import recalculate_open_orders_for_tenant
 
-    # Small delay to ensure all database transactions are fully committed
-    # and visible across all connections before fetching order data
-    time.sleep(0.1)  # 100ms delay
+            recalculate_open_orders_for_tenant.delay(str(tenant_id))
+        except Exception as e:
+            logger.warning(f"Failed to queue recalculation of in-progress orders for tenant {tenant_id}: {e}")
 
-    try:
-        from channels.layers import get_channel_layer
-        from asgiref.sync import async_to_sync
-        from orders.models import Order
+    transaction.on_commit(queue_recalculation)
 
-        channel_layer = get_channel_layer()
-        if not channel_layer:
-            logger.warning("No channel layer configured for WebSocket notifications")
-            return
 
-        # Send a general configuration update to a global group (if implemented)
-        try:
-            async_to_sync(channel_layer.group_send)(
-                "configuration_updates",  # Global group for configuration changes
-                {
-                    "type": "configuration_update",
-                    "message": {
-                        "type": "global_config_change",
-                        "data": {
-                            "message": "System configuration has been updated.",
-                            "requires_refresh": True,
-                            "timestamp": (str(timezone.now())),
-                        },
-                    },
-                },
-            )
-            logger.info("Sent global configuration update notification")
-        except Exception as e:
-            logger.debug(f"Global configuration notification failed (group may not exist): {e}")
-
-        # Get all in-progress orders that might have active WebSocket connections
-        # Fetch fresh data from database to ensure we have the latest calculated totals
-        in_progress_statuses = [Order.OrderStatus.PENDING, Order.OrderStatus.HOLD]
-        in_progress_orders = Order.objects.filter(status__in=in_progress_statuses)
-
-        notification_count = 0
-        for order in in_progress_orders:
-            group_name = f"order_{order.id}"
-            try:
-                # Send a configuration update message to the order's WebSocket group
-                async_to_sync(channel_layer.group_send)(
-                    group_name,
-                    {
-                        "type": "configuration_update",
-                        "message": {
-                            "type": "order_config_change",
-                            "data": {
-                                "message": "Tax rates or surcharges have been updated. Order totals have been recalculated.",
-                                "order_id": str(order.id),
-                                "requires_refresh": True,
-                            },
-                        },
-                    },
-                )
-                notification_count += 1
-            except Exception as e:
-                logger.warning(f"Failed to send WebSocket notification for order {order.id}: {e}")
-
-        logger.info(f"Sent WebSocket notifications to {notification_count} order groups")
+def _invalidate_tenant_settings(tenant_id):
+    """Rebuild the tenant's settings snapshot in every worker"""
+    from .config import tenant_settings
 
-    except Exception as e:
-        logger.warning(f"Failed to send WebSocket notifications: {e}")
+    invalidate_now_and_on_commit(tenant_settings.invalidate, tenant_id)
 
 
 @receiver(post_save, sender=StoreLocation)
@@ -166,7 +99,7 @@ def broadcast_printer_config_change(sender, instance, **kwargs):
         # If you have a GlobalPOSConsumer or similar, add group join logic there
         async_to_sync(channel_layer.group_send)(
             f"tenant_{tenant_id}_global",  # Broadcast to all terminals in tenant
-            {
+            pre_encoded_event({
                 "type": "system_notification",
                 "data": {
                     "notification_type": "printer_config_updated",
@@ -175,7 +108,7 @@ def broadcast_printer_config_change(sender, instance, **kwargs):
                     "action": action,
                     "timestamp": str(timezone.now()),
                 }
-            }
+            })
         )
 
         logger.info(f"Sent printer config update notification to tenant {tenant_id}")
@@ -192,13 +125,11 @@ def handle_printer_config_change(sender, instance, **kwargs):
     """
     logger.info("DEPRECATED: PrinterConfiguration updated (use Printer/KitchenZone models instead)")
 
-    # Reload app settings to refresh printer config
-    from .config import app_settings
-    app_settings.reload()
+    # Rebuild the tenant's settings snapshot to refresh printer config
+    _invalidate_tenant_settings(instance.tenant_id)
 
     # Invalidate printer-related caches
     invalidate_cache_pattern('*global_settings*')
-    invalidate_cache_pattern('*get_cached_global_settings*')
 
 
 # WebOrderSettings signal handler REMOVED - model no longer exists
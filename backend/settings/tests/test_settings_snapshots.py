@@ -0,0 +1,150 @@
+"""
+Tenant Settings Snapshot Tests
+
+Tests that settings are served from immutable per-tenant snapshots, that a
+save made in one worker reaches the others through the shared version
+counter, and that tenants never see each other's values.
+
+Test Categories:
+1. Snapshot Reads (2 tests)
+2. Cross-Worker Versioning (4 tests)
+3. Tenant Isolation (2 tests)
+"""
+import pytest
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tenant.managers import set_current_tenant
+from settings.config import SettingsSnapshot, TenantSettingsStore, app_settings, tenant_settings
+from settings.models import GlobalSettings
+
+
+@pytest.fixture
+def snapshot_settings(settings):
+    settings.TENANT_SETTINGS = {'SNAPSHOT_CACHE_SIZE': 8, 'VERSION_CHECK_SECONDS': 0}
+    tenant_settings.clear()
+    yield settings.TENANT_SETTINGS
+    tenant_settings.clear()
+
+
+@pytest.fixture
+def settings_a(tenant_a, snapshot_settings):
+    set_current_tenant(tenant_a)
+    return GlobalSettings.objects.create(
+        tenant=tenant_a, brand_name='Pizza Place', currency='USD', surcharge_percentage=Decimal('0.03')
+    )
+
+
+@pytest.fixture
+def settings_b(tenant_b, snapshot_settings):
+    set_current_tenant(tenant_b)
+    return GlobalSettings.objects.create(
+        tenant=tenant_b, brand_name='Burger Barn', currency='CAD', surcharge_percentage=Decimal('0.00')
+    )
+
+
+# ============================================================================
+# SNAPSHOT READS TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestSnapshotReads:
+    """Test that reads come from an immutable in-process snapshot."""
+
+    def test_reads_after_first_load_are_query_free(self, tenant_a, settings_a, snapshot_settings):
+        snapshot_settings['VERSION_CHECK_SECONDS'] = 60
+        set_current_tenant(tenant_a)
+        assert app_settings.brand_name == 'Pizza Place'
+
+        with CaptureQueriesContext(connection) as ctx:
+            values = [app_settings.currency, app_settings.surcharge_percentage, app_settings.get_printer_config()]
+
+        assert len(ctx) == 0
+        assert values == ['USD', Decimal('0.03'), {'receipt_printers': [], 'kitchen_printers': [], 'kitchen_zones': []}]
+
+    def test_snapshot_is_immutable(self, tenant_a, settings_a):
+        set_current_tenant(tenant_a)
+        snapshot = app_settings.snapshot()
+
+        with pytest.raises(AttributeError):
+            snapshot.currency = 'EUR'
+        with pytest.raises(AttributeError):
+            snapshot.missing_setting
+        assert isinstance(snapshot, SettingsSnapshot) and snapshot.tenant_id == tenant_a.id
+
+
+# ============================================================================
+# CROSS-WORKER VERSIONING TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestCrossWorkerVersioning:
+    """Test that a save in one worker reaches snapshots held by others."""
+
+    def test_save_reaches_other_worker(self, tenant_a, settings_a):
+        other_worker = TenantSettingsStore()
+        assert other_worker.get(tenant_a).brand_name == 'Pizza Place'
+
+        settings_a.brand_name = 'Pizza Palace'
+        settings_a.save()  # signal bumps the shared version in this worker
+
+        assert other_worker.get(tenant_a).brand_name == 'Pizza Palace'
+
+    def test_version_checked_at_most_every_interval(self, tenant_a, settings_a, snapshot_settings):
+        snapshot_settings['VERSION_CHECK_SECONDS'] = 60
+        other_worker = TenantSettingsStore()
+        held = other_worker.get(tenant_a)
+
+        GlobalSettings.objects.filter(pk=settings_a.pk).update(brand_name='Pizza Palace')
+        tenant_settings.invalidate(tenant_a.id)
+
+        assert other_worker.get(tenant_a) is held
+        snapshot_settings['VERSION_CHECK_SECONDS'] = 0
+        assert other_worker.get(tenant_a).brand_name == 'Pizza Palace'
+
+    def test_save_bumps_version_again_on_commit(self, tenant_a, settings_a, django_capture_on_commit_callbacks):
+        before = tenant_settings.current_version(tenant_a.id)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            settings_a.save()
+
+        assert tenant_settings.current_version(tenant_a.id) == before + 2
+
+    def test_settings_served_while_cache_is_down(self, tenant_a, settings_a, cache_unavailable):
+        assert tenant_settings.get(tenant_a).brand_name == 'Pizza Place'
+
+        settings_a.brand_name = 'Pizza Palace'
+        settings_a.save()
+
+        assert tenant_settings.current_version(tenant_a.id) is None
+        assert tenant_settings.get(tenant_a).brand_name == 'Pizza Palace'
+
+
+# ============================================================================
+# TENANT ISOLATION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestTenantIsolation:
+    """Test that each tenant reads only its own snapshot."""
+
+    def test_tenants_read_their_own_values(self, tenant_a, tenant_b, settings_a, settings_b):
+        set_current_tenant(tenant_a)
+        assert (app_settings.brand_name, app_settings.currency) == ('Pizza Place', 'USD')
+
+        set_current_tenant(tenant_b)
+        assert (app_settings.brand_name, app_settings.currency) == ('Burger Barn', 'CAD')
+
+        set_current_tenant(tenant_a)
+        assert app_settings.brand_name == 'Pizza Place'
+
+    def test_least_recently_used_tenant_evicted(self, tenant_a, tenant_b, settings_a, settings_b, snapshot_settings):
+        snapshot_settings['SNAPSHOT_CACHE_SIZE'] = 1
+        store = TenantSettingsStore()
+
+        store.get(tenant_a)
+        store.get(tenant_b)
+
+        assert list(store._entries) == [tenant_b.id]
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TenantConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tenant'
+
+    def ready(self):
+        """
+        Import signals when the app is ready to ensure they are registered.
+        """
+        import tenant.signals
@@ -1,9 +1,11 @@
 from django.http import JsonResponse
 from django.conf import settings
 from .models import Tenant
+from .registry import tenant_registry
 from .managers import set_current_tenant
-import jwt
-from jwt.exceptions import InvalidTokenError
+from core_backend.auth.context import get_access_token, get_auth_context
+from core_backend.infrastructure import routes
+from core_backend.infrastructure.routes import get_route_flags
 
 
 class TenantNotFoundError(Exception):
@@ -44,26 +46,10 @@ class TenantMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
-        # Skip tenant resolution for Django admin URLs
-        # Admin operates without tenant context (staff can manage multiple tenants)
-        if request.path.startswith('/admin/'):
-            request.tenant = None
-            set_current_tenant(None)
-            response = self.get_response(request)
-            return response
-
-        # Skip tenant resolution for authentication and security endpoints
-        # These endpoints must work without tenant context
-        exempt_paths = [
-            '/api/users/login/pos/',                          # POS login
-            '/api/users/login/admin/',                        # Admin login
-            '/api/users/login/web/',                          # Web/customer login
-            '/api/security/csrf/',                            # CSRF token issuance
-            '/api/terminals/pairing/device-authorization/',   # Device/terminal registration
-            '/api/terminals/pairing/token/',                  # Device/terminal token polling (RFC 8628)
-            '/api/payments/webhooks/',                        # Payment provider webhooks (Stripe, etc.)
-        ]
-        if any(request.path.startswith(path) for path in exempt_paths):
+        # Skip tenant resolution for Django admin URLs and for the authentication
+        # and security endpoints, which must work without tenant context
+        # (Admin operates without tenant context - staff can manage multiple tenants)
+        if get_route_flags(request) & routes.TENANT_EXEMPT:
             request.tenant = None
             set_current_tenant(None)
             response = self.get_response(request)
@@ -114,7 +100,7 @@ class TenantMiddleware:
             tenant_slug = request.GET.get('tenant')
             if tenant_slug:
                 try:
-                    return Tenant.objects.get(slug=tenant_slug)
+                    return tenant_registry.get(slug=tenant_slug)
                 except Tenant.DoesNotExist:
                     pass
 
@@ -138,7 +124,7 @@ class TenantMiddleware:
                 tenant_slug = path_parts[0]
                 try:
                     # Don't filter by is_active - let line 60 check handle it
-                    tenant = Tenant.objects.get(slug=tenant_slug)
+                    tenant = tenant_registry.get(slug=tenant_slug)
                     # Store in session for subsequent requests
                     request.session['tenant_id'] = str(tenant.id)
                     return tenant
@@ -157,7 +143,7 @@ class TenantMiddleware:
         if subdomain == 'manage':
             try:
                 # Don't filter by is_active - let line 60 check handle it
-                return Tenant.objects.get(slug=settings.SYSTEM_TENANT_SLUG)
+                return tenant_registry.get(slug=settings.SYSTEM_TENANT_SLUG)
             except Tenant.DoesNotExist:
                 raise TenantNotFoundError(
                     f"System tenant '{settings.SYSTEM_TENANT_SLUG}' not found. "
@@ -169,7 +155,7 @@ class TenantMiddleware:
         tenant_header = request.META.get('HTTP_X_TENANT')
         if tenant_header:
             try:
-                tenant = Tenant.objects.get(slug=tenant_header)
+                tenant = tenant_registry.get(slug=tenant_header)
                 # Store in session for subsequent requests
                 request.session['tenant_id'] = str(tenant.id)
                 return tenant
@@ -205,7 +191,7 @@ class TenantMiddleware:
         if subdomain and subdomain not in ['www', 'api']:
             try:
                 # Don't filter by is_active - let line 60 check handle it
-                tenant = Tenant.objects.get(slug=subdomain)
+                tenant = tenant_registry.get(slug=subdomain)
                 # Store in session for subsequent guest requests
                 request.session['tenant_id'] = str(tenant.id)
                 return tenant
@@ -220,7 +206,7 @@ class TenantMiddleware:
         if tenant_id:
             try:
                 # Don't filter by is_active - let line 60 check handle it
-                return Tenant.objects.get(id=tenant_id)
+                return tenant_registry.get(id=tenant_id)
             except Tenant.DoesNotExist:
                 pass
 
@@ -230,7 +216,7 @@ class TenantMiddleware:
         if tenant_slug:
             try:
                 # Don't filter by is_active - let line 60 check handle it
-                return Tenant.objects.get(slug=tenant_slug)
+                return tenant_registry.get(slug=tenant_slug)
             except Tenant.DoesNotExist:
                 # Fallback tenant doesn't exist yet - common during initial setup
                 raise TenantNotFoundError(
@@ -290,63 +276,52 @@ class TenantMiddleware:
             Tenant instance if JWT contains valid tenant_id, None otherwise
 
         Note:
-            This is a lightweight decode for tenant extraction only.
-            Full JWT validation happens later in DRF authentication.
+            The token is decoded once per request into an AuthContext that
+            CookieJWTAuthentication reuses for verification and the user.
+            Tenant extraction reads its claims even if verification fails;
+            DRF authentication still rejects such tokens.
         """
-        # Try to get JWT from cookies (check both admin and POS cookie names)
-        admin_cookie_name = getattr(settings, 'SIMPLE_JWT_ADMIN', {}).get('AUTH_COOKIE')
-        access_token = None
-
-        if admin_cookie_name:
-            access_token = request.COOKIES.get(admin_cookie_name)
-        if not access_token:
-            access_token = request.COOKIES.get(settings.SIMPLE_JWT.get("AUTH_COOKIE"))
-
-        if not access_token:
+        context = get_auth_context(request, get_access_token(request.COOKIES))
+        if context is None:
             return None
 
-        try:
-            # Decode JWT without verification (we just need tenant_id for context)
-            # Full verification happens in DRF CookieJWTAuthentication
-            # options={'verify_signature': False} is safe here because:
-            # 1. We only use this for tenant lookup, not authorization
-            # 2. DRF will do full signature verification later
-            # 3. Invalid tenant_id will just fail to find tenant (graceful fallback)
-            payload = jwt.decode(
-                access_token,
-                options={'verify_signature': False, 'verify_exp': False}
-            )
-
-            tenant_id = payload.get('tenant_id')
-            if not tenant_id:
-                # JWT exists but missing tenant_id claim - this is invalid for multi-tenant system
-                # Do not fall back (fail explicitly to prevent security issues)
-                raise TenantNotFoundError(
-                    "JWT missing tenant_id claim. Token format is invalid."
-                )
-
-            # Look up tenant by ID from JWT claims
-            # NOTE: Don't filter by is_active here - let the middleware check on line 60 handle it
-            # This ensures inactive tenants get proper 403 error instead of falling back
-            try:
-                return Tenant.objects.get(id=tenant_id)
-            except Tenant.DoesNotExist:
-                # JWT has tenant claim but tenant doesn't exist - this is a critical error
-                # Do not fall back to other methods (fail explicitly)
-                raise TenantNotFoundError(
-                    f"JWT tenant_id '{tenant_id}' not found. Token may be stale."
-                )
-
-        except (InvalidTokenError, KeyError, ValueError):
+        # Claims are the verified payload for valid tokens, otherwise an
+        # unverified decode. Using unverified claims is safe here because:
+        # 1. We only use this for tenant lookup, not authorization
+        # 2. DRF rejects the token later if verification failed
+        # 3. Invalid tenant_id will just fail to find tenant (graceful fallback)
+        payload = context.claims
+        if payload is None:
             # Invalid JWT format or other decode errors
             # Fall through to other tenant resolution methods
             return None
 
+        tenant_id = payload.get('tenant_id')
+        if not tenant_id:
+            # JWT exists but missing tenant_id claim - this is invalid for multi-tenant system
+            # Do not fall back (fail explicitly to prevent security issues)
+            raise TenantNotFoundError(
+                "JWT missing tenant_id claim. Token format is invalid."
+            )
+
+        # Look up tenant by ID from JWT claims
+        # NOTE: Don't filter by is_active here - let the middleware check on line 60 handle it
+        # This ensures inactive tenants get proper 403 error instead of falling back
+        try:
+            context.tenant = tenant_registry.get(id=tenant_id)
+        except Tenant.DoesNotExist:
+            # JWT has tenant claim but tenant doesn't exist - this is a critical error
+            # Do not fall back to other methods (fail explicitly)
+            raise TenantNotFoundError(
+                f"JWT tenant_id '{tenant_id}' not found. Token may be stale."
+            )
+        return context.tenant
+
     def get_tenant_from_custom_domain(self, host):
         """
         Resolve tenant by custom domain.
 
-        Phase 1: Proper relational model with O(1) indexed lookup
+        Phase 1: Proper relational model, resolved from the in-process tenant registry
         Phase 3: Add automated verification and SSL provisioning
 
         Args:
@@ -359,21 +334,10 @@ class TenantMiddleware:
             order.joespizza.com → Tenant "joespizza"
             shop.mariascafe.com → Tenant "mariascafe"
         """
+        # Served from the in-process registry, which only indexes verified
+        # domains; get_by_domain() skips inactive tenants
         try:
-            from tenant.models import CustomDomain
-
-            # Fast O(1) lookup with database index
-            # Only match verified domains for security
-            domain = CustomDomain.objects.select_related('tenant').get(
-                domain=host,
-                verified=True,
-                tenant__is_active=True
-            )
-            return domain.tenant
-
-        except CustomDomain.DoesNotExist:
-            # No custom domain found for this host
-            return None
+            return tenant_registry.get_by_domain(host)
         except Exception:
             # Error resolving custom domain, but don't break request flow
             return None
@@ -0,0 +1,151 @@
+"""
+In-process tenant registry.
+
+The tenant table is small and rarely changes, so each process keeps all
+tenants and their verified custom domains in memory, indexed by id, slug and
+domain. TenantMiddleware and TenantWebSocketMiddleware resolve tenants from
+here instead of querying for every request/connection.
+
+The index is reloaded after TENANT_REGISTRY['TTL_SECONDS'], or sooner when the
+registry's cache generation (AdvancedCacheManager) moves. Saving or deleting a
+Tenant or CustomDomain bumps it (see tenant.signals), and each worker compares
+it at most every TENANT_REGISTRY['VERSION_CHECK_SECONDS']. While the cache is
+unreachable the loaded index keeps being served until its TTL, so tenant
+resolution only needs the database.
+"""
+import copy
+import threading
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from core_backend.infrastructure.cache import AdvancedCacheManager
+
+from .models import CustomDomain, Tenant
+
+GENERATION_FAMILY = "tenant_registry"
+
+
+class _TenantIndex:
+    """One load of the tenant table, indexed for lookup."""
+
+    __slots__ = ("version", "loaded_at", "by_id", "by_slug", "by_domain")
+
+    def __init__(self, version: Optional[int], loaded_at: float):
+        self.version = version
+        self.loaded_at = loaded_at
+        self.by_id: Dict[str, Tenant] = {}
+        self.by_slug: Dict[str, Tenant] = {}
+        self.by_domain: Dict[str, Tenant] = {}
+
+
+class TenantRegistry:
+    """
+    Per-process index of all tenants by id, slug and verified custom domain.
+
+    Lookups return a copy of the cached instance, so callers can attach
+    state to (or save) the tenant they get without affecting other requests.
+    """
+
+    def __init__(self):
+        self._index: Optional[_TenantIndex] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current_version() -> Optional[int]:
+        """Registry generation, or None when the cache is unavailable"""
+        return AdvancedCacheManager.get_generation(GENERATION_FAMILY, "none")
+
+    def get(self, id=None, slug=None) -> Tenant:
+        """
+        Return the tenant with the given id or slug.
+
+        Raises Tenant.DoesNotExist like Tenant.objects.get(), so resolution
+        code can switch over without changing its error handling. Inactive
+        tenants are returned; callers decide how to treat them.
+        """
+        if id is not None:
+            tenant = self._lookup("by_id", str(id))
+        elif slug is not None:
+            tenant = self._lookup("by_slug", slug)
+        else:
+            raise TypeError("TenantRegistry.get() requires id or slug")
+
+        if tenant is None:
+            raise Tenant.DoesNotExist(
+                f"Tenant matching {'id' if id is not None else 'slug'}="
+                f"{id if id is not None else slug!r} does not exist."
+            )
+        return tenant
+
+    def get_by_domain(self, domain: str) -> Optional[Tenant]:
+        """Return the active tenant owning verified custom domain, or None."""
+        tenant = self._lookup("by_domain", domain)
+        if tenant is None or not tenant.is_active:
+            return None
+        return tenant
+
+    def invalidate(self) -> None:
+        """Bump the registry version so every worker reloads its index"""
+        AdvancedCacheManager.bump_generation(GENERATION_FAMILY, "none")
+        with self._lock:
+            self._index = None
+
+    def clear(self) -> None:
+        """Drop this process's index (the version in the shared cache is kept)"""
+        with self._lock:
+            self._index = None
+            self._checked_at = 0.0
+
+    def _lookup(self, index_name: str, key) -> Optional[Tenant]:
+        tenant = getattr(self._current(), index_name).get(key)
+        if tenant is None:
+            # A tenant or domain created in another worker may not have reached
+            # this one yet - check the version before reporting a miss
+            tenant = getattr(self._current(force_check=True), index_name).get(key)
+        return copy.copy(tenant) if tenant is not None else None
+
+    def _current(self, force_check: bool = False) -> _TenantIndex:
+        config = settings.TENANT_REGISTRY
+        now = time.monotonic()
+        index = self._index
+
+        if index is not None and now - index.loaded_at < config["TTL_SECONDS"]:
+            if not force_check and now - self._checked_at < config["VERSION_CHECK_SECONDS"]:
+                return index
+            version = self.current_version()
+            self._checked_at = now
+            if version is not None and version == index.version:
+                return index
+            if version is None and not force_check:
+                # Cache unreachable: keep serving the loaded index until its TTL
+                # (a miss still reloads, so new tenants resolve from the database)
+                return index
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            if self._index is not None and self._index is not index:
+                return self._index
+            self._index = self._load()
+            self._checked_at = time.monotonic()
+            return self._index
+
+    def _load(self) -> _TenantIndex:
+        index = _TenantIndex(self.current_version(), time.monotonic())
+
+        for tenant in Tenant.objects.all():
+            index.by_id[str(tenant.id)] = tenant
+            index.by_slug[tenant.slug] = tenant
+
+        domains = CustomDomain.objects.filter(verified=True).values_list("domain", "tenant_id")
+        for domain, tenant_id in domains:
+            tenant = index.by_id.get(str(tenant_id))
+            if tenant is not None:
+                index.by_domain[domain] = tenant
+
+        return index
+
+
+tenant_registry = TenantRegistry()
@@ -0,0 +1,19 @@
+"""
+Signal handlers for the tenant app.
+Keeps the in-process tenant registry in step with Tenant and CustomDomain changes.
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core_backend.infrastructure.cache import invalidate_now_and_on_commit
+
+from .models import Tenant, CustomDomain
+from .registry import tenant_registry
+
+
+@receiver([post_save, post_delete], sender=Tenant)
+@receiver([post_save, post_delete], sender=CustomDomain)
+def invalidate_tenant_registry(sender, instance, **kwargs):
+    """Reload every worker's tenant registry"""
+    invalidate_now_and_on_commit(tenant_registry.invalidate)
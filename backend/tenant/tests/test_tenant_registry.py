@@ -0,0 +1,181 @@
+"""
+Tenant Registry Tests
+
+Tests that tenant resolution is served from the in-process registry, that
+Tenant and CustomDomain changes reach it through the version counter, and
+that resolution behaves as it did when each lookup hit the database.
+
+Test Categories:
+1. Registry Lookups (4 tests)
+2. Invalidation (3 tests)
+3. Cache Outage (2 tests)
+4. Middleware Resolution (3 tests)
+"""
+import pytest
+
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from core_backend.infrastructure.cache import AdvancedCacheManager
+from tenant.middleware import TenantMiddleware
+from tenant.models import CustomDomain, Tenant
+from tenant.registry import TenantRegistry, tenant_registry
+
+
+@pytest.fixture
+def registry_settings(settings):
+    settings.TENANT_REGISTRY = {'TTL_SECONDS': 300, 'VERSION_CHECK_SECONDS': 60}
+    tenant_registry.clear()
+    yield settings.TENANT_REGISTRY
+    tenant_registry.clear()
+
+
+# ============================================================================
+# REGISTRY LOOKUPS TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestRegistryLookups:
+    """Test lookups by id, slug and custom domain."""
+
+    def test_lookups_after_first_load_are_query_free(self, tenant_a, tenant_b, registry_settings):
+        assert tenant_registry.get(slug='pizza-place').id == tenant_a.id
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert tenant_registry.get(id=str(tenant_b.id)).slug == tenant_b.slug
+            assert tenant_registry.get(id=tenant_a.id).slug == 'pizza-place'
+            assert tenant_registry.get(slug=tenant_b.slug).id == tenant_b.id
+
+        assert len(ctx.captured_queries) == 0
+
+    def test_unknown_tenant_raises_does_not_exist(self, tenant_a, registry_settings):
+        with pytest.raises(Tenant.DoesNotExist):
+            tenant_registry.get(slug='no-such-tenant')
+        with pytest.raises(Tenant.DoesNotExist):
+            tenant_registry.get(id='not-a-uuid')
+
+    def test_returns_copies_of_cached_instances(self, tenant_a, registry_settings):
+        first = tenant_registry.get(slug='pizza-place')
+        first.name = 'Changed In Request'
+
+        assert tenant_registry.get(slug='pizza-place').name == 'Pizza Place'
+
+    def test_domain_lookup_only_matches_verified_domains_of_active_tenants(
+        self, tenant_a, tenant_b, registry_settings
+    ):
+        CustomDomain.objects.create(tenant=tenant_a, domain='order.pizza.com', verified=True)
+        CustomDomain.objects.create(tenant=tenant_a, domain='pending.pizza.com', verified=False)
+        tenant_b.is_active = False
+        tenant_b.save()
+        CustomDomain.objects.create(tenant=tenant_b, domain='order.burger.com', verified=True)
+
+        assert tenant_registry.get_by_domain('order.pizza.com').id == tenant_a.id
+        assert tenant_registry.get_by_domain('pending.pizza.com') is None
+        assert tenant_registry.get_by_domain('order.burger.com') is None
+
+
+# ============================================================================
+# INVALIDATION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestInvalidation:
+    """Test that saves reach every worker's registry."""
+
+    def test_tenant_save_is_visible_immediately(self, tenant_a, registry_settings):
+        assert tenant_registry.get(slug='pizza-place').is_active is True
+
+        tenant_a.is_active = False
+        tenant_a.save()
+
+        assert tenant_registry.get(slug='pizza-place').is_active is False
+
+    def test_other_worker_reloads_when_version_moves(self, tenant_a, registry_settings):
+        registry_settings['VERSION_CHECK_SECONDS'] = 0
+        other_worker = TenantRegistry()
+        assert other_worker.get(slug='pizza-place').name == 'Pizza Place'
+
+        # Save through the queryset (no signal) and bump the version by hand,
+        # as the signal in another process would
+        Tenant.objects.filter(pk=tenant_a.pk).update(name='Renamed Pizza')
+        tenant_registry.invalidate()
+
+        assert other_worker.get(slug='pizza-place').name == 'Renamed Pizza'
+
+    def test_miss_rechecks_version_for_tenants_created_elsewhere(self, tenant_a, registry_settings):
+        other_worker = TenantRegistry()
+        other_worker.get(slug='pizza-place')
+
+        created = Tenant.objects.create(name='New Place', slug='new-place', is_active=True)
+
+        assert other_worker.get(slug='new-place').id == created.id
+
+
+# ============================================================================
+# CACHE OUTAGE TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestCacheOutage:
+    """Test that tenant resolution only needs the database while the cache is down."""
+
+    def test_cold_registry_loads_from_database(self, tenant_a, registry_settings, cache_unavailable):
+        registry = TenantRegistry()
+
+        assert registry.get(slug='pizza-place').id == tenant_a.id
+
+        tenant_a.name = 'Saved During Outage'
+        tenant_a.save()
+        assert tenant_registry.get(slug='pizza-place').name == 'Saved During Outage'
+
+    def test_warm_registry_keeps_serving_its_index(self, tenant_a, registry_settings, monkeypatch):
+        registry_settings['VERSION_CHECK_SECONDS'] = 0
+        tenant_registry.get(slug='pizza-place')
+        monkeypatch.setattr(AdvancedCacheManager, '_circuit_breaker_state', {})
+        monkeypatch.setattr(AdvancedCacheManager, 'get_generation', classmethod(lambda cls, *args: None))
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert tenant_registry.get(slug='pizza-place').id == tenant_a.id
+
+        assert len(ctx.captured_queries) == 0
+
+
+# ============================================================================
+# MIDDLEWARE RESOLUTION TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestMiddlewareResolution:
+    """Test that TenantMiddleware resolves through the registry."""
+
+    def _request(self, host, **extra):
+        request = RequestFactory().get('/api/products/', HTTP_HOST=host, **extra)
+        request.session = {}
+        request.user = type('Anonymous', (), {'is_authenticated': False, 'is_superuser': False})()
+        return request
+
+    def test_subdomain_resolution_is_query_free_when_warm(self, tenant_a, registry_settings):
+        middleware = TenantMiddleware(lambda request: None)
+        middleware.get_tenant_from_request(self._request('pizza-place.ajeen.com'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            tenant = middleware.get_tenant_from_request(self._request('pizza-place.ajeen.com'))
+
+        assert tenant.id == tenant_a.id
+        assert len(ctx.captured_queries) == 0
+
+    def test_x_tenant_header_resolution(self, tenant_a, tenant_b, registry_settings):
+        middleware = TenantMiddleware(lambda request: None)
+        request = self._request('api.ajeen.com', HTTP_X_TENANT=tenant_b.slug)
+
+        assert middleware.get_tenant_from_request(request).id == tenant_b.id
+        assert request.session['tenant_id'] == str(tenant_b.id)
+
+    def test_custom_domain_resolution(self, tenant_a, registry_settings):
+        CustomDomain.objects.create(tenant=tenant_a, domain='order.pizza.com', verified=True)
+        middleware = TenantMiddleware(lambda request: None)
+
+        tenant = middleware.get_tenant_from_request(self._request('order.pizza.com'))
+
+        assert tenant.id == tenant_a.id
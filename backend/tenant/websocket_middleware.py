@@ -4,10 +4,9 @@ WebSocket Tenant Middleware for Django Channels.
 Resolves tenant from JWT cookie and adds to WebSocket scope.
 This allows consumers to access request.tenant just like HTTP views.
 """
-import jwt
 from channels.db import database_sync_to_async
-from django.conf import settings
-from .models import Tenant
+from core_backend.auth.context import get_access_token, get_auth_context, get_scope_cookies
+from .registry import tenant_registry
 from .managers import set_current_tenant
 
 
@@ -51,51 +50,31 @@ class TenantWebSocketMiddleware:
         Extract tenant from JWT token in cookies.
 
         WebSocket connections include cookies in the 'headers' scope key.
-        We parse cookies, find JWT, decode it, and lookup tenant.
+        We parse cookies, find JWT, decode it into the connection's
+        AuthContext, and lookup tenant.
         """
-        # Parse cookies from headers
-        headers = dict(scope.get('headers', []))
-        cookie_header = headers.get(b'cookie', b'').decode('utf-8')
-
-        if not cookie_header:
-            return None
-
-        # Parse cookie string into dict
-        cookies = {}
-        for cookie in cookie_header.split('; '):
-            if '=' in cookie:
-                key, value = cookie.split('=', 1)
-                cookies[key] = value
-
-        # Try to get JWT from cookies (check both admin and POS cookie names)
-        admin_cookie_name = getattr(settings, 'SIMPLE_JWT_ADMIN', {}).get('AUTH_COOKIE')
-        access_token = None
-
-        if admin_cookie_name:
-            access_token = cookies.get(admin_cookie_name)
-        if not access_token:
-            access_token = cookies.get(settings.SIMPLE_JWT.get("AUTH_COOKIE"))
-
-        if not access_token:
+        access_token = get_access_token(get_scope_cookies(scope))
+        context = get_auth_context(scope, access_token)
+        if context is None:
             return None
 
         try:
-            # Decode JWT without verification (tenant lookup only)
-            # Full verification happens in the consumer if needed
-            payload = jwt.decode(
-                access_token,
-                options={'verify_signature': False, 'verify_exp': False}
-            )
+            # Claims are decoded once per connection and shared with
+            # JWTAuthMiddleware, which verifies the token for the user
+            payload = context.claims
+            if payload is None:
+                return None
 
             tenant_id = payload.get('tenant_id')
             if not tenant_id:
                 return None
 
-            # Look up tenant by ID from JWT claims (async database query)
-            tenant = await database_sync_to_async(Tenant.objects.get)(
-                id=tenant_id,
-                is_active=True
-            )
+            # Look up tenant by ID from JWT claims in the tenant registry
+            # (only touches the database when the registry reloads)
+            tenant = await database_sync_to_async(tenant_registry.get)(id=tenant_id)
+            if not tenant.is_active:
+                return None
+            context.tenant = tenant
             return tenant
 
         except Exception:
@@ -2,23 +2,23 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
+from core_backend.auth.context import get_access_token, get_auth_context, load_user
+
 User = get_user_model()
 
 
 class CookieJWTAuthentication(JWTAuthentication):
     def authenticate(self, request):
         # Try admin-specific cookie name first, then base name
-        admin_name = getattr(settings, 'SIMPLE_JWT_ADMIN', {}).get('AUTH_COOKIE')
-        access_token = None
-        if admin_name:
-            access_token = request.COOKIES.get(admin_name)
-        if not access_token:
-            access_token = request.COOKIES.get(settings.SIMPLE_JWT["AUTH_COOKIE"])  # POS/base
+        access_token = get_access_token(request.COOKIES)
         if not access_token:
             return None
 
-        validated_token = self.get_validated_token(access_token)
-        return self.get_user(validated_token), validated_token
+        # TenantMiddleware has usually decoded this token already; reuse its
+        # verification result and load the user at most once per request
+        context = get_auth_context(request, access_token)
+        validated_token = context.validated_token
+        return context.get_user(), validated_token
 
     def get_user(self, validated_token):
         """
@@ -39,6 +39,9 @@ class CookieJWTAuthentication(JWTAuthentication):
 
         The JWT for Jimmy's Pizza contains user_id=24, which ALWAYS loads the
         Jimmy's Pizza user record, never Maria's Cafe.
+
+        authenticate() goes through the request's AuthContext instead; this
+        remains for callers holding a validated token without a request.
         """
         try:
             user_id = validated_token[settings.SIMPLE_JWT.get('USER_ID_CLAIM', 'user_id')]
@@ -46,11 +49,10 @@ class CookieJWTAuthentication(JWTAuthentication):
             from rest_framework_simplejwt.exceptions import InvalidToken
             raise InvalidToken('Token contained no recognizable user identification')
 
-        try:
-            # Use all_objects to bypass tenant filtering during authentication
-            # IMPORTANT: select_related('tenant') to eagerly load tenant for middleware
-            user = User.all_objects.select_related('tenant').get(**{settings.SIMPLE_JWT.get('USER_ID_FIELD', 'id'): user_id})
-        except User.DoesNotExist:
+        # Use all_objects to bypass tenant filtering during authentication
+        # IMPORTANT: select_related('tenant') to eagerly load tenant for middleware
+        user = load_user(user_id)
+        if user is None:
             from rest_framework_simplejwt.exceptions import AuthenticationFailed
             raise AuthenticationFailed('User not found', code='user_not_found')
 
@@ -1,6 +1,9 @@
+from django.conf import settings
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from .models import User
+from core_backend.auth.context import bump_token_version
+from core_backend.infrastructure.cache import invalidate_now_and_on_commit
 from core_backend.infrastructure.cache_utils import invalidate_cache_pattern
 import logging
 
@@ -20,4 +23,13 @@ def handle_user_changes(sender, instance=None, **kwargs):
         logger.info(f"Invalidated user caches after change to user: {instance.username if instance else 'unknown'}")
         
     except Exception as e:
-        logger.error(f"Failed to invalidate user caches: {e}")
\ No newline at end of file
+        logger.error(f"Failed to invalidate user caches: {e}")
+
+
+@receiver([post_save, post_delete], sender=User)
+def retire_cached_auth_user(sender, instance, **kwargs):
+    """Bump the user's token version so authentication stops serving a cached copy"""
+    if not settings.AUTH_CONTEXT['USER_CACHE_ENABLED']:
+        # Nothing is cached - don't touch the cache on every save (e.g. last_login)
+        return
+    invalidate_now_and_on_commit(bump_token_version, instance.pk)
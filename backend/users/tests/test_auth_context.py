@@ -0,0 +1,139 @@
+"""
+Auth Context Tests
+
+These tests verify that an access token is verified once per request and
+shared by TenantMiddleware and CookieJWTAuthentication, and that the optional
+user cache is keyed by token version.
+
+Test Categories:
+1. Decode Once (3 tests)
+2. User Cache (5 tests)
+"""
+import pytest
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core_backend.auth.context import get_auth_context, load_user
+from tenant.middleware import TenantMiddleware
+from tenant.registry import tenant_registry
+from users.authentication import CookieJWTAuthentication
+from users.services import UserService
+
+
+def _request_with_token(access_token):
+    request = RequestFactory().get('/api/products/')
+    request.COOKIES[settings.SIMPLE_JWT['AUTH_COOKIE']] = access_token
+    request.session = {}
+    request.user = type('Anonymous', (), {'is_authenticated': False, 'is_superuser': False})()
+    return request
+
+
+@pytest.fixture
+def user_cache(settings):
+    settings.AUTH_CONTEXT = {'USER_CACHE_ENABLED': True, 'USER_CACHE_TTL_SECONDS': 30}
+    yield settings.AUTH_CONTEXT
+
+
+# ============================================================================
+# DECODE ONCE TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestDecodeOnce:
+    """Test that middleware and DRF authentication share one verification."""
+
+    def test_token_verified_once_per_request(self, tenant_a, admin_user_tenant_a):
+        access_token = UserService.generate_tokens_for_user(admin_user_tenant_a)['access']
+        request = _request_with_token(access_token)
+
+        with mock.patch.object(
+            JWTAuthentication, 'get_validated_token', autospec=True,
+            side_effect=JWTAuthentication.get_validated_token,
+        ) as verify:
+            tenant = TenantMiddleware(lambda r: None).get_tenant_from_request(request)
+            user, validated_token = CookieJWTAuthentication().authenticate(request)
+
+        assert verify.call_count == 1
+        assert tenant.id == tenant_a.id
+        assert user.id == admin_user_tenant_a.id
+        assert validated_token['tenant_id'] == str(tenant_a.id)
+
+    def test_user_reuses_tenant_resolved_by_middleware(self, tenant_a, admin_user_tenant_a):
+        access_token = UserService.generate_tokens_for_user(admin_user_tenant_a)['access']
+        request = _request_with_token(access_token)
+
+        tenant = TenantMiddleware(lambda r: None).get_tenant_from_request(request)
+        user, _ = CookieJWTAuthentication().authenticate(request)
+
+        assert user.tenant is tenant
+
+    def test_expired_token_still_resolves_tenant_but_fails_authentication(
+        self, tenant_a, admin_user_tenant_a
+    ):
+        access_token = RefreshToken.for_user(admin_user_tenant_a).access_token
+        access_token['tenant_id'] = str(tenant_a.id)
+        access_token.set_exp(lifetime=timedelta(seconds=-10))
+        request = _request_with_token(str(access_token))
+
+        tenant = TenantMiddleware(lambda r: None).get_tenant_from_request(request)
+
+        assert tenant.id == tenant_a.id
+        assert get_auth_context(request, str(access_token)).is_valid is False
+        with pytest.raises(InvalidToken):
+            CookieJWTAuthentication().authenticate(request)
+
+
+# ============================================================================
+# USER CACHE TESTS
+# ============================================================================
+
+@pytest.mark.django_db
+class TestUserCache:
+    """Test the optional (user_id, token_version) user cache."""
+
+    def test_cached_user_load_is_query_free(self, tenant_a, admin_user_tenant_a, user_cache):
+        tenant_registry.get(id=tenant_a.id)
+        load_user(admin_user_tenant_a.id)
+
+        with CaptureQueriesContext(connection) as ctx:
+            user = load_user(admin_user_tenant_a.id)
+
+        assert user.id == admin_user_tenant_a.id
+        assert user.tenant.id == tenant_a.id
+        assert len(ctx.captured_queries) == 0
+
+    def test_user_save_retires_cached_copy(self, admin_user_tenant_a, user_cache):
+        load_user(admin_user_tenant_a.id)
+
+        admin_user_tenant_a.is_active = False
+        admin_user_tenant_a.save()
+
+        assert load_user(admin_user_tenant_a.id).is_active is False
+
+    def test_cache_disabled_by_default(self, admin_user_tenant_a):
+        load_user(admin_user_tenant_a.id)
+
+        with CaptureQueriesContext(connection) as ctx:
+            load_user(admin_user_tenant_a.id)
+
+        assert len(ctx.captured_queries) == 1
+
+    def test_user_save_skips_cache_when_disabled(self, admin_user_tenant_a):
+        with mock.patch('users.signals.bump_token_version') as bump:
+            admin_user_tenant_a.save(update_fields=['last_login'])
+
+        bump.assert_not_called()
+
+    def test_users_load_and_save_while_cache_is_down(self, admin_user_tenant_a, user_cache, cache_unavailable):
+        admin_user_tenant_a.first_name = 'Saved'
+        admin_user_tenant_a.save()
+
+        assert load_user(admin_user_tenant_a.id).first_name == 'Saved'